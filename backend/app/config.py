@@ -239,6 +239,24 @@ class Config:
             256 * 1024,
             int(os.getenv("VISION_QUEUE_MAX_IMAGE_BYTES", str(5 * 1024 * 1024))),
         )
+        # Vision jobs drained per worker read and annotated in one batch request
+        VISION_BATCH_SIZE = max(1, min(16, int(os.getenv("VISION_BATCH_SIZE", "8"))))
+        # Jobs (Vision: batches) a worker runs at once per stream, and the SIGTERM drain budget
+        QUEUE_STREAM_CONCURRENCY = max(1, min(64, int(os.getenv("QUEUE_STREAM_CONCURRENCY", "4"))))
+        QUEUE_DRAIN_TIMEOUT_SECONDS = max(1, int(os.getenv("QUEUE_DRAIN_TIMEOUT_SECONDS", "30")))
+        # How often each worker publishes its queue counters and latency histograms
+        QUEUE_METRICS_INTERVAL_SECONDS = max(5, int(os.getenv("QUEUE_METRICS_INTERVAL_SECONDS", "15")))
+        # Worker supervisor: process range, scaling check interval and queue backlog per process
+        QUEUE_WORKER_PROCESSES_MIN = max(1, min(32, int(os.getenv("QUEUE_WORKER_PROCESSES_MIN", "1"))))
+        QUEUE_WORKER_PROCESSES_MAX = max(
+            QUEUE_WORKER_PROCESSES_MIN, min(32, int(os.getenv("QUEUE_WORKER_PROCESSES_MAX", "4")))
+        )
+        QUEUE_SCALE_INTERVAL_SECONDS = max(5, int(os.getenv("QUEUE_SCALE_INTERVAL_SECONDS", "15")))
+        QUEUE_SCALE_BACKLOG_PER_PROCESS = max(1, int(os.getenv("QUEUE_SCALE_BACKLOG_PER_PROCESS", "50")))
+        # Reads led by a priority lane (Pro users' Vision jobs) for each one led by the base lane
+        QUEUE_PRIORITY_WEIGHT = max(1, min(100, int(os.getenv("QUEUE_PRIORITY_WEIGHT", "4"))))
+        # How often workers move due delayed retries back into their streams
+        QUEUE_RETRY_POLL_INTERVAL_SECONDS = max(1, int(os.getenv("QUEUE_RETRY_POLL_INTERVAL_SECONDS", "1")))
     except ValueError:
         logger.warning("Invalid queue configuration; using safe defaults")
         QUEUE_MAX_ATTEMPTS = 5
@@ -246,6 +264,27 @@ class Config:
         QUEUE_RESULT_TTL_SECONDS = 1800
         QUEUE_STREAM_MAXLEN = 10000
         VISION_QUEUE_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+        VISION_BATCH_SIZE = 8
+        QUEUE_STREAM_CONCURRENCY = 4
+        QUEUE_DRAIN_TIMEOUT_SECONDS = 30
+        QUEUE_METRICS_INTERVAL_SECONDS = 15
+        QUEUE_WORKER_PROCESSES_MIN = 1
+        QUEUE_WORKER_PROCESSES_MAX = 4
+        QUEUE_SCALE_INTERVAL_SECONDS = 15
+        QUEUE_SCALE_BACKLOG_PER_PROCESS = 50
+        QUEUE_PRIORITY_WEIGHT = 4
+        QUEUE_RETRY_POLL_INTERVAL_SECONDS = 1
+
+    # Trending feed: the queue worker refreshes precomputed hot scores in batches.
+    try:
+        TRENDING_REFRESH_INTERVAL_SECONDS = max(60, int(os.getenv("TRENDING_REFRESH_INTERVAL_SECONDS", "600")))
+        TRENDING_REFRESH_BATCH_SIZE = max(50, min(5000, int(os.getenv("TRENDING_REFRESH_BATCH_SIZE", "500"))))
+        TRENDING_WINDOW_DAYS = max(1, int(os.getenv("TRENDING_WINDOW_DAYS", "14")))
+    except ValueError:
+        logger.warning("Invalid trending configuration; using safe defaults")
+        TRENDING_REFRESH_INTERVAL_SECONDS = 600
+        TRENDING_REFRESH_BATCH_SIZE = 500
+        TRENDING_WINDOW_DAYS = 14
 
     # App URLs
     # App URLs
@@ -268,6 +307,76 @@ class Config:
     # ==========================================
     UPLOAD_MAX_SIZE_MB = int(os.getenv("UPLOAD_MAX_SIZE_MB", "10"))
     UPLOAD_MAX_DIMENSION = int(os.getenv("UPLOAD_MAX_DIMENSION", "1920"))
+    # Image decode/resize/encode runs in a dedicated process pool so uploads do not
+    # hold the API worker's GIL. 0 workers runs optimization on a thread instead
+    # (tests and serverless). Work beyond workers + max pending is rejected with 503.
+    _image_workers_default = "0" if ENVIRONMENT.lower() in {"test", "testing"} or os.getenv("VERCEL") else "2"
+    try:
+        IMAGE_PROCESS_WORKERS = max(0, min(16, int(os.getenv("IMAGE_PROCESS_WORKERS", _image_workers_default))))
+        IMAGE_PROCESS_MAX_PENDING = max(0, int(os.getenv("IMAGE_PROCESS_MAX_PENDING", "8")))
+    except ValueError:
+        logger.warning("Invalid image process pool configuration; using safe defaults")
+        IMAGE_PROCESS_WORKERS = int(_image_workers_default)
+        IMAGE_PROCESS_MAX_PENDING = 8
+    # Batch uploads share one quota check, one insert and one cache invalidation;
+    # per-image optimization/detection runs at most UPLOAD_BATCH_CONCURRENCY at a time.
+    try:
+        UPLOAD_BATCH_MAX_FILES = max(1, min(50, int(os.getenv("UPLOAD_BATCH_MAX_FILES", "10"))))
+        UPLOAD_BATCH_CONCURRENCY = max(1, int(os.getenv("UPLOAD_BATCH_CONCURRENCY", "4")))
+    except ValueError:
+        logger.warning("Invalid batch upload configuration; using safe defaults")
+        UPLOAD_BATCH_MAX_FILES = 10
+        UPLOAD_BATCH_CONCURRENCY = 4
+    # Detection result cache: per-process LRU entries and Redis TTL for the shared tier
+    try:
+        DETECTION_CACHE_L1_SIZE = max(0, int(os.getenv("DETECTION_CACHE_L1_SIZE", "512")))
+        DETECTION_CACHE_REDIS_TTL_SECONDS = max(60, int(os.getenv("DETECTION_CACHE_REDIS_TTL_SECONDS", "86400")))
+    except ValueError:
+        logger.warning("Invalid detection cache configuration; using safe defaults")
+        DETECTION_CACHE_L1_SIZE = 512
+        DETECTION_CACHE_REDIS_TTL_SECONDS = 86400
+    # Optional local CPU pre-classifier (ONNX). Images it scores at or above the cat
+    # threshold, or at or below the not-cat threshold, skip Vision; the rest escalate.
+    LOCAL_CLASSIFIER_MODEL_PATH = os.getenv("LOCAL_CLASSIFIER_MODEL_PATH", "").strip()
+    try:
+        LOCAL_CLASSIFIER_INPUT_SIZE = max(32, min(512, int(os.getenv("LOCAL_CLASSIFIER_INPUT_SIZE", "224"))))
+        LOCAL_CLASSIFIER_THREADS = max(1, min(8, int(os.getenv("LOCAL_CLASSIFIER_THREADS", "1"))))
+        LOCAL_CLASSIFIER_BATCH_SIZE = max(1, min(64, int(os.getenv("LOCAL_CLASSIFIER_BATCH_SIZE", "16"))))
+        LOCAL_CLASSIFIER_CAT_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_CAT_THRESHOLD", "0.97"))
+        LOCAL_CLASSIFIER_NOT_CAT_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_NOT_CAT_THRESHOLD", "0.03"))
+    except ValueError:
+        logger.warning("Invalid local classifier configuration; using safe defaults")
+        LOCAL_CLASSIFIER_INPUT_SIZE = 224
+        LOCAL_CLASSIFIER_THREADS = 1
+        LOCAL_CLASSIFIER_BATCH_SIZE = 16
+        LOCAL_CLASSIFIER_CAT_THRESHOLD = 0.97
+        LOCAL_CLASSIFIER_NOT_CAT_THRESHOLD = 0.03
+    # Near-duplicate screening with perceptual hashes: "flag" sends matches to
+    # moderation, "reject" refuses them with 409, "off" disables the check.
+    DUPLICATE_UPLOAD_ACTION = os.getenv("DUPLICATE_UPLOAD_ACTION", "flag").lower()
+    if DUPLICATE_UPLOAD_ACTION not in {"off", "flag", "reject"}:
+        logger.warning("Invalid DUPLICATE_UPLOAD_ACTION; using flag")
+        DUPLICATE_UPLOAD_ACTION = "flag"
+    try:
+        DUPLICATE_HAMMING_THRESHOLD = max(0, min(16, int(os.getenv("DUPLICATE_HAMMING_THRESHOLD", "8"))))
+        DUPLICATE_RECENT_DAYS = max(1, int(os.getenv("DUPLICATE_RECENT_DAYS", "7")))
+        DUPLICATE_INDEX_REFRESH_SECONDS = max(30, int(os.getenv("DUPLICATE_INDEX_REFRESH_SECONDS", "300")))
+        DUPLICATE_INDEX_MAX_ROWS = max(1, int(os.getenv("DUPLICATE_INDEX_MAX_ROWS", "20000")))
+    except ValueError:
+        logger.warning("Invalid duplicate screening configuration; using safe defaults")
+        DUPLICATE_HAMMING_THRESHOLD = 8
+        DUPLICATE_RECENT_DAYS = 7
+        DUPLICATE_INDEX_REFRESH_SECONDS = 300
+        DUPLICATE_INDEX_MAX_ROWS = 20000
+    # Direct-to-S3 uploads: clients POST to a quarantine prefix with a short-lived
+    # presigned form and the queue worker validates and publishes the photo.
+    # Requires the queue worker (see ENABLE_VISION_ANALYSIS_QUEUE).
+    ENABLE_DIRECT_UPLOADS = os.getenv("ENABLE_DIRECT_UPLOADS", "false").lower() in ("true", "1", "yes")
+    try:
+        DIRECT_UPLOAD_URL_TTL_SECONDS = max(30, min(3600, int(os.getenv("DIRECT_UPLOAD_URL_TTL_SECONDS", "300"))))
+    except ValueError:
+        logger.warning("Invalid direct upload configuration; using safe defaults")
+        DIRECT_UPLOAD_URL_TTL_SECONDS = 300
     RATE_LIMIT_UPLOAD_FREE = os.getenv("RATE_LIMIT_UPLOAD_FREE", "5/minute")
     RATE_LIMIT_UPLOAD_PRO = os.getenv("RATE_LIMIT_UPLOAD_PRO", "20/minute")
 
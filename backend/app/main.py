@@ -230,11 +230,14 @@ tags_metadata = [
 # ========== Background Tasks ==========
 from contextlib import asynccontextmanager
 
+from app.services.detection_cache import detection_cache
 from app.services.queue_service import queue_service
 from app.services.redis_service import redis_service
+from app.services.storage_service import storage_service
 from app.tasks.cleanup_tasks import start_cleanup_jobs, stop_cleanup_jobs
 from app.tasks.subscription_tasks import start_subscription_reconciliation_job, stop_subscription_reconciliation_job
 from app.utils.http_client import close_shared_httpx_client
+from app.utils.image_utils import image_engine
 from app.utils.telemetry import setup_telemetry
 
 
@@ -245,13 +248,21 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     else:
         logger.info("Background cleanup tasks disabled (lifespan)")
     await start_subscription_reconciliation_job()
+    # Fork image workers before the first upload so it does not pay the cold start.
+    try:
+        await asyncio.to_thread(image_engine.start)
+    except Exception as e:
+        logger.error("Image engine warm-up failed; workers will start on demand: %s", e)
     yield
     await stop_subscription_reconciliation_job()
     if config.ENABLE_BACKGROUND_TASKS:
         await stop_cleanup_jobs()
     await close_shared_httpx_client()
+    await detection_cache.close()
     await redis_service.close()
     await queue_service.close()
+    storage_service.shutdown()
+    await asyncio.to_thread(image_engine.shutdown)
 
 
 # ========== FastAPI Application ==========
@@ -32,6 +32,15 @@ def _request_is_authenticated(request: Request) -> bool:
     return bool(request.headers.get("Cookie"))
 
 
+# Incrementally written bodies must not be buffered just to hash them.
+STREAMING_MEDIA_TYPES = ("application/x-ndjson", "text/event-stream")
+
+
+def _is_streaming_response(response: Response) -> bool:
+    content_type = response.headers.get("content-type", "").lower()
+    return content_type.startswith(STREAMING_MEDIA_TYPES)
+
+
 def _is_cacheable_response(response: Response) -> bool:
     """Only generate validators for explicitly cacheable responses."""
     cache_control = response.headers.get("Cache-Control", "")
@@ -83,7 +92,7 @@ class ETagMiddleware(BaseHTTPMiddleware):
         if "etag" in response.headers or "ETag" in response.headers:
             return response
 
-        if not _is_cacheable_response(response):
+        if _is_streaming_response(response) or not _is_cacheable_response(response):
             return response
 
         # Route handlers should set Content-Length. Skip hashing known-large
@@ -1,4 +1,5 @@
 import asyncio
+import os
 from collections import Counter
 from datetime import date, datetime, timedelta
 from typing import Any, cast
@@ -11,6 +12,10 @@ from app.limiter import limiter
 from app.logger import logger
 from app.middleware.auth_middleware import require_permission
 from app.schemas.user import User
+from app.services.detection_cache import detection_cache
+from app.services.queue_metrics import collect_queue_metrics
+from app.services.queue_service import QueueUnavailable
+from app.utils.stage_timing import STAGE_BUCKETS_MS, stage_histograms
 
 router = APIRouter()
 
@@ -346,3 +351,48 @@ async def get_monthly_stats(
     except Exception as fallback_error:
         logger.error("Failed to fetch monthly stats: %s", fallback_error, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch monthly report")
+
+
+@router.get("/metrics/upload-stages")
+async def get_upload_stage_metrics(
+    current_admin: User = Depends(require_permission("system:stats")),
+) -> dict[str, Any]:
+    """
+    Per-stage upload latency histograms for this API process.
+
+    Counters are process-local and reset on restart; compare workers by ``pid``.
+    """
+    return {
+        "pid": os.getpid(),
+        "bucket_bounds_ms": list(STAGE_BUCKETS_MS),
+        "pipelines": stage_histograms.snapshot(),
+    }
+
+
+@router.get("/metrics/detection-cache")
+async def get_detection_cache_metrics(
+    current_admin: User = Depends(require_permission("system:stats")),
+) -> dict[str, Any]:
+    """
+    Hit ratios of the layered Vision detection cache for this process.
+
+    Lower tiers only see lookups that missed the tiers above them.
+    """
+    return {"pid": os.getpid(), **detection_cache.stats()}
+
+
+@router.get("/metrics/queues")
+async def get_queue_metrics(
+    current_admin: User = Depends(require_permission("system:stats")),
+) -> dict[str, Any]:
+    """
+    Depth, lag, throughput and latency of the job queues.
+
+    Stream state is sampled live from Redis; outcome counters and latency
+    histograms are totals over the workers that published recently.
+    ``backlog`` (undelivered + pending) is the signal for scaling workers.
+    """
+    try:
+        return await collect_queue_metrics()
+    except QueueUnavailable as exc:
+        raise HTTPException(status_code=503, detail="Queue Redis unavailable") from exc
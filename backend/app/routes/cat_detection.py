@@ -4,7 +4,7 @@ Cat detection API routes using Google Cloud Vision
 
 from typing import Annotated, Any, Literal, NoReturn, cast
 
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
 from fastapi.responses import JSONResponse
 
 from app.config import config
@@ -17,6 +17,9 @@ from app.utils.upload_verification import create_upload_verification_token
 
 router = APIRouter(prefix="/detect", tags=["Cat Detection"])
 
+# Long-poll bound for job status; stays below client and proxy request timeouts
+VISION_JOB_MAX_WAIT_SECONDS = 25
+
 
 from app.schemas.cat_detection import (
     CatDetectionResult,
@@ -66,6 +69,7 @@ async def _enqueue_vision_job(
             analyzed_by=current_user.email,
             filename=filename,
             contents=contents,
+            priority=current_user.is_pro,
         )
     except (QueueUnavailable, QueueBackpressure) as exc:
         raise HTTPException(status_code=503, detail="Vision analysis queue temporarily unavailable") from exc
@@ -250,10 +254,19 @@ async def combined_cat_and_spot_analysis(
 async def get_vision_job_status(
     job_id: str,
     current_user: Annotated[User, Depends(get_current_user)],
+    wait: Annotated[int, Query(ge=0, le=VISION_JOB_MAX_WAIT_SECONDS)] = 0,
 ) -> VisionJobStatus:
-    """Return a Vision analysis result owned by the authenticated user."""
+    """
+    Return a Vision analysis result owned by the authenticated user.
+
+    With ``wait`` the request long-polls: it returns as soon as the worker
+    completes or fails the job, or with the current state after ``wait`` seconds.
+    """
     try:
-        job = await queue_service.get_vision_job(job_id, str(current_user.id))
+        if wait:
+            job = await queue_service.wait_for_vision_job(job_id, str(current_user.id), timeout=wait)
+        else:
+            job = await queue_service.get_vision_job(job_id, str(current_user.id))
     except QueueUnavailable as exc:
         raise HTTPException(status_code=503, detail="Vision analysis queue temporarily unavailable") from exc
     if not job:
@@ -3,10 +3,12 @@ Gallery routes with API-side pagination, cursor-based pagination,
 sorting, field selection, and ETag support.
 """
 
+from collections.abc import AsyncIterator
 from typing import Annotated, Any
 from uuid import UUID
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 
 from app.dependencies import get_current_token, get_gallery_service, get_storage_service
@@ -26,10 +28,12 @@ from app.schemas.gallery import (
     SortField,
     SortOrder,
     TagInfo,
+    TagPeriod,
 )
 from app.schemas.location import CatLocation
 from app.schemas.user import User
 from app.services.gallery_service import GalleryService
+from app.services.search_service import SpatialFilter
 from app.services.storage_service import StorageService
 from app.utils.location_utils import protect_photo_location, protect_photo_locations
 
@@ -88,13 +92,37 @@ def _build_gallery_locations(photos: list[dict[str, Any]]) -> list[CatLocation]:
     return locations
 
 
+def _build_search_area(
+    lat: float | None,
+    lng: float | None,
+    radius_km: float | None,
+    bounds: tuple[float | None, float | None, float | None, float | None],
+) -> SpatialFilter | None:
+    """Validate optional radius/bbox search parameters into a spatial filter."""
+    has_radius = any(value is not None for value in (lat, lng, radius_km))
+    has_bbox = any(value is not None for value in bounds)
+    if has_radius and has_bbox:
+        raise HTTPException(status_code=400, detail="Use either lat/lng/radius_km or north/south/east/west, not both")
+    if has_radius:
+        if lat is None or lng is None:
+            raise HTTPException(status_code=400, detail="lat and lng are required for a radius search")
+        return SpatialFilter.from_radius(lat, lng, radius_km if radius_km is not None else 5.0)
+    if has_bbox:
+        north, south, east, west = bounds
+        if north is None or south is None or east is None or west is None:
+            raise HTTPException(status_code=400, detail="north, south, east and west are all required")
+        return SpatialFilter.from_bbox(north, south, east, west)
+    return None
+
+
 def _apply_sort(
     photos: list[dict[str, Any]],
     sort: SortField | None,
     order: SortOrder,
 ) -> list[dict[str, Any]]:
     """Sort photos list by the given field and order."""
-    if not sort:
+    if not sort or sort == SortField.TRENDING:
+        # Trending order only exists in the database (hot_score index).
         return photos
 
     reverse = order == SortOrder.DESC
@@ -133,7 +161,7 @@ async def get_gallery(
     limit: int = Query(20, ge=1, le=100, description="Number of items per page"),
     offset: int = Query(0, ge=0, description="Number of items to skip"),
     page: int | None = Query(None, ge=1, description="Page number (alternative to offset)"),
-    sort: SortField | None = Query(None, description="Sort field: uploaded_at, likes_count, comments_count"),
+    sort: SortField | None = Query(None, description="Sort field: uploaded_at, likes_count, comments_count, trending"),
     order: SortOrder = Query(SortOrder.DESC, description="Sort order: asc or desc"),
     fields: str | None = Query(None, description="Comma-separated list of fields to include"),
 ) -> PaginatedGalleryResponse:
@@ -144,6 +172,7 @@ async def get_gallery(
     - `/gallery?limit=20&offset=0` - First 20 images
     - `/gallery?limit=20&page=2` - Second page of 20 images
     - `/gallery?sort=likes_count&order=desc` - Sort by most liked
+    - `/gallery?sort=trending` - Sort by precomputed hot score
     - `/gallery?fields=id,image_url,location_name` - Only specific fields
     """
     # Dynamic caching strategy
@@ -244,6 +273,59 @@ async def get_locations(
         raise HTTPException(status_code=500, detail="Failed to fetch cat locations")
 
 
+@router.get(
+    "/locations/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One CatLocation JSON object per line"}},
+)
+@limiter.limit(get_api_limit)
+async def stream_locations(
+    request: Request,
+    gallery_service: Annotated[GalleryService, Depends(get_gallery_service)],
+) -> StreamingResponse:
+    """
+    Stream every approved marker as NDJSON for offline/map-preload clients.
+
+    Rows are read in chunks from a server-side cursor and coordinate protection
+    is applied per chunk, so the full marker set is never held in memory.
+    """
+    chunks = gallery_service.stream_map_locations()
+    try:
+        # Fetch the first chunk eagerly so database failures still map to a 500.
+        first_chunk: list[dict[str, Any]] = await anext(chunks, [])
+    except Exception as e:
+        logger.error("Locations stream error: %s", str(e), exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch cat locations")
+
+    async def body() -> AsyncIterator[bytes]:
+        skipped = 0
+        chunk = first_chunk
+        try:
+            while chunk:
+                lines: list[str] = []
+                for photo in protect_photo_locations(chunk):
+                    try:
+                        lines.append(CatLocation(**photo).model_dump_json())
+                    except ValidationError:
+                        skipped += 1
+                if lines:
+                    yield ("\n".join(lines) + "\n").encode()
+                chunk = await anext(chunks, [])
+        except Exception as e:
+            # Headers are already sent; a truncated stream is the only signal left.
+            logger.error("Locations stream aborted: %s", str(e), exc_info=True)
+        finally:
+            await chunks.aclose()
+        if skipped:
+            logger.warning("Skipped %d streamed markers with incomplete location data", skipped)
+
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "public, max-age=300"},
+    )
+
+
 # ---- Viewport endpoint ----
 
 
@@ -304,8 +386,21 @@ async def search_locations(
     page: int | None = Query(None, ge=1, description="Page number (alternative to offset)"),
     sort: SortField | None = Query(None, description="Sort field"),
     order: SortOrder = Query(SortOrder.DESC, description="Sort order"),
+    lat: float | None = Query(None, ge=-90, le=90, description="Center latitude for a radius search"),
+    lng: float | None = Query(None, ge=-180, le=180, description="Center longitude for a radius search"),
+    radius_km: float | None = Query(None, gt=0, le=50, description="Search radius in km (default 5)"),
+    north: float | None = Query(None, ge=-90, le=90, description="North latitude bound"),
+    south: float | None = Query(None, ge=-90, le=90, description="South latitude bound"),
+    east: float | None = Query(None, ge=-180, le=180, description="East longitude bound"),
+    west: float | None = Query(None, ge=-180, le=180, description="West longitude bound"),
 ) -> SearchResponse:
-    """Search cat locations with optional text query and/or tag filters."""
+    """
+    Search cat locations with optional text query, tag and spatial filters.
+
+    Spatial filters are either `lat`/`lng`/`radius_km` or a `north`/`south`/`east`/`west`
+    bounding box; text, tags and location are matched in a single query.
+    """
+    area = _build_search_area(lat, lng, radius_km, (north, south, east, west))
     try:
         tag_list = None
         if tags:
@@ -320,6 +415,7 @@ async def search_locations(
             offset=actual_offset,
             user_id=current_user.id if current_user else None,
             include_total=True,
+            area=area,
         )
 
         # Apply sorting
@@ -354,12 +450,13 @@ async def get_popular_tags(
     response: Response,
     gallery_service: Annotated[GalleryService, Depends(get_gallery_service)],
     limit: int = Query(20, ge=1, le=100, description="Number of top tags to return"),
+    period: TagPeriod = Query(TagPeriod.ALL, description="Time window: 7d, 30d or all"),
 ) -> PopularTagsResponse:
-    """Get the most popular tags used across all cat photos."""
+    """Get the most popular tags used across cat photos, optionally for recent uploads only."""
     response.headers["Cache-Control"] = "public, max-age=3600"
 
     try:
-        tags_data = await gallery_service.get_popular_tags(limit=limit)
+        tags_data = await gallery_service.get_popular_tags(limit=limit, period_days=period.days)
         tags = [TagInfo(**t) for t in tags_data]
         return PopularTagsResponse(tags=tags)
     except Exception as e:
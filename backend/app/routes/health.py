@@ -490,13 +490,16 @@ def metrics(request: Request) -> JSONResponse:
     This is a simple alternative for environments without Prometheus.
     """
     from app.utils.cache import get_cache_stats
+    from app.utils.image_utils import image_engine
 
     cache_stats = get_cache_stats()
+    engine_stats = image_engine.stats()
 
     if _detailed_health_enabled():
         content = {
             "timestamp": datetime.now(UTC).isoformat(),
             "cache": cache_stats,
+            "image_engine": engine_stats,
             "environment": os.getenv("ENVIRONMENT", "development"),
             "python_version": sys.version.split()[0],
         }
@@ -508,6 +511,11 @@ def metrics(request: Request) -> JSONResponse:
                 "redis_connected": cache_stats.get("redis_connected"),
                 "memory_cache_size": cache_stats.get("memory_cache_size"),
             },
+            "image_engine": {
+                "mode": engine_stats["mode"],
+                "in_flight": engine_stats["in_flight"],
+                "rejected": engine_stats["rejected"],
+            },
         }
 
     return JSONResponse(
@@ -3,7 +3,10 @@ Upload routes for cat photo uploads with location information
 Enhanced with security features: rate limiting, input sanitization, security logging
 """
 
+import asyncio
+import hashlib
 import json
+import time
 import uuid
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
@@ -20,21 +23,33 @@ from app.limiter import get_upload_limit, upload_limiter
 limiter = upload_limiter  # Alias for backward compatibility with tests
 from app.logger import logger, sanitize_log_value
 from app.middleware.auth_middleware import get_current_user
-from app.schemas.gallery import UploadQuotaResponse
+from app.schemas.gallery import DirectUploadTicket, UploadJobAccepted, UploadJobStatus, UploadQuotaResponse
 from app.schemas.user import User
 from app.services.cat_detection_service import CatDetectionService
+from app.services.duplicate_service import DuplicateMatch, apply_duplicate_policy, remember_upload, screen_upload
 from app.services.gallery_service import GalleryService
+from app.services.google_vision import VisionRateLimited
+from app.services.queue_service import QueueBackpressure, QueueUnavailable, queue_service
 from app.services.quota_service import QuotaService
 from app.services.redis_service import RedisLockError, redis_service
 from app.services.storage_service import StorageService
+from app.services.upload_pipeline import (
+    CatVerificationUnavailable,
+    NoCatsDetected,
+    approval_status,
+    build_upload_renditions,
+    verify_cats,
+)
 from app.utils import cache as cache_utils
 from app.utils.cache import invalidate_after_upload
 from app.utils.exceptions import ExternalServiceError
 from app.utils.file_processing import process_uploaded_image, validate_coordinates, validate_location_data
 from app.utils.security import (
+    ALLOWED_IMAGE_MIMES,
     log_security_event,
     sanitize_tags,
 )
+from app.utils.stage_timing import record_stage, stage_timer, timed_stage
 from app.utils.upload_verification import verify_upload_verification_token
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
@@ -109,7 +124,11 @@ def validate_cat_detection_data(cat_data: dict) -> bool:
 
 
 async def _perform_server_side_detection(
-    file: UploadFile | bytes, detection_service: CatDetectionService, user_id: str, client_cat_data: dict | None
+    file: UploadFile | bytes,
+    detection_service: CatDetectionService,
+    user_id: str,
+    client_cat_data: dict | None,
+    content_hash: str | None = None,
 ) -> dict[str, Any]:
     """Run server-side cat detection and validate results"""
     # CRITICAL SECURITY FIX: Always perform server-side detection
@@ -118,60 +137,43 @@ async def _perform_server_side_detection(
     if isinstance(file, UploadFile):
         await file.seek(0)
 
-    detection_result = await detection_service.detect_cats(file)
-
-    if detection_result.get("service_available") is False or detection_result.get("fallback_active"):
-        log_security_event(
-            "upload_verification_unavailable",
-            user_id=user_id,
-            severity="WARNING",
-        )
+    try:
+        return await verify_cats(detection_service, file, user_id, client_cat_data, content_hash=content_hash)
+    except (CatVerificationUnavailable, VisionRateLimited) as exc:
         raise HTTPException(
             status_code=503,
             detail="Cat verification service unavailable. Please try again later.",
-        )
+        ) from exc
+    except NoCatsDetected as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
 
-    # Log discrepancy if client said "has_cats" but server says "no"
-    if client_cat_data and client_cat_data.get("has_cats") and not detection_result.get("has_cats"):
+async def _screen_near_duplicate(contents: bytes, user_id: str) -> tuple[int | None, DuplicateMatch | None]:
+    """Perceptual-hash screening; refuses near-duplicates when configured to reject."""
+    phash, match = await screen_upload(contents, user_id)
+    if match is not None:
         log_security_event(
-            "detection_mismatch",
+            "near_duplicate_upload",
             user_id=user_id,
             details={
-                "client_result": sanitize_log_value(client_cat_data),
-                "server_result": sanitize_log_value(str(detection_result)[:200]),
+                "match_photo_id": match.photo_id,
+                "distance": match.distance,
+                "action": config.DUPLICATE_UPLOAD_ACTION,
             },
             severity="WARNING",
         )
-
-    # Reject if no cats found by server
-    if not detection_result.get("has_cats", False):
-        log_security_event(
-            "upload_rejected_no_cats",
-            user_id=user_id,
-            details={"detection_result": sanitize_log_value(str(detection_result)[:200])},
-            severity="INFO",
-        )
-        raise HTTPException(
-            status_code=400,
-            detail="No cats detected in the image. Please upload a photo containing cats.",
-        )
-
-    return {
-        "has_cats": detection_result.get("has_cats"),
-        "cat_count": detection_result.get("cat_count", 0),
-        "confidence": detection_result.get("confidence", 0),
-        "suitable_for_cat_spot": detection_result.get("suitable_for_cat_spot", False),
-        "cats_detected": detection_result.get("cats_detected", []),
-        "detection_timestamp": datetime.now().isoformat(),
-        "detection_source": "server",
-    }
+        if config.DUPLICATE_UPLOAD_ACTION == "reject":
+            raise HTTPException(status_code=409, detail="This photo looks like one that has already been uploaded")
+    return phash, match
 
 
 @asynccontextmanager
 async def _upload_quota_lock(user_id: str) -> AsyncIterator[None]:
     """Hold the per-user admission lock only around quota and persistence work."""
+    lock_started = time.perf_counter()
     try:
         async with redis_service.lock(f"quota:upload:{user_id}", ttl=30, wait_timeout=15):
+            record_stage("quota_lock", time.perf_counter() - lock_started)
             yield
     except RedisLockError as lock_error:
         logger.error("Upload quota lock unavailable for %s: %s", user_id, lock_error)
@@ -235,29 +237,219 @@ async def upload_cat_photo(
     """
     user_id = str(current_user.id)
 
-    try:
-        # Log upload attempt
-        log_security_event(
-            "cat_photo_upload_started",
-            user_id=user_id,
-            details={
-                "filename": sanitize_log_value(file.filename),
-                "location_name": sanitize_log_value(location_name[:50]) if location_name else "unknown",
-            },
-        )
+    with stage_timer("upload") as timings:
+        try:
+            # Log upload attempt
+            log_security_event(
+                "cat_photo_upload_started",
+                user_id=user_id,
+                details={
+                    "filename": sanitize_log_value(file.filename),
+                    "location_name": sanitize_log_value(location_name[:50]) if location_name else "unknown",
+                },
+            )
 
-        # Reject cheap invalid input before quota, image processing, storage, or Vision work.
-        latitude, longitude = validate_coordinates(lat, lng)
-        cleaned_location_name, cleaned_description = validate_location_data(location_name, description)
-        parsed_tags = parse_and_sanitize_tags(tags)
-        if parsed_tags:
-            cleaned_description = format_tags_for_description(parsed_tags, cleaned_description)
-        blurred_val = str(location_blurred).lower() in ["true", "1", "yes"]
+            # Reject cheap invalid input before quota, image processing, storage, or Vision work.
+            latitude, longitude = validate_coordinates(lat, lng)
+            cleaned_location_name, cleaned_description = validate_location_data(location_name, description)
+            parsed_tags = parse_and_sanitize_tags(tags)
+            if parsed_tags:
+                cleaned_description = format_tags_for_description(parsed_tags, cleaned_description)
+            blurred_val = str(location_blurred).lower() in ["true", "1", "yes"]
+
+            # Quota preflight. Lock is released before CPU, Vision, S3 and database work.
+            with timed_stage("quota_check"):
+                await _ensure_upload_quota(quota_service, user_id, current_user.is_pro)
+
+            # Process and validate the uploaded image with optimization and security checks
+            contents, content_type, file_extension = await process_uploaded_image(
+                file,
+                max_size_mb=config.UPLOAD_MAX_SIZE_MB,
+                optimize=True,
+                max_dimension=config.UPLOAD_MAX_DIMENSION,
+                user_id=user_id,
+            )
 
-        # Quota preflight. Lock is released before CPU, Vision, S3 and database work.
-        await _ensure_upload_quota(quota_service, user_id, current_user.is_pro)
+            # Near-duplicate screening runs before Vision so rejected re-uploads cost nothing
+            with timed_stage("duplicate_screen"):
+                phash, duplicate_match = await _screen_near_duplicate(contents, user_id)
 
-        # Process and validate the uploaded image with optimization and security checks
+            # Parse client side cat detection data (logging/debugging only)
+            client_cat_data = None
+            if cat_detection_data:
+                try:
+                    client_cat_data = json.loads(cat_detection_data)
+                    logger.debug("Client-side detection data received")
+                except json.JSONDecodeError:
+                    logger.warning("Failed to parse client detection data: %s", sanitize_log_value(cat_detection_data))
+
+            # Hash the canonical bytes once; token verification and detection share it.
+            content_sha256 = hashlib.sha256(contents).hexdigest()
+
+            # Reuse a short-lived server-signed result only when it belongs to this user
+            # and these exact canonical bytes. Otherwise fail closed through Vision.
+            verified_detection = (
+                verify_upload_verification_token(verification_token, contents, user_id, content_sha256=content_sha256)
+                if verification_token
+                else None
+            )
+            if verified_detection:
+                cat_data = {
+                    **verified_detection,
+                    "detection_timestamp": datetime.now().isoformat(),
+                    "detection_source": "verified_token",
+                }
+            else:
+                with timed_stage("detection"):
+                    cat_data = await _perform_server_side_detection(
+                        contents, detection_service, user_id, client_cat_data, content_hash=content_sha256
+                    )
+
+            status = approval_status(cat_data)
+
+            # Pre-build the rendition set so listings never resize on the fly
+            with timed_stage("renditions"):
+                renditions = await build_upload_renditions(contents, user_id)
+
+            # Upload optimized file (and renditions) to S3
+            try:
+                with timed_stage("s3_put"):
+                    image_url = await storage_service.upload_file(
+                        file_content=contents,
+                        content_type=content_type,
+                        file_extension=file_extension,
+                        renditions=renditions,
+                    )
+            except ExternalServiceError as s3_error:
+                # Catch all S3/storage related errors
+                logger.error("S3 upload failed: %s", s3_error)
+                log_security_event(
+                    "s3_upload_failed",
+                    user_id=user_id,
+                    details={"error": sanitize_log_value(str(s3_error)[:200])},
+                    severity="ERROR",
+                )
+                raise HTTPException(status_code=500, detail="Failed to upload image")
+
+            # Insert into database (cat_photos table) - original coordinates preserved in DB;
+            # dynamic privacy fuzzing is applied on public API read endpoints via location_blurred flag.
+            photo_data = {
+                "id": str(uuid.uuid4()),
+                "user_id": current_user.id,
+                "location_name": cleaned_location_name,
+                "description": cleaned_description if cleaned_description else None,
+                "tags": parsed_tags if parsed_tags else [],
+                "latitude": latitude,
+                "longitude": longitude,
+                "image_url": image_url,
+                "uploaded_at": datetime.now().isoformat(),
+                "location_blurred": blurred_val,
+                "status": status,
+            }
+            apply_duplicate_policy(photo_data, phash, duplicate_match)
+
+            created_photo: dict[str, Any] | None = None
+            quota_allowed = False
+            database_error: Exception | None = None
+            async with _upload_quota_lock(user_id):
+                quota_allowed = await quota_service.check_quota(user_id, current_user.is_pro)
+                if quota_allowed:
+                    try:
+                        with timed_stage("save_photo"):
+                            created_photo = await gallery_service.save_photo(photo_data)
+                            await quota_service.increment_usage(user_id)
+                    except Exception as db_error:
+                        database_error = db_error
+
+            if not quota_allowed:
+                log_security_event("quota_exceeded", user_id=user_id, severity="WARNING")
+                try:
+                    await storage_service.delete_file(image_url)
+                except Exception as cleanup_error:
+                    logger.error("Failed to delete quota-rejected S3 object: %s", cleanup_error)
+                raise HTTPException(
+                    status_code=429, detail="Daily upload limit reached. Upgrade to Pro for more uploads."
+                )
+
+            if database_error is not None or created_photo is None:
+                # Rollback: Delete file from S3 if DB insert fails
+                logger.error("Database insert failed: %s. Rolling back S3 upload.", database_error)
+                try:
+                    await storage_service.delete_file(image_url)
+                except Exception as s3_del_err:
+                    logger.error("Failed to delete S3 file during DB rollback: %s", s3_del_err)
+
+                log_security_event(
+                    "upload_transaction_rollback",
+                    user_id=user_id,
+                    details={
+                        "error": sanitize_log_value(str(database_error)[:200]),
+                        "image_url": sanitize_log_value(image_url),
+                    },
+                    severity="ERROR",
+                )
+                raise HTTPException(status_code=500, detail="Failed to save cat photo")
+
+            remember_upload(photo_data)
+
+            # Invalidate gallery, tags and user photos cache after new upload in background
+            background_tasks.add_task(invalidate_after_upload, user_id)
+
+            log_security_event(
+                "cat_photo_upload_success",
+                user_id=user_id,
+                details={
+                    "photo_id": created_photo["id"],
+                    "location_name": cleaned_location_name,
+                },
+            )
+
+            logger.info("Cat photo uploaded successfully: %r by %r", created_photo["id"], current_user.email)
+
+            return JSONResponse(
+                status_code=201,
+                content={
+                    "success": True,
+                    "message": "Cat photo uploaded successfully!",
+                    "photo": {
+                        "id": created_photo["id"],
+                        "location_name": created_photo["location_name"],
+                        "location": {
+                            "latitude": created_photo["latitude"],
+                            "longitude": created_photo["longitude"],
+                        },
+                        "image_url": created_photo["image_url"],
+                        "uploaded_at": created_photo["uploaded_at"],
+                    },
+                    "cat_detection": cat_data,
+                    "uploaded_by": current_user.email,
+                },
+                headers={"Content-Type": "application/json", "Server-Timing": timings.server_timing()},
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Catch-all for any other unexpected errors during upload process
+            logger.error("Upload error: %s", e, exc_info=True)
+            log_security_event(
+                "upload_error",
+                user_id=user_id,
+                details={"error": "An internal upload error occurred"},
+                severity="ERROR",
+            )
+            raise HTTPException(status_code=500, detail="Upload failed due to an internal error")
+
+
+async def _store_batch_image(
+    file: UploadFile,
+    detection_service: CatDetectionService,
+    storage_service: StorageService,
+    user_id: str,
+    gate: asyncio.Semaphore,
+) -> dict[str, Any]:
+    """Optimize, verify and store one image of a batch upload."""
+    async with gate:
         contents, content_type, file_extension = await process_uploaded_image(
             file,
             max_size_mb=config.UPLOAD_MAX_SIZE_MB,
@@ -265,156 +457,404 @@ async def upload_cat_photo(
             max_dimension=config.UPLOAD_MAX_DIMENSION,
             user_id=user_id,
         )
+        with timed_stage("duplicate_screen"):
+            phash, duplicate_match = await _screen_near_duplicate(contents, user_id)
+        with timed_stage("detection"):
+            cat_data = await _perform_server_side_detection(
+                contents, detection_service, user_id, None, content_hash=hashlib.sha256(contents).hexdigest()
+            )
+        with timed_stage("renditions"):
+            renditions = await build_upload_renditions(contents, user_id)
+        try:
+            with timed_stage("s3_put"):
+                image_url = await storage_service.upload_file(
+                    file_content=contents,
+                    content_type=content_type,
+                    file_extension=file_extension,
+                    renditions=renditions,
+                )
+        except ExternalServiceError as s3_error:
+            logger.error("S3 upload failed: %s", s3_error)
+            raise HTTPException(status_code=500, detail="Failed to upload image")
+    return {"image_url": image_url, "cat_data": cat_data, "phash": phash, "duplicate_match": duplicate_match}
+
+
+async def _delete_stored_images(storage_service: StorageService, image_urls: list[str]) -> None:
+    results = await asyncio.gather(
+        *(storage_service.delete_file(image_url) for image_url in image_urls), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("Failed to delete S3 object during batch rollback: %s", result)
 
-        # Parse client side cat detection data (logging/debugging only)
-        client_cat_data = None
-        if cat_detection_data:
-            try:
-                client_cat_data = json.loads(cat_detection_data)
-                logger.debug("Client-side detection data received")
-            except json.JSONDecodeError:
-                logger.warning("Failed to parse client detection data: %s", sanitize_log_value(cat_detection_data))
-
-        # Reuse a short-lived server-signed result only when it belongs to this user
-        # and these exact canonical bytes. Otherwise fail closed through Vision.
-        verified_detection = (
-            verify_upload_verification_token(verification_token, contents, user_id) if verification_token else None
-        )
-        if verified_detection:
-            cat_data = {
-                **verified_detection,
-                "detection_timestamp": datetime.now().isoformat(),
-                "detection_source": "verified_token",
-            }
-        else:
-            cat_data = await _perform_server_side_detection(contents, detection_service, user_id, client_cat_data)
 
-        # Determine approval status based on confidence threshold:
-        # High confidence (>= 60%) -> approved; Borderline confidence -> pending_review
-        confidence_val = float(cat_data.get("confidence", 0))
-        confidence_pct = confidence_val * 100.0 if confidence_val <= 1.0 else confidence_val
-        status = "approved" if confidence_pct >= 60.0 else "pending_review"
+@router.post("/cats")
+@upload_limiter.limit(get_upload_limit)
+async def upload_cat_photos(
+    request: Request,  # Required for rate limiting
+    background_tasks: BackgroundTasks,
+    current_user: Annotated[User, Depends(get_current_user)],
+    gallery_service: Annotated[GalleryService, Depends(get_gallery_service)],
+    detection_service: Annotated[CatDetectionService, Depends(get_cat_detection_service)],
+    storage_service: Annotated[StorageService, Depends(get_storage_service)],
+    quota_service: Annotated[QuotaService, Depends(get_quota_service)],
+    files: list[UploadFile] = File(...),
+    lat: str = Form(...),
+    lng: str = Form(...),
+    location_name: str = Form(...),
+    description: str | None = Form(""),
+    tags: str | None = Form(None),
+    location_blurred: str = Form("false"),
+) -> JSONResponse:
+    """
+    Upload several cat photos that share one location.
 
-        # Upload optimized file to S3
+    Quota is admitted once for the whole batch, images are optimized and verified
+    concurrently (bounded by ``UPLOAD_BATCH_CONCURRENCY``), accepted photos are
+    inserted in one statement and caches are invalidated once. Images that fail
+    validation or detection are reported in ``rejected``; the rest are saved.
+
+    Raises:
+        HTTPException: 400 - If the batch is empty, too large, or no image is accepted.
+        HTTPException: 429 - If the batch exceeds the remaining daily upload quota.
+        HTTPException: 500 - If storing the photos fails.
+    """
+    user_id = str(current_user.id)
+    if not files:
+        raise HTTPException(status_code=400, detail="No images provided")
+    if len(files) > config.UPLOAD_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many images (max {config.UPLOAD_BATCH_MAX_FILES} per upload)")
+
+    with stage_timer("upload_batch") as timings:
         try:
-            image_url = await storage_service.upload_file(
-                file_content=contents,
-                content_type=content_type,
-                file_extension=file_extension,
-            )
-        except ExternalServiceError as s3_error:
-            # Catch all S3/storage related errors
-            logger.error("S3 upload failed: %s", s3_error)
             log_security_event(
-                "s3_upload_failed",
+                "cat_photo_batch_upload_started",
                 user_id=user_id,
-                details={"error": sanitize_log_value(str(s3_error)[:200])},
-                severity="ERROR",
+                details={
+                    "file_count": len(files),
+                    "location_name": sanitize_log_value(location_name[:50]) if location_name else "unknown",
+                },
             )
-            raise HTTPException(status_code=500, detail="Failed to upload image")
 
-        # Insert into database (cat_photos table) - original coordinates preserved in DB;
-        # dynamic privacy fuzzing is applied on public API read endpoints via location_blurred flag.
-        photo_data = {
-            "id": str(uuid.uuid4()),
-            "user_id": current_user.id,
-            "location_name": cleaned_location_name,
-            "description": cleaned_description if cleaned_description else None,
-            "tags": parsed_tags if parsed_tags else [],
-            "latitude": latitude,
-            "longitude": longitude,
-            "image_url": image_url,
-            "uploaded_at": datetime.now().isoformat(),
-            "location_blurred": blurred_val,
-            "status": status,
-        }
-
-        created_photo: dict[str, Any] | None = None
-        quota_allowed = False
-        database_error: Exception | None = None
-        async with _upload_quota_lock(user_id):
-            quota_allowed = await quota_service.check_quota(user_id, current_user.is_pro)
-            if quota_allowed:
-                try:
-                    created_photo = await gallery_service.save_photo(photo_data)
-                    await quota_service.increment_usage(user_id)
-                except Exception as db_error:
-                    database_error = db_error
+            latitude, longitude = validate_coordinates(lat, lng)
+            cleaned_location_name, cleaned_description = validate_location_data(location_name, description)
+            parsed_tags = parse_and_sanitize_tags(tags)
+            if parsed_tags:
+                cleaned_description = format_tags_for_description(parsed_tags, cleaned_description)
+            blurred_val = str(location_blurred).lower() in ["true", "1", "yes"]
+
+            # One quota preflight for the whole batch
+            async with _upload_quota_lock(user_id):
+                remaining = await quota_service.remaining_quota(user_id, current_user.is_pro)
+            if remaining < len(files):
+                log_security_event("quota_exceeded", user_id=user_id, severity="WARNING")
+                raise HTTPException(
+                    status_code=429, detail=f"Daily upload limit reached. {remaining} upload(s) remaining today."
+                )
+
+            gate = asyncio.Semaphore(config.UPLOAD_BATCH_CONCURRENCY)
+            outcomes = await asyncio.gather(
+                *(_store_batch_image(file, detection_service, storage_service, user_id, gate) for file in files),
+                return_exceptions=True,
+            )
 
-        if not quota_allowed:
-            log_security_event("quota_exceeded", user_id=user_id, severity="WARNING")
-            try:
-                await storage_service.delete_file(image_url)
-            except Exception as cleanup_error:
-                logger.error("Failed to delete quota-rejected S3 object: %s", cleanup_error)
-            raise HTTPException(status_code=429, detail="Daily upload limit reached. Upgrade to Pro for more uploads.")
-
-        if database_error is not None or created_photo is None:
-            # Rollback: Delete file from S3 if DB insert fails
-            logger.error("Database insert failed: %s. Rolling back S3 upload.", database_error)
-            try:
-                await storage_service.delete_file(image_url)
-            except Exception as s3_del_err:
-                logger.error("Failed to delete S3 file during DB rollback: %s", s3_del_err)
+            stored: list[dict[str, Any]] = []
+            rejected: list[dict[str, Any]] = []
+            for index, (file, outcome) in enumerate(zip(files, outcomes, strict=True)):
+                if isinstance(outcome, HTTPException):
+                    rejected.append(
+                        {
+                            "index": index,
+                            "filename": file.filename,
+                            "status_code": outcome.status_code,
+                            "detail": outcome.detail,
+                        }
+                    )
+                elif isinstance(outcome, BaseException):
+                    logger.error("Batch upload item %d failed: %s", index, outcome)
+                    rejected.append(
+                        {
+                            "index": index,
+                            "filename": file.filename,
+                            "status_code": 500,
+                            "detail": "Failed to process image",
+                        }
+                    )
+                else:
+                    stored.append(outcome)
+
+            if not stored:
+                raise HTTPException(
+                    status_code=400, detail={"message": "No images could be uploaded", "rejected": rejected}
+                )
+
+            uploaded_at = datetime.now().isoformat()
+            photo_rows: list[dict[str, Any]] = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": current_user.id,
+                    "location_name": cleaned_location_name,
+                    "description": cleaned_description if cleaned_description else None,
+                    "tags": parsed_tags if parsed_tags else [],
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "image_url": item["image_url"],
+                    "uploaded_at": uploaded_at,
+                    "location_blurred": blurred_val,
+                    "status": approval_status(item["cat_data"]),
+                }
+                for item in stored
+            ]
+            for row, item in zip(photo_rows, stored, strict=True):
+                apply_duplicate_policy(row, item.get("phash"), item.get("duplicate_match"))
+            image_urls = [item["image_url"] for item in stored]
+
+            created_photos: list[dict[str, Any]] = []
+            quota_allowed = False
+            database_error: Exception | None = None
+            async with _upload_quota_lock(user_id):
+                quota_allowed = await quota_service.remaining_quota(user_id, current_user.is_pro) >= len(photo_rows)
+                if quota_allowed:
+                    try:
+                        with timed_stage("save_photo"):
+                            created_photos = await gallery_service.save_photos(photo_rows)
+                        await quota_service.increment_usage(user_id, amount=len(created_photos))
+                    except Exception as db_error:
+                        database_error = db_error
+
+            if not quota_allowed:
+                log_security_event("quota_exceeded", user_id=user_id, severity="WARNING")
+                await _delete_stored_images(storage_service, image_urls)
+                raise HTTPException(
+                    status_code=429, detail="Daily upload limit reached. Upgrade to Pro for more uploads."
+                )
+
+            if database_error is not None or not created_photos:
+                logger.error("Batch database insert failed: %s. Rolling back S3 uploads.", database_error)
+                await _delete_stored_images(storage_service, image_urls)
+                log_security_event(
+                    "upload_transaction_rollback",
+                    user_id=user_id,
+                    details={"error": sanitize_log_value(str(database_error)[:200]), "file_count": len(image_urls)},
+                    severity="ERROR",
+                )
+                raise HTTPException(status_code=500, detail="Failed to save cat photos")
+
+            for row in photo_rows:
+                remember_upload(row)
+
+            # One coalesced invalidation for the whole batch
+            background_tasks.add_task(invalidate_after_upload, user_id)
 
             log_security_event(
-                "upload_transaction_rollback",
+                "cat_photo_batch_upload_success",
                 user_id=user_id,
                 details={
-                    "error": sanitize_log_value(str(database_error)[:200]),
-                    "image_url": sanitize_log_value(image_url),
+                    "photo_ids": [photo["id"] for photo in created_photos],
+                    "rejected": len(rejected),
+                    "location_name": cleaned_location_name,
                 },
+            )
+
+            detections = {item["image_url"]: item["cat_data"] for item in stored}
+            return JSONResponse(
+                status_code=201,
+                content={
+                    "success": True,
+                    "message": f"Uploaded {len(created_photos)} of {len(files)} cat photos",
+                    "photos": [
+                        {
+                            "id": photo["id"],
+                            "location_name": photo["location_name"],
+                            "location": {"latitude": photo["latitude"], "longitude": photo["longitude"]},
+                            "image_url": photo["image_url"],
+                            "uploaded_at": str(photo["uploaded_at"]),
+                            "cat_detection": detections.get(photo["image_url"]),
+                        }
+                        for photo in created_photos
+                    ],
+                    "rejected": rejected,
+                    "uploaded_by": current_user.email,
+                },
+                headers={"Server-Timing": timings.server_timing()},
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("Batch upload error: %s", e, exc_info=True)
+            log_security_event(
+                "upload_error",
+                user_id=user_id,
+                details={"error": "An internal upload error occurred"},
                 severity="ERROR",
             )
-            raise HTTPException(status_code=500, detail="Failed to save cat photo")
+            raise HTTPException(status_code=500, detail="Upload failed due to an internal error")
 
-        # Invalidate gallery, tags and user photos cache after new upload in background
-        background_tasks.add_task(invalidate_after_upload, user_id)
 
-        log_security_event(
-            "cat_photo_upload_success",
-            user_id=user_id,
-            details={
-                "photo_id": created_photo["id"],
-                "location_name": cleaned_location_name,
-            },
-        )
+def _require_direct_uploads() -> None:
+    """Direct uploads need the queue worker; without it the endpoints do not exist."""
+    if not config.ENABLE_DIRECT_UPLOADS or not queue_service.available:
+        raise HTTPException(status_code=404, detail="Direct uploads are not enabled")
 
-        logger.info("Cat photo uploaded successfully: %r by %r", created_photo["id"], current_user.email)
-
-        return JSONResponse(
-            status_code=201,
-            content={
-                "success": True,
-                "message": "Cat photo uploaded successfully!",
-                "photo": {
-                    "id": created_photo["id"],
-                    "location_name": created_photo["location_name"],
-                    "location": {
-                        "latitude": created_photo["latitude"],
-                        "longitude": created_photo["longitude"],
-                    },
-                    "image_url": created_photo["image_url"],
-                    "uploaded_at": created_photo["uploaded_at"],
-                },
-                "cat_detection": cat_data,
-                "uploaded_by": current_user.email,
-            },
-            headers={"Content-Type": "application/json"},
+
+@router.post("/cat/presign", response_model=DirectUploadTicket)
+@upload_limiter.limit(get_upload_limit)
+async def create_direct_upload(
+    request: Request,  # Required for rate limiting
+    current_user: Annotated[User, Depends(get_current_user)],
+    storage_service: Annotated[StorageService, Depends(get_storage_service)],
+    quota_service: Annotated[QuotaService, Depends(get_quota_service)],
+    content_type: str = Form(...),
+) -> DirectUploadTicket:
+    """
+    Issue a short-lived presigned POST so the client uploads straight to storage.
+
+    The object lands in a private quarantine prefix; call ``/upload/cat/complete``
+    with the returned ``upload_id`` to queue validation and publication.
+
+    Raises:
+        HTTPException: 400 - If the content type is not an allowed image type.
+        HTTPException: 404 - If direct uploads are disabled.
+        HTTPException: 429 - If daily upload limit is reached.
+    """
+    _require_direct_uploads()
+    user_id = str(current_user.id)
+    if content_type not in ALLOWED_IMAGE_MIMES:
+        raise HTTPException(status_code=400, detail="Unsupported image type")
+
+    await _ensure_upload_quota(quota_service, user_id, current_user.is_pro)
+
+    upload_id = str(uuid.uuid4())
+    max_bytes = config.UPLOAD_MAX_SIZE_MB * 1024 * 1024
+    try:
+        presigned = storage_service.create_presigned_upload(
+            storage_service.quarantine_key(user_id, upload_id),
+            content_type,
+            max_bytes,
+            config.DIRECT_UPLOAD_URL_TTL_SECONDS,
         )
+    except Exception as e:
+        logger.error("Presigned upload signing failed: %s", e)
+        raise HTTPException(status_code=503, detail="Direct upload is temporarily unavailable")
+
+    log_security_event("direct_upload_issued", user_id=user_id, details={"upload_id": upload_id})
+    return DirectUploadTicket(
+        upload_id=upload_id,
+        url=str(presigned["url"]),
+        fields={str(k): str(v) for k, v in presigned["fields"].items()},
+        max_bytes=max_bytes,
+        expires_in=config.DIRECT_UPLOAD_URL_TTL_SECONDS,
+    )
+
+
+@router.post(
+    "/cat/complete",
+    status_code=202,
+    response_model=UploadJobAccepted,
+    responses={
+        400: {"description": "Invalid upload id or nothing was uploaded"},
+        409: {"description": "Upload already submitted"},
+        503: {"description": "Upload processing queue temporarily unavailable"},
+    },
+)
+@upload_limiter.limit(get_upload_limit)
+async def complete_direct_upload(
+    request: Request,  # Required for rate limiting
+    current_user: Annotated[User, Depends(get_current_user)],
+    storage_service: Annotated[StorageService, Depends(get_storage_service)],
+    quota_service: Annotated[QuotaService, Depends(get_quota_service)],
+    upload_id: str = Form(...),
+    lat: str = Form(...),
+    lng: str = Form(...),
+    location_name: str = Form(...),
+    description: str | None = Form(""),
+    tags: str | None = Form(None),
+    location_blurred: str = Form("false"),
+    filename: str | None = Form(None),
+) -> JSONResponse:
+    """
+    Queue post-processing for a photo uploaded with ``/upload/cat/presign``.
+
+    The worker validates, optimizes and verifies the image before the photo is
+    saved; poll ``/upload/jobs/{job_id}`` for the outcome.
 
-    except HTTPException:
-        raise
+    Raises:
+        HTTPException: 400 - If the upload id is invalid or nothing was uploaded under it.
+        HTTPException: 404 - If direct uploads are disabled.
+        HTTPException: 409 - If the upload was already submitted.
+        HTTPException: 429 - If daily upload limit is reached.
+        HTTPException: 503 - If storage or the queue is unavailable.
+    """
+    _require_direct_uploads()
+    user_id = str(current_user.id)
+    try:
+        upload_id = str(uuid.UUID(upload_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid upload id")
+
+    latitude, longitude = validate_coordinates(lat, lng)
+    cleaned_location_name, cleaned_description = validate_location_data(location_name, description)
+    parsed_tags = parse_and_sanitize_tags(tags)
+    if parsed_tags:
+        cleaned_description = format_tags_for_description(parsed_tags, cleaned_description)
+
+    await _ensure_upload_quota(quota_service, user_id, current_user.is_pro)
+
+    object_key = StorageService.quarantine_key(user_id, upload_id)
+    # Never queue work for an object that was not uploaded; the worker would only retry it
+    try:
+        uploaded = await storage_service.object_exists(object_key)
     except Exception as e:
-        # Catch-all for any other unexpected errors during upload process
-        logger.error("Upload error: %s", e, exc_info=True)
-        log_security_event(
-            "upload_error",
+        logger.error("Quarantine object check failed: %s", e)
+        raise HTTPException(status_code=503, detail="Direct upload is temporarily unavailable")
+    if not uploaded:
+        raise HTTPException(status_code=400, detail="Uploaded file was not found; upload it before completing")
+
+    try:
+        job = await queue_service.enqueue_upload_job(
+            upload_id=upload_id,
             user_id=user_id,
-            details={"error": "An internal upload error occurred"},
-            severity="ERROR",
+            is_pro=current_user.is_pro,
+            object_key=object_key,
+            photo={
+                "location_name": cleaned_location_name,
+                "description": cleaned_description,
+                "tags": parsed_tags,
+                "latitude": latitude,
+                "longitude": longitude,
+                "location_blurred": str(location_blurred).lower() in ["true", "1", "yes"],
+                "filename": filename,
+            },
         )
-        raise HTTPException(status_code=500, detail="Upload failed due to an internal error")
+    except (QueueUnavailable, QueueBackpressure) as exc:
+        raise HTTPException(status_code=503, detail="Upload processing queue temporarily unavailable") from exc
+    if job is None:
+        raise HTTPException(status_code=409, detail="Upload already submitted")
+
+    accepted = UploadJobAccepted(status="queued", job_id=upload_id, created_at=str(job["created_at"]))
+    return JSONResponse(status_code=202, content=accepted.model_dump())
+
+
+@router.get(
+    "/jobs/{job_id}",
+    responses={
+        404: {"description": "Upload job not found"},
+        503: {"description": "Upload processing queue temporarily unavailable"},
+    },
+)
+async def get_upload_job_status(
+    job_id: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> UploadJobStatus:
+    """Return a direct-upload processing result owned by the authenticated user."""
+    try:
+        job = await queue_service.get_upload_job(job_id, str(current_user.id))
+    except QueueUnavailable as exc:
+        raise HTTPException(status_code=503, detail="Upload processing queue temporarily unavailable") from exc
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return UploadJobStatus(**job)
 
 
 # Test endpoint removed for security
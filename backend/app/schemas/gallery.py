@@ -3,6 +3,7 @@ Gallery response schemas with cursor-based pagination, sorting, and field select
 """
 
 from enum import StrEnum
+from typing import Any, Literal
 
 from pydantic import BaseModel
 
@@ -15,6 +16,7 @@ class SortField(StrEnum):
     UPLOADED_AT = "uploaded_at"
     LIKES_COUNT = "likes_count"
     COMMENTS_COUNT = "comments_count"
+    TRENDING = "trending"
 
 
 class SortOrder(StrEnum):
@@ -24,6 +26,18 @@ class SortOrder(StrEnum):
     DESC = "desc"
 
 
+class TagPeriod(StrEnum):
+    """Time windows for popular tags."""
+
+    WEEK = "7d"
+    MONTH = "30d"
+    ALL = "all"
+
+    @property
+    def days(self) -> int | None:
+        return {TagPeriod.WEEK: 7, TagPeriod.MONTH: 30}.get(self)
+
+
 class PaginationMeta(BaseModel):
     """Offset-based pagination metadata."""
 
@@ -77,6 +91,31 @@ class UploadQuotaResponse(BaseModel):
     resets_at: str | None = None
 
 
+class DirectUploadTicket(BaseModel):
+    """Presigned POST for uploading one photo straight to storage quarantine."""
+
+    upload_id: str
+    url: str
+    fields: dict[str, str]
+    max_bytes: int
+    expires_in: int
+
+
+class UploadJobAccepted(BaseModel):
+    status: Literal["queued"]
+    job_id: str
+    created_at: str
+
+
+class UploadJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "processing", "completed", "failed"]
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: str
+    updated_at: str
+
+
 # ---- Allowed fields for ?fields= parameter ----
 
 GALLERY_ALLOWED_FIELDS: set[str] = {
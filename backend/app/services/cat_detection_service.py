@@ -1,32 +1,33 @@
 import hashlib
 import io
-import time
-from collections import OrderedDict
 from typing import Any, cast
 
 from fastapi import HTTPException, UploadFile
 from PIL import Image
 
+from app.config import config
 from app.logger import logger
+from app.services.detection_cache import detection_cache
 from app.services.google_vision import vision_service
+from app.services.local_classifier import CatPreClassifier, get_pre_classifier
+from app.utils.image_utils import VISION_MAX_DIMENSION
 
 # Set explicit max pixel limit to prevent Decompression Bomb Attacks
 Image.MAX_IMAGE_PIXELS = 89_478_485
 
-_DETECTION_CACHE_MAX_SIZE = 512
-_DETECTION_CACHE_TTL_SECONDS = 3600.0
-_detection_cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
-
 
 def clear_detection_cache() -> None:
-    _detection_cache.clear()
+    detection_cache.clear()
 
 
 class CatDetectionService:
     """Service for cat detection and spot analysis using Google Cloud Vision API"""
 
-    def __init__(self, vision_service: Any = None) -> None:
-        """Initialize the service"""
+    pre_classifier: CatPreClassifier | None = None
+
+    def __init__(self, vision_service: Any = None, pre_classifier: CatPreClassifier | None = None) -> None:
+        """Initialize the service; ``pre_classifier`` is an optional local backend tried before Vision."""
+        self.pre_classifier = pre_classifier
         if vision_service:
             self.vision_service = vision_service
         else:
@@ -43,8 +44,8 @@ class CatDetectionService:
             if image.mode != "RGB":
                 image = image.convert("RGB")
 
-            # Resize if too large (max 1024x1024)
-            max_size = (1024, 1024)
+            # Resize if too large; matches the payload Vision receives
+            max_size = (VISION_MAX_DIMENSION, VISION_MAX_DIMENSION)
             if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
                 image.thumbnail(max_size, Image.Resampling.LANCZOS)
 
@@ -57,96 +58,110 @@ class CatDetectionService:
                 raise HTTPException(status_code=400, detail="Invalid image file format")
             raise HTTPException(status_code=400, detail=f"Image processing failed: {e!s}")
 
-    async def detect_cats(self, file: UploadFile | bytes) -> dict[str, Any]:
+    @staticmethod
+    def _format_vision_result(vision_result: dict[str, Any]) -> dict[str, Any]:
+        """Convert a Vision service result into the public detection format."""
+        # Convert Vision API result to our expected format
+        cats_detected = []
+        if vision_result.get("cat_objects"):
+            for obj in vision_result.get("cat_objects", []):
+                cats_detected.append(
+                    {
+                        "description": f"Detected {obj.get('name', 'cat')}",
+                        "breed_guess": "Domestic cat",
+                        "position": "Center of image",
+                        "size": "Medium",
+                    }
+                )
+        elif vision_result.get("cat_labels"):
+            for label in vision_result.get("cat_labels", []):
+                cats_detected.append(
+                    {
+                        "description": f"Detected {label.get('description', 'cat')}",
+                        "breed_guess": "Domestic cat",
+                        "position": "Center of image",
+                        "size": "Medium",
+                    }
+                )
+
+        # Format the result
+        fallback_active = bool(
+            vision_result.get("fallback_mode")
+            or vision_result.get("fallback_active")
+            or vision_result.get("emergency_fallback")
+        )
+        return {
+            "has_cats": vision_result.get("has_cats", False),
+            "cat_count": vision_result.get("cat_count", 0),
+            "confidence": int(vision_result.get("confidence", 0)),
+            "cats_detected": cats_detected,
+            "image_quality": vision_result.get("image_quality", "Medium"),
+            "suitable_for_cat_spot": vision_result.get("has_cats", False),
+            "reasoning": vision_result.get("reasoning", "Cannot analyze"),
+            "service_available": not fallback_active,
+            "fallback_active": fallback_active,
+            "rate_limited": bool(vision_result.get("rate_limited")),
+        }
+
+    async def _pre_classify(self, content: bytes) -> dict[str, Any] | None:
+        """Vision-shaped result from the local backend, or None to escalate to Vision."""
+        if self.pre_classifier is None:
+            return None
+        try:
+            score = await self.pre_classifier.score(content)
+        except Exception as e:
+            logger.warning(f"Local pre-classifier failed; escalating to Vision: {e}")
+            return None
+        if score is None:
+            return None
+        confidence = round(score * 100, 2)
+        if score >= config.LOCAL_CLASSIFIER_CAT_THRESHOLD:
+            return {
+                "has_cats": True,
+                "cat_count": 1,
+                "confidence": confidence,
+                "cat_labels": [{"description": "Cat", "score": score}],
+                "labels": [],
+                "reasoning": f"Cat detected by local classifier with {confidence}% confidence",
+                "detector": self.pre_classifier.name,
+            }
+        if score <= config.LOCAL_CLASSIFIER_NOT_CAT_THRESHOLD:
+            return {
+                "has_cats": False,
+                "cat_count": 0,
+                "confidence": round(100 - confidence, 2),
+                "labels": [],
+                "reasoning": "No cat found by local classifier",
+                "detector": self.pre_classifier.name,
+            }
+        return None
+
+    async def detect_cats(self, file: UploadFile | bytes, content_hash: str | None = None) -> dict[str, Any]:
         """
         Detect cats in image using Google Cloud Vision API (Async)
 
         Args:
             file: UploadFile object or raw bytes
+            content_hash: SHA-256 hex digest of ``file`` when the caller already has it
 
         Returns:
             Dict containing detection results
         """
         try:
-            # Only cryptographic content hashes may reuse an authorization result.
-            # Perceptual hashes are intentionally not used: different images can
-            # collide, and upload admission trusts a positive detection result.
-            content_bytes: bytes | None = None
+            # Results are reused only through the SHA-256 keyed cache in the vision
+            # service. Perceptual hashes are intentionally not used: different images
+            # can collide, and upload admission trusts a positive detection result.
             if isinstance(file, (bytes, bytearray)):
-                content_bytes = bytes(file)
-            elif isinstance(file, UploadFile):
-                try:
-                    content_bytes = await file.read()
-                    await file.seek(0)
-                except Exception:
-                    content_bytes = None
-
-            image_hash = (
-                hashlib.sha256(content_bytes).hexdigest()
-                if isinstance(content_bytes, (bytes, bytearray)) and len(content_bytes) > 0
-                else None
-            )
-            if image_hash:
-                cached_entry = _detection_cache.get(image_hash)
-                if cached_entry:
-                    expires_at, cached_result = cached_entry
-                    if expires_at > time.monotonic():
-                        _detection_cache.move_to_end(image_hash)
-                        logger.info("Cat detection cache hit for SHA256 hash")
-                        return cached_result
-                    _detection_cache.pop(image_hash, None)
-
-            # Use Google Vision API to detect cats
-            vision_result = await self.vision_service.detect_cats(file)
-
-            # Convert Vision API result to our expected format
-            cats_detected = []
-            if vision_result.get("cat_objects"):
-                for obj in vision_result.get("cat_objects", []):
-                    cats_detected.append(
-                        {
-                            "description": f"Detected {obj.get('name', 'cat')}",
-                            "breed_guess": "Domestic cat",
-                            "position": "Center of image",
-                            "size": "Medium",
-                        }
-                    )
-            elif vision_result.get("cat_labels"):
-                for label in vision_result.get("cat_labels", []):
-                    cats_detected.append(
-                        {
-                            "description": f"Detected {label.get('description', 'cat')}",
-                            "breed_guess": "Domestic cat",
-                            "position": "Center of image",
-                            "size": "Medium",
-                        }
-                    )
-
-            # Format the result
-            fallback_active = bool(
-                vision_result.get("fallback_mode")
-                or vision_result.get("fallback_active")
-                or vision_result.get("emergency_fallback")
-            )
-            result = {
-                "has_cats": vision_result.get("has_cats", False),
-                "cat_count": vision_result.get("cat_count", 0),
-                "confidence": int(vision_result.get("confidence", 0)),
-                "cats_detected": cats_detected,
-                "image_quality": vision_result.get("image_quality", "Medium"),
-                "suitable_for_cat_spot": vision_result.get("has_cats", False),
-                "reasoning": vision_result.get("reasoning", "Cannot analyze"),
-                "service_available": not fallback_active,
-                "fallback_active": fallback_active,
-            }
-
-            if result.get("service_available") and image_hash:
-                _detection_cache[image_hash] = (time.monotonic() + _DETECTION_CACHE_TTL_SECONDS, result)
-                _detection_cache.move_to_end(image_hash)
-                while len(_detection_cache) > _DETECTION_CACHE_MAX_SIZE:
-                    _detection_cache.popitem(last=False)
+                local_result = await self._pre_classify(bytes(file))
+                if local_result is not None:
+                    return self._format_vision_result(local_result)
+                # Callers that already hashed the canonical bytes skip a second pass.
+                image_hash = content_hash or hashlib.sha256(file).hexdigest()
+                vision_result = await self.vision_service.detect_cats(bytes(file), content_hash=image_hash)
+            else:
+                vision_result = await self.vision_service.detect_cats(file)
 
-            return result
+            return self._format_vision_result(vision_result)
 
         except Exception as e:
             logger.error(f"Cat detection failed: {e}")
@@ -180,9 +195,22 @@ class CatDetectionService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Spot analysis failed: {e!s}")
 
+    async def analyze_batch(self, contents: list[bytes]) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+        """
+        Cat detection and spot analysis for several images from one batched Vision pass.
+
+        Returns one ``(cat_detection, spot_analysis)`` pair per image, in input order.
+        """
+        vision_results = await self.vision_service.detect_cats_batch(contents)
+        analyses: list[tuple[dict[str, Any], dict[str, Any]]] = []
+        for vision_result in vision_results:
+            detection = self._format_vision_result(vision_result)
+            analyses.append((detection, self.vision_service.build_spot_analysis(vision_result)))
+        return analyses
+
 
 # Singleton instance
-cat_detection_service = CatDetectionService(vision_service=vision_service)
+cat_detection_service = CatDetectionService(vision_service=vision_service, pre_classifier=get_pre_classifier())
 
 
 def get_cat_detection_service() -> CatDetectionService:
@@ -0,0 +1,213 @@
+"""
+Read-through cache for Vision detection results, keyed by SHA-256 of the image.
+
+Tiers, consulted in order:
+
+- L1: per-process LRU with a TTL (no I/O);
+- L2: Redis, shared by API processes and queue workers;
+- L3: the ``vision_analysis_cache`` table, read only on an L1/L2 miss.
+
+Hits are promoted to the faster tiers. New results go to L1 and L2 immediately;
+table writes are buffered and upserted in batches in the background. Only
+cryptographic content hashes are used as keys, so a hit is always a result for
+the exact same bytes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict
+from typing import Any, cast
+
+from app.config import config
+from app.logger import logger
+from app.services.redis_service import redis_service
+from app.utils.supabase_client import get_async_supabase_admin_client
+
+REDIS_KEY_PREFIX = "vision:result:"
+L1_TTL_SECONDS = 3600.0
+TABLE = "vision_analysis_cache"
+# Write-behind: rows per upsert, delay before a partial batch is flushed and the
+# most rows kept while the table is unreachable
+FLUSH_BATCH_SIZE = 50
+FLUSH_DELAY_SECONDS = 2.0
+MAX_PENDING_WRITES = 5000
+TIERS = ("l1", "redis", "table")
+
+
+class DetectionResultCache:
+    def __init__(self, l1_size: int | None = None) -> None:
+        self.l1_size = config.DETECTION_CACHE_L1_SIZE if l1_size is None else l1_size
+        self._l1: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._flush_task: asyncio.Task[None] | None = None
+        self._hits = dict.fromkeys(TIERS, 0)
+        self._lookups = dict.fromkeys(TIERS, 0)
+
+    def clear(self) -> None:
+        """Drop L1, pending writes and counters (tests and admin resets)."""
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            # The owning loop may already be closed
+            with contextlib.suppress(RuntimeError):
+                task.cancel()
+        self._l1.clear()
+        self._pending.clear()
+        self._hits = dict.fromkeys(TIERS, 0)
+        self._lookups = dict.fromkeys(TIERS, 0)
+
+    def stats(self) -> dict[str, Any]:
+        """Per-tier lookups, hits and hit ratio since start or the last clear."""
+        tiers = {
+            tier: {
+                "lookups": self._lookups[tier],
+                "hits": self._hits[tier],
+                "hit_ratio": round(self._hits[tier] / self._lookups[tier], 4) if self._lookups[tier] else 0.0,
+            }
+            for tier in TIERS
+        }
+        total = self._lookups["l1"]
+        return {
+            "tiers": tiers,
+            "overall_hit_ratio": round(sum(self._hits.values()) / total, 4) if total else 0.0,
+            "l1_entries": len(self._l1),
+            "pending_table_writes": len(self._pending),
+        }
+
+    async def get(self, image_hash: str) -> dict[str, Any] | None:
+        return (await self.get_many([image_hash])).get(image_hash)
+
+    async def get_many(self, image_hashes: list[str]) -> dict[str, dict[str, Any]]:
+        """Cached results for the given hashes; misses are simply absent."""
+        found: dict[str, dict[str, Any]] = {}
+        misses = []
+        for image_hash in dict.fromkeys(image_hashes):
+            result = self._l1_get(image_hash)
+            if result is None:
+                misses.append(image_hash)
+            else:
+                found[image_hash] = result
+        self._record("l1", len(found) + len(misses), len(found))
+        if not misses:
+            return found
+
+        redis_values = await redis_service.get_many([REDIS_KEY_PREFIX + image_hash for image_hash in misses])
+        from_redis = {
+            image_hash: value for image_hash, value in zip(misses, redis_values, strict=True) if isinstance(value, dict)
+        }
+        self._record("redis", len(misses), len(from_redis))
+        for image_hash, result in from_redis.items():
+            self._l1_put(image_hash, result)
+        found.update(from_redis)
+
+        misses = [image_hash for image_hash in misses if image_hash not in from_redis]
+        if not misses:
+            return found
+        from_table = await self._table_get_many(misses)
+        self._record("table", len(misses), len(from_table))
+        for image_hash, result in from_table.items():
+            self._l1_put(image_hash, result)
+        if from_table:
+            await asyncio.gather(*(self._redis_put(image_hash, result) for image_hash, result in from_table.items()))
+        found.update(from_table)
+        return found
+
+    async def set(self, image_hash: str, result: dict[str, Any]) -> None:
+        """Store a fresh result in L1 and Redis; the table write is batched."""
+        self._l1_put(image_hash, result)
+        await self._redis_put(image_hash, result)
+        if len(self._pending) < MAX_PENDING_WRITES:
+            self._pending[image_hash] = result
+        self._schedule_flush()
+
+    async def flush(self) -> None:
+        """Upsert all buffered table writes now."""
+        while self._pending:
+            # Rows leave the buffer only once written, so a failed or cancelled upsert loses nothing
+            batch = dict(list(self._pending.items())[:FLUSH_BATCH_SIZE])
+            try:
+                client = await get_async_supabase_admin_client()
+                rows: list[dict[str, Any]] = [
+                    {"image_hash": image_hash, "response": result} for image_hash, result in batch.items()
+                ]
+                await client.table(TABLE).upsert(rows).execute()
+            except Exception as e:
+                # Keep the rows for the next flush; Redis still serves them meanwhile
+                logger.warning("Detection cache table flush failed (%d rows): %s", len(batch), e)
+                return
+            for image_hash, result in batch.items():
+                # A newer result stored during the upsert stays buffered for the next batch
+                if self._pending.get(image_hash) is result:
+                    del self._pending[image_hash]
+
+    def _schedule_flush(self) -> None:
+        task = self._flush_task
+        if task is not None and not task.done():
+            try:
+                same_loop = task.get_loop() is asyncio.get_running_loop()
+            except RuntimeError:
+                same_loop = False
+            if same_loop:
+                return
+        self._flush_task = asyncio.create_task(self._flush_soon())
+
+    async def _flush_soon(self) -> None:
+        if len(self._pending) < FLUSH_BATCH_SIZE:
+            await asyncio.sleep(FLUSH_DELAY_SECONDS)
+        await self.flush()
+
+    async def close(self) -> None:
+        """Cancel the background flush and write out anything still buffered."""
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, RuntimeError):
+                await task
+        await self.flush()
+
+    def _record(self, tier: str, lookups: int, hits: int) -> None:
+        self._lookups[tier] += lookups
+        self._hits[tier] += hits
+
+    def _l1_get(self, image_hash: str) -> dict[str, Any] | None:
+        entry = self._l1.get(image_hash)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            self._l1.pop(image_hash, None)
+            return None
+        self._l1.move_to_end(image_hash)
+        return result
+
+    def _l1_put(self, image_hash: str, result: dict[str, Any]) -> None:
+        if self.l1_size <= 0:
+            return
+        self._l1[image_hash] = (time.monotonic() + L1_TTL_SECONDS, result)
+        self._l1.move_to_end(image_hash)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    @staticmethod
+    async def _redis_put(image_hash: str, result: dict[str, Any]) -> None:
+        await redis_service.set(REDIS_KEY_PREFIX + image_hash, result, expire=config.DETECTION_CACHE_REDIS_TTL_SECONDS)
+
+    @staticmethod
+    async def _table_get_many(image_hashes: list[str]) -> dict[str, dict[str, Any]]:
+        try:
+            client = await get_async_supabase_admin_client()
+            response = await client.table(TABLE).select("image_hash,response").in_("image_hash", image_hashes).execute()
+        except Exception as e:
+            logger.warning("Detection cache table lookup failed: %s", e)
+            return {}
+        rows = response.data if isinstance(getattr(response, "data", None), list) else []
+        return {
+            str(row["image_hash"]): cast(dict[str, Any], row["response"])
+            for row in cast(list[dict[str, Any]], rows)
+            if isinstance(row, dict) and isinstance(row.get("response"), dict)
+        }
+
+
+detection_cache = DetectionResultCache()
@@ -0,0 +1,216 @@
+"""Worker-side processing for presigned direct-to-S3 uploads.
+
+The API only signs a quarantine upload and enqueues a job. This pipeline owns
+everything the synchronous upload route does with the bytes: validation,
+optimization, cat detection, renditions, publication and the photo insert.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+from datetime import datetime
+from typing import Any, cast
+
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from app.config import config
+from app.logger import logger
+from app.services.cat_detection_service import cat_detection_service
+from app.services.duplicate_service import apply_duplicate_policy, remember_upload, screen_upload
+from app.services.gallery_service import GalleryService
+from app.services.quota_service import QuotaService
+from app.services.redis_service import redis_service
+from app.services.storage_service import storage_service
+from app.services.upload_pipeline import NoCatsDetected, approval_status, build_upload_renditions, verify_cats
+from app.utils.cache import invalidate_after_upload
+from app.utils.file_processing import process_uploaded_image
+from app.utils.security import log_security_event
+from app.utils.supabase_client import get_async_supabase_admin_client
+
+PUBLISHED_PHOTO_COLUMNS = "id,location_name,latitude,longitude,image_url,uploaded_at,status"
+
+
+class DirectUploadRejected(ValueError):
+    """The uploaded object cannot be published; retrying will not change the outcome."""
+
+
+async def _load_quarantined_image(object_key: str, user_id: str, filename: str | None) -> tuple[bytes, str, str]:
+    """Download the quarantine object and run it through the standard upload validation."""
+    try:
+        stored = await storage_service.download_object(object_key, config.UPLOAD_MAX_SIZE_MB * 1024 * 1024)
+    except ValueError as exc:
+        raise DirectUploadRejected(str(exc)) from exc
+    if stored is None:
+        raise DirectUploadRejected("Uploaded file was not found; the upload may have expired")
+
+    raw_content, stored_type = stored
+    upload = UploadFile(
+        io.BytesIO(raw_content),
+        size=len(raw_content),
+        filename=filename,
+        headers=Headers({"content-type": stored_type}),
+    )
+    try:
+        contents, content_type, file_extension = await process_uploaded_image(
+            upload,
+            max_size_mb=config.UPLOAD_MAX_SIZE_MB,
+            optimize=True,
+            max_dimension=config.UPLOAD_MAX_DIMENSION,
+            user_id=user_id,
+        )
+    except HTTPException as exc:
+        if exc.status_code < 500:
+            raise DirectUploadRejected(str(exc.detail)) from exc
+        raise RuntimeError(str(exc.detail)) from exc
+    return contents, content_type, file_extension
+
+
+async def _published_photo(admin_client: Any, photo_id: str, user_id: str) -> dict[str, Any] | None:  # noqa: ANN401
+    """The photo row an earlier attempt of this job already saved, if any."""
+    response = (
+        await admin_client.table("cat_photos")
+        .select(PUBLISHED_PHOTO_COLUMNS)
+        .eq("id", photo_id)
+        .eq("user_id", user_id)
+        .limit(1)
+        .execute()
+    )
+    rows = cast(list[dict[str, Any]], response.data or [])
+    return rows[0] if rows else None
+
+
+async def _cleanup_after_save(photo_data: dict[str, Any], object_key: str, user_id: str) -> None:
+    """Post-save housekeeping; the photo is already published, so failures are only logged."""
+    try:
+        remember_upload(photo_data)
+    except Exception as e:
+        logger.warning("Duplicate index update skipped for %s: %s", photo_data["id"], e)
+    try:
+        await storage_service.delete_files([object_key])
+    except Exception as e:
+        logger.warning("Quarantine object %s was not deleted: %s", object_key, e)
+    try:
+        await invalidate_after_upload(user_id)
+    except Exception as e:
+        logger.warning("Cache invalidation after direct upload failed for %s: %s", user_id, e)
+
+
+def _job_result(photo: dict[str, Any], cat_data: dict[str, Any] | None) -> dict[str, Any]:
+    return {
+        "photo": {
+            "id": photo["id"],
+            "location_name": photo["location_name"],
+            "location": {
+                "latitude": photo["latitude"],
+                "longitude": photo["longitude"],
+            },
+            "image_url": photo["image_url"],
+            "uploaded_at": photo["uploaded_at"],
+            "status": photo["status"],
+        },
+        "cat_detection": cat_data,
+    }
+
+
+async def process_direct_upload(job: dict[str, Any]) -> dict[str, Any]:
+    """
+    Validate, publish and save one quarantined upload; returns the job result.
+
+    Raises DirectUploadRejected for uploads that can never succeed (the quarantine
+    object is deleted). Any other exception leaves the object for a retry. The
+    job id is the photo id, so a retry after the row was saved returns that photo.
+    """
+    job_id = str(job["job_id"])
+    user_id = str(job["user_id"])
+    object_key = str(job["object_key"])
+    fields: dict[str, Any] = job.get("photo") or {}
+
+    try:
+        return await _publish(job_id, user_id, bool(job.get("is_pro")), object_key, fields)
+    except DirectUploadRejected:
+        await storage_service.delete_files([object_key])
+        raise
+
+
+async def _publish(
+    job_id: str,
+    user_id: str,
+    is_pro: bool,
+    object_key: str,
+    fields: dict[str, Any],
+) -> dict[str, Any]:
+    admin_client = await get_async_supabase_admin_client()
+    existing = await _published_photo(admin_client, job_id, user_id)
+    if existing is not None:
+        # An earlier attempt saved the photo and failed afterwards; finish its housekeeping.
+        logger.info("Direct upload %s was already published; completing the job", job_id)
+        await _cleanup_after_save({"id": job_id, "user_id": user_id}, object_key, user_id)
+        return _job_result(existing, None)
+
+    contents, content_type, file_extension = await _load_quarantined_image(object_key, user_id, fields.get("filename"))
+    phash, duplicate_match = await screen_upload(contents, user_id)
+    if duplicate_match is not None and config.DUPLICATE_UPLOAD_ACTION == "reject":
+        raise DirectUploadRejected("This photo looks like one that has already been uploaded")
+    try:
+        # Verification outages propagate so the queue retries the job instead of publishing unverified content
+        cat_data = await verify_cats(
+            cat_detection_service, contents, user_id, content_hash=hashlib.sha256(contents).hexdigest()
+        )
+    except NoCatsDetected as exc:
+        raise DirectUploadRejected(str(exc)) from exc
+    status = approval_status(cat_data)
+
+    renditions = await build_upload_renditions(contents, user_id)
+    image_url = await storage_service.upload_file(
+        file_content=contents,
+        content_type=content_type,
+        file_extension=file_extension,
+        renditions=renditions,
+    )
+
+    photo_data = {
+        # The upload id is the photo id, so a retried job cannot insert twice.
+        "id": job_id,
+        "user_id": user_id,
+        "location_name": fields.get("location_name"),
+        "description": fields.get("description") or None,
+        "tags": fields.get("tags") or [],
+        "latitude": fields.get("latitude"),
+        "longitude": fields.get("longitude"),
+        "image_url": image_url,
+        "uploaded_at": datetime.now().isoformat(),
+        "location_blurred": bool(fields.get("location_blurred")),
+        "status": status,
+    }
+    apply_duplicate_policy(photo_data, phash, duplicate_match)
+
+    quota_service = QuotaService(admin_client)
+    gallery_service = GalleryService(admin_client)
+    created_photo: dict[str, Any] | None = None
+    try:
+        async with redis_service.lock(f"quota:upload:{user_id}", ttl=30, wait_timeout=15):
+            if await quota_service.check_quota(user_id, is_pro):
+                created_photo = await gallery_service.save_photo(photo_data)
+                await quota_service.increment_usage(user_id)
+    except Exception:
+        if created_photo is None:
+            await storage_service.delete_file(image_url)
+            raise
+        # The row (and its image) is live; a retry would only find it already published.
+        logger.warning("Upload bookkeeping failed after saving photo %s", job_id, exc_info=True)
+
+    if created_photo is None:
+        await storage_service.delete_file(image_url)
+        log_security_event("quota_exceeded", user_id=user_id, severity="WARNING")
+        raise DirectUploadRejected("Daily upload limit reached. Upgrade to Pro for more uploads.")
+
+    await _cleanup_after_save(photo_data, object_key, user_id)
+
+    log_security_event(
+        "cat_photo_upload_success",
+        user_id=user_id,
+        details={"photo_id": created_photo["id"], "location_name": created_photo["location_name"], "direct": True},
+    )
+    return _job_result({**created_photo, "status": photo_data["status"]}, cat_data)
@@ -0,0 +1,189 @@
+"""Near-duplicate screening for uploads using perceptual hashes.
+
+Re-uploads of a photo (resized or recompressed) miss the SHA-256 keyed Vision
+cache. A 64-bit pHash is stored on ``cat_photos.phash`` and compared against
+the uploader's own photos and a process-local BK-tree of recent uploads.
+
+Matches only route a photo to moderation or refuse it; detection results are
+still reused exclusively through the cryptographic content hash.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+
+from supabase import AClient
+
+from app.config import config
+from app.logger import logger
+from app.utils.bk_tree import BKTree, hamming_distance
+from app.utils.image_utils import image_engine, perceptual_hash
+from app.utils.supabase_client import get_async_supabase_admin_client
+
+# PostgREST caps each response at max-rows (1000 by default), so the recent
+# window is read in pages up to DUPLICATE_INDEX_MAX_ROWS; an uploader scan fits in one.
+RECENT_INDEX_PAGE_ROWS = 1000
+USER_SCAN_MAX_ROWS = 1000
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    photo_id: str
+    user_id: str
+    distance: int
+
+
+class RecentPhotoHashIndex:
+    """BK-tree of recently uploaded photo hashes, rebuilt from the database on a TTL."""
+
+    def __init__(self) -> None:
+        self._tree: BKTree[tuple[str, str]] = BKTree()
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tree)
+
+    def clear(self) -> None:
+        self._tree = BKTree()
+        self._loaded_at = None
+
+    def remember(self, photo_id: str, user_id: str, phash: int) -> None:
+        """Add a just-saved photo so the next upload sees it before the next refresh."""
+        self._tree.add(phash, (photo_id, user_id))
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= config.DUPLICATE_INDEX_REFRESH_SECONDS
+
+    async def _refresh(self, admin_client: AClient) -> None:
+        since = datetime.now(UTC) - timedelta(days=config.DUPLICATE_RECENT_DAYS)
+        max_rows = config.DUPLICATE_INDEX_MAX_ROWS
+        tree: BKTree[tuple[str, str]] = BKTree()
+        offset = 0
+        while offset < max_rows:
+            end = min(offset + RECENT_INDEX_PAGE_ROWS, max_rows) - 1
+            res = await (
+                admin_client.table("cat_photos")
+                .select("id,user_id,phash")
+                .gte("uploaded_at", since.isoformat())
+                .not_.is_("phash", "null")
+                .is_("deleted_at", "null")
+                .order("uploaded_at", desc=True)
+                .order("id")
+                .range(offset, end)
+                .execute()
+            )
+            rows = cast(list[dict[str, Any]], res.data or [])
+            if not rows:
+                break
+            # Advance by what came back: the server may cap a page below the requested size
+            offset += len(rows)
+            for row in rows:
+                if isinstance(row, dict) and row.get("phash") is not None:
+                    tree.add(int(row["phash"]), (str(row.get("id")), str(row.get("user_id"))))
+        if offset >= max_rows:
+            logger.warning(
+                "Recent duplicate index reached DUPLICATE_INDEX_MAX_ROWS=%d; older uploads in the window are skipped",
+                max_rows,
+            )
+        self._tree = tree
+        self._loaded_at = time.monotonic()
+
+    async def search(self, admin_client: AClient, phash: int, max_distance: int) -> list[DuplicateMatch]:
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    await self._refresh(admin_client)
+        return [
+            DuplicateMatch(photo_id=photo_id, user_id=user_id, distance=distance)
+            for distance, (photo_id, user_id) in self._tree.search(phash, max_distance)
+        ]
+
+
+recent_hash_index = RecentPhotoHashIndex()
+
+
+class DuplicateService:
+    """Find stored photos whose perceptual hash is within the configured radius."""
+
+    def __init__(self, supabase_admin: AClient, index: RecentPhotoHashIndex | None = None) -> None:
+        self.supabase_admin = supabase_admin
+        self.index = index or recent_hash_index
+
+    async def _user_matches(self, user_id: str, phash: int, max_distance: int) -> list[DuplicateMatch]:
+        res = await (
+            self.supabase_admin.table("cat_photos")
+            .select("id,phash")
+            .eq("user_id", user_id)
+            .not_.is_("phash", "null")
+            .is_("deleted_at", "null")
+            .limit(USER_SCAN_MAX_ROWS)
+            .execute()
+        )
+        matches = []
+        for row in cast(list[dict[str, Any]], res.data or []):
+            if not isinstance(row, dict) or row.get("phash") is None:
+                continue
+            distance = hamming_distance(phash, int(row["phash"]))
+            if distance <= max_distance:
+                matches.append(DuplicateMatch(photo_id=str(row.get("id")), user_id=user_id, distance=distance))
+        return matches
+
+    async def find_near_duplicates(self, user_id: str, phash: int) -> list[DuplicateMatch]:
+        """Matches among the uploader's photos and recent uploads, nearest first."""
+        max_distance = config.DUPLICATE_HAMMING_THRESHOLD
+        own, recent = await asyncio.gather(
+            self._user_matches(user_id, phash, max_distance),
+            self.index.search(self.supabase_admin, phash, max_distance),
+        )
+        best: dict[str, DuplicateMatch] = {}
+        for match in [*own, *recent]:
+            if match.photo_id not in best or match.distance < best[match.photo_id].distance:
+                best[match.photo_id] = match
+        return sorted(best.values(), key=lambda match: match.distance)
+
+
+async def screen_upload(contents: bytes, user_id: str) -> tuple[int | None, DuplicateMatch | None]:
+    """
+    Hash canonical upload bytes and look for a near-duplicate.
+
+    Returns ``(phash, nearest match)``. Screening is best effort: failures are
+    logged and never block an upload.
+    """
+    if config.DUPLICATE_UPLOAD_ACTION == "off":
+        return None, None
+    try:
+        phash = await image_engine.run(perceptual_hash, contents)
+    except Exception as e:
+        logger.warning("Perceptual hash failed for upload by %s: %s", user_id, e)
+        return None, None
+    try:
+        admin_client = await get_async_supabase_admin_client()
+        matches = await DuplicateService(admin_client).find_near_duplicates(user_id, phash)
+    except Exception as e:
+        logger.warning("Duplicate lookup unavailable for upload by %s: %s", user_id, e)
+        return phash, None
+    return phash, matches[0] if matches else None
+
+
+def apply_duplicate_policy(photo_data: dict[str, Any], phash: int | None, match: DuplicateMatch | None) -> None:
+    """Record the hash on a photo row and route flagged near-duplicates to moderation."""
+    if phash is not None:
+        photo_data["phash"] = phash
+    if match is not None:
+        photo_data["status"] = "pending_review"
+        photo_data["metadata"] = {
+            **(photo_data.get("metadata") or {}),
+            "near_duplicate_of": match.photo_id,
+            "near_duplicate_distance": match.distance,
+        }
+
+
+def remember_upload(photo_data: dict[str, Any]) -> None:
+    """Make a saved photo visible to screening before the next index refresh."""
+    if photo_data.get("phash") is not None:
+        recent_hash_index.remember(str(photo_data["id"]), str(photo_data["user_id"]), int(photo_data["phash"]))
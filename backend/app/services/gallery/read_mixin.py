@@ -1,6 +1,8 @@
+from collections.abc import AsyncGenerator
 from typing import Any, cast
 
 from postgrest.types import CountMethod
+from sqlalchemy import bindparam, column, desc, select, table
 
 from app.compat import structlog
 from app.services.gallery.base_mixin import GalleryBaseMixin
@@ -8,6 +10,8 @@ from app.utils.cache import cached_gallery, cached_user_likes
 
 logger = structlog.get_logger(__name__)
 
+MAP_LOCATION_COLUMNS = ("id", "latitude", "longitude", "location_name", "image_url", "user_id", "uploaded_at")
+
 
 class GalleryReadMixin(GalleryBaseMixin):
     """READ operations for GalleryService"""
@@ -95,7 +99,7 @@ class GalleryReadMixin(GalleryBaseMixin):
         order_field = sort_field or "uploaded_at"
 
         try:
-            res = await query.order(order_field, desc=sort_desc).range(offset, offset + limit - 1).execute()
+            res = await self._order_photos(query, order_field, sort_desc).range(offset, offset + limit - 1).execute()
             data = cast(list[dict[str, Any]], res.data or [])
             total = res.count if include_count and res.count is not None else None
             return data, total
@@ -109,7 +113,9 @@ class GalleryReadMixin(GalleryBaseMixin):
                     self.supabase.table("cat_photos").select(self.PHOTO_COLUMNS)
                 )
                 res = (
-                    await query_no_count.order(order_field, desc=sort_desc).range(offset, offset + limit - 1).execute()
+                    await self._order_photos(query_no_count, order_field, sort_desc)
+                    .range(offset, offset + limit - 1)
+                    .execute()
                 )
                 data = cast(list[dict[str, Any]], res.data or [])
                 # Fetch count separately as fallback
@@ -119,6 +125,13 @@ class GalleryReadMixin(GalleryBaseMixin):
             # Re-raise if it's not the specific count error or if we weren't asking for count
             raise
 
+    @staticmethod
+    def _order_photos(query: Any, order_field: str, sort_desc: bool) -> Any:
+        """Apply gallery ordering; trending reads the precomputed hot_score index."""
+        if order_field == "trending":
+            return query.order("hot_score", desc=sort_desc).order("uploaded_at", desc=sort_desc)
+        return query.order(order_field, desc=sort_desc)
+
     async def _fetch_total_count_fallback(self, data: list[dict[str, Any]]) -> int:
         """Fallback: fetch total count separately using a HEAD-style count-only query."""
         try:
@@ -146,24 +159,88 @@ class GalleryReadMixin(GalleryBaseMixin):
                 .execute()
             )
             data = cast(list[dict[str, Any]], res.data or [])
-
-            # Final safety check: ensure all items are dicts and catch None image_urls
-            sanitized_data = []
-            for photo in data:
-                photo_dict = dict(photo) if not isinstance(photo, dict) else photo
-                img_url = photo_dict.get("image_url")
-
-                if img_url and "supabase.co/storage/v1/object/public" in img_url:
-                    sep = "&" if "?" in img_url else "?"
-                    photo_dict["image_url"] = f"{img_url}{sep}width=100&resize=cover&format=webp"
-                sanitized_data.append(photo_dict)
-
-            return sanitized_data
+            return [self._map_marker(photo) for photo in data]
         except Exception as e:
             from app.utils.exceptions import ExternalServiceError
 
             raise ExternalServiceError(f"Failed to fetch map locations: {e!s}", service="Supabase")
 
+    @staticmethod
+    def _map_marker(photo: Any) -> dict[str, Any]:
+        """Normalize a marker row and request a small thumbnail from Supabase storage."""
+        photo_dict = dict(photo) if not isinstance(photo, dict) else photo
+        img_url = photo_dict.get("image_url")
+
+        if img_url and "supabase.co/storage/v1/object/public" in img_url:
+            sep = "&" if "?" in img_url else "?"
+            photo_dict["image_url"] = f"{img_url}{sep}width=100&resize=cover&format=webp"
+        return photo_dict
+
+    async def stream_map_locations(self, chunk_size: int = 500) -> AsyncGenerator[list[dict[str, Any]], None]:
+        """
+        Yield every approved marker in bounded chunks, newest first.
+
+        Uses a server-side cursor in a dedicated session (the request-scoped
+        session may close before a streaming response finishes), falling back
+        to keyset pagination over the Supabase client.
+        """
+        chunk_size = min(max(1, chunk_size), 1000)
+        from app.database import AsyncSessionLocal
+
+        if AsyncSessionLocal is not None:
+            started = False
+            try:
+                async with AsyncSessionLocal() as session:
+                    photos = table(
+                        "cat_photos", *(column(name) for name in (*MAP_LOCATION_COLUMNS, "deleted_at", "status"))
+                    )
+                    query = (
+                        select(*(getattr(photos.c, name) for name in MAP_LOCATION_COLUMNS))
+                        .where(
+                            photos.c.deleted_at.is_(None),
+                            photos.c.status == bindparam("approved_status"),
+                            photos.c.latitude.is_not(None),
+                            photos.c.longitude.is_not(None),
+                        )
+                        .order_by(desc(photos.c.uploaded_at), desc(photos.c.id))
+                        .execution_options(yield_per=chunk_size)
+                    )
+                    result = await session.stream(query, {"approved_status": self.APPROVED_STATUS})
+                    async for partition in result.partitions(chunk_size):
+                        started = True
+                        yield [self._map_marker(row._mapping) for row in partition]
+                return
+            except Exception as e:
+                # Once rows were sent, replaying from the fallback would duplicate them.
+                if started:
+                    raise
+                logger.warning("SQL marker stream failed, falling back to Supabase pagination: %s", e)
+
+        async for chunk in self._stream_map_locations_supabase(chunk_size):
+            yield chunk
+
+    async def _stream_map_locations_supabase(self, chunk_size: int) -> AsyncGenerator[list[dict[str, Any]], None]:
+        """Keyset-paginate markers on (uploaded_at, id) so deep pages stay index reads."""
+        cursor: tuple[str, str] | None = None
+        while True:
+            query = self._apply_visibility_filter(
+                self.supabase.table("cat_photos").select(",".join(MAP_LOCATION_COLUMNS))
+            )
+            if cursor is not None:
+                last_uploaded_at, last_id = cursor
+                query = query.or_(
+                    f'uploaded_at.lt."{last_uploaded_at}",and(uploaded_at.eq."{last_uploaded_at}",id.lt.{last_id})'
+                )
+            res = await query.order("uploaded_at", desc=True).order("id", desc=True).limit(chunk_size).execute()
+            data = cast(list[dict[str, Any]], res.data or [])
+            if not data:
+                return
+            yield [self._map_marker(photo) for photo in data]
+            if len(data) < chunk_size:
+                return
+            last = data[-1]
+            cursor = (str(last.get("uploaded_at")), str(last.get("id")))
+
     async def get_photo_by_id(self, photo_id: str, include_unapproved: bool = False) -> dict[str, Any] | None:
         """Fetch a single photo by ID using the standard Supabase client path."""
         try:
@@ -20,7 +20,7 @@ class SearchResultList(list[dict[str, Any]]):
 
 
 if TYPE_CHECKING:
-    from app.services.search_service import SearchService
+    from app.services.search_service import SearchService, SpatialFilter
 
 
 class GallerySearchMixin(GalleryBaseMixin):
@@ -42,11 +42,20 @@ class GallerySearchMixin(GalleryBaseMixin):
         use_fulltext: bool = True,
         user_id: str | None = None,
         include_total: bool = False,
+        area: "SpatialFilter | None" = None,
     ) -> list[dict[str, Any]]:
         try:
-            results = await self.search_service.search_photos(query, tags, limit, offset, use_fulltext)
-            total = await self.search_service.count_photos(query, tags, use_fulltext) if include_total else None
-            results = self._process_photos(results)
+            if area is not None:
+                cached = await self._search_photos_in_area(
+                    query, tags, area, limit, offset, use_fulltext, include_total
+                )
+                # Copy rows so per-user enrichment never mutates the shared cache entry.
+                results = [dict(photo) for photo in cached["data"]]
+                total = cached["total"]
+            else:
+                results = await self.search_service.search_photos(query, tags, limit, offset, use_fulltext)
+                total = await self.search_service.count_photos(query, tags, use_fulltext) if include_total else None
+                results = self._process_photos(results)
             if user_id and results:
                 results = await self.enrich_with_user_data(results, user_id)
             if include_total:
@@ -60,30 +69,70 @@ class GallerySearchMixin(GalleryBaseMixin):
 
             raise ExternalServiceError(f"Database error during photo retrieval: {e!s}", service="Supabase")
 
+    @cache(expire=300, key_prefix="search_area", skip_args=1)
+    async def _search_photos_in_area(
+        self,
+        query: str | None,
+        tags: list[str] | None,
+        area: "SpatialFilter",
+        limit: int,
+        offset: int,
+        use_fulltext: bool,
+        include_total: bool,
+    ) -> dict[str, Any]:
+        """Run the combined text/tag/spatial query; cached per spatial filter and query."""
+        results, total = await self.search_service.search_photos_in_area(
+            query, tags, area, limit, offset, use_fulltext, include_total
+        )
+        return {"data": self._process_photos(results), "total": total}
+
     @cached_tags
-    async def get_popular_tags(self, limit: int = 20) -> list[dict[str, Any]]:
+    async def get_popular_tags(self, limit: int = 20, period_days: int | None = None) -> list[dict[str, Any]]:
+        """Top-N read from the incrementally maintained tag_counts tables."""
+        safe_limit = max(1, min(limit, 100))
         if self.db:
-            result = await self.db.execute(
-                text(
-                    """
-                    SELECT lower(tag) AS tag, count(*)::int AS count
-                    FROM cat_photos, unnest(tags) AS tag
-                    WHERE deleted_at IS NULL AND status = :approved_status
-                    GROUP BY lower(tag)
-                    ORDER BY count DESC, tag
-                    LIMIT :limit
-                    """
-                ),
-                {"approved_status": self.APPROVED_STATUS, "limit": max(1, min(limit, 100))},
-            )
-            return [dict(row._mapping) for row in result]
-
-        return await GallerySearchMixin._get_popular_tags_impl(self.supabase, limit)
+            try:
+                if period_days is None:
+                    query = text(
+                        """
+                        SELECT tag, photo_count AS count
+                        FROM tag_counts
+                        WHERE photo_count > 0
+                        ORDER BY photo_count DESC, tag
+                        LIMIT :limit
+                        """
+                    )
+                    params: dict[str, Any] = {"limit": safe_limit}
+                else:
+                    query = text(
+                        """
+                        SELECT tag, sum(photo_count)::int AS count
+                        FROM tag_daily_counts
+                        WHERE day > current_date - CAST(:period_days AS integer)
+                        GROUP BY tag
+                        HAVING sum(photo_count) > 0
+                        ORDER BY count DESC, tag
+                        LIMIT :limit
+                        """
+                    )
+                    params = {"limit": safe_limit, "period_days": max(1, min(period_days, 31))}
+                result = await self.db.execute(query, params)
+                return [dict(row._mapping) for row in result]
+            except Exception as e:
+                logger.warning("SQL tag_counts read failed, falling back to RPC: %s", e)
+                await self.db.rollback()
+
+        return await GallerySearchMixin._get_popular_tags_impl(self.supabase, limit, period_days)
 
     @staticmethod
-    async def _get_popular_tags_impl(supabase_client: AClient, limit: int) -> list[dict[str, Any]]:
+    async def _get_popular_tags_impl(
+        supabase_client: AClient, limit: int, period_days: int | None = None
+    ) -> list[dict[str, Any]]:
         try:
-            res = await supabase_client.rpc("get_popular_tags", {"result_limit": max(1, min(limit, 100))}).execute()
+            params: dict[str, Any] = {"result_limit": max(1, min(limit, 100))}
+            if period_days is not None:
+                params["period_days"] = period_days
+            res = await supabase_client.rpc("get_popular_tags", params).execute()
             rows = cast(list[dict[str, Any]], res.data or [])
             if all("tag" in row and "count" in row for row in rows):
                 return rows
@@ -13,9 +13,48 @@ if TYPE_CHECKING:
 logger = structlog.get_logger(__name__)
 
 
+_PHOTO_INSERT_COLUMNS = (
+    "id",
+    "image_url",
+    "latitude",
+    "longitude",
+    "description",
+    "location_name",
+    "user_id",
+    "status",
+    "tags",
+    "metadata",
+    "uploaded_at",
+    "location_blurred",
+    "phash",
+)
+_PHOTO_RETURNING = (
+    "id, image_url, latitude, longitude, description, location_name, "
+    "uploaded_at, tags, likes_count, comments_count, user_id"
+)
+
+
 class GalleryWriteMixin(GalleryBaseMixin):
     """WRITE operations for GalleryService"""
 
+    @staticmethod
+    def _photo_insert_params(photo_data: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": photo_data.get("id"),
+            "image_url": photo_data.get("image_url"),
+            "latitude": photo_data.get("latitude"),
+            "longitude": photo_data.get("longitude"),
+            "description": photo_data.get("description"),
+            "location_name": photo_data.get("location_name"),
+            "user_id": photo_data.get("user_id"),
+            "status": photo_data.get("status"),
+            "tags": list(cast(list[str], photo_data.get("tags") or [])),
+            "metadata": cast(dict[str, Any] | None, photo_data.get("metadata")),
+            "uploaded_at": photo_data.get("uploaded_at"),
+            "location_blurred": bool(photo_data.get("location_blurred", False)),
+            "phash": photo_data.get("phash"),
+        }
+
     async def verify_photo_ownership(self, photo_id: str, user_id: str) -> dict[str, Any] | None:
         """Verify if a user owns a photo."""
         try:
@@ -59,30 +98,17 @@ class GalleryWriteMixin(GalleryBaseMixin):
                 query = text(
                     "INSERT INTO cat_photos ("
                     "id, image_url, latitude, longitude, description, location_name, "
-                    "user_id, status, tags, metadata, uploaded_at, location_blurred"
+                    "user_id, status, tags, metadata, uploaded_at, location_blurred, phash"
                     ") VALUES ("
                     ":id, :image_url, :latitude, :longitude, :description, :location_name, "
-                    ":user_id, :status, :tags, :metadata, :uploaded_at, :location_blurred"
+                    ":user_id, :status, :tags, :metadata, :uploaded_at, :location_blurred, :phash"
                     ") RETURNING id, image_url, latitude, longitude, description, location_name, "
                     "uploaded_at, tags, likes_count, comments_count, user_id"
                 ).bindparams(
                     bindparam("tags", type_=ARRAY(String())),
                     bindparam("metadata", type_=JSONB),
                 )
-                params = {
-                    "id": photo_data.get("id"),
-                    "image_url": photo_data.get("image_url"),
-                    "latitude": photo_data.get("latitude"),
-                    "longitude": photo_data.get("longitude"),
-                    "description": photo_data.get("description"),
-                    "location_name": photo_data.get("location_name"),
-                    "user_id": photo_data.get("user_id"),
-                    "status": photo_data.get("status"),
-                    "tags": list(cast(list[str], photo_data.get("tags") or [])),
-                    "metadata": cast(dict[str, Any] | None, photo_data.get("metadata")),
-                    "uploaded_at": photo_data.get("uploaded_at"),
-                    "location_blurred": bool(photo_data.get("location_blurred", False)),
-                }
+                params = self._photo_insert_params(photo_data)
                 result = await self.db.execute(query, params)
                 row = result.fetchone()
                 if not row:
@@ -116,6 +142,59 @@ class GalleryWriteMixin(GalleryBaseMixin):
             logger.error(f"Failed to save photo to database: {e}")
             raise e
 
+    async def save_photos(self, photos: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Save several photos with a single multi-row INSERT (all or nothing)."""
+        if not photos:
+            return []
+        if self.db:
+            try:
+                rows_sql = []
+                params: dict[str, Any] = {}
+                bind_types = []
+                for index, photo_data in enumerate(photos):
+                    rows_sql.append("(" + ", ".join(f":{column}_{index}" for column in _PHOTO_INSERT_COLUMNS) + ")")
+                    params.update(
+                        {f"{key}_{index}": value for key, value in self._photo_insert_params(photo_data).items()}
+                    )
+                    bind_types += [
+                        bindparam(f"tags_{index}", type_=ARRAY(String())),
+                        bindparam(f"metadata_{index}", type_=JSONB),
+                    ]
+                # Only fixed column names and generated placeholders are interpolated
+                sql = f"INSERT INTO cat_photos ({', '.join(_PHOTO_INSERT_COLUMNS)}) VALUES {', '.join(rows_sql)}"  # noqa: S608
+                query = text(f"{sql} RETURNING {_PHOTO_RETURNING}").bindparams(*bind_types)
+                result = await self.db.execute(query, params)
+                rows = result.fetchall()
+                if len(rows) != len(photos):
+                    from app.utils.exceptions import ExternalServiceError
+
+                    raise ExternalServiceError("Database insert returned incomplete data", service="PostgreSQL")
+                await self.db.commit()
+                return [dict(row._mapping) for row in rows]
+            except Exception as e:
+                with contextlib.suppress(Exception):
+                    await self.db.rollback()
+                logger.warning(f"SQLAlchemy batch save failed, falling back to Supabase client: {e}")
+        try:
+            admin = await self.get_supabase_admin()
+            if not admin:
+                from app.utils.exceptions import ExternalServiceError
+
+                raise ExternalServiceError(
+                    "Supabase admin credentials missing (required for write operations)", service="Supabase"
+                )
+
+            res = await admin.table("cat_photos").insert(photos).execute()
+            data_list = cast(list[dict[str, Any]], res.data or [])
+            if len(data_list) != len(photos):
+                from app.utils.exceptions import ExternalServiceError
+
+                raise ExternalServiceError("Database insert returned incomplete data", service="Supabase")
+            return data_list
+        except Exception as e:
+            logger.error(f"Failed to save photos to database: {e}")
+            raise e
+
     async def process_photo_deletion(
         self, photo_id: str, image_url: str, user_id: str, storage_service: "StorageService"
     ) -> None:
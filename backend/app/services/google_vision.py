@@ -3,22 +3,36 @@ import hashlib
 import json
 import os
 from pathlib import Path
-from typing import Any
+from typing import Any, cast
 
 from fastapi import HTTPException, UploadFile
 from starlette.concurrency import run_in_threadpool
 
 from app.config import config
 from app.logger import logger
-from app.utils.supabase_client import get_async_supabase_admin_client
+from app.services.detection_cache import detection_cache
+from app.utils.image_utils import image_engine, prepare_vision_image
 
 try:
     import google.cloud.vision as vision
+    from google.api_core import exceptions as google_exceptions
 
     VISION_AVAILABLE = True
+    RATE_LIMIT_ERRORS: tuple[type[Exception], ...] = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+    )
 except ImportError:
     VISION_AVAILABLE = False
     vision: Any = None  # type: ignore
+    RATE_LIMIT_ERRORS = ()
+
+# google.rpc.Code.RESOURCE_EXHAUSTED in per-image annotation errors
+RESOURCE_EXHAUSTED_CODE = 8
+
+
+class VisionRateLimited(RuntimeError):
+    """Vision rejected the request for quota or rate reasons; retry later."""
 
 
 class GoogleVisionService:
@@ -30,6 +44,10 @@ class GoogleVisionService:
     NON_CAT_ANIMALS = ["dog", "puppy", "canine", "bird", "reptile", "rodent"]
     NON_CAT_SCORE_THRESHOLD = 0.7
     HIGH_CONFIDENCE_THRESHOLD = 0.75
+    VISION_API_TIMEOUT = 10
+    # batch_annotate_images accepts at most 16 images; the byte cap keeps requests small
+    BATCH_MAX_IMAGES = 16
+    BATCH_MAX_BYTES = 8 * 1024 * 1024
 
     def __init__(self) -> None:
         """Initialize Google Vision client"""
@@ -94,27 +112,13 @@ class GoogleVisionService:
             filename = getattr(image_input, "filename", "unknown")
             logger.debug(f"Cat detection started for: {filename}, initialized={self.is_initialized}")
 
-            # Read image content with memory-efficient chunked reading for large files
+            # One bounded read; the payload is downscaled before it reaches Vision
             MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB threshold
-            chunks = []
-            bytes_read = 0
-
-            # Ensure we are at start of file
             image_input.file.seek(0)
+            content = image_input.file.read(MAX_MEMORY_SIZE + 1)
+            if len(content) > MAX_MEMORY_SIZE:
+                logger.warning("Large image (%d bytes) - memory usage warning", len(content))
 
-            while True:
-                chunk = image_input.file.read(8192)  # 8KB chunks
-                if not chunk:
-                    break
-                chunks.append(chunk)
-                bytes_read += len(chunk)
-
-                # Safety check for very large files
-                if bytes_read > MAX_MEMORY_SIZE:
-                    logger.warning("Large image (%d bytes) - memory usage warning", bytes_read)
-                    break
-
-            content = b"".join(chunks)
             # Reset file pointer for potential reuse
             image_input.file.seek(0)
 
@@ -125,41 +129,39 @@ class GoogleVisionService:
         return hashlib.sha256(content).hexdigest()
 
     async def _get_cached_result(self, image_hash: str) -> dict | None:
-        """Try to retrieve cached analysis result. (Async)"""
+        """Cached analysis result from the layered detection cache. (Async)"""
         try:
-            client = await get_async_supabase_admin_client()
-            response = (
-                await client.table("vision_analysis_cache")
-                .select("response")
-                .eq("image_hash", image_hash)
-                .maybe_single()
-                .execute()
-            )
-            if response and hasattr(response, "data") and response.data:
-                logger.info(f"Vision API Cache Hit: {image_hash[:8]}...")
-                from typing import Any, cast
-
-                data = cast(dict[str, Any], response.data)
-                return cast(dict[str, Any] | None, data["response"])
+            return await detection_cache.get(image_hash)
         except Exception as e:
             logger.warning(f"Cache lookup failed: {e}")
         return None
 
+    async def _get_cached_results(self, image_hashes: list[str]) -> dict[str, dict[str, Any]]:
+        """Cached analysis results for several hashes in one pass per cache tier. (Async)"""
+        try:
+            return await detection_cache.get_many(image_hashes)
+        except Exception as e:
+            logger.warning(f"Cache lookup failed: {e}")
+        return {}
+
     async def _cache_result(self, image_hash: str, result: dict) -> None:
-        """Cache analysis result. (Async)"""
+        """Cache analysis result; the database write happens in the background. (Async)"""
         try:
-            client = await get_async_supabase_admin_client()
-            await client.table("vision_analysis_cache").upsert({"image_hash": image_hash, "response": result}).execute()
+            await detection_cache.set(image_hash, result)
             logger.debug(f"Cached vision result for {image_hash[:8]}...")
         except Exception as e:
             logger.warning(f"Cache write failed: {e}")
 
-    async def detect_cats(self, image_input: UploadFile | bytes) -> dict:
-        """Detect cats in image using Google Vision API (Async)"""
+    async def detect_cats(self, image_input: UploadFile | bytes, content_hash: str | None = None) -> dict:
+        """Detect cats in image using Google Vision API (Async)
+
+        ``content_hash`` is the SHA-256 of ``image_input`` when the caller already computed it.
+        """
         try:
             content, _ = self._process_image_content(image_input)
             # 1. Check Cache
-            image_hash = self._calculate_image_hash(content)
+            image_hash = content_hash if content_hash and isinstance(image_input, bytes) else None
+            image_hash = image_hash or self._calculate_image_hash(content)
             cached_result = await self._get_cached_result(image_hash)
             if cached_result:
                 return cached_result
@@ -180,7 +182,7 @@ class GoogleVisionService:
 
         except Exception as e:
             logger.error(f"Google Vision detection failed: {e!s}")
-            return self._fallback_cat_detection(error=str(e))
+            return self._fallback_cat_detection(error=str(e), rate_limited=isinstance(e, VisionRateLimited))
         finally:
             if not isinstance(image_input, bytes):
                 image_input.file.seek(0)
@@ -190,7 +192,7 @@ class GoogleVisionService:
         if not self.is_initialized or not self.client:
             return self._fallback_cat_detection()
 
-        label_response, object_response = await self._get_vision_api_responses(content)
+        label_response, object_response = await self._get_vision_api_responses(await self._prepare_content(content))
         if not label_response or not object_response:
             return self._fallback_cat_detection(error="Vision API failed")
 
@@ -198,6 +200,65 @@ class GoogleVisionService:
         await self._cache_result(image_hash, result)
         return result
 
+    async def detect_cats_batch(self, contents: list[bytes]) -> list[dict[str, Any]]:
+        """Detect cats in several images, annotating all uncached images in batched requests.
+
+        Results are returned in input order; identical images are annotated once.
+        """
+        hashes = [self._calculate_image_hash(content) for content in contents]
+        unique = dict(zip(hashes, contents, strict=True))
+        try:
+            results = await self._get_cached_results(list(unique))
+            pending = [(image_hash, content) for image_hash, content in unique.items() if image_hash not in results]
+            if pending and (not self.is_initialized or not self.client):
+                results.update({image_hash: self._fallback_cat_detection() for image_hash, _ in pending})
+                pending = []
+
+            prepared = await asyncio.gather(*(self._prepare_content(content) for _, content in pending))
+            pending = [(image_hash, content) for (image_hash, _), content in zip(pending, prepared, strict=True)]
+            for chunk in self._batch_chunks(pending):
+                responses = await self._batch_annotate([content for _, content in chunk])
+                fresh: dict[str, dict[str, Any]] = {}
+                for (image_hash, _), response in zip(chunk, responses, strict=True):
+                    if response is None:
+                        results[image_hash] = self._fallback_cat_detection(error="Vision API failed")
+                    else:
+                        fresh[image_hash] = results[image_hash] = self._process_vision_responses(response, response)
+                await asyncio.gather(*(self._cache_result(image_hash, result) for image_hash, result in fresh.items()))
+        except Exception as e:
+            logger.error(f"Google Vision batch detection failed: {e!s}")
+            rate_limited = isinstance(e, VisionRateLimited)
+            return [self._fallback_cat_detection(error=str(e), rate_limited=rate_limited) for _ in contents]
+        return [results[image_hash] for image_hash in hashes]
+
+    async def _prepare_content(self, content: bytes) -> bytes:
+        """Downscaled Vision payload; falls back to the original bytes if it cannot be built.
+
+        Cache keys stay on the SHA-256 of the original bytes, so authorization
+        reuse is unchanged; only the request body shrinks.
+        """
+        try:
+            return cast(bytes, await image_engine.run(prepare_vision_image, content))
+        except Exception as e:
+            logger.debug(f"Vision payload downscale skipped: {e}")
+            return content
+
+    def _batch_chunks(self, items: list[tuple[str, bytes]]) -> list[list[tuple[str, bytes]]]:
+        """Split images into requests bounded by image count and total payload size."""
+        chunks: list[list[tuple[str, bytes]]] = []
+        current: list[tuple[str, bytes]] = []
+        current_bytes = 0
+        for item in items:
+            size = len(item[1])
+            if current and (len(current) >= self.BATCH_MAX_IMAGES or current_bytes + size > self.BATCH_MAX_BYTES):
+                chunks.append(current)
+                current, current_bytes = [], 0
+            current.append(item)
+            current_bytes += size
+        if current:
+            chunks.append(current)
+        return chunks
+
     def _process_vision_responses(self, label_response: Any, object_response: Any) -> dict:
         """Process Raw Vision API responses into detection result."""
         labels = label_response.label_annotations
@@ -305,34 +366,65 @@ class GoogleVisionService:
         logger.info(f"Cat detection success: {result['cat_count']} cats, {confidence}% confidence")
         return result
 
-    async def _get_vision_api_responses(self, content: bytes) -> tuple[Any, Any] | tuple[None, None]:
-        """Execute Vision API calls with timeout (Async/Non-blocking)."""
-        VISION_API_TIMEOUT = 10
-        image = vision.Image(content=content)
+    @staticmethod
+    def _annotate_request(content: bytes) -> Any:  # noqa: ANN401
+        """One image request carrying both label and object features."""
+        return vision.AnnotateImageRequest(
+            image=vision.Image(content=content),
+            features=[
+                vision.Feature(type_=vision.Feature.Type.LABEL_DETECTION),
+                vision.Feature(type_=vision.Feature.Type.OBJECT_LOCALIZATION),
+            ],
+        )
 
+    async def _batch_annotate(self, contents: list[bytes]) -> list[Any | None]:
+        """One batch_annotate_images call; None marks images whose annotation failed."""
         if not self.client:
             logger.warning("Google Vision client not initialized")
-            return None, None
+            return [None] * len(contents)
 
         # Use local client reference for thread safety and type narrowing
         client = self.client
-
         try:
-            # Execute both calls in parallel using thread pool to avoid blocking ASGI loop
-            label_task = run_in_threadpool(client.label_detection, image=image)
-            object_task = run_in_threadpool(client.object_localization, image=image)
-
-            # Wait for both with a timeout
-            results = await asyncio.wait_for(asyncio.gather(label_task, object_task), timeout=VISION_API_TIMEOUT)
-
-            return results[0], results[1]
-
+            # Thread pool keeps the blocking gRPC call off the ASGI loop
+            batch_response = await asyncio.wait_for(
+                run_in_threadpool(
+                    client.batch_annotate_images, requests=[self._annotate_request(content) for content in contents]
+                ),
+                timeout=self.VISION_API_TIMEOUT,
+            )
         except TimeoutError:
             logger.warning("Vision API call timed out")
-            return None, None
+            return [None] * len(contents)
+        except RATE_LIMIT_ERRORS as api_error:
+            raise VisionRateLimited(f"Vision API rate limited: {api_error}") from api_error
         except Exception as api_error:
             logger.warning(f"Vision API call failed: {api_error}")
+            return [None] * len(contents)
+
+        responses = list(batch_response.responses)
+        if len(responses) != len(contents):
+            logger.warning("Vision API returned %d responses for %d images", len(responses), len(contents))
+            return [None] * len(contents)
+        annotated: list[Any | None] = []
+        for response in responses:
+            if getattr(getattr(response, "error", None), "code", None) == RESOURCE_EXHAUSTED_CODE:
+                # Quota is per project, so the rest of the batch would fail the same way
+                raise VisionRateLimited(f"Vision API quota exhausted: {response.error.message}")
+            error_message = getattr(getattr(response, "error", None), "message", None)
+            if error_message:
+                logger.warning(f"Vision API image annotation failed: {error_message}")
+                annotated.append(None)
+            else:
+                annotated.append(response)
+        return annotated
+
+    async def _get_vision_api_responses(self, content: bytes) -> tuple[Any, Any] | tuple[None, None]:
+        """Label and object annotations for one image from a single request."""
+        response = (await self._batch_annotate([content]))[0]
+        if response is None:
             return None, None
+        return response, response
 
     def _rejected_fallback_dict(self, reasoning: str, extra: dict[str, Any] | None = None) -> dict[str, Any]:
         """Helper to construct rejected fallback responses."""
@@ -352,13 +444,13 @@ class GoogleVisionService:
             res.update(extra)
         return res
 
-    def _fallback_cat_detection(self, error: str | None = None) -> dict:
+    def _fallback_cat_detection(self, error: str | None = None, rate_limited: bool = False) -> dict:
         """Fallback cat detection when Google Vision is not available."""
         logger.warning(f"Fallback cat detection triggered - rejecting image (error: {error})")
         reasoning = "Cat verification service unavailable. Please try again later." + (
             f" - Error: {error}" if error else ""
         )
-        return self._rejected_fallback_dict(reasoning)
+        return self._rejected_fallback_dict(reasoning, {"rate_limited": True} if rate_limited else None)
 
     def _emergency_fallback(self, error: Any) -> dict:
         """Emergency fallback - SECURITY: Reject image when all detection methods fail."""
@@ -370,32 +462,36 @@ class GoogleVisionService:
         """Analyze if location is suitable for cats using Vision API labels (Async)"""
         try:
             vision_result = await self.detect_cats(image_input)
-            labels = vision_result.get("labels", [])
-            has_cats = vision_result.get("has_cats", False)
-
-            env_data = self._analyze_environment(labels)
-            score = self._calculate_suitability_score(has_cats, env_data["safety_factors"])
-
-            result = {
-                "suitability_score": score,
-                "safety_factors": env_data["safety_factors"],
-                "environment_type": env_data["environment_type"],
-                "pros": env_data["pros"] if env_data["pros"] else ["Requires further analysis"],
-                "cons": env_data["cons"] if env_data["cons"] else ["No clear disadvantages found"],
-                "recommendations": env_data["recommendations"]
-                or [
-                    "Provide food and clean water regularly",
-                    "Create safe shelter for cats",
-                    "Check safety of surrounding area",
-                ],
-                "best_times": ["Morning 06:00-08:00", "Evening 17:00-19:00"],
-            }
-            logger.info(f"Spot analysis complete: score={score}")
-            return result
+            return self.build_spot_analysis(vision_result)
         except Exception as e:
             logger.error(f"Spot analysis failed: {e!s}")
             raise HTTPException(status_code=500, detail=f"Spot analysis failed: {e!s}")
 
+    def build_spot_analysis(self, vision_result: dict[str, Any]) -> dict[str, Any]:
+        """Spot suitability derived from an existing detection result's labels."""
+        labels = vision_result.get("labels", [])
+        has_cats = vision_result.get("has_cats", False)
+
+        env_data = self._analyze_environment(labels)
+        score = self._calculate_suitability_score(has_cats, env_data["safety_factors"])
+
+        result = {
+            "suitability_score": score,
+            "safety_factors": env_data["safety_factors"],
+            "environment_type": env_data["environment_type"],
+            "pros": env_data["pros"] if env_data["pros"] else ["Requires further analysis"],
+            "cons": env_data["cons"] if env_data["cons"] else ["No clear disadvantages found"],
+            "recommendations": env_data["recommendations"]
+            or [
+                "Provide food and clean water regularly",
+                "Create safe shelter for cats",
+                "Check safety of surrounding area",
+            ],
+            "best_times": ["Morning 06:00-08:00", "Evening 17:00-19:00"],
+        }
+        logger.info(f"Spot analysis complete: score={score}")
+        return result
+
     def _analyze_environment(self, labels: list[str]) -> dict:
         env_type = "Cannot be identified"
         safety = {
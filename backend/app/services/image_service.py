@@ -4,12 +4,57 @@ Service for image processing, optimization, and CDN management.
 
 from functools import lru_cache
 from typing import Any
-from urllib.parse import quote
+from urllib.parse import quote, urlsplit
 
 from app.config import config
+from app.utils.image_utils import RENDITION_FORMATS, RENDITION_WIDTHS
+
+# Uploads with a rendition set are stored as <folder>/<id>/original.<ext> with
+# <folder>/<id>/w<width>.<ext> siblings, so the layout is visible from the URL alone.
+RENDITION_ORIGINAL_STEM = "original"
+RENDITION_URL_EXTENSION = "webp"
 
 
 class ImageService:
+    @staticmethod
+    def rendition_base_key(folder: str, object_id: str) -> str:
+        return f"{folder}/{object_id}"
+
+    @staticmethod
+    def original_key(base_key: str, file_extension: str) -> str:
+        return f"{base_key}/{RENDITION_ORIGINAL_STEM}.{file_extension}"
+
+    @staticmethod
+    def is_rendition_original(key_or_url: str) -> bool:
+        """True when the object is the original of a pre-built rendition set."""
+        path = urlsplit(key_or_url).path if "://" in key_or_url else key_or_url
+        name = path.rsplit("/", 1)[-1]
+        return name.startswith(f"{RENDITION_ORIGINAL_STEM}.") and path.count("/") >= 2
+
+    @staticmethod
+    def rendition_keys(original_key: str) -> list[str]:
+        """Every rendition key stored next to ``original_key``."""
+        base_key = original_key.rsplit("/", 1)[0]
+        return [
+            f"{base_key}/w{width}.{extension}" for width in RENDITION_WIDTHS for _, extension, _ in RENDITION_FORMATS
+        ]
+
+    @staticmethod
+    def rendition_width(width: int) -> int:
+        """Smallest pre-built width that covers ``width``; the largest one beyond the set."""
+        for candidate in sorted(RENDITION_WIDTHS):
+            if candidate >= width:
+                return candidate
+        return max(RENDITION_WIDTHS)
+
+    @classmethod
+    def rendition_url(cls, url: str, width: int) -> str | None:
+        """Pre-built rendition URL for ``width``, or None when ``url`` has no rendition set."""
+        if not width or not cls.is_rendition_original(url):
+            return None
+        base_url = url.split("?", 1)[0].rsplit("/", 1)[0]
+        return f"{base_url}/w{cls.rendition_width(width)}.{RENDITION_URL_EXTENSION}"
+
     @staticmethod
     @lru_cache(maxsize=2048)
     def _optimize_image_url_cached(url: str | None, width: int = 300) -> str | None:
@@ -24,7 +69,8 @@ class ImageService:
         """
         Optimize image URL:
         1. Rewrite to CDN if configured
-        2. Append transformation parameters if supported (Supabase)
+        2. Use a pre-built rendition if the upload has them
+        3. Append transformation parameters if supported (Supabase)
         """
         if not url:
             return url
@@ -39,8 +85,13 @@ class ImageService:
         if config.CDN_BASE_URL and s3_domain in url:
             final_url = url.replace(f"https://{s3_domain}", config.CDN_BASE_URL)
 
-        # 2. Resizing and Compression
-        # 2.a Supabase Storage Native Transformation
+        # 2. Pre-built renditions from upload time: no transform or proxy hop
+        rendition = ImageService.rendition_url(final_url, width)
+        if rendition:
+            return rendition
+
+        # 3. Resizing and Compression
+        # 3.a Supabase Storage Native Transformation
         if "supabase.co" in final_url:
             # Apply translations if it's a storage object URL
             if "/storage/v1/object/" in final_url:
@@ -48,7 +99,7 @@ class ImageService:
                 return f"{final_url}{separator}width={width}&quality=80&resize=cover&format=webp"
             return final_url
 
-        # 2.b S3 / External Storage Proxy (using wsrv.nl)
+        # 3.b S3 / External Storage Proxy (using wsrv.nl)
         # This gives S3 'superpowers' to resize images on the fly
         # Only proxy if a specific width is requested and enabled in config
         if width and config.ENABLE_IMAGE_PROXY:
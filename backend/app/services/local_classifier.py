@@ -0,0 +1,172 @@
+"""
+Local CPU cat pre-classifier.
+
+A small ONNX image classifier scores each upload before Vision is consulted.
+Confident cat / not-cat scores settle detection locally; anything in between is
+escalated to Vision. The model runs inside the image engine's worker processes
+(one InferenceSession per process, loaded on first use) with a capped number of
+ONNX Runtime threads, so inference never competes with request handling.
+
+Model contract: input ``float32[N, 3, S, S]`` RGB normalised with ImageNet
+mean/std, output either ``[N, 1]`` cat logits or ``[N, 2]`` ``[not_cat, cat]``
+logits. numpy and onnxruntime are optional; without them (or without a model
+path) there is no pre-classifier and every uncached image goes to Vision.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+from typing import Any, Protocol
+
+from PIL import Image, ImageOps
+
+from app.config import config
+from app.logger import logger
+from app.utils.image_utils import decode_image, image_engine
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+    np: Any = None  # type: ignore
+    ort: Any = None  # type: ignore
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+# Concurrent single-image requests wait this long to share one inference batch
+BATCH_WINDOW_SECONDS = 0.005
+
+# Per-process sessions keyed by (model path, threads)
+_sessions: dict[tuple[str, int], Any] = {}
+
+
+class CatPreClassifier(Protocol):
+    """Detector backend consulted before Vision; scores are P(cat) or None if unscorable."""
+
+    name: str
+
+    async def score(self, content: bytes) -> float | None: ...
+
+    async def score_batch(self, contents: list[bytes]) -> list[float | None]: ...
+
+
+def _load_session(model_path: str, threads: int) -> Any:  # noqa: ANN401
+    session = _sessions.get((model_path, threads))
+    if session is None:
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        _sessions[(model_path, threads)] = session
+    return session
+
+
+def _preprocess(content: bytes, size: int) -> Any | None:  # noqa: ANN401
+    """CHW float32 tensor for one image, or None when it cannot be decoded."""
+    try:
+        img = decode_image(content, size)
+        with contextlib.suppress(Exception):
+            ImageOps.exif_transpose(img, in_place=True)
+        img = img.convert("RGB").resize((size, size), Image.Resampling.BILINEAR)
+    except Exception:
+        return None
+    pixels = np.frombuffer(img.tobytes(), dtype=np.uint8).reshape(size, size, 3).astype(np.float32) / 255.0
+    pixels = (pixels - np.array(IMAGENET_MEAN, dtype=np.float32)) / np.array(IMAGENET_STD, dtype=np.float32)
+    return pixels.transpose(2, 0, 1)
+
+
+def _cat_probability(logits: list[float]) -> float:
+    if len(logits) == 1:
+        return 1.0 / (1.0 + math.exp(-logits[0]))
+    not_cat, cat = logits[0], logits[1]
+    return 1.0 / (1.0 + math.exp(not_cat - cat))
+
+
+def score_images(model_path: str, input_size: int, threads: int, contents: list[bytes]) -> list[float | None]:
+    """Run one batched inference; executed on the image engine."""
+    tensors = [_preprocess(content, input_size) for content in contents]
+    valid = [index for index, tensor in enumerate(tensors) if tensor is not None]
+    scores: list[float | None] = [None] * len(contents)
+    if not valid:
+        return scores
+    session = _load_session(model_path, threads)
+    batch = np.stack([tensors[index] for index in valid])
+    outputs = session.run(None, {session.get_inputs()[0].name: batch})[0]
+    for index, logits in zip(valid, outputs.reshape(len(valid), -1).tolist(), strict=True):
+        scores[index] = round(_cat_probability(logits), 4)
+    return scores
+
+
+class OnnxCatClassifier:
+    """ONNX Runtime backend; concurrent ``score`` calls are coalesced into batches."""
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_path: str,
+        input_size: int | None = None,
+        threads: int | None = None,
+        max_batch: int | None = None,
+    ) -> None:
+        self.model_path = model_path
+        self.input_size = input_size or config.LOCAL_CLASSIFIER_INPUT_SIZE
+        self.threads = threads or config.LOCAL_CLASSIFIER_THREADS
+        self.max_batch = max_batch or config.LOCAL_CLASSIFIER_BATCH_SIZE
+        self._waiting: list[tuple[bytes, asyncio.Future[float | None]]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Strong references so in-flight batches are not garbage collected
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+
+    async def score_batch(self, contents: list[bytes]) -> list[float | None]:
+        scores: list[float | None] = []
+        for offset in range(0, len(contents), self.max_batch):
+            chunk = contents[offset : offset + self.max_batch]
+            scores.extend(await image_engine.run(score_images, self.model_path, self.input_size, self.threads, chunk))
+        return scores
+
+    async def score(self, content: bytes) -> float | None:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[float | None] = loop.create_future()
+        self._waiting.append((content, future))
+        if len(self._waiting) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(BATCH_WINDOW_SECONDS, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        waiting, self._waiting = self._waiting, []
+        if waiting:
+            task = asyncio.create_task(self._run_waiting(waiting))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_waiting(self, waiting: list[tuple[bytes, asyncio.Future[float | None]]]) -> None:
+        try:
+            scores = await self.score_batch([content for content, _ in waiting])
+        except Exception as e:
+            logger.warning("Local classifier batch of %d failed: %s", len(waiting), e)
+            scores = [None] * len(waiting)
+        for (_, future), score in zip(waiting, scores, strict=True):
+            if not future.done():
+                future.set_result(score)
+
+
+def get_pre_classifier() -> CatPreClassifier | None:
+    """The configured pre-classifier, or None when disabled or unavailable."""
+    if not config.LOCAL_CLASSIFIER_MODEL_PATH:
+        return None
+    if not ONNX_AVAILABLE:
+        logger.warning("LOCAL_CLASSIFIER_MODEL_PATH is set but numpy/onnxruntime are not installed")
+        return None
+    return OnnxCatClassifier(config.LOCAL_CLASSIFIER_MODEL_PATH)
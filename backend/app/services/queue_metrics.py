@@ -0,0 +1,117 @@
+"""
+Queue observability for operators and worker autoscaling.
+
+Two sources are combined:
+
+- stream state sampled from Redis on request (length, pending entries per
+  consumer, age of the oldest pending and undelivered entries, dead letters);
+- per-worker outcome counters (completed, retried, dead-lettered) and latency
+  histograms (``wait``: enqueue to start, ``processing``: start to finish),
+  kept in process and published to Redis every
+  ``QUEUE_METRICS_INTERVAL_SECONDS``.
+
+Counters are cumulative per worker process. A worker that stops publishing
+drops out of the totals after three intervals.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import Counter
+from datetime import UTC, datetime
+from typing import Any
+
+from app.config import config
+from app.services.queue_service import queue_service
+from app.utils.stage_timing import STAGE_BUCKETS_MS, StageHistogram, StageHistograms
+
+OUTCOMES = ("completed", "retried", "dead_lettered")
+LATENCY_STAGES = ("wait", "processing")
+
+
+class WorkerQueueMetrics:
+    """Outcome counters and latency histograms for one worker process."""
+
+    def __init__(self) -> None:
+        self._histograms = StageHistograms()
+        self._outcomes: dict[str, Counter[str]] = {}
+
+    def observe(self, stream: str, stage: str, duration_ms: float) -> None:
+        self._histograms.observe(stream, stage, duration_ms)
+
+    def count(self, stream: str, outcome: str, amount: int = 1) -> None:
+        self._outcomes.setdefault(stream, Counter())[outcome] += amount
+
+    def snapshot(self, consumer: str, in_flight: dict[str, int]) -> dict[str, Any]:
+        histograms = self._histograms.snapshot()
+        return {
+            "consumer": consumer,
+            "pid": os.getpid(),
+            "updated_at": time.time(),
+            "streams": {
+                stream: {
+                    "in_flight": in_flight.get(stream, 0),
+                    "outcomes": {outcome: self._outcomes.get(stream, Counter())[outcome] for outcome in OUTCOMES},
+                    "latency": histograms.get(stream, {}),
+                }
+                for stream, _ in queue_service.streams
+            },
+        }
+
+
+def _merge_workers(workers: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    merged: dict[str, dict[str, Any]] = {}
+    for stream, _ in queue_service.streams:
+        outcomes: Counter[str] = Counter()
+        latency = {stage: StageHistogram() for stage in LATENCY_STAGES}
+        in_flight = 0
+        for worker in workers:
+            stream_metrics = (worker.get("streams") or {}).get(stream) or {}
+            in_flight += int(stream_metrics.get("in_flight") or 0)
+            outcomes.update({key: int(value) for key, value in (stream_metrics.get("outcomes") or {}).items()})
+            for stage, histogram in latency.items():
+                snapshot = (stream_metrics.get("latency") or {}).get(stage)
+                if snapshot:
+                    histogram.merge(snapshot)
+        merged[stream] = {
+            "in_flight": in_flight,
+            "outcomes": {outcome: outcomes[outcome] for outcome in OUTCOMES},
+            "latency": {stage: histogram.snapshot() for stage, histogram in latency.items()},
+        }
+    return merged
+
+
+async def collect_queue_metrics() -> dict[str, Any]:
+    """Stream state plus totals from live workers; ``backlog`` is what an autoscaler should track."""
+    streams = await queue_service.stream_stats()
+    workers = await queue_service.get_worker_metrics(max_age_seconds=3 * config.QUEUE_METRICS_INTERVAL_SECONDS)
+    totals = _merge_workers(workers)
+    for stream, stats in streams.items():
+        stats["backlog"] = stats["undelivered"] + stats["pending"]
+        stats.update(totals.get(stream, {}))
+    ages = [
+        age
+        for stats in streams.values()
+        for age in (stats["oldest_pending_age_seconds"], stats["oldest_undelivered_age_seconds"])
+        if age is not None
+    ]
+    return {
+        "sampled_at": datetime.now(UTC).isoformat(),
+        "bucket_bounds_ms": list(STAGE_BUCKETS_MS),
+        "backlog": sum(stats["backlog"] for stats in streams.values()),
+        "oldest_entry_age_seconds": max(ages, default=None),
+        "streams": streams,
+        "workers": [
+            {
+                "consumer": worker.get("consumer"),
+                "pid": worker.get("pid"),
+                "updated_at": worker.get("updated_at"),
+                "in_flight": sum(
+                    int(stream_metrics.get("in_flight") or 0)
+                    for stream_metrics in (worker.get("streams") or {}).values()
+                ),
+            }
+            for worker in workers
+        ],
+    }
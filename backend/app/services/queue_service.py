@@ -1,20 +1,37 @@
 """Durable Redis Streams used for external API work.
 
 The API verifies and persists a small queue envelope, while a long-lived
-worker owns the external Stripe/Vision calls. Image bytes are stored in Redis
-with a short TTL instead of being placed in the stream entry itself.
+worker owns the external Stripe/Vision calls. Image bytes are stored raw in
+Redis (over a binary-safe connection) with a short TTL instead of being
+placed in the stream entry itself; direct uploads never pass through Redis
+and are referenced by their S3 quarantine key.
+
+Bookkeeping is batched to keep Redis round trips per job constant: an enqueue
+is one Lua script (capacity check, job state, stream entry), completing the
+entries of one unit is one MULTI/EXEC (XACK, XDEL, attempt counters), and a
+failure is one INCR/EXPIRE transaction plus one more that either schedules
+the retry or dead-letters the entry.
+
+Retries are delayed rather than left pending: the failed entry is completed
+and parked in a per-stream sorted set scored by its due time, carrying its
+attempt count in an ``attempts`` field. Workers move due entries back to the
+end of their stream with a script, so each is released exactly once.
 """
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import contextlib
 import json
+import time
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Any, cast
 from uuid import uuid4
 
 import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
 from redis.exceptions import ResponseError
 
 from app.config import config
@@ -37,6 +54,54 @@ class QueuePayloadMissing(QueueError):
     """Raised when a Vision job no longer has its temporary image payload."""
 
 
+# KEYS: stream, then keys to SET with a TTL. ARGV: maxlen, ttl, "1" to claim the
+# first key with NX, one value per key, then the stream entry's field/value pairs.
+_ENQUEUE_SCRIPT = """
+if redis.call('XLEN', KEYS[1]) >= tonumber(ARGV[1]) then
+    return {'full'}
+end
+for i = 2, #KEYS do
+    if i == 2 and ARGV[3] == '1' then
+        if not redis.call('SET', KEYS[i], ARGV[i + 2], 'EX', ARGV[2], 'NX') then
+            return {'exists'}
+        end
+    else
+        redis.call('SET', KEYS[i], ARGV[i + 2], 'EX', ARGV[2])
+    end
+end
+local fields = {}
+for i = #KEYS + 3, #ARGV do
+    fields[#fields + 1] = ARGV[i]
+end
+return {'ok', redis.call('XADD', KEYS[1], '*', unpack(fields))}
+"""
+
+# KEYS: retry sorted set, stream. ARGV: now in ms, most entries to move.
+# Members are JSON {"id": source entry id, "fields": {...}} scored by due time.
+_RELEASE_RETRIES_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+    local fields = {}
+    for field, value in pairs(cjson.decode(member)['fields']) do
+        fields[#fields + 1] = field
+        fields[#fields + 1] = value
+    end
+    redis.call('XADD', KEYS[2], '*', unpack(fields))
+    redis.call('ZREM', KEYS[1], member)
+end
+return #due
+"""
+
+
+def entry_age_seconds(message_id: str, now_ms: float) -> float | None:
+    """Seconds since a stream entry was added, from the millisecond part of its id."""
+    try:
+        added_ms = int(message_id.split("-", 1)[0])
+    except ValueError:
+        return None
+    return round(max(now_ms - added_ms, 0) / 1000, 3)
+
+
 @dataclass(frozen=True)
 class QueueMessage:
     stream: str
@@ -49,31 +114,73 @@ class QueueService:
 
     STRIPE_STREAM = "purrfect:queue:stripe"
     VISION_STREAM = "purrfect:queue:vision"
+    # Priority lane for Pro users' Vision jobs, read by the Vision reader ahead of the base stream
+    VISION_PRIORITY_STREAM = "purrfect:queue:vision:priority"
+    UPLOAD_STREAM = "purrfect:queue:uploads"
     STRIPE_GROUP = "purrfect-workers"
     VISION_GROUP = "purrfect-workers"
+    UPLOAD_GROUP = "purrfect-workers"
     DEAD_LETTER_SUFFIX = ":dead-letter"
+    # Sorted set of entries waiting for a delayed retry, scored by due time in ms
+    RETRY_SUFFIX = ":retries"
+    ATTEMPTS_FIELD = "attempts"
     VISION_JOB_PREFIX = "purrfect:vision:job:"
+    # Raw image bytes; the legacy prefix holds base64 payloads enqueued by older releases
+    VISION_RAW_PAYLOAD_PREFIX = "purrfect:vision:payload-raw:"
     VISION_PAYLOAD_PREFIX = "purrfect:vision:payload:"
+    VISION_JOB_CHANNEL_PREFIX = "purrfect:vision:job-events:"
+    TERMINAL_JOB_STATUSES = frozenset({"completed", "failed"})
+    UPLOAD_JOB_PREFIX = "purrfect:upload:job:"
     ATTEMPT_PREFIX = "purrfect:queue:attempts:"
+    # Hash of consumer name -> latest metrics snapshot published by that worker
+    WORKER_METRICS_KEY = "purrfect:queue:worker-metrics"
 
     def __init__(self) -> None:
         self.client: aioredis.Redis | None = None
+        # Binary-safe connection pool for image payloads, which are stored without base64
+        self.binary_client: aioredis.Redis | None = None
         if config.QUEUE_REDIS_URL:
             try:
                 self.client = aioredis.from_url(config.QUEUE_REDIS_URL, decode_responses=True)
+                self.binary_client = aioredis.from_url(config.QUEUE_REDIS_URL, decode_responses=False)
             except Exception as exc:
                 logger.error("Failed to configure queue Redis: %s", exc)
+        # Groups known to exist, so enqueues skip XGROUP CREATE
+        self._ready_groups: set[tuple[str, str]] = set()
+        # Lua scripts by source, with the client each is registered on
+        self._scripts: dict[str, tuple[aioredis.Redis, AsyncScript]] = {}
 
     @property
     def available(self) -> bool:
         return self.client is not None
 
+    @property
+    def streams(self) -> tuple[tuple[str, str], ...]:
+        """Every consumed (stream, group) pair, priority lanes included."""
+        return (
+            (self.STRIPE_STREAM, self.STRIPE_GROUP),
+            (self.VISION_PRIORITY_STREAM, self.VISION_GROUP),
+            (self.VISION_STREAM, self.VISION_GROUP),
+            (self.UPLOAD_STREAM, self.UPLOAD_GROUP),
+        )
+
+    def lanes(self, stream: str) -> tuple[str, ...]:
+        """Streams read together as ``stream``, highest priority first."""
+        if stream == self.VISION_STREAM:
+            return (self.VISION_PRIORITY_STREAM, self.VISION_STREAM)
+        return (stream,)
+
+    def base_stream(self, stream: str) -> str:
+        """The stream a priority lane belongs to (a base stream maps to itself)."""
+        return self.VISION_STREAM if stream == self.VISION_PRIORITY_STREAM else stream
+
     async def close(self) -> None:
-        if self.client:
-            try:
-                await cast(Any, self.client).aclose()
-            except Exception:
-                logger.warning("Failed to close queue Redis pool", exc_info=True)
+        for client in (self.client, self.binary_client):
+            if client:
+                try:
+                    await cast(Any, client).aclose()
+                except Exception:
+                    logger.warning("Failed to close queue Redis pool", exc_info=True)
 
     async def ping(self) -> bool:
         if not self.client:
@@ -88,7 +195,14 @@ class QueueService:
             raise QueueUnavailable("Queue Redis is not configured")
         return self.client
 
+    def _require_binary_client(self) -> aioredis.Redis:
+        if not self.binary_client:
+            raise QueueUnavailable("Queue Redis is not configured")
+        return self.binary_client
+
     async def ensure_group(self, stream: str, group: str) -> None:
+        if (stream, group) in self._ready_groups:
+            return
         client = self._require_client()
         try:
             await client.xgroup_create(stream, group, id="0-0", mkstream=True)
@@ -97,10 +211,20 @@ class QueueService:
                 raise QueueUnavailable("Unable to create Redis consumer group") from exc
         except Exception as exc:
             raise QueueUnavailable("Unable to create Redis consumer group") from exc
+        self._ready_groups.add((stream, group))
+
+    async def _recreate_missing_group(self, stream: str, group: str, exc: Exception) -> bool:
+        """Recreate a group lost with its stream (e.g. Redis restarted without persistence)."""
+        if not isinstance(exc, ResponseError) or "NOGROUP" not in str(exc):
+            return False
+        logger.warning("Consumer group %s on %s is missing; recreating it", group, stream)
+        self._ready_groups.discard((stream, group))
+        await self.ensure_group(stream, group)
+        return True
 
     async def ensure_groups(self) -> None:
-        await self.ensure_group(self.STRIPE_STREAM, self.STRIPE_GROUP)
-        await self.ensure_group(self.VISION_STREAM, self.VISION_GROUP)
+        for stream, group in self.streams:
+            await self.ensure_group(stream, group)
 
     @staticmethod
     def _serialize(value: Any) -> str:
@@ -116,30 +240,58 @@ class QueueService:
             return None
         return parsed if isinstance(parsed, dict) else None
 
-    async def _ensure_capacity(self, stream: str) -> None:
-        client = self._require_client()
-        try:
-            length = int(await client.xlen(stream))
-        except Exception as exc:
-            raise QueueUnavailable("Unable to inspect Redis queue capacity") from exc
-        if length >= config.QUEUE_STREAM_MAXLEN:
+    @staticmethod
+    def _attempt_key(stream: str, message_id: str) -> str:
+        return f"{QueueService.ATTEMPT_PREFIX}{stream}:{message_id}"
+
+    def _script(self, client: aioredis.Redis, source: str) -> AsyncScript:
+        registered = self._scripts.get(source)
+        if registered is None or registered[0] is not client:
+            registered = self._scripts[source] = (client, client.register_script(source))
+        return registered[1]
+
+    async def _enqueue(
+        self,
+        stream: str,
+        values: dict[str, str | bytes],
+        fields: dict[str, str],
+        *,
+        claim_first: bool = False,
+    ) -> str | None:
+        """
+        Check capacity, store ``values`` and append the stream entry in one script call.
+
+        Returns the stream entry id, or None when ``claim_first`` is set and the
+        first key already exists. Raises QueueBackpressure when the stream is full.
+        """
+        client = self._require_binary_client()
+        script = self._script(client, _ENQUEUE_SCRIPT)
+        args: list[Any] = [config.QUEUE_STREAM_MAXLEN, config.QUEUE_RESULT_TTL_SECONDS, int(claim_first)]
+        args.extend(values.values())
+        for field, value in fields.items():
+            args.extend((field, value))
+        reply = await script(keys=[stream, *values], args=args)
+        status, *rest = (part.decode() if isinstance(part, bytes) else str(part) for part in reply)
+        if status == "full":
             raise QueueBackpressure("Queue is full; retry after the worker drains pending jobs")
+        return rest[0] if status == "ok" else None
 
     async def enqueue_stripe_webhook(self, event: dict[str, Any]) -> str:
         """Enqueue an already signature-verified Stripe event."""
-        client = self._require_client()
         event_id = str(event.get("id") or "")
         event_type = str(event.get("type") or "")
         if not event_id or not event_type:
             raise ValueError("Stripe event is missing id or type")
 
         await self.ensure_group(self.STRIPE_STREAM, self.STRIPE_GROUP)
-        await self._ensure_capacity(self.STRIPE_STREAM)
         try:
-            message_id = await client.xadd(
+            message_id = await self._enqueue(
                 self.STRIPE_STREAM,
+                {},
                 {"event_id": event_id, "event_type": event_type, "event": self._serialize(event)},
             )
+        except QueueBackpressure:
+            raise
         except Exception as exc:
             raise QueueUnavailable("Unable to enqueue Stripe webhook") from exc
         return str(message_id)
@@ -152,16 +304,17 @@ class QueueService:
         analyzed_by: str,
         filename: str | None,
         contents: bytes,
+        priority: bool = False,
     ) -> dict[str, Any]:
-        """Store a bounded temporary payload and enqueue a Vision job."""
+        """Store a bounded temporary payload and enqueue a Vision job, on the priority lane if asked."""
         if len(contents) > config.VISION_QUEUE_MAX_IMAGE_BYTES:
             raise QueueBackpressure("Image is too large for the Vision queue")
         if operation not in {"spot-analysis", "combined"}:
             raise ValueError("Unsupported Vision queue operation")
 
-        client = self._require_client()
-        await self.ensure_group(self.VISION_STREAM, self.VISION_GROUP)
-        await self._ensure_capacity(self.VISION_STREAM)
+        stream = self.VISION_PRIORITY_STREAM if priority else self.VISION_STREAM
+        await self.ensure_group(stream, self.VISION_GROUP)
+        client = self._require_binary_client()
 
         job_id = str(uuid4())
         now = datetime.now(UTC).isoformat()
@@ -178,17 +331,19 @@ class QueueService:
             "created_at": now,
             "updated_at": now,
         }
-        payload_key = f"{self.VISION_PAYLOAD_PREFIX}{job_id}"
+        payload_key = f"{self.VISION_RAW_PAYLOAD_PREFIX}{job_id}"
         job_key = f"{self.VISION_JOB_PREFIX}{job_id}"
-        encoded_contents = base64.b64encode(contents).decode("ascii")
 
         try:
-            await client.set(payload_key, encoded_contents, ex=config.QUEUE_RESULT_TTL_SECONDS)
-            await client.set(job_key, self._serialize(job), ex=config.QUEUE_RESULT_TTL_SECONDS)
-            await client.xadd(
-                self.VISION_STREAM,
+            # Payload and envelope are written by the same script as the stream entry,
+            # so the worker never sees an entry without its payload
+            await self._enqueue(
+                stream,
+                {payload_key: contents, job_key: self._serialize(job)},
                 {"job_id": job_id, "operation": operation, "user_id": user_id},
             )
+        except QueueBackpressure:
+            raise
         except Exception as exc:
             try:
                 await client.delete(payload_key, job_key)
@@ -198,23 +353,75 @@ class QueueService:
         return job
 
     async def get_vision_job(self, job_id: str, user_id: str) -> dict[str, Any] | None:
+        return await self._get_job(self.VISION_JOB_PREFIX, job_id, user_id, "Vision")
+
+    async def update_vision_job(self, job_id: str, **updates: Any) -> dict[str, Any] | None:
+        job = await self._update_job(self.VISION_JOB_PREFIX, job_id, updates, "Vision")
+        if job is not None:
+            await self._publish_vision_job(job_id, job)
+        return job
+
+    async def _publish_vision_job(self, job_id: str, job: dict[str, Any]) -> None:
+        # Best effort: waiters fall back to the stored state when their wait ends
+        try:
+            await self._require_client().publish(f"{self.VISION_JOB_CHANNEL_PREFIX}{job_id}", self._serialize(job))
+        except Exception:
+            logger.warning("Failed to publish Vision job %s update", job_id, exc_info=True)
+
+    async def wait_for_vision_job(self, job_id: str, user_id: str, timeout: float) -> dict[str, Any] | None:
+        """
+        Vision job state, waiting up to ``timeout`` seconds for it to complete or fail.
+
+        Subscribes to the job's channel before reading the stored state so an update
+        published in between is not missed. Each waiter holds one Redis connection
+        for the duration of the wait.
+        """
         client = self._require_client()
+        pubsub = client.pubsub()
         try:
-            raw = await client.get(f"{self.VISION_JOB_PREFIX}{job_id}")
+            await pubsub.subscribe(f"{self.VISION_JOB_CHANNEL_PREFIX}{job_id}")
         except Exception as exc:
-            raise QueueUnavailable("Unable to read Vision job status") from exc
+            with contextlib.suppress(Exception):
+                await cast(Any, pubsub).aclose()
+            raise QueueUnavailable("Unable to subscribe to Vision job updates") from exc
+        try:
+            job = await self.get_vision_job(job_id, user_id)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while job and job.get("status") not in self.TERMINAL_JOB_STATUSES:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                except Exception as exc:
+                    raise QueueUnavailable("Lost Vision job update subscription") from exc
+                update = self._deserialize(message.get("data")) if message else None
+                if update and str(update.get("user_id")) == user_id:
+                    job = update
+            return job
+        finally:
+            with contextlib.suppress(Exception):
+                await cast(Any, pubsub).aclose()
+
+    async def _get_job(self, prefix: str, job_id: str, user_id: str, label: str) -> dict[str, Any] | None:
+        client = self._require_client()
+        try:
+            raw = await client.get(f"{prefix}{job_id}")
+        except Exception as exc:
+            raise QueueUnavailable(f"Unable to read {label} job status") from exc
         job = self._deserialize(raw)
         if not job or str(job.get("user_id")) != user_id:
             return None
         return job
 
-    async def update_vision_job(self, job_id: str, **updates: Any) -> dict[str, Any] | None:
+    async def _update_job(self, prefix: str, job_id: str, updates: dict[str, Any], label: str) -> dict[str, Any] | None:
         client = self._require_client()
-        key = f"{self.VISION_JOB_PREFIX}{job_id}"
+        key = f"{prefix}{job_id}"
         try:
             current = self._deserialize(await client.get(key))
         except Exception as exc:
-            raise QueueUnavailable("Unable to read Vision job state") from exc
+            raise QueueUnavailable(f"Unable to read {label} job state") from exc
         if not current:
             return None
         current.update(updates)
@@ -222,29 +429,85 @@ class QueueService:
         try:
             await client.set(key, self._serialize(current), ex=config.QUEUE_RESULT_TTL_SECONDS)
         except Exception as exc:
-            raise QueueUnavailable("Unable to update Vision job state") from exc
+            raise QueueUnavailable(f"Unable to update {label} job state") from exc
         return current
 
     async def get_vision_payload(self, job_id: str) -> bytes:
-        client = self._require_client()
+        client = self._require_binary_client()
         try:
-            raw = await client.get(f"{self.VISION_PAYLOAD_PREFIX}{job_id}")
+            raw, legacy = await client.mget(
+                [f"{self.VISION_RAW_PAYLOAD_PREFIX}{job_id}", f"{self.VISION_PAYLOAD_PREFIX}{job_id}"]
+            )
         except Exception as exc:
             raise QueueUnavailable("Unable to read Vision payload") from exc
-        if raw is None:
+        if raw is not None:
+            return bytes(raw)
+        if legacy is None:
             raise QueuePayloadMissing(f"Vision payload expired for job {job_id}")
         try:
-            return base64.b64decode(raw.decode() if isinstance(raw, bytes) else str(raw), validate=True)
+            return base64.b64decode(legacy, validate=True)
         except (ValueError, TypeError) as exc:
             raise QueuePayloadMissing(f"Vision payload is invalid for job {job_id}") from exc
 
     async def delete_vision_payload(self, job_id: str) -> None:
-        client = self._require_client()
+        client = self._require_binary_client()
         try:
-            await client.delete(f"{self.VISION_PAYLOAD_PREFIX}{job_id}")
+            await client.delete(f"{self.VISION_RAW_PAYLOAD_PREFIX}{job_id}", f"{self.VISION_PAYLOAD_PREFIX}{job_id}")
         except Exception as exc:
             raise QueueUnavailable("Unable to delete Vision payload") from exc
 
+    async def enqueue_upload_job(
+        self,
+        *,
+        upload_id: str,
+        user_id: str,
+        is_pro: bool,
+        object_key: str,
+        photo: dict[str, Any],
+    ) -> dict[str, Any] | None:
+        """
+        Enqueue post-processing for a direct-to-S3 upload.
+
+        The upload id doubles as the job id and is claimed with SET NX, so a
+        completed upload cannot be submitted twice. Returns None when it already was.
+        """
+        await self.ensure_group(self.UPLOAD_STREAM, self.UPLOAD_GROUP)
+
+        now = datetime.now(UTC).isoformat()
+        job = {
+            "job_id": upload_id,
+            "user_id": user_id,
+            "is_pro": is_pro,
+            "object_key": object_key,
+            "photo": photo,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        job_key = f"{self.UPLOAD_JOB_PREFIX}{upload_id}"
+        try:
+            # No cleanup on failure: the claim may belong to an earlier, successful submission
+            message_id = await self._enqueue(
+                self.UPLOAD_STREAM,
+                {job_key: self._serialize(job)},
+                {"job_id": upload_id, "user_id": user_id},
+                claim_first=True,
+            )
+        except QueueBackpressure:
+            raise
+        except Exception as exc:
+            raise QueueUnavailable("Unable to enqueue upload job") from exc
+        return job if message_id is not None else None
+
+    async def get_upload_job(self, job_id: str, user_id: str) -> dict[str, Any] | None:
+        return await self._get_job(self.UPLOAD_JOB_PREFIX, job_id, user_id, "upload")
+
+    async def update_upload_job(self, job_id: str, **updates: Any) -> dict[str, Any] | None:
+        return await self._update_job(self.UPLOAD_JOB_PREFIX, job_id, updates, "upload")
+
     async def read_group(
         self,
         *,
@@ -252,20 +515,36 @@ class QueueService:
         group: str,
         consumer: str,
         count: int = 10,
-        block_ms: int = 1000,
+        block_ms: int | None = 1000,
+    ) -> list[QueueMessage]:
+        """New entries for ``consumer``; ``block_ms=None`` returns at once when there are none."""
+        return await self.read_lanes(streams=(stream,), group=group, consumer=consumer, count=count, block_ms=block_ms)
+
+    async def read_lanes(
+        self,
+        *,
+        streams: tuple[str, ...],
+        group: str,
+        consumer: str,
+        count: int = 10,
+        block_ms: int | None = 1000,
     ) -> list[QueueMessage]:
+        """One XREADGROUP over several streams; ``count`` applies to each stream."""
         client = self._require_client()
         try:
             raw = await client.xreadgroup(
                 group,
                 consumer,
-                {stream: ">"},
+                dict.fromkeys(streams, ">"),
                 count=count,
                 block=block_ms,
             )
         except Exception as exc:
+            recreated = [await self._recreate_missing_group(stream, group, exc) for stream in streams]
+            if any(recreated):
+                return []
             raise QueueUnavailable("Unable to read Redis queue") from exc
-        return self._flatten_messages(stream, raw)
+        return self._flatten_messages(streams[0], raw)
 
     async def claim_stale(
         self,
@@ -286,6 +565,8 @@ class QueueService:
                 count=count,
             )
         except Exception as exc:
+            if await self._recreate_missing_group(stream, group, exc):
+                return []
             raise QueueUnavailable("Unable to reclaim Redis queue entries") from exc
         entries = raw[1] if isinstance(raw, (list, tuple)) and len(raw) > 1 else []
         return [
@@ -293,6 +574,16 @@ class QueueService:
             for message_id, fields in entries
         ]
 
+    async def extend_visibility(self, *, stream: str, group: str, consumer: str, message_ids: list[str]) -> None:
+        """Reset the idle time of entries this consumer is still working on so they are not reclaimed."""
+        if not message_ids:
+            return
+        client = self._require_client()
+        try:
+            await client.xclaim(stream, group, consumer, 0, message_ids, justid=True)
+        except Exception as exc:
+            raise QueueUnavailable("Unable to extend Redis queue entry visibility") from exc
+
     @staticmethod
     def _flatten_messages(stream: str, raw: Any) -> list[QueueMessage]:
         messages: list[QueueMessage] = []
@@ -308,21 +599,30 @@ class QueueService:
                 )
         return messages
 
-    async def acknowledge(self, message: QueueMessage, group: str) -> None:
+    async def complete_messages(self, messages: list[QueueMessage], group: str) -> None:
+        """Acknowledge and delete finished entries and drop their attempt counters in one MULTI/EXEC."""
+        if not messages:
+            return
         client = self._require_client()
+        message_ids: dict[str, list[str]] = {}
+        for message in messages:
+            message_ids.setdefault(message.stream, []).append(message.message_id)
         try:
-            acknowledged = await client.xack(message.stream, group, message.message_id)
+            async with client.pipeline(transaction=True) as pipe:
+                for stream, ids in message_ids.items():
+                    # Explicit deletion keeps the stream bounded without trimming a
+                    # still-pending entry belonging to another consumer. XACK ignores
+                    # ownership, so an entry it reports as already acknowledged has
+                    # been deleted by whoever acknowledged it and XDEL is a no-op.
+                    pipe.xack(stream, group, *ids)
+                    pipe.xdel(stream, *ids)
+                    pipe.delete(*(self._attempt_key(stream, message_id) for message_id in ids))
+                await pipe.execute()
         except Exception as exc:
-            raise QueueUnavailable("Unable to acknowledge Redis queue entry") from exc
-        if acknowledged:
-            # Explicit deletion keeps the stream bounded without trimming a
-            # still-pending entry belonging to another consumer.
-            try:
-                await client.xdel(message.stream, message.message_id)
-            except Exception as exc:
-                raise QueueUnavailable("Unable to remove acknowledged queue entry") from exc
+            raise QueueUnavailable("Unable to acknowledge Redis queue entries") from exc
 
     async def dead_letter(self, message: QueueMessage, group: str, reason: str) -> None:
+        """Copy an entry to its dead-letter stream and complete it, atomically."""
         client = self._require_client()
         dead_letter_stream = f"{message.stream}{self.DEAD_LETTER_SUFFIX}"
         payload = {
@@ -333,31 +633,160 @@ class QueueService:
             "failed_at": datetime.now(UTC).isoformat(),
         }
         try:
-            await client.xadd(dead_letter_stream, {"message": self._serialize(payload)})
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.xadd(dead_letter_stream, {"message": self._serialize(payload)})
+                pipe.xack(message.stream, group, message.message_id)
+                pipe.xdel(message.stream, message.message_id)
+                pipe.delete(self._attempt_key(message.stream, message.message_id))
+                await pipe.execute()
         except Exception as exc:
             raise QueueUnavailable("Unable to write queue dead-letter entry") from exc
-        await self.acknowledge(message, group)
 
     async def increment_attempt(self, message: QueueMessage) -> int:
+        """Record a failed attempt; includes attempts made before the entry was rescheduled."""
         client = self._require_client()
-        key = f"{self.ATTEMPT_PREFIX}{message.stream}:{message.message_id}"
         try:
-            attempts = int(await client.incr(key))
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.incr(self._attempt_key(message.stream, message.message_id))
+                pipe.expire(self._attempt_key(message.stream, message.message_id), config.QUEUE_RESULT_TTL_SECONDS)
+                attempts, _ = await pipe.execute()
         except Exception as exc:
             raise QueueUnavailable("Unable to record queue attempt") from exc
-        if attempts == 1:
+        try:
+            previous = int(message.fields.get(self.ATTEMPTS_FIELD) or 0)
+        except ValueError:
+            previous = 0
+        return previous + int(attempts)
+
+    async def schedule_retry(self, message: QueueMessage, group: str, attempts: int, delay_seconds: float) -> None:
+        """Complete an entry and park a copy for re-delivery after ``delay_seconds``, atomically."""
+        client = self._require_client()
+        member = self._serialize(
+            {"id": message.message_id, "fields": {**message.fields, self.ATTEMPTS_FIELD: str(attempts)}}
+        )
+        due_ms = int((time.time() + delay_seconds) * 1000)
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.zadd(f"{message.stream}{self.RETRY_SUFFIX}", {member: due_ms})
+                pipe.xack(message.stream, group, message.message_id)
+                pipe.xdel(message.stream, message.message_id)
+                pipe.delete(self._attempt_key(message.stream, message.message_id))
+                await pipe.execute()
+        except Exception as exc:
+            raise QueueUnavailable("Unable to schedule queue retry") from exc
+
+    async def release_due_retries(self, limit: int = 100) -> int:
+        """Move retries that are due back into their streams; returns how many moved."""
+        client = self._require_client()
+        script = self._script(client, _RELEASE_RETRIES_SCRIPT)
+        now_ms = int(time.time() * 1000)
+        released = 0
+        try:
+            for stream, _ in self.streams:
+                released += int(await script(keys=[f"{stream}{self.RETRY_SUFFIX}", stream], args=[now_ms, limit]))
+        except Exception as exc:
+            raise QueueUnavailable("Unable to release scheduled queue retries") from exc
+        return released
+
+    async def stream_stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Depth, pending entries, scheduled retries and age of the oldest work per stream.
+
+        Sampled with XLEN, XPENDING, XINFO GROUPS and ZCARD in one pipeline, plus one
+        XRANGE per stream with undelivered entries. Completed entries are deleted,
+        so every entry still in a stream is either pending or undelivered.
+        """
+        client = self._require_client()
+        now_ms = time.time() * 1000
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for stream, group in self.streams:
+                    pipe.xlen(stream)
+                    pipe.xpending(stream, group)
+                    pipe.xpending_range(stream, group, min="-", max="+", count=1)
+                    pipe.xinfo_groups(stream)
+                    pipe.xlen(f"{stream}{self.DEAD_LETTER_SUFFIX}")
+                    pipe.zcard(f"{stream}{self.RETRY_SUFFIX}")
+                replies = await pipe.execute(raise_on_error=False)
+        except Exception as exc:
+            raise QueueUnavailable("Unable to sample Redis queue state") from exc
+
+        def _ok(reply: Any, default: Any) -> Any:  # noqa: ANN401
+            # Missing streams or groups come back as per-command errors
+            return default if isinstance(reply, Exception) or reply is None else reply
+
+        stats: dict[str, dict[str, Any]] = {}
+        last_delivered: dict[str, str] = {}
+        for index, (stream, group) in enumerate(self.streams):
+            length, summary, oldest, groups, dead_letters, retries = replies[index * 6 : index * 6 + 6]
+            summary = _ok(summary, {})
+            oldest = _ok(oldest, [])
+            pending = int(summary.get("pending") or 0)
+            length = int(_ok(length, 0))
+            for info in _ok(groups, []):
+                if str(info.get("name")) == group:
+                    last_delivered[stream] = str(info.get("last-delivered-id") or "0-0")
+            stats[stream] = {
+                "length": length,
+                "pending": pending,
+                "undelivered": max(length - pending, 0),
+                "consumers": {
+                    str(consumer["name"]): int(consumer["pending"]) for consumer in summary.get("consumers") or []
+                },
+                "oldest_pending_age_seconds": (
+                    entry_age_seconds(str(oldest[0]["message_id"]), now_ms) if oldest else None
+                ),
+                "oldest_pending_idle_seconds": (
+                    round(int(oldest[0]["time_since_delivered"]) / 1000, 3) if oldest else None
+                ),
+                "oldest_pending_deliveries": int(oldest[0]["times_delivered"]) if oldest else None,
+                "oldest_undelivered_age_seconds": None,
+                "dead_letter_length": int(_ok(dead_letters, 0)),
+                "scheduled_retries": int(_ok(retries, 0)),
+            }
+
+        waiting = [stream for stream, _ in self.streams if stats[stream]["undelivered"]]
+        if waiting:
             try:
-                await client.expire(key, config.QUEUE_RESULT_TTL_SECONDS)
+                async with client.pipeline(transaction=False) as pipe:
+                    for stream in waiting:
+                        pipe.xrange(stream, min=f"({last_delivered.get(stream, '0-0')}", max="+", count=1)
+                    entries = await pipe.execute(raise_on_error=False)
             except Exception as exc:
-                raise QueueUnavailable("Unable to expire queue attempt state") from exc
-        return attempts
+                raise QueueUnavailable("Unable to sample Redis queue state") from exc
+            for stream, first in zip(waiting, entries, strict=True):
+                first = _ok(first, [])
+                if first:
+                    stats[stream]["oldest_undelivered_age_seconds"] = entry_age_seconds(str(first[0][0]), now_ms)
+        return stats
+
+    async def publish_worker_metrics(self, consumer: str, snapshot: dict[str, Any]) -> None:
+        client = self._require_client()
+        try:
+            await client.hset(self.WORKER_METRICS_KEY, consumer, self._serialize(snapshot))
+        except Exception as exc:
+            raise QueueUnavailable("Unable to publish queue worker metrics") from exc
 
-    async def clear_attempt(self, message: QueueMessage) -> None:
+    async def get_worker_metrics(self, max_age_seconds: float) -> list[dict[str, Any]]:
+        """Snapshots from live workers; entries older than ``max_age_seconds`` are dropped."""
         client = self._require_client()
         try:
-            await client.delete(f"{self.ATTEMPT_PREFIX}{message.stream}:{message.message_id}")
+            raw = await client.hgetall(self.WORKER_METRICS_KEY)
         except Exception as exc:
-            raise QueueUnavailable("Unable to clear queue attempt state") from exc
+            raise QueueUnavailable("Unable to read queue worker metrics") from exc
+        now = time.time()
+        live: list[dict[str, Any]] = []
+        stale: list[str] = []
+        for consumer, value in (raw or {}).items():
+            snapshot = self._deserialize(value)
+            if snapshot and now - float(snapshot.get("updated_at") or 0) <= max_age_seconds:
+                live.append(snapshot)
+            else:
+                stale.append(str(consumer))
+        if stale:
+            with contextlib.suppress(Exception):
+                await client.hdel(self.WORKER_METRICS_KEY, *stale)
+        return live
 
 
 queue_service = QueueService()
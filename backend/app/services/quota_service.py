@@ -109,13 +109,8 @@ class QuotaService:
             # Fail closed for security
             return 9999, None
 
-    async def check_quota(self, user_id: str, is_pro: bool) -> bool:
-        """
-        Check if user has sufficient quota within the 24-hour rolling window.
-        """
-        max_quota = self.PRO_LIMIT if is_pro else self.FREE_LIMIT
-
-        # 1. Check Global usage (System-wide daily limit)
+    async def _global_quota_available(self) -> bool:
+        """Check the system-wide daily upload limit; fails closed."""
         today = datetime.date.today().isoformat()
         try:
             sys_total = 0
@@ -154,6 +149,17 @@ class QuotaService:
         except Exception as e:
             logger.error("Global quota check failed: %s", sanitize_log_value(str(e)))
             return False
+        return True
+
+    async def check_quota(self, user_id: str, is_pro: bool) -> bool:
+        """
+        Check if user has sufficient quota within the 24-hour rolling window.
+        """
+        max_quota = self.PRO_LIMIT if is_pro else self.FREE_LIMIT
+
+        # 1. Check Global usage (System-wide daily limit)
+        if not await self._global_quota_available():
+            return False
 
         # 2. Check User Rolling Quota
         usage_count, _ = await self.get_quota_usage(user_id, max_quota)
@@ -164,6 +170,17 @@ class QuotaService:
 
         return True
 
+    async def remaining_quota(self, user_id: str, is_pro: bool) -> int:
+        """
+        Number of uploads still allowed in the user's rolling window.
+        Returns 0 when the system-wide limit is reached; used to admit batches at once.
+        """
+        max_quota = self.PRO_LIMIT if is_pro else self.FREE_LIMIT
+        if not await self._global_quota_available():
+            return 0
+        usage_count, _ = await self.get_quota_usage(user_id, max_quota)
+        return max(0, max_quota - usage_count)
+
     async def check_and_increment(self, user_id: str, is_pro: bool) -> bool:
         """
         Check quota and perform analytics increment.
@@ -176,13 +193,17 @@ class QuotaService:
         await self.increment_usage(user_id)
         return True
 
-    async def increment_usage(self, user_id: str) -> None:
-        """Increment usage count for user and system via existing RPC for analytics."""
+    async def increment_usage(self, user_id: str, amount: int = 1) -> None:
+        """Add ``amount`` uploads to the user and system counters via existing RPC for analytics."""
+        if amount < 1:
+            return
         today = datetime.date.today().isoformat()
         try:
             # RPC call still uses Supabase client as it's easier than converting RPC to SQL
             # unless it's a simple logic.
-            await self.supabase.rpc("increment_usage", {"p_user_id": user_id, "p_date": today}).execute()
+            await self.supabase.rpc(
+                "increment_usage", {"p_user_id": user_id, "p_date": today, "p_amount": amount}
+            ).execute()
         except Exception as e:
             logger.error(
                 "Failed to increment legacy quota for user %s: %s",
@@ -95,6 +95,17 @@ class RedisService:
             logger.error("Redis get error for %s: %s", str(key).replace("\n", " "), str(e).replace("\n", " "))
             return None
 
+    async def get_many(self, keys: list[str]) -> list[Any | None]:
+        """MGET counterpart of ``get``; missing or unreadable keys come back as None."""
+        if not self.client or not keys:
+            return [None] * len(keys)
+        try:
+            values = await self.client.mget(keys)
+            return [json.loads(value) if value else None for value in values]
+        except Exception as e:
+            logger.error("Redis mget error for %d keys: %s", len(keys), str(e).replace("\n", " "))
+            return [None] * len(keys)
+
     async def set(self, key: str, value: Any, expire: int = 300) -> bool:
         """expire in seconds, default 5 mins"""
         if not self.client:
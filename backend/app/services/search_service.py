@@ -1,7 +1,10 @@
+import math
+from collections.abc import Callable
+from dataclasses import dataclass
 from typing import Any, cast
 
 from postgrest.types import CountMethod
-from sqlalchemy import bindparam, column, desc, func, or_, select, table, text
+from sqlalchemy import Float, bindparam, column, desc, func, or_, select, table, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from supabase import AClient
 
@@ -44,6 +47,94 @@ _SQL_PHOTO_SELECTED_COLUMNS = tuple(
     )
 )
 
+# Bounding box searches are snapped outward to a ~1 km grid so nearby callers
+# share cache entries. Radius searches keep their exact center and radius:
+# snapping the center would move the circle off photos the caller asked for.
+SEARCH_TILE_DEGREES = 0.01
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _haversine_term(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """sin^2(d / 2R) for the great-circle distance d; compared instead of d itself."""
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    return (
+        math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    )
+
+
+@dataclass(frozen=True)
+class SpatialFilter:
+    """Bounding box predicate for search, optionally narrowed to a radius."""
+
+    min_lat: float
+    max_lat: float
+    min_lng: float
+    max_lng: float
+    latitude: float | None = None
+    longitude: float | None = None
+    radius_km: float | None = None
+
+    @classmethod
+    def from_radius(cls, latitude: float, longitude: float, radius_km: float) -> "SpatialFilter":
+        """Build a radius filter with its enclosing bounding box."""
+        # 111 km per degree is slightly under the true arc length, so the box always encloses the circle
+        lat_delta = radius_km / 111.0
+        lng_delta = radius_km / (111.0 * max(0.001, abs(math.cos(math.radians(latitude)))))
+        return cls(
+            min_lat=max(-90.0, latitude - lat_delta),
+            max_lat=min(90.0, latitude + lat_delta),
+            min_lng=max(-180.0, longitude - lng_delta),
+            max_lng=min(180.0, longitude + lng_delta),
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km,
+        )
+
+    @classmethod
+    def from_bbox(cls, north: float, south: float, east: float, west: float) -> "SpatialFilter":
+        """Build a bounding box filter expanded outward to whole tiles."""
+
+        def snap(value: float, rounding: Callable[[float], int]) -> float:
+            return round(rounding(value / SEARCH_TILE_DEGREES) * SEARCH_TILE_DEGREES, 6)
+
+        return cls(
+            min_lat=max(-90.0, snap(min(south, north), math.floor)),
+            max_lat=min(90.0, snap(max(south, north), math.ceil)),
+            min_lng=max(-180.0, snap(min(west, east), math.floor)),
+            max_lng=min(180.0, snap(max(west, east), math.ceil)),
+        )
+
+    @property
+    def haversine_limit(self) -> float | None:
+        """``_haversine_term`` bound for the radius, or None for a plain bounding box."""
+        if self.radius_km is None:
+            return None
+        return math.sin(min(self.radius_km / (2 * EARTH_RADIUS_KM), math.pi / 2)) ** 2
+
+    def contains(self, latitude: float | None, longitude: float | None) -> bool:
+        """Whether a point falls inside the box and, for a radius filter, the circle."""
+        if latitude is None or longitude is None:
+            return False
+        if not (self.min_lat <= latitude <= self.max_lat and self.min_lng <= longitude <= self.max_lng):
+            return False
+        limit = self.haversine_limit
+        if limit is None or self.latitude is None or self.longitude is None:
+            return True
+        return _haversine_term(self.latitude, self.longitude, latitude, longitude) <= limit
+
+    def rpc_params(self) -> dict[str, Any]:
+        """Parameters for the search_photos_in_area RPC."""
+        return {
+            "min_lat": self.min_lat,
+            "max_lat": self.max_lat,
+            "min_lng": self.min_lng,
+            "max_lng": self.max_lng,
+            "center_lat": self.latitude,
+            "center_lng": self.longitude,
+            "radius_meters": self.radius_km * 1000 if self.radius_km is not None else None,
+        }
+
 
 class SearchService:
     def __init__(self, supabase_client: AClient, db: AsyncSession | None = None) -> None:
@@ -84,19 +175,20 @@ class SearchService:
         limit: int = 100,
         offset: int = 0,
         use_fulltext: bool = True,
+        area: SpatialFilter | None = None,
     ) -> list[dict[str, Any]]:
         """
-        Search photos with optional text query and/or tags filter.
+        Search photos with optional text query, tags and/or spatial filter.
         """
         try:
             if query and use_fulltext and await self.fulltext_available:
                 try:
-                    return await self._fulltext_search(query, tags, limit, offset)
+                    return await self._fulltext_search(query, tags, limit, offset, area)
                 except Exception as e:
                     logger.info("Full-text search failed, falling back to ILIKE: %s", e)
 
             sanitized_query = sanitize_search_input(query) if query else None
-            return await self._ilike_search(sanitized_query, tags, limit, offset)
+            return await self._ilike_search(sanitized_query, tags, limit, offset, area)
 
         except Exception as e:
             logger.error("Search failed: %s", e)
@@ -107,22 +199,137 @@ class SearchService:
         query: str | None = None,
         tags: list[str] | None = None,
         use_fulltext: bool = True,
+        area: SpatialFilter | None = None,
     ) -> int | None:
         """Count all matches without fetching another page of photo payloads."""
         if query and use_fulltext and await self.fulltext_available:
             try:
-                return await self._count_matches(query, tags, fulltext=True)
+                return await self._count_matches(query, tags, fulltext=True, area=area)
             except Exception as e:
                 logger.info("Full-text count failed, falling back to ILIKE count: %s", e)
 
         try:
             sanitized_query = sanitize_search_input(query) if query else None
-            return await self._count_matches(sanitized_query, tags, fulltext=False)
+            return await self._count_matches(sanitized_query, tags, fulltext=False, area=area)
         except Exception as e:
             logger.warning("Search count failed: %s", e)
             return None
 
-    async def _count_matches(self, query: str | None, tags: list[str] | None, *, fulltext: bool) -> int:
+    async def search_photos_in_area(
+        self,
+        query: str | None,
+        tags: list[str] | None,
+        area: SpatialFilter,
+        limit: int = 100,
+        offset: int = 0,
+        use_fulltext: bool = True,
+        include_total: bool = False,
+    ) -> tuple[list[dict[str, Any]], int | None]:
+        """
+        Search text, tags and location in one round trip.
+
+        The PostGIS RPC evaluates all predicates (and the total) in a single
+        statement; the SQL/Supabase fallback adds the bounding box and, for a
+        radius, a haversine distance check to the regular search query. The
+        Supabase builder cannot express the distance check, so there rows are
+        filtered after the page is fetched and the total counts the box.
+        """
+        from app.services.feature_flags import FeatureFlagService
+
+        # The RPC matches text through search_vector only; ILIKE-only callers use the fallback.
+        if FeatureFlagService.is_enabled("ENABLE_POSTGIS_SEARCH") and (use_fulltext or not query):
+            try:
+                return await self._search_area_postgis(query, tags, area, limit, offset, include_total)
+            except Exception as e:
+                logger.warning("PostGIS area search failed, falling back to bounding box: %s", e)
+
+        results = await self.search_photos(query, tags, limit, offset, use_fulltext, area=area)
+        if area.radius_km is not None:
+            # SQL applies the distance check itself; the Supabase builder can only filter the box
+            results = [row for row in results if area.contains(row.get("latitude"), row.get("longitude"))]
+        total = await self.count_photos(query, tags, use_fulltext, area=area) if include_total else None
+        return results, total
+
+    async def _search_area_postgis(
+        self,
+        query: str | None,
+        tags: list[str] | None,
+        area: SpatialFilter,
+        limit: int,
+        offset: int,
+        include_total: bool = False,
+    ) -> tuple[list[dict[str, Any]], int | None]:
+        if query and not await self.fulltext_available:
+            raise RuntimeError("Full-text search column unavailable")
+        res = await self.supabase.rpc(
+            "search_photos_in_area",
+            {
+                "search_query": query or None,
+                "tag_filter": self._clean_tags(tags) if tags else None,
+                **area.rpc_params(),
+                "result_limit": min(max(limit, 1), 100),
+                "result_offset": max(offset, 0),
+            },
+        ).execute()
+        rows = cast(list[dict[str, Any]], res.data or [])
+        if any(not isinstance(row, dict) or row.get("status") != self.APPROVED_STATUS for row in rows):
+            raise RuntimeError("Area search returned rows without approved moderation status")
+        total = int(rows[0]["total_count"]) if rows and rows[0].get("total_count") is not None else None
+        if include_total and not rows:
+            # No row carries total_count; past the last page the matches still need counting
+            total = 0 if offset <= 0 else await self.count_photos(query, tags, area=area)
+        photo_columns = {name.strip() for name in self.PHOTO_COLUMNS.split(",")}
+        return [{k: v for k, v in row.items() if k in photo_columns} for row in rows], total
+
+    @staticmethod
+    def _apply_area_sql(sql_query: Any, params: dict[str, Any], area: SpatialFilter | None) -> Any:
+        """Add bounding box (and radius distance) predicates to a SQLAlchemy select."""
+        if area is None:
+            return sql_query
+        params.update(
+            {
+                "area_min_lat": area.min_lat,
+                "area_max_lat": area.max_lat,
+                "area_min_lng": area.min_lng,
+                "area_max_lng": area.max_lng,
+            }
+        )
+        sql_query = sql_query.where(
+            _SQL_PHOTOS.c.latitude >= bindparam("area_min_lat"),
+            _SQL_PHOTOS.c.latitude <= bindparam("area_max_lat"),
+            _SQL_PHOTOS.c.longitude >= bindparam("area_min_lng"),
+            _SQL_PHOTOS.c.longitude <= bindparam("area_max_lng"),
+        )
+        limit = area.haversine_limit
+        if limit is None or area.latitude is None or area.longitude is None:
+            return sql_query
+        params.update(
+            {"area_center_lat": area.latitude, "area_center_lng": area.longitude, "area_haversine_limit": limit}
+        )
+        center_lat = bindparam("area_center_lat", type_=Float)
+        center_lng = bindparam("area_center_lng", type_=Float)
+        half_dlat = func.radians(_SQL_PHOTOS.c.latitude - center_lat) / 2.0
+        half_dlng = func.radians(_SQL_PHOTOS.c.longitude - center_lng) / 2.0
+        haversine = func.power(func.sin(half_dlat), 2) + func.cos(func.radians(center_lat)) * func.cos(
+            func.radians(_SQL_PHOTOS.c.latitude)
+        ) * func.power(func.sin(half_dlng), 2)
+        return sql_query.where(haversine <= bindparam("area_haversine_limit", type_=Float))
+
+    @staticmethod
+    def _apply_area_supabase(db_query: Any, area: SpatialFilter | None) -> Any:
+        """Add bounding box filters to a Supabase query builder."""
+        if area is None:
+            return db_query
+        return (
+            db_query.gte("latitude", area.min_lat)
+            .lte("latitude", area.max_lat)
+            .gte("longitude", area.min_lng)
+            .lte("longitude", area.max_lng)
+        )
+
+    async def _count_matches(
+        self, query: str | None, tags: list[str] | None, *, fulltext: bool, area: SpatialFilter | None = None
+    ) -> int:
         """Run the count portion of the same visibility/search predicate."""
         if self.db:
             params: dict[str, Any] = {"approved_status": self.APPROVED_STATUS}
@@ -153,6 +360,7 @@ class SearchService:
             if tags:
                 params["tags"] = self._clean_tags(tags)
                 count_query = count_query.where(_SQL_PHOTOS.c.tags.op("@>")(bindparam("tags")))
+            count_query = self._apply_area_sql(count_query, params, area)
 
             result = await self.db.execute(count_query, params)
             return int(result.scalar_one() or 0)
@@ -172,6 +380,7 @@ class SearchService:
                 db_query = db_query.or_(f"location_name.ilike.%{safe_query}%,description.ilike.%{safe_query}%")
         if tags:
             db_query = db_query.contains("tags", self._clean_tags(tags))
+        db_query = self._apply_area_supabase(db_query, area)
         response = await db_query.limit(1).execute()
         count = getattr(response, "count", None)
         if count is None:
@@ -184,7 +393,12 @@ class SearchService:
         return [tag.strip().lower().replace("#", "") for tag in tags]
 
     async def _fulltext_search(
-        self, query: str, tags: list[str] | None = None, limit: int = 100, offset: int = 0
+        self,
+        query: str,
+        tags: list[str] | None = None,
+        limit: int = 100,
+        offset: int = 0,
+        area: SpatialFilter | None = None,
     ) -> list[dict[str, Any]]:
         """Perform full-text search with SQL fallback to Supabase client."""
         # Try SQL approach first
@@ -201,6 +415,7 @@ class SearchService:
                 if tags:
                     params["tags"] = self._clean_tags(tags)
                     sql_query = sql_query.where(_SQL_PHOTOS.c.tags.op("@>")(bindparam("tags")))
+                sql_query = self._apply_area_sql(sql_query, params, area)
 
                 sql_query = (
                     sql_query.order_by(desc(_SQL_PHOTOS.c.uploaded_at))
@@ -226,6 +441,7 @@ class SearchService:
             )
             if tags:
                 db_query = db_query.contains("tags", self._clean_tags(tags))
+            db_query = self._apply_area_supabase(db_query, area)
 
             resp = await db_query.execute()
             return cast(list[dict[str, Any]], resp.data or [])
@@ -234,7 +450,12 @@ class SearchService:
             raise
 
     async def _ilike_search(
-        self, query: str | None = None, tags: list[str] | None = None, limit: int = 100, offset: int = 0
+        self,
+        query: str | None = None,
+        tags: list[str] | None = None,
+        limit: int = 100,
+        offset: int = 0,
+        area: SpatialFilter | None = None,
     ) -> list[dict[str, Any]]:
         """Fallback search using ILIKE with SQL fallback to Supabase client."""
         # Try SQL approach first
@@ -260,6 +481,7 @@ class SearchService:
                 if tags:
                     params["tags"] = self._clean_tags(tags)
                     sql_query = sql_query.where(_SQL_PHOTOS.c.tags.op("@>")(bindparam("tags")))
+                sql_query = self._apply_area_sql(sql_query, params, area)
 
                 sql_query = (
                     sql_query.order_by(desc(_SQL_PHOTOS.c.uploaded_at))
@@ -288,6 +510,7 @@ class SearchService:
 
             if tags:
                 db_query = db_query.contains("tags", self._clean_tags(tags))
+            db_query = self._apply_area_supabase(db_query, area)
 
             resp = await db_query.order("uploaded_at", desc=True).range(offset, offset + limit - 1).execute()
             return cast(list[dict[str, Any]], resp.data or [])
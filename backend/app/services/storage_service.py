@@ -1,13 +1,24 @@
 import asyncio
+import io
 import os
 import typing
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import boto3  # type: ignore[import-untyped, unused-ignore]
+from boto3.s3.transfer import TransferConfig  # type: ignore[import-untyped, unused-ignore]
 from fastapi import HTTPException
 
 from app.logger import logger
+from app.services.image_service import ImageService
+
+# Direct uploads land here and are only published after worker validation
+QUARANTINE_PREFIX = "quarantine"
+# S3 DeleteObjects accepts at most this many keys per request
+DELETE_BATCH_SIZE = 1000
+# S3 rejects multipart parts smaller than 5 MB (except the last)
+MIN_MULTIPART_CHUNK_BYTES = 5 * 1024 * 1024
 
 
 class StorageService:
@@ -22,38 +33,193 @@ class StorageService:
             # Alternatively, check connection on specific methods
             pass
 
+        # Blocking S3 calls run on a dedicated pool so upload bursts do not starve
+        # other to_thread work; the HTTP connection pool is sized to match.
+        try:
+            self.max_concurrency = max(1, min(64, int(os.getenv("S3_MAX_CONCURRENCY", "16"))))
+            self.multipart_threshold = max(
+                MIN_MULTIPART_CHUNK_BYTES, int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8")) * 1024 * 1024
+            )
+        except ValueError:
+            logger.warning("Invalid S3 concurrency configuration; using safe defaults")
+            self.max_concurrency = 16
+            self.multipart_threshold = 8 * 1024 * 1024
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="s3-io")
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=MIN_MULTIPART_CHUNK_BYTES,
+            max_concurrency=4,
+        )
+
         # SECURITY: Use S3 client with additional security configurations
         self.s3_client = boto3.client(
             "s3",
             region_name=self.aws_region,
             aws_access_key_id=self.aws_access_key,
             aws_secret_access_key=self.aws_secret_key,
+            # Local S3 stand-ins (MinIO) for development and benchmarks
+            endpoint_url=os.getenv("AWS_S3_ENDPOINT_URL") or None,
             config=boto3.session.Config(
                 signature_version="s3v4",  # Use v4 signatures for better security
                 s3={"addressing_style": "path"},  # Use path-style addressing
+                # Every executor thread may also fan out multipart parts
+                max_pool_connections=self.max_concurrency * 2,
             ),
         )
 
+    async def _run(self, func: typing.Callable[..., typing.Any], *args: typing.Any) -> typing.Any:
+        """Run a blocking S3 call on the storage executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
     async def upload_file(
         self,
         file_content: typing.Any,
         content_type: str,
         file_extension: str = "jpg",
         folder: str = "upload",
+        renditions: list[tuple[str, bytes, str]] | None = None,
     ) -> str:
         """
         Uploads a file to S3 and returns the public URL (Async).
-        Offloads blocking S3 I/O to a thread pool.
+        Offloads blocking S3 I/O to the storage executor; large bodies use multipart.
+
+        With ``renditions`` (see ``build_renditions``) the original is stored as
+        ``<folder>/<id>/original.<ext>`` and every rendition beside it; all puts
+        run concurrently and a partial set is rolled back.
         """
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            None,
-            self._upload_file_sync,
-            file_content,
-            content_type,
-            file_extension,
-            folder,
+        if not renditions:
+            return typing.cast(
+                str,
+                await self._run(self._upload_file_sync, file_content, content_type, file_extension, folder),
+            )
+
+        base_key = ImageService.rendition_base_key(folder, str(uuid.uuid4()))
+        original_key = ImageService.original_key(base_key, file_extension)
+        objects = [(original_key, file_content, content_type)] + [
+            (f"{base_key}/{name}", body, rendition_type) for name, body, rendition_type in renditions
+        ]
+        results = await asyncio.gather(
+            *(self._run(self._put_object_sync, key, body, object_type) for key, body, object_type in objects),
+            return_exceptions=True,
         )
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            logger.error(
+                "S3 rendition upload failed for %d of %d objects: %s", len(failures), len(objects), failures[0]
+            )
+            stored = [
+                key
+                for (key, _, _), result in zip(objects, results, strict=True)
+                if not isinstance(result, BaseException)
+            ]
+            await self.delete_files(stored)
+            raise HTTPException(status_code=500, detail="Failed to upload image. Please try again later.")
+        return self._public_url(original_key)
+
+    def _public_url(self, key: str) -> str:
+        from app.config import config
+
+        if config.CDN_BASE_URL:
+            return f"{config.CDN_BASE_URL}/{key}"
+        return f"https://{self.aws_bucket}.s3.{self.aws_region}.amazonaws.com/{key}"
+
+    def _put_object_sync(self, key: str, body: typing.Any, content_type: str) -> None:
+        extra_args = {
+            "ContentType": content_type,
+            # SECURITY: Enhanced security headers for S3 uploads
+            "CacheControl": "public, max-age=31536000",  # 1 year cache
+            "ContentDisposition": "inline",  # Prevent download prompts
+            # SECURITY: Prevent MIME sniffing and other attacks via metadata
+            "Metadata": {
+                "x-content-type-options": "nosniff",
+                "x-xss-protection": "1; mode=block",
+                "uploaded-via": "purrfect-spots-api",
+                "content-security-policy": "default-src 'self'",
+            },
+        }
+        if isinstance(body, (bytes, bytearray)) and len(body) >= self.multipart_threshold:
+            # Large objects upload as parallel parts; a failed part retries alone.
+            self.s3_client.upload_fileobj(
+                io.BytesIO(body), self.aws_bucket, key, ExtraArgs=extra_args, Config=self.transfer_config
+            )
+            return
+        self.s3_client.put_object(Bucket=self.aws_bucket, Key=key, Body=body, **extra_args)
+
+    @staticmethod
+    def quarantine_key(user_id: str, upload_id: str) -> str:
+        """Key a direct upload lands on; derived server-side so clients cannot name it."""
+        return f"{QUARANTINE_PREFIX}/{user_id}/{upload_id}"
+
+    def create_presigned_upload(
+        self,
+        key: str,
+        content_type: str,
+        max_bytes: int,
+        expires_in: int,
+    ) -> dict[str, typing.Any]:
+        """
+        Presigned POST form for a single quarantine object.
+        S3 enforces the content type and size range; signing is local (no network).
+        """
+        return typing.cast(
+            dict[str, typing.Any],
+            self.s3_client.generate_presigned_post(
+                Bucket=self.aws_bucket,
+                Key=key,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, max_bytes],
+                ],
+                ExpiresIn=expires_in,
+            ),
+        )
+
+    async def download_object(self, key: str, max_bytes: int) -> tuple[bytes, str] | None:
+        """
+        Read an object and its stored content type (Async), bounded by ``max_bytes``.
+        Returns None when the object does not exist; raises ValueError when it is too large.
+        """
+        return typing.cast(tuple[bytes, str] | None, await self._run(self._download_object_sync, key, max_bytes))
+
+    async def object_exists(self, key: str) -> bool:
+        """HEAD an object (Async); False when it does not exist."""
+        return typing.cast(bool, await self._run(self._object_exists_sync, key))
+
+    def _object_exists_sync(self, key: str) -> bool:
+        from botocore.exceptions import ClientError  # type: ignore[import-untyped, unused-ignore]
+
+        try:
+            self.s3_client.head_object(Bucket=self.aws_bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"NoSuchKey", "404"}:
+                return False
+            raise
+        return True
+
+    def _download_object_sync(self, key: str, max_bytes: int) -> tuple[bytes, str] | None:
+        from botocore.exceptions import ClientError  # type: ignore[import-untyped, unused-ignore]
+
+        try:
+            response = self.s3_client.get_object(Bucket=self.aws_bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"NoSuchKey", "404"}:
+                return None
+            raise
+        body = response["Body"]
+        try:
+            if int(response.get("ContentLength") or 0) > max_bytes:
+                raise ValueError("Stored object exceeds the upload size limit")
+            content = typing.cast(bytes, body.read(max_bytes + 1))
+        finally:
+            body.close()
+        if len(content) > max_bytes:
+            raise ValueError("Stored object exceeds the upload size limit")
+        return content, str(response.get("ContentType") or "")
 
     def _upload_file_sync(
         self,
@@ -67,32 +233,10 @@ class StorageService:
         key = f"{folder}/{unique_filename}"
 
         try:
-            self.s3_client.put_object(
-                Bucket=self.aws_bucket,
-                Key=key,
-                Body=file_content,
-                ContentType=content_type,
-                # SECURITY: Enhanced security headers for S3 uploads
-                CacheControl="public, max-age=31536000",  # 1 year cache
-                ContentDisposition="inline",  # Prevent download prompts
-                # SECURITY: Prevent MIME sniffing and other attacks via metadata
-                Metadata={
-                    "x-content-type-options": "nosniff",
-                    "x-xss-protection": "1; mode=block",
-                    "uploaded-via": "purrfect-spots-api",
-                    "content-security-policy": "default-src 'self'",
-                },
-            )
+            self._put_object_sync(key, file_content, content_type)
 
             # Create S3 public URL
-            from app.config import config
-
-            if config.CDN_BASE_URL:
-                url = f"{config.CDN_BASE_URL}/{key}"
-            else:
-                url = f"https://{self.aws_bucket}.s3.{self.aws_region}.amazonaws.com/{key}"
-
-            return url
+            return self._public_url(key)
 
         except Exception as e:
             from botocore.exceptions import ClientError  # type: ignore[import-untyped, unused-ignore]
@@ -108,8 +252,7 @@ class StorageService:
         Lists files in S3 under a specific prefix (Async).
         Returns a list of (key, last_modified) tuples.
         """
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._list_files_sync, prefix)
+        return typing.cast(list[tuple[str, datetime]], await self._run(self._list_files_sync, prefix))
 
     def _list_files_sync(self, prefix: str) -> list[tuple[str, datetime]]:
         """Internal synchronous list method"""
@@ -129,37 +272,44 @@ class StorageService:
             return []
 
     async def delete_files(self, keys: list[str]) -> None:
-        """Delete S3 keys in provider-sized batches."""
+        """Delete S3 keys in provider-sized batches, issuing the batches in parallel."""
         if not keys:
             return
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._delete_files_sync, keys)
+        batches = [keys[start : start + DELETE_BATCH_SIZE] for start in range(0, len(keys), DELETE_BATCH_SIZE)]
+        await asyncio.gather(*(self._run(self._delete_files_sync, batch) for batch in batches))
 
     def _delete_files_sync(self, keys: list[str]) -> None:
-        for start in range(0, len(keys), 1000):
-            batch = keys[start : start + 1000]
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start : start + DELETE_BATCH_SIZE]
             try:
-                self.s3_client.delete_objects(
+                response = self.s3_client.delete_objects(
                     Bucket=self.aws_bucket,
                     Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
                 )
             except Exception as e:
                 logger.warning("S3 batch delete failed for %d objects: %s", len(batch), e)
+                continue
+            errors = response.get("Errors") if isinstance(response, dict) else None
+            if errors:
+                logger.warning("S3 batch delete left %d of %d objects: %s", len(errors), len(batch), errors[0])
 
     async def delete_file(self, file_url: str) -> None:
         """
-        Deletes a file from S3 (Async).
-        Offloads blocking S3 I/O to a thread pool.
+        Deletes a file (and its rendition set) from S3 (Async).
+        Offloads blocking S3 I/O to the storage executor.
         """
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._delete_file_sync, file_url)
+        await self._run(self._delete_file_sync, file_url)
 
     def _delete_file_sync(self, file_url: str) -> None:
         """Internal synchronous delete method"""
         try:
             # Extract key from URL
-            parts = file_url.split("/")
-            if len(parts) >= 2:
+            parts = file_url.split("?", 1)[0].split("/")
+            if ImageService.is_rendition_original(file_url) and len(parts) >= 3:
+                # Original plus its rendition set in one batch request
+                key = "/".join(parts[-3:])
+                self._delete_files_sync([key, *ImageService.rendition_keys(key)])
+            elif len(parts) >= 2:
                 key = f"{parts[-2]}/{parts[-1]}"
                 self.s3_client.delete_object(Bucket=self.aws_bucket, Key=key)
 
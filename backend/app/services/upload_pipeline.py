@@ -0,0 +1,110 @@
+"""
+Upload steps shared by the upload routes and the direct-upload worker.
+
+Server-side cat verification, the auto-approval threshold and rendition
+building live here so the two publishing paths cannot drift apart. Callers map
+the exceptions to their own surface: HTTP errors for the routes, a retry or a
+final rejection for the queue worker.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from fastapi import UploadFile
+
+from app.logger import logger, sanitize_log_value
+from app.services.cat_detection_service import CatDetectionService
+from app.services.google_vision import VisionRateLimited
+from app.utils.image_utils import build_renditions, image_engine
+from app.utils.security import log_security_event
+
+# Confidence (percent) at or above which a photo is published without review
+AUTO_APPROVE_CONFIDENCE = 60.0
+NO_CATS_MESSAGE = "No cats detected in the image. Please upload a photo containing cats."
+
+
+class CatVerificationUnavailable(RuntimeError):
+    """Vision could not verify the image; the same upload may succeed later."""
+
+
+class NoCatsDetected(ValueError):
+    """Server-side detection found no cats; retrying will not change the outcome."""
+
+
+async def verify_cats(
+    detection_service: CatDetectionService,
+    file: UploadFile | bytes,
+    user_id: str,
+    client_cat_data: dict[str, Any] | None = None,
+    content_hash: str | None = None,
+) -> dict[str, Any]:
+    """
+    Run server-side cat detection and return the cat data stored with the photo.
+
+    Raises VisionRateLimited or CatVerificationUnavailable when Vision did not
+    verify the image, and NoCatsDetected when it found no cats.
+    """
+    if content_hash and isinstance(file, bytes):
+        detection_result = await detection_service.detect_cats(file, content_hash=content_hash)
+    else:
+        detection_result = await detection_service.detect_cats(file)
+
+    rate_limited = bool(detection_result.get("rate_limited"))
+    if rate_limited or detection_result.get("service_available") is False or detection_result.get("fallback_active"):
+        log_security_event(
+            "upload_verification_unavailable",
+            user_id=user_id,
+            severity="WARNING",
+        )
+        if rate_limited:
+            raise VisionRateLimited("Cat verification service is rate limited")
+        raise CatVerificationUnavailable("Cat verification service unavailable")
+
+    # Log discrepancy if client said "has_cats" but server says "no"
+    if client_cat_data and client_cat_data.get("has_cats") and not detection_result.get("has_cats"):
+        log_security_event(
+            "detection_mismatch",
+            user_id=user_id,
+            details={
+                "client_result": sanitize_log_value(client_cat_data),
+                "server_result": sanitize_log_value(str(detection_result)[:200]),
+            },
+            severity="WARNING",
+        )
+
+    if not detection_result.get("has_cats", False):
+        log_security_event(
+            "upload_rejected_no_cats",
+            user_id=user_id,
+            details={"detection_result": sanitize_log_value(str(detection_result)[:200])},
+            severity="INFO",
+        )
+        raise NoCatsDetected(NO_CATS_MESSAGE)
+
+    return {
+        "has_cats": detection_result.get("has_cats"),
+        "cat_count": detection_result.get("cat_count", 0),
+        "confidence": detection_result.get("confidence", 0),
+        "suitable_for_cat_spot": detection_result.get("suitable_for_cat_spot", False),
+        "cats_detected": detection_result.get("cats_detected", []),
+        "detection_timestamp": datetime.now().isoformat(),
+        "detection_source": "server",
+    }
+
+
+def approval_status(cat_data: dict[str, Any]) -> str:
+    """High confidence (>= 60%) -> approved; borderline confidence -> pending_review."""
+    confidence_val = float(cat_data.get("confidence", 0))
+    confidence_pct = confidence_val * 100.0 if confidence_val <= 1.0 else confidence_val
+    return "approved" if confidence_pct >= AUTO_APPROVE_CONFIDENCE else "pending_review"
+
+
+async def build_upload_renditions(contents: bytes, user_id: str) -> list[tuple[str, bytes, str]] | None:
+    """Encode upload-time renditions; without them the photo falls back to URL-based resizing."""
+    try:
+        return await image_engine.run(build_renditions, contents)
+    except Exception as e:
+        logger.warning("Rendition build skipped for %s: %s", user_id, e)
+        return None
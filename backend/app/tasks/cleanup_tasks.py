@@ -4,10 +4,13 @@ from datetime import UTC, datetime, timedelta
 from typing import Any, cast
 from urllib.parse import urlparse
 
+from app.config import config
 from app.logger import logger
+from app.services.image_service import ImageService
 from app.services.notification_service import NotificationService
+from app.services.queue_service import queue_service
 from app.services.redis_service import RedisLockError, redis_service
-from app.services.storage_service import storage_service
+from app.services.storage_service import QUARANTINE_PREFIX, storage_service
 from app.services.user_service import UserService
 from app.utils.supabase_client import get_async_supabase_admin_client
 
@@ -56,7 +59,11 @@ async def _cleanup_orphaned_s3_files() -> None:
                 path = urlparse(image_url).path.lstrip("/")
                 marker = path.find("upload/")
                 if marker >= 0:
-                    referenced_keys.add(path[marker:])
+                    key = path[marker:]
+                    referenced_keys.add(key)
+                    # Pre-built renditions live beside the original and are not in the table
+                    if ImageService.is_rendition_original(key):
+                        referenced_keys.update(ImageService.rendition_keys(key))
 
             # 2. List all files in S3
             s3_files = await storage_service.list_files(prefix="upload/")
@@ -102,9 +109,84 @@ async def _cleanup_orphaned_s3_files_job() -> None:
             raise
 
 
+async def _cleanup_abandoned_direct_uploads() -> None:
+    """Delete quarantine objects whose direct upload was never completed or has finished."""
+    try:
+        async with redis_service.lock("maintenance:quarantine", ttl=3600, wait_timeout=0):
+            logger.info("Running abandoned direct upload cleanup...")
+            # A presigned form is usable for the URL TTL and its job record lives
+            # for the job TTL after each update; older objects without a live job are abandoned.
+            max_age = timedelta(seconds=config.DIRECT_UPLOAD_URL_TTL_SECONDS + config.QUEUE_RESULT_TTL_SECONDS)
+            now = datetime.now(UTC)
+            abandoned = []
+            for key, last_modified in await storage_service.list_files(prefix=f"{QUARANTINE_PREFIX}/"):
+                if now - last_modified < max_age:
+                    continue
+                parts = key.split("/")
+                if len(parts) == 3 and queue_service.available:
+                    job = await queue_service.get_upload_job(parts[2], parts[1])
+                    if job and job.get("status") not in queue_service.TERMINAL_JOB_STATUSES:
+                        continue
+                abandoned.append(key)
+
+            if abandoned:
+                logger.info("Deleting %d abandoned direct uploads from quarantine", len(abandoned))
+                await storage_service.delete_files(abandoned)
+            else:
+                logger.info("No abandoned direct uploads found.")
+    except RedisLockError:
+        logger.info("Quarantine cleanup skipped because another worker owns the lock")
+    except Exception as e:
+        logger.error(f"Error in quarantine cleanup: {e}")
+
+
+async def _cleanup_abandoned_direct_uploads_job() -> None:
+    while True:
+        await _cleanup_abandoned_direct_uploads()
+
+        # Hourly: abandoned uploads become eligible shortly after the job TTL
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            logger.info("Quarantine cleanup job cancelled during sleep.")
+            raise
+
+
+async def _reconcile_tag_counts() -> None:
+    """Rebuild tag_counts once to correct drift in the trigger-maintained totals."""
+    try:
+        async with redis_service.lock("maintenance:tag-counts", ttl=3600, wait_timeout=0):
+            logger.info("Running tag count reconciliation...")
+            admin_client = await get_async_supabase_admin_client()
+            result = await admin_client.rpc("reconcile_tag_counts", {}).execute()
+            logger.info("Tag count reconciliation complete: %s tags", result.data)
+
+            from app.utils.cache import invalidate_tags_cache
+
+            await invalidate_tags_cache()
+    except RedisLockError:
+        logger.info("Tag count reconciliation skipped because another worker owns the lock")
+    except Exception as e:
+        logger.error(f"Error in tag count reconciliation: {e}")
+
+
+async def _reconcile_tag_counts_job() -> None:
+    while True:
+        await _reconcile_tag_counts()
+
+        # Sleep for 6 hours; incremental triggers keep counts current in between
+        try:
+            await asyncio.sleep(21600)
+        except asyncio.CancelledError:
+            logger.info("Tag count reconciliation job cancelled during sleep.")
+            raise
+
+
 _notification_task: asyncio.Task | None = None
 _account_deletion_task: asyncio.Task | None = None
 _s3_cleanup_task: asyncio.Task | None = None
+_quarantine_cleanup_task: asyncio.Task | None = None
+_tag_counts_task: asyncio.Task | None = None
 
 
 async def _cleanup_deleted_accounts() -> None:
@@ -137,6 +219,8 @@ async def start_cleanup_jobs() -> None:
     global _notification_task
     global _account_deletion_task
     global _s3_cleanup_task
+    global _quarantine_cleanup_task
+    global _tag_counts_task
     logger.info("Starting background cleanup jobs")
     if _notification_task is None:
         _notification_task = asyncio.create_task(_cleanup_notifications_job())
@@ -144,12 +228,18 @@ async def start_cleanup_jobs() -> None:
         _account_deletion_task = asyncio.create_task(_cleanup_deleted_accounts_job())
     if _s3_cleanup_task is None:
         _s3_cleanup_task = asyncio.create_task(_cleanup_orphaned_s3_files_job())
+    if _quarantine_cleanup_task is None:
+        _quarantine_cleanup_task = asyncio.create_task(_cleanup_abandoned_direct_uploads_job())
+    if _tag_counts_task is None:
+        _tag_counts_task = asyncio.create_task(_reconcile_tag_counts_job())
 
 
 async def stop_cleanup_jobs() -> None:
     global _notification_task
     global _account_deletion_task
     global _s3_cleanup_task
+    global _quarantine_cleanup_task
+    global _tag_counts_task
     logger.info("Stopping background cleanup jobs")
 
     tasks = []
@@ -168,6 +258,16 @@ async def stop_cleanup_jobs() -> None:
         tasks.append(_s3_cleanup_task)
         _s3_cleanup_task = None
 
+    if _quarantine_cleanup_task is not None:
+        _quarantine_cleanup_task.cancel()
+        tasks.append(_quarantine_cleanup_task)
+        _quarantine_cleanup_task = None
+
+    if _tag_counts_task is not None:
+        _tag_counts_task.cancel()
+        tasks.append(_tag_counts_task)
+        _tag_counts_task = None
+
     if tasks:
         with contextlib.suppress(asyncio.CancelledError):
             await asyncio.gather(*tasks)
@@ -179,4 +279,6 @@ async def run_maintenance_tasks() -> dict[str, str]:
     await _cleanup_notifications()
     await _cleanup_deleted_accounts()
     await _cleanup_orphaned_s3_files()
+    await _cleanup_abandoned_direct_uploads()
+    await _reconcile_tag_counts()
     return {"status": "completed", "message": "All maintenance tasks executed successfully"}
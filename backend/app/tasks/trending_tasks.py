@@ -0,0 +1,40 @@
+"""Batch refresh of precomputed gallery trending scores."""
+
+from app.config import config
+from app.logger import logger
+from app.services.redis_service import RedisLockError, redis_service
+from app.utils.supabase_client import get_async_supabase_admin_client
+
+# Upper bound on batches per pass so one slow pass cannot monopolize the worker.
+_MAX_BATCHES_PER_PASS = 50
+
+
+async def refresh_trending_scores_once() -> int:
+    """Refresh stale hot scores in batches until none remain; return rows updated."""
+    lock_ttl = max(300, config.TRENDING_REFRESH_INTERVAL_SECONDS)
+    updated = 0
+    try:
+        async with redis_service.lock("maintenance:trending-scores", ttl=lock_ttl, wait_timeout=0):
+            admin_client = await get_async_supabase_admin_client()
+            for _ in range(_MAX_BATCHES_PER_PASS):
+                res = await admin_client.rpc(
+                    "refresh_photo_hot_scores",
+                    {
+                        "batch_size": config.TRENDING_REFRESH_BATCH_SIZE,
+                        "window_days": config.TRENDING_WINDOW_DAYS,
+                    },
+                ).execute()
+                batch = res.data if isinstance(res.data, int) else 0
+                updated += batch
+                if batch < config.TRENDING_REFRESH_BATCH_SIZE:
+                    break
+    except RedisLockError:
+        logger.info("Trending score refresh skipped because another worker owns the lock")
+        return 0
+
+    if updated:
+        from app.utils.cache import invalidate_gallery_cache
+
+        await invalidate_gallery_cache()
+    logger.info("Trending score refresh updated %d photos", updated)
+    return updated
@@ -0,0 +1,71 @@
+"""
+BK-tree over 64-bit perceptual hashes.
+
+Lookups of every stored hash within a Hamming radius visit only the subtrees
+whose edge distance can still satisfy the triangle inequality, instead of
+scanning the whole set.
+"""
+
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+_HASH_MASK = (1 << 64) - 1
+
+
+def hamming_distance(left: int, right: int) -> int:
+    """Differing bits between two 64-bit hashes (signed or unsigned representation)."""
+    return ((left ^ right) & _HASH_MASK).bit_count()
+
+
+class _Node(Generic[T]):
+    __slots__ = ("children", "key", "values")
+
+    def __init__(self, key: int, value: T) -> None:
+        self.key = key
+        self.values: list[T] = [value]
+        self.children: dict[int, _Node[T]] = {}
+
+
+class BKTree(Generic[T]):
+    """Hamming-metric BK-tree mapping hashes to one or more values."""
+
+    def __init__(self) -> None:
+        self._root: _Node[T] | None = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: int, value: T) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = _Node(key, value)
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(key, node.key)
+            if distance == 0:
+                node.values.append(value)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _Node(key, value)
+                return
+            node = child
+
+    def search(self, key: int, max_distance: int) -> list[tuple[int, T]]:
+        """All ``(distance, value)`` pairs within ``max_distance``, nearest first."""
+        matches: list[tuple[int, T]] = []
+        if self._root is None:
+            return matches
+        pending = [self._root]
+        while pending:
+            node = pending.pop()
+            distance = hamming_distance(key, node.key)
+            if distance <= max_distance:
+                matches.extend((distance, value) for value in node.values)
+            low, high = distance - max_distance, distance + max_distance
+            pending.extend(child for edge, child in node.children.items() if low <= edge <= high)
+        matches.sort(key=lambda match: match[0])
+        return matches
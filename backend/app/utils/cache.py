@@ -244,7 +244,7 @@ cached_user_likes = cache(expire=300, key_prefix="user_likes", skip_args=1)
 
 # Invalidation helpers
 async def invalidate_gallery_cache() -> None:
-    await clear_cache_patterns(("cache:gallery:*", "cache:nearby:*", "cache:viewport:*"))
+    await clear_cache_patterns(("cache:gallery:*", "cache:nearby:*", "cache:viewport:*", "cache:search_area:*"))
 
 
 async def invalidate_tags_cache() -> None:
@@ -267,6 +267,7 @@ async def invalidate_after_upload(user_id: str) -> None:
             "cache:gallery:*",
             "cache:nearby:*",
             "cache:viewport:*",
+            "cache:search_area:*",
             "cache:tags:*",
             "cache:user_photos:*",
             "cache:user_likes:*",
@@ -3,20 +3,48 @@ Image optimization utilities for Purrfect Spots
 Provides image compression, resizing, and format optimization before S3 upload
 """
 
+import asyncio
 import contextlib
 import io
+import math
+import multiprocessing
+import threading
+import time
 import warnings
-from typing import Any
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
 
 from PIL import Image, ImageOps
 
 from app.logger import logger
 from app.utils.security import MAX_IMAGE_PIXELS
 
+T = TypeVar("T")
+
 # Configuration constants
 MAX_IMAGE_DIMENSION = 1920  # Max width or height in pixels
 JPEG_QUALITY = 85  # Quality for JPEG compression (1-100)
 WEBP_QUALITY = 80  # Quality for WebP compression (1-100)
+BLANK_CHECK_MAX_DIMENSION = 256  # Solid-colour check runs on a sample this size
+RESIZE_REDUCING_GAP = 3.0  # Box-reduce before LANCZOS; >= 3 is visually identical to plain LANCZOS
+
+# Pre-built rendition set stored next to each uploaded original (see ImageService.rendition_url)
+RENDITION_WIDTHS = (100, 300, 500, 1200)
+RENDITION_FORMATS = (("WEBP", "webp", "image/webp"), ("JPEG", "jpg", "image/jpeg"))
+
+# Detection payload sent to Cloud Vision: longest edge and JPEG quality
+VISION_MAX_DIMENSION = 1024
+VISION_JPEG_QUALITY = 85
+
+# Perceptual hash: DCT of a 32x32 greyscale sample, keeping the 8x8 low frequencies
+PHASH_SAMPLE_SIZE = 32
+PHASH_BLOCK_SIZE = 8
+_PHASH_COSINES = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * PHASH_SAMPLE_SIZE)) for x in range(PHASH_SAMPLE_SIZE)]
+    for u in range(PHASH_BLOCK_SIZE)
+]
 
 
 def _enforce_image_pixel_limit(img: Image.Image) -> None:
@@ -36,15 +64,72 @@ def _open_image_safely(image_source: bytes | Any) -> Image.Image:
         return img
 
 
-def _preprocess_image(image_content: bytes) -> tuple[Image.Image, str | None, int]:
-    """Open image, apply EXIF orientation transpose, strip EXIF, check aspect ratio, convert mode."""
-    img = _open_image_safely(image_content)
+def _scaled_size(size: tuple[int, int], max_dimension: int) -> tuple[int, int]:
+    """Size with the longest side at ``max_dimension``, rounded up so it never undershoots."""
+    width, height = size
+    scale = max_dimension / max(width, height)
+    return max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale))
+
+
+def decode_image(image_source: bytes | Any, max_dimension: int | None = None) -> Image.Image:
+    """
+    Open and fully decode an image once.
+
+    Unlike ``is_valid_image`` (which only parses headers and must be followed by a
+    second open), the returned image is loaded and can be handed straight to
+    ``optimize_image``. Truncated or corrupt pixel data raises here.
+
+    With ``max_dimension``, JPEGs are decoded in draft mode: libjpeg scales the
+    DCT by 1/2, 1/4 or 1/8 while decoding, never below the target size, so a
+    24 MP photo bound for 1920 px is never materialised at full resolution.
+    """
+    img = _open_image_safely(image_source)
+    if max_dimension and img.format == "JPEG" and max(img.size) > max_dimension:
+        img.draft(img.mode, _scaled_size(img.size, max_dimension))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        img.load()
+    return img
+
+
+def _is_blank_image(img: Image.Image) -> bool:
+    """True for solid-colour images, judged on a nearest-neighbour sample (no averaging)."""
+    sample = img
+    if max(img.size) > BLANK_CHECK_MAX_DIMENSION:
+        sample = img.resize(_scaled_size(img.size, BLANK_CHECK_MAX_DIMENSION), Image.Resampling.NEAREST)
+    extrema = sample.getextrema()
+    if isinstance(extrema, list):
+        return all(isinstance(e, tuple) and e[0] == e[1] for e in extrema)
+    if isinstance(extrema, tuple) and len(extrema) == 2 and isinstance(extrema[0], (int, float)):
+        return bool(extrema[0] == extrema[1])
+    return False
+
+
+def _flatten_to_rgb(img: Image.Image) -> Image.Image:
+    """Convert to RGB, compositing transparent images onto white rather than black."""
+    if img.mode in ("RGBA", "LA", "P", "PA"):
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def _preprocess_image(
+    image_content: bytes, image: Image.Image | None = None, max_dimension: int | None = None
+) -> tuple[Image.Image, str | None, int]:
+    """Decode (draft-scaled for JPEG), apply EXIF orientation, check shape and blankness, strip metadata."""
+    img = image if image is not None else decode_image(image_content, max_dimension)
     original_format = img.format
     original_size = len(image_content)
 
-    # Edge Case #2: Apply EXIF orientation transpose BEFORE stripping EXIF
+    # Edge Case #2: Apply EXIF orientation transpose BEFORE stripping EXIF.
+    # In place: the no-rotation case would otherwise return a full copy.
     try:
-        img = ImageOps.exif_transpose(img)
+        ImageOps.exif_transpose(img, in_place=True)
     except Exception as exc:
         logger.debug("ImageOps.exif_transpose skipped: %s", exc)
 
@@ -62,34 +147,19 @@ def _preprocess_image(image_content: bytes) -> tuple[Image.Image, str | None, in
         raise ValueError("Extreme aspect ratio rejected (maximum 20:1 ratio allowed)")
 
     # Edge Case #15: Reject solid color / blank images (e.g. solid black or solid white)
-    extrema = img.getextrema()
-    is_blank = False
-    if isinstance(extrema, list):
-        is_blank = all(isinstance(e, tuple) and e[0] == e[1] for e in extrema)
-    elif isinstance(extrema, tuple) and len(extrema) == 2 and isinstance(extrema[0], (int, float)):
-        is_blank = extrema[0] == extrema[1]
-
-    if is_blank:
+    if _is_blank_image(img):
         raise ValueError("Solid color or blank image rejected")
 
     logger.debug(f"Original image: {img.size}, format={original_format}, size={original_size / 1024:.1f}KB")
 
     # Edge Case #5: Convert RGBA/CMYK/LA/P/HSV/LAB safely to RGB
-    if img.mode in ("RGBA", "LA", "P"):
-        # Create white background for transparent images
-        background = Image.new("RGB", img.size, (255, 255, 255))
-        if img.mode == "P":
-            img = img.convert("RGBA")
-        background.paste(img, mask=img.split()[-1] if img.mode == "RGBA" else None)
-        img = background
-    elif img.mode != "RGB":
-        img = img.convert("RGB")
+    img = _flatten_to_rgb(img)
 
-    # SECURITY: Strip EXIF & comment metadata to protect user privacy
-    img_no_exif = Image.new(img.mode, img.size)
-    img_no_exif.paste(img, (0, 0))
-    img = img_no_exif
-    logger.debug("Stripped EXIF metadata and normalized image canvas")
+    # SECURITY: Strip EXIF, XMP, ICC & comment metadata to protect user privacy.
+    # Encoders only write metadata passed via save() kwargs or carried in .info,
+    # so clearing .info is enough; no full-canvas copy is needed.
+    img.info.clear()
+    logger.debug("Stripped image metadata")
 
     return img, original_format, original_size
 
@@ -105,7 +175,7 @@ def _resize_image(img: Image.Image, max_dimension: int) -> Image.Image:
             new_height = max_dimension
             new_width = int(width * (max_dimension / height))
 
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
         logger.debug(f"Resized image to: {img.size}")
     return img
 
@@ -141,6 +211,7 @@ def optimize_image(
     max_dimension: int = MAX_IMAGE_DIMENSION,
     quality: int = JPEG_QUALITY,
     target_format: str | None = None,
+    image: Image.Image | None = None,
 ) -> tuple[bytes, str]:
     """
     Optimize image for web delivery and storage.
@@ -151,13 +222,14 @@ def optimize_image(
         max_dimension: Maximum width or height
         quality: Compression quality (1-100)
         target_format: Force output format ('JPEG', 'WEBP', 'PNG') or None for auto
+        image: Already decoded ``image_content`` (see ``decode_image``) to skip a second decode
 
     Returns:
         Tuple of (optimized_bytes, new_content_type)
     """
     try:
         # Preprocess (open, strip EXIF, convert mode)
-        img, original_format, original_size = _preprocess_image(image_content)
+        img, original_format, original_size = _preprocess_image(image_content, image, max_dimension)
 
         # Resize if needed
         img = _resize_image(img, max_dimension)
@@ -204,6 +276,89 @@ def optimize_image(
         return image_content, content_type
 
 
+def build_renditions(image_content: bytes) -> list[tuple[str, bytes, str]]:
+    """
+    Encode the full rendition set from a single decode.
+
+    Each width is resized from the next larger rendition (never upscaled) and
+    written in every ``RENDITION_FORMATS`` format.
+
+    Returns:
+        List of (file name such as ``w300.webp``, encoded bytes, content type)
+    """
+    img = _flatten_to_rgb(decode_image(image_content, max(RENDITION_WIDTHS)))
+    img.info.clear()
+
+    renditions: list[tuple[str, bytes, str]] = []
+    source = img
+    for width in sorted(RENDITION_WIDTHS, reverse=True):
+        if source.width > width:
+            height = max(1, round(source.height * width / source.width))
+            source = source.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
+        for pil_format, extension, content_type in RENDITION_FORMATS:
+            buffer = io.BytesIO()
+            if pil_format == "JPEG":
+                source.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            else:
+                source.save(buffer, format=pil_format, quality=WEBP_QUALITY)
+            renditions.append((f"w{width}.{extension}", buffer.getvalue(), content_type))
+    return renditions
+
+
+def prepare_vision_image(image_content: bytes) -> bytes:
+    """
+    Canonical detection payload: an upright JPEG no larger than ``VISION_MAX_DIMENSION``.
+
+    Small, un-rotated JPEGs are returned unchanged; anything else is decoded once
+    (draft-scaled) and re-encoded. Raises for undecodable input.
+    """
+    img = _open_image_safely(image_content)
+    orientation = img.getexif().get(0x0112, 1)
+    if img.format == "JPEG" and img.mode == "RGB" and max(img.size) <= VISION_MAX_DIMENSION and orientation == 1:
+        return image_content
+
+    img = decode_image(image_content, VISION_MAX_DIMENSION)
+    with contextlib.suppress(Exception):
+        ImageOps.exif_transpose(img, in_place=True)
+    img = _flatten_to_rgb(img)
+    img.thumbnail(
+        (VISION_MAX_DIMENSION, VISION_MAX_DIMENSION), Image.Resampling.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP
+    )
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=VISION_JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def perceptual_hash(image_content: bytes) -> int:
+    """
+    64-bit DCT perceptual hash (pHash) of an image.
+
+    Resized or recompressed copies land within a few bits of each other. The
+    value is returned as a signed 64-bit integer so it fits a Postgres bigint.
+    Never use it to authorize anything: unrelated images can collide.
+    """
+    img = decode_image(image_content, PHASH_SAMPLE_SIZE * 4)
+    sample = img.convert("L").resize((PHASH_SAMPLE_SIZE, PHASH_SAMPLE_SIZE), Image.Resampling.LANCZOS)
+    pixels = sample.tobytes()
+    rows = [pixels[y * PHASH_SAMPLE_SIZE : (y + 1) * PHASH_SAMPLE_SIZE] for y in range(PHASH_SAMPLE_SIZE)]
+
+    # Separable DCT-II restricted to the low-frequency block
+    row_coefficients = [
+        [sum(c * p for c, p in zip(cosines, row, strict=True)) for cosines in _PHASH_COSINES] for row in rows
+    ]
+    block = [
+        sum(_PHASH_COSINES[v][y] * row_coefficients[y][u] for y in range(PHASH_SAMPLE_SIZE))
+        for v in range(PHASH_BLOCK_SIZE)
+        for u in range(PHASH_BLOCK_SIZE)
+    ]
+    median = sorted(block)[len(block) // 2]
+
+    value = 0
+    for coefficient in block:
+        value = (value << 1) | (coefficient > median)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
 def get_image_dimensions(image_content: bytes) -> tuple[int, int]:
     """
     Get image dimensions without full decode.
@@ -242,3 +397,166 @@ def is_valid_image(image_content: bytes | Any) -> bool:
     finally:
         if position is not None and hasattr(image_content, "seek"):
             image_content.seek(position)
+
+
+# ========== Process-pool image engine ==========
+
+
+class ImageEngineSaturated(RuntimeError):
+    """Raised when every worker is busy and the pending queue is full."""
+
+
+def _init_image_worker() -> None:
+    """Load Pillow codecs once per worker so the first real job is not a cold start."""
+    Image.init()
+
+
+def _warm_image_worker() -> int:
+    """No-op job submitted once per worker at startup to fork the processes eagerly."""
+    return multiprocessing.current_process().pid or 0
+
+
+class ImageEngine:
+    """
+    Bounded executor for CPU-heavy image work (decode, resize, encode).
+
+    With ``workers > 0`` jobs run in a warm ``ProcessPoolExecutor`` so they do not
+    compete with request handling for the API worker's GIL; only ``bytes`` and
+    small tuples cross the process boundary. With ``workers == 0`` jobs run on a
+    thread. Either way at most ``workers + max_pending`` jobs are admitted; the
+    rest fail fast with ``ImageEngineSaturated`` so callers can answer 503.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None) -> None:
+        self._workers_override = workers
+        self._max_pending_override = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._pool_restarts = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    @property
+    def workers(self) -> int:
+        if self._workers_override is not None:
+            return self._workers_override
+        from app.config import config
+
+        return int(config.IMAGE_PROCESS_WORKERS)
+
+    @property
+    def max_pending(self) -> int:
+        if self._max_pending_override is not None:
+            return self._max_pending_override
+        from app.config import config
+
+        return int(config.IMAGE_PROCESS_MAX_PENDING)
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_pending
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        methods = multiprocessing.get_all_start_methods()
+        # forkserver children start from a clean process, not a copy of the
+        # threaded event loop; fall back to spawn where it is unavailable.
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_init_image_worker)
+
+    def start(self) -> None:
+        """Create the pool and block until every worker process is running."""
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            executor = self._executor
+        pids = {future.result() for future in [executor.submit(_warm_image_worker) for _ in range(self.workers)]}
+        logger.info("Image engine started with %d worker process(es)", len(pids))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def _reset_broken_executor(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self._pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise ImageEngineSaturated("Image engine is saturated")
+            self._in_flight += 1
+            self._submitted += 1
+
+    def _release(self, elapsed: float, succeeded: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if succeeded:
+                self._completed += 1
+            else:
+                self._failed += 1
+            self._total_seconds += elapsed
+            self._max_seconds = max(self._max_seconds, elapsed)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:  # noqa: ANN401
+        """
+        Run ``func(*args)`` on the engine. ``func`` must be a module-level function
+        and its arguments and result must be picklable when the process pool is on.
+        """
+        self._admit()
+        started = time.perf_counter()
+        succeeded = False
+        try:
+            if self.workers <= 0:
+                result = await asyncio.to_thread(func, *args)
+            else:
+                executor = self._get_executor()
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+                except BrokenProcessPool:
+                    # A worker died (e.g. OOM on a hostile image); replace the pool for later jobs.
+                    logger.error("Image engine worker pool broke; restarting it")
+                    self._reset_broken_executor(executor)
+                    raise
+            succeeded = True
+            return result
+        finally:
+            self._release(time.perf_counter() - started, succeeded)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "mode": "process" if self.workers > 0 else "thread",
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "pool_restarts": self._pool_restarts,
+                "avg_ms": round(self._total_seconds / finished * 1000, 2) if finished else 0.0,
+                "max_ms": round(self._max_seconds * 1000, 2),
+            }
+
+
+image_engine = ImageEngine()
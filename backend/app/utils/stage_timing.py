@@ -0,0 +1,184 @@
+"""
+Per-stage timings for request pipelines (uploads).
+
+A ``StageTimer`` is bound to the current request through a ContextVar, so
+helpers deep in the pipeline (``process_uploaded_image``, the quota lock)
+record stages without extra arguments. Each stage feeds three sinks:
+
+- the timer itself, rendered as a ``Server-Timing`` header;
+- process-wide histograms served by the admin metrics endpoint;
+- an OpenTelemetry span, only when telemetry is enabled.
+
+Outside a timer every helper is a no-op, and with telemetry disabled a stage
+costs two ``perf_counter`` calls and one histogram update.
+"""
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from app.utils.telemetry import get_tracer, telemetry_enabled
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is unbounded
+STAGE_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current_timer: ContextVar["StageTimer | None"] = ContextVar("stage_timer", default=None)
+_tracer: Any = None
+
+
+def _get_stage_tracer() -> Any:  # noqa: ANN401
+    global _tracer
+    if _tracer is None:
+        _tracer = get_tracer("purrfect.stages")
+    return _tracer
+
+
+class StageHistogram:
+    """Fixed-bucket latency histogram for one pipeline stage."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(STAGE_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms: float) -> None:
+        index = len(STAGE_BUCKETS_MS)
+        for position, bound in enumerate(STAGE_BUCKETS_MS):
+            if duration_ms <= bound:
+                index = position
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def merge(self, snapshot: dict[str, Any]) -> None:
+        """Add a ``snapshot()`` taken elsewhere (e.g. in another worker process)."""
+        buckets = snapshot.get("buckets") or {}
+        for index, bound in enumerate(STAGE_BUCKETS_MS):
+            self.counts[index] += int(buckets.get(f"le_{bound}", 0))
+        self.counts[-1] += int(buckets.get("le_inf", 0))
+        count = int(snapshot.get("count", 0))
+        self.count += count
+        self.total_ms += float(snapshot.get("mean_ms", 0.0)) * count
+        self.max_ms = max(self.max_ms, float(snapshot.get("max_ms", 0.0)))
+
+    def quantile(self, q: float) -> float:
+        """Bucket upper bound containing quantile ``q`` (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return float(STAGE_BUCKETS_MS[index]) if index < len(STAGE_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        buckets = {f"le_{bound}": count for bound, count in zip(STAGE_BUCKETS_MS, self.counts, strict=False)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": buckets,
+        }
+
+
+class StageHistograms:
+    """Process-wide histograms keyed by pipeline and stage."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple[str, str], StageHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, pipeline: str, stage: str, duration_ms: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get((pipeline, stage))
+            if histogram is None:
+                histogram = self._histograms[(pipeline, stage)] = StageHistogram()
+            histogram.observe(duration_ms)
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, Any]]]:
+        with self._lock:
+            result: dict[str, dict[str, dict[str, Any]]] = {}
+            for (pipeline, stage), histogram in sorted(self._histograms.items()):
+                result.setdefault(pipeline, {})[stage] = histogram.snapshot()
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+stage_histograms = StageHistograms()
+
+
+class StageTimer:
+    """Ordered stage durations for one request."""
+
+    def __init__(self, pipeline: str) -> None:
+        self.pipeline = pipeline
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        # Repeated stages (e.g. one per image of a batch) accumulate
+        duration_ms = seconds * 1000
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration_ms
+        stage_histograms.observe(self.pipeline, stage, duration_ms)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            if telemetry_enabled():
+                with _get_stage_tracer().start_as_current_span(f"{self.pipeline}.{name}"):
+                    yield
+            else:
+                yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value including the elapsed total."""
+        entries = [f"{name};dur={duration_ms:.1f}" for name, duration_ms in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def stage_timer(pipeline: str) -> Iterator[StageTimer]:
+    """Bind a new timer to the current context for the duration of a request."""
+    timer = StageTimer(pipeline)
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """Time a block as ``name`` on the active timer; no-op without one."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Record a duration measured elsewhere (e.g. inside a worker process)."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.record(name, seconds)
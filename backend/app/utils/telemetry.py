@@ -11,6 +11,11 @@ from fastapi import FastAPI
 from app.logger import logger
 
 
+def telemetry_enabled() -> bool:
+    """Whether OpenTelemetry export is switched on (ENABLE_TELEMETRY=true)."""
+    return os.getenv("ENABLE_TELEMETRY", "false").lower() == "true"
+
+
 def setup_telemetry(app: FastAPI, service_name: str = "purrfect-backend") -> None:
     """
     Configure OpenTelemetry tracing for the application.
@@ -20,7 +25,7 @@ def setup_telemetry(app: FastAPI, service_name: str = "purrfect-backend") -> Non
         service_name: Name of the service for traces
     """
     # Skip if disabled via env
-    if os.getenv("ENABLE_TELEMETRY", "false").lower() != "true":
+    if not telemetry_enabled():
         logger.info("Telemetry disabled (ENABLE_TELEMETRY!=true)")
         return
 
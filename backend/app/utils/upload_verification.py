@@ -42,7 +42,7 @@ def create_upload_verification_token(content: bytes, user_id: str, detection: di
 
 
 def verify_upload_verification_token(
-    token: str, content: bytes, user_id: str, burn: bool = True
+    token: str, content: bytes, user_id: str, burn: bool = True, content_sha256: str | None = None
 ) -> dict[str, Any] | None:
     try:
         payload = jwt.decode(
@@ -57,7 +57,8 @@ def verify_upload_verification_token(
 
     if payload.get("purpose") != TOKEN_PURPOSE or payload.get("sub") != user_id:
         return None
-    if not hmac.compare_digest(str(payload.get("sha256", "")), _content_digest(content)):
+    digest = content_sha256 or _content_digest(content)
+    if not hmac.compare_digest(str(payload.get("sha256", "")), digest):
         return None
 
     jti = payload.get("jti")
@@ -1,19 +1,38 @@
-"""Long-lived worker for Redis-backed Stripe and Google Vision jobs."""
+"""Long-lived worker for Redis-backed Stripe, Google Vision and direct-upload jobs."""
 
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import json
 import os
+import random
+import signal
 import socket
+import time
+from dataclasses import dataclass, field
 from typing import Any
 from uuid import uuid4
 
+import stripe
+
 from app.config import config
 from app.logger import logger
 from app.services.cat_detection_service import cat_detection_service
-from app.services.queue_service import QueueMessage, QueuePayloadMissing, queue_service
+from app.services.detection_cache import detection_cache
+from app.services.direct_upload_service import DirectUploadRejected, process_direct_upload
+from app.services.google_vision import VisionRateLimited
+from app.services.queue_metrics import WorkerQueueMetrics
+from app.services.queue_service import (
+    QueueError,
+    QueueMessage,
+    QueuePayloadMissing,
+    entry_age_seconds,
+    queue_service,
+)
+from app.services.storage_service import storage_service
 from app.services.subscription_service import SubscriptionService
+from app.tasks.trending_tasks import refresh_trending_scores_once
 from app.utils.supabase_client import get_async_supabase_admin_client
 
 
@@ -21,62 +40,350 @@ class PermanentJobError(RuntimeError):
     """Raised when retrying cannot recover a queue entry."""
 
 
-class QueueWorker:
-    """Process each stream with consumer-group delivery and stale-claim recovery."""
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with equal jitter, capped at ``max_seconds``."""
+
+    base_seconds: float
+    max_seconds: float
+
+    def delay(self, attempts: int) -> float:
+        """Seconds to wait after failed attempt ``attempts``: between half and all of the capped backoff."""
+        ceiling = min(self.max_seconds, self.base_seconds * 2.0 ** max(attempts - 1, 0))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)  # noqa: S311 - jitter, not a secret
+
+
+# First matching error class wins. Rate limits back off hardest so retries do
+# not keep the API throttled; Redis blips and network errors recover quickly.
+RETRY_POLICIES: tuple[tuple[tuple[type[BaseException], ...], RetryPolicy], ...] = (
+    ((stripe.error.RateLimitError, VisionRateLimited), RetryPolicy(base_seconds=15, max_seconds=600)),
+    ((QueueError,), RetryPolicy(base_seconds=1, max_seconds=30)),
+    ((TimeoutError, ConnectionError, stripe.error.APIConnectionError), RetryPolicy(base_seconds=2, max_seconds=120)),
+)
+DEFAULT_RETRY_POLICY = RetryPolicy(base_seconds=5, max_seconds=300)
+
+
+def retry_delay(error: BaseException, attempts: int) -> float:
+    for error_types, policy in RETRY_POLICIES:
+        if isinstance(error, error_types):
+            return policy.delay(attempts)
+    return DEFAULT_RETRY_POLICY.delay(attempts)
+
+
+@dataclass
+class _ReadCompletions:
+    """Entries finished by the units started from one read, acknowledged together once the last unit ends."""
+
+    group: str
+    units: int
+    messages: list[QueueMessage] = field(default_factory=list)
+
 
-    def __init__(self) -> None:
+class QueueWorker:
+    """
+    Process each stream with consumer-group delivery and stale-claim recovery.
+
+    Each stream runs up to ``QUEUE_STREAM_CONCURRENCY`` units at once (one
+    message, or one Vision batch). Entries being worked on are tracked so a
+    stale claim never starts them twice, and their visibility is refreshed
+    while they run. Entries finished by the units of one read are
+    acknowledged in one call when the last of those units ends. ``request_stop`` (SIGTERM) stops reading and drains.
+    Failed entries are rescheduled with a per-error-class backoff and moved
+    back into their stream when due.
+    A stream with a priority lane is read lane by lane: the priority lane
+    leads ``QUEUE_PRIORITY_WEIGHT`` reads out of every ``QUEUE_PRIORITY_WEIGHT + 1``
+    and the base lane leads the remaining one, so it is never starved.
+    Outcomes and latencies are published periodically for ``/admin/metrics/queues``.
+    """
+
+    def __init__(self, concurrency: int | None = None) -> None:
         hostname = socket.gethostname().replace(" ", "-")[:40]
         self.consumer = os.getenv("QUEUE_CONSUMER_NAME", f"{hostname}-{uuid4().hex[:10]}")
+        self.concurrency = concurrency or config.QUEUE_STREAM_CONCURRENCY
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        # Entry ids being worked on, keyed by the stream (lane) they were read from
+        self._in_flight: dict[str, set[str]] = {}
+        self._lane_turns: dict[str, int] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._stopping = asyncio.Event()
+        self.metrics = WorkerQueueMetrics()
+
+    @property
+    def streams(self) -> tuple[tuple[str, str], ...]:
+        """One reader per base stream; priority lanes are read by their base stream's reader."""
+        return tuple(
+            (stream, group) for stream, group in queue_service.streams if queue_service.base_stream(stream) == stream
+        )
+
+    def request_stop(self) -> None:
+        """Stop reading new entries; in-flight jobs are allowed to finish."""
+        if not self._stopping.is_set():
+            logger.info("Queue worker stopping; draining %d in-flight unit(s)", len(self._tasks))
+            self._stopping.set()
 
     async def run_forever(self) -> None:
         if not queue_service.available:
             raise RuntimeError("QUEUE_REDIS_URL or REDIS_URL is required for the worker")
 
         await queue_service.ensure_groups()
-        await asyncio.gather(
-            self._run_stream(queue_service.STRIPE_STREAM, queue_service.STRIPE_GROUP),
-            self._run_stream(queue_service.VISION_STREAM, queue_service.VISION_GROUP),
-        )
+        background = [
+            asyncio.create_task(self._run_trending_refresh()),
+            asyncio.create_task(self._run_visibility_heartbeat()),
+            asyncio.create_task(self._run_metrics_publisher()),
+            asyncio.create_task(self._run_retry_scheduler()),
+        ]
+        readers = [asyncio.create_task(self._run_stream(stream, group)) for stream, group in self.streams]
+        try:
+            await self._stopping.wait()
+            # Readers exit after their current read or once a slot frees up
+            await asyncio.wait(readers, timeout=config.QUEUE_DRAIN_TIMEOUT_SECONDS)
+            await self._drain(config.QUEUE_DRAIN_TIMEOUT_SECONDS)
+        finally:
+            for task in [*readers, *background]:
+                task.cancel()
+            await asyncio.gather(*readers, *background, return_exceptions=True)
+
+    async def _drain(self, timeout: float) -> None:
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            # Unacknowledged entries stay pending and are reclaimed by another consumer
+            logger.warning("Queue worker drain timed out; abandoning %d unit(s)", len(pending))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _stream_slots(self, stream: str) -> asyncio.Semaphore:
+        slots = self._slots.get(stream)
+        if slots is None:
+            slots = self._slots[stream] = asyncio.Semaphore(self.concurrency)
+        return slots
+
+    async def _acquire_slots(self, stream: str, limit: int) -> int:
+        """Wait for one free slot, then take up to ``limit`` without waiting."""
+        slots = self._stream_slots(stream)
+        await slots.acquire()
+        acquired = 1
+        while acquired < limit and not slots.locked():
+            await slots.acquire()
+            acquired += 1
+        return acquired
+
+    def _release_slots(self, stream: str, count: int) -> None:
+        slots = self._stream_slots(stream)
+        for _ in range(count):
+            slots.release()
 
     async def _run_stream(self, stream: str, group: str) -> None:
-        while True:
+        per_unit = config.VISION_BATCH_SIZE if stream == queue_service.VISION_STREAM else 1
+        max_units = 1 if per_unit > 1 else 10
+        while not self._stopping.is_set():
+            units = await self._acquire_slots(stream, max_units)
+            if self._stopping.is_set():
+                self._release_slots(stream, units)
+                return
             try:
-                stale_messages = await queue_service.claim_stale(
-                    stream=stream,
+                messages = await self._next_messages(stream, group, units * per_unit)
+            except asyncio.CancelledError:
+                self._release_slots(stream, units)
+                raise
+            except Exception:
+                self._release_slots(stream, units)
+                logger.error("Queue Redis temporarily unavailable for %s", stream, exc_info=True)
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), timeout=5)
+                continue
+
+            batches = [messages[offset : offset + per_unit] for offset in range(0, len(messages), per_unit)]
+            self._release_slots(stream, units - len(batches))
+            read = _ReadCompletions(group, len(batches))
+            for batch in batches:
+                self._start_unit(batch, stream, read)
+
+    def _lane_order(self, stream: str) -> tuple[str, ...]:
+        """Lanes of ``stream`` in the order this read should try them (weighted round robin)."""
+        lanes = queue_service.lanes(stream)
+        if len(lanes) == 1:
+            return lanes
+        turn = self._lane_turns.get(stream, 0)
+        self._lane_turns[stream] = (turn + 1) % (config.QUEUE_PRIORITY_WEIGHT + 1)
+        if turn == config.QUEUE_PRIORITY_WEIGHT:
+            return lanes[::-1]
+        return lanes
+
+    async def _next_messages(self, stream: str, group: str, count: int) -> list[QueueMessage]:
+        """Reclaimed stale entries first, skipping any still running here; otherwise new ones."""
+        lanes = self._lane_order(stream)
+        for lane in lanes:
+            stale_messages = await queue_service.claim_stale(
+                stream=lane,
+                group=group,
+                consumer=self.consumer,
+                count=count,
+            )
+            in_flight = self._in_flight.get(lane, set())
+            stale_messages = [message for message in stale_messages if message.message_id not in in_flight]
+            if stale_messages:
+                return stale_messages
+        if len(lanes) == 1:
+            return await queue_service.read_group(
+                stream=stream,
+                group=group,
+                consumer=self.consumer,
+                count=count,
+            )
+
+        # Fill the read from the leading lane first, without blocking
+        messages: list[QueueMessage] = []
+        for lane in lanes:
+            messages.extend(
+                await queue_service.read_group(
+                    stream=lane,
                     group=group,
                     consumer=self.consumer,
+                    count=count - len(messages),
+                    block_ms=None,
                 )
-                for message in stale_messages:
-                    await self._process_with_retry(message, group)
+            )
+            if len(messages) >= count:
+                break
+        if messages:
+            return messages
+        # Every lane is empty: wait on all of them, splitting the count so the total still fits
+        return await queue_service.read_lanes(
+            streams=lanes,
+            group=group,
+            consumer=self.consumer,
+            count=max(1, count // len(lanes)),
+        )
 
-                messages = await queue_service.read_group(
-                    stream=stream,
-                    group=group,
-                    consumer=self.consumer,
+    def _start_unit(self, messages: list[QueueMessage], stream: str, read: _ReadCompletions) -> None:
+        for message in messages:
+            self._in_flight.setdefault(message.stream, set()).add(message.message_id)
+        task = asyncio.create_task(self._run_unit(messages, stream, read))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_unit(self, messages: list[QueueMessage], stream: str, read: _ReadCompletions) -> None:
+        now_ms = time.time() * 1000
+        for message in messages:
+            waited = entry_age_seconds(message.message_id, now_ms)
+            if waited is not None:
+                self.metrics.observe(message.stream, "wait", waited * 1000)
+        started = time.perf_counter()
+        try:
+            await self._collect_messages(messages, stream, read.group, read.messages)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Entries stay pending and are retried through stale-claim recovery
+            logger.error("Queue unit failed outside job handling on %s", stream, exc_info=True)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for message in messages:
+                self.metrics.observe(message.stream, "processing", elapsed_ms)
+                # Finished entries stay in flight (visibility extended) until acknowledged
+                if message not in read.messages:
+                    self._in_flight[message.stream].discard(message.message_id)
+            self._release_slots(stream, 1)
+            read.units -= 1
+            if read.units == 0:
+                await self._flush_read(read)
+
+    async def _flush_read(self, read: _ReadCompletions) -> None:
+        try:
+            await self._complete_messages(read.messages, read.group)
+        except Exception:
+            # Entries stay pending and are retried through stale-claim recovery
+            logger.error("Could not acknowledge %d finished queue entries", len(read.messages), exc_info=True)
+        finally:
+            for message in read.messages:
+                self._in_flight[message.stream].discard(message.message_id)
+
+    async def _run_visibility_heartbeat(self) -> None:
+        interval = config.QUEUE_VISIBILITY_TIMEOUT_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            for stream, group in queue_service.streams:
+                message_ids = sorted(self._in_flight.get(stream, ()))
+                if not message_ids:
+                    continue
+                try:
+                    await queue_service.extend_visibility(
+                        stream=stream, group=group, consumer=self.consumer, message_ids=message_ids
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.warning("Could not extend visibility of %d entries on %s", len(message_ids), stream)
+
+    async def _run_metrics_publisher(self) -> None:
+        while True:
+            await asyncio.sleep(config.QUEUE_METRICS_INTERVAL_SECONDS)
+            in_flight = {stream: len(message_ids) for stream, message_ids in self._in_flight.items()}
+            try:
+                await queue_service.publish_worker_metrics(
+                    self.consumer, self.metrics.snapshot(self.consumer, in_flight)
                 )
-                for message in messages:
-                    await self._process_with_retry(message, group)
             except asyncio.CancelledError:
                 raise
             except Exception:
-                logger.error("Queue Redis temporarily unavailable for %s", stream, exc_info=True)
-                await asyncio.sleep(5)
+                logger.warning("Could not publish queue worker metrics", exc_info=True)
+
+    async def _run_retry_scheduler(self) -> None:
+        while True:
+            await asyncio.sleep(config.QUEUE_RETRY_POLL_INTERVAL_SECONDS)
+            try:
+                await queue_service.release_due_retries()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Could not release scheduled queue retries", exc_info=True)
+
+    async def _run_trending_refresh(self) -> None:
+        while True:
+            try:
+                await refresh_trending_scores_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Keep the worker alive; the next pass refreshes whatever is still stale.
+                logger.error("Trending score refresh failed", exc_info=True)
+            await asyncio.sleep(config.TRENDING_REFRESH_INTERVAL_SECONDS)
+
+    async def _collect_messages(
+        self, messages: list[QueueMessage], stream: str, group: str, completed: list[QueueMessage]
+    ) -> None:
+        """Process one unit, appending the entries that finished to ``completed``."""
+        if stream == queue_service.VISION_STREAM and len(messages) > 1:
+            await self._run_vision_batch(messages, group, completed)
+            return
+        for message in messages:
+            if await self._process_with_retry(message, group):
+                completed.append(message)
 
-    async def _process_with_retry(self, message: QueueMessage, group: str) -> None:
+    async def _process_with_retry(self, message: QueueMessage, group: str) -> bool:
+        """Run one entry; True when it succeeded and still needs completing."""
         try:
             await self._dispatch_message(message)
         except Exception as exc:
             await self._handle_processing_failure(message, group, exc)
-            return
+            return False
+        return True
 
-        await queue_service.clear_attempt(message)
-        await queue_service.acknowledge(message, group)
+    async def _complete_messages(self, messages: list[QueueMessage], group: str) -> None:
+        await queue_service.complete_messages(messages, group)
+        for message in messages:
+            self.metrics.count(message.stream, "completed")
 
     async def _dispatch_message(self, message: QueueMessage) -> None:
         if message.stream == queue_service.STRIPE_STREAM:
             await self._process_stripe(message)
-        elif message.stream == queue_service.VISION_STREAM:
+        elif queue_service.base_stream(message.stream) == queue_service.VISION_STREAM:
             await self._process_vision(message)
+        elif message.stream == queue_service.UPLOAD_STREAM:
+            await self._process_upload(message)
         else:
             raise PermanentJobError(f"Unsupported queue stream {message.stream}")
 
@@ -89,12 +396,23 @@ class QueueWorker:
 
         if self._should_dead_letter(error, attempts):
             await self._mark_vision_job_failed(message, error, attempts)
+            await self._mark_upload_job_failed(message, error, attempts)
             await self._move_to_dead_letter(message, group, error)
             return
 
+        self.metrics.count(message.stream, "retried")
         await self._mark_vision_job_for_retry(message, attempts)
+        await self._mark_upload_job_for_retry(message, attempts)
+        delay = retry_delay(error, attempts)
+        try:
+            await queue_service.schedule_retry(message, group, attempts, delay)
+        except Exception:
+            # Still pending, so stale-claim recovery retries it instead
+            logger.error("Could not schedule queue retry; leaving it pending: %s", message.message_id, exc_info=True)
+            return
         logger.warning(
-            "Queue job failed; leaving it pending for stale-claim retry (%s/%s): %s",
+            "Queue job failed; retrying in %.1fs (%s/%s): %s",
+            delay,
             attempts,
             config.QUEUE_MAX_ATTEMPTS,
             message.message_id,
@@ -124,14 +442,38 @@ class QueueWorker:
 
     @staticmethod
     def _vision_job_id(message: QueueMessage) -> str:
-        if message.stream != queue_service.VISION_STREAM:
+        if queue_service.base_stream(message.stream) != queue_service.VISION_STREAM:
             return ""
         return message.fields.get("job_id", "")
 
+    async def _mark_upload_job_failed(self, message: QueueMessage, error: Exception, attempts: int) -> None:
+        job_id, user_id = self._upload_job_ref(message)
+        if not job_id:
+            return
+        await queue_service.update_upload_job(
+            job_id,
+            status="failed",
+            error=self._safe_error(error),
+            attempts=attempts,
+        )
+        if user_id:
+            await storage_service.delete_files([storage_service.quarantine_key(user_id, job_id)])
+
+    async def _mark_upload_job_for_retry(self, message: QueueMessage, attempts: int) -> None:
+        job_id, _ = self._upload_job_ref(message)
+        if job_id:
+            await queue_service.update_upload_job(job_id, status="queued", attempts=attempts)
+
+    @staticmethod
+    def _upload_job_ref(message: QueueMessage) -> tuple[str, str]:
+        if message.stream != queue_service.UPLOAD_STREAM:
+            return "", ""
+        return message.fields.get("job_id", ""), message.fields.get("user_id", "")
+
     async def _move_to_dead_letter(self, message: QueueMessage, group: str, error: Exception) -> None:
         try:
             await queue_service.dead_letter(message, group, self._safe_error(error))
-            await queue_service.clear_attempt(message)
+            self.metrics.count(message.stream, "dead_lettered")
             logger.error("Queue job moved to dead-letter stream: %s", message.message_id, exc_info=True)
         except Exception:
             # Keep the source entry pending if the dead-letter write is
@@ -152,7 +494,8 @@ class QueueWorker:
         admin_client = await get_async_supabase_admin_client()
         await SubscriptionService(admin_client).handle_verified_webhook(event)
 
-    async def _process_vision(self, message: QueueMessage) -> None:
+    async def _start_vision_job(self, message: QueueMessage) -> tuple[dict[str, Any], int, bytes] | None:
+        """Validate and claim a vision job; None when it already completed."""
         job_id = message.fields.get("job_id", "")
         user_id = message.fields.get("user_id", "")
         operation = message.fields.get("operation", "")
@@ -163,20 +506,29 @@ class QueueWorker:
         if not job:
             raise QueuePayloadMissing(f"Vision job {job_id} is missing")
         if job.get("status") == "completed":
-            return
+            return None
 
         attempts = int(job.get("attempts") or 0) + 1
         await queue_service.update_vision_job(job_id, status="processing", attempts=attempts, error=None)
         contents = await queue_service.get_vision_payload(job_id)
+        return job, attempts, contents
+
+    async def _complete_vision_job(
+        self,
+        message: QueueMessage,
+        job: dict[str, Any],
+        attempts: int,
+        contents: bytes,
+        cat_detection: dict[str, Any] | None,
+        spot_analysis: dict[str, Any],
+    ) -> None:
+        job_id = message.fields["job_id"]
         filename = str(job.get("filename") or "uploaded-image")
         analyzed_by = str(job.get("analyzed_by") or "")
 
-        if operation == "spot-analysis":
-            result: dict[str, Any] = await cat_detection_service.analyze_cat_spot_suitability(contents)
-            result.update({"filename": filename, "analyzed_by": analyzed_by})
+        if message.fields["operation"] == "spot-analysis" or cat_detection is None:
+            result: dict[str, Any] = {**spot_analysis, "filename": filename, "analyzed_by": analyzed_by}
         else:
-            cat_detection = await cat_detection_service.detect_cats(contents)
-            spot_analysis = await cat_detection_service.analyze_cat_spot_suitability(contents)
             result = {
                 "cat_detection": cat_detection,
                 "spot_analysis": spot_analysis,
@@ -198,6 +550,80 @@ class QueueWorker:
         await queue_service.update_vision_job(job_id, status="completed", result=result, error=None, attempts=attempts)
         await queue_service.delete_vision_payload(job_id)
 
+    @staticmethod
+    def _require_vision_result(cat_detection: dict[str, Any]) -> None:
+        """A fallback result means Vision was not consulted; retry the job rather than complete it."""
+        if cat_detection.get("rate_limited"):
+            raise VisionRateLimited("Vision API rate limited")
+        if cat_detection.get("service_available") is False or cat_detection.get("fallback_active"):
+            raise RuntimeError("Cat verification service unavailable")
+
+    async def _process_vision(self, message: QueueMessage) -> None:
+        started = await self._start_vision_job(message)
+        if started is None:
+            return
+        job, attempts, contents = started
+
+        # Same Vision pass as a batch, so a fallback result is visible for spot analysis too
+        ((cat_detection, spot_analysis),) = await cat_detection_service.analyze_batch([contents])
+        self._require_vision_result(cat_detection)
+        await self._complete_vision_job(message, job, attempts, contents, cat_detection, spot_analysis)
+
+    async def _run_vision_batch(self, messages: list[QueueMessage], group: str, completed: list[QueueMessage]) -> None:
+        """Annotate several vision jobs with one batched Vision pass and fan the results back out."""
+        started: list[tuple[QueueMessage, dict[str, Any], int, bytes]] = []
+        for message in messages:
+            try:
+                job_state = await self._start_vision_job(message)
+            except Exception as exc:
+                await self._handle_processing_failure(message, group, exc)
+                continue
+            if job_state is None:
+                completed.append(message)
+            else:
+                started.append((message, *job_state))
+        if not started:
+            return
+
+        try:
+            analyses = await cat_detection_service.analyze_batch([contents for *_, contents in started])
+        except Exception as exc:
+            for message, *_ in started:
+                await self._handle_processing_failure(message, group, exc)
+            return
+
+        for (message, job, attempts, contents), (cat_detection, spot_analysis) in zip(started, analyses, strict=True):
+            try:
+                self._require_vision_result(cat_detection)
+                await self._complete_vision_job(message, job, attempts, contents, cat_detection, spot_analysis)
+            except Exception as exc:
+                await self._handle_processing_failure(message, group, exc)
+                continue
+            completed.append(message)
+
+    async def _process_upload(self, message: QueueMessage) -> None:
+        job_id, user_id = self._upload_job_ref(message)
+        if not job_id or not user_id:
+            raise PermanentJobError("Upload queue entry is incomplete")
+
+        job = await queue_service.get_upload_job(job_id, user_id)
+        if not job:
+            raise QueuePayloadMissing(f"Upload job {job_id} is missing")
+        if job.get("status") in {"completed", "failed"}:
+            return
+
+        attempts = int(job.get("attempts") or 0) + 1
+        await queue_service.update_upload_job(job_id, status="processing", attempts=attempts, error=None)
+        try:
+            result = await process_direct_upload(job)
+        except DirectUploadRejected as exc:
+            # A rejected upload is a final answer for the client, not a queue failure.
+            await queue_service.update_upload_job(
+                job_id, status="failed", error=self._safe_error(exc), attempts=attempts
+            )
+            return
+        await queue_service.update_upload_job(job_id, status="completed", result=result, error=None, attempts=attempts)
+
     @staticmethod
     def _safe_error(error: Exception) -> str:
         return str(error).replace("\r", " ").replace("\n", " ")[:500] or error.__class__.__name__
@@ -205,11 +631,21 @@ class QueueWorker:
 
 async def _run() -> None:
     worker = QueueWorker()
+    loop = asyncio.get_running_loop()
+    for stop_signal in (signal.SIGTERM, signal.SIGINT):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(stop_signal, worker.request_stop)
     try:
         await worker.run_forever()
     finally:
+        await detection_cache.close()
         await queue_service.close()
+        storage_service.shutdown()
 
 
-if __name__ == "__main__":
+def main() -> None:
     asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Supervisor running several queue worker processes.
+
+``python -m app.worker_supervisor`` keeps between ``QUEUE_WORKER_PROCESSES_MIN``
+and ``QUEUE_WORKER_PROCESSES_MAX`` worker processes. Each one is a full
+``app.worker`` with its own event loop and consumer name
+(``<base>-<slot>``, reused when a slot restarts). All of them read the same
+environment, so they share one configuration.
+
+- Crashed workers are restarted, with exponential backoff if they keep
+  crashing shortly after starting. A worker that exits cleanly is restarted
+  straight away.
+- Every ``QUEUE_SCALE_INTERVAL_SECONDS`` the queue backlog (undelivered plus
+  pending entries) is sampled. The target grows to one process per
+  ``QUEUE_SCALE_BACKLOG_PER_PROCESS`` jobs straight away and shrinks one
+  process per cooldown.
+- A worker being retired, or every worker on SIGTERM/SIGINT, gets SIGTERM
+  and drains its in-flight jobs. Stragglers are killed after the drain
+  timeout plus a short grace period.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol
+from uuid import uuid4
+
+from app.config import config
+from app.logger import logger
+from app.services.queue_service import queue_service
+
+CHECK_INTERVAL_SECONDS = 1.0
+# A worker that exits sooner than this after starting counts as crash-looping
+STABLE_UPTIME_SECONDS = 60.0
+MAX_RESTART_DELAY_SECONDS = 60.0
+SCALE_DOWN_COOLDOWN_SECONDS = 120.0
+# Time past the worker's own drain timeout before a draining worker is killed
+DRAIN_GRACE_SECONDS = 5
+
+
+class WorkerProcess(Protocol):
+    """The parts of ``multiprocessing.Process`` the supervisor uses."""
+
+    @property
+    def exitcode(self) -> int | None: ...
+
+    def is_alive(self) -> bool: ...
+
+    def terminate(self) -> None: ...
+
+    def kill(self) -> None: ...
+
+    def join(self, timeout: float | None = None) -> None: ...
+
+
+def _run_worker_process(consumer: str) -> None:
+    os.environ["QUEUE_CONSUMER_NAME"] = consumer
+    from app.worker import main
+
+    main()
+
+
+def spawn_worker_process(consumer: str) -> WorkerProcess:
+    # Spawned, not forked: the parent's Redis pools and event loop must not leak into children
+    process = multiprocessing.get_context("spawn").Process(
+        target=_run_worker_process, args=(consumer,), name=f"queue-worker-{consumer}"
+    )
+    process.start()
+    return process
+
+
+def desired_processes(backlog: int, minimum: int, maximum: int, backlog_per_process: int) -> int:
+    """Processes needed for ``backlog`` queued or pending jobs, clamped to the range."""
+    return max(minimum, min(maximum, math.ceil(backlog / backlog_per_process)))
+
+
+@dataclass
+class _Slot:
+    process: WorkerProcess | None = None
+    started_at: float = 0.0
+    crashes: int = 0
+    restart_at: float = 0.0
+
+
+class WorkerSupervisor:
+    def __init__(
+        self,
+        min_processes: int | None = None,
+        max_processes: int | None = None,
+        spawn: Callable[[str], WorkerProcess] | None = None,
+    ) -> None:
+        self.min_processes = min_processes or config.QUEUE_WORKER_PROCESSES_MIN
+        self.max_processes = max(self.min_processes, max_processes or config.QUEUE_WORKER_PROCESSES_MAX)
+        hostname = socket.gethostname().replace(" ", "-")[:40]
+        self.base_name = os.getenv("QUEUE_CONSUMER_NAME", f"{hostname}-{uuid4().hex[:10]}")
+        self.target = self.min_processes
+        self._spawn = spawn or spawn_worker_process
+        self._slots: dict[int, _Slot] = {}
+        # Retired workers still draining, with the time they get killed at
+        self._retiring: list[tuple[WorkerProcess, float]] = []
+        self._last_scaled = time.monotonic()
+        self._stopping = asyncio.Event()
+
+    @property
+    def running(self) -> int:
+        return sum(1 for slot in self._slots.values() if slot.process is not None and slot.process.is_alive())
+
+    def request_stop(self) -> None:
+        if not self._stopping.is_set():
+            logger.info("Worker supervisor stopping %d worker process(es)", self.running)
+            self._stopping.set()
+
+    async def run_forever(self) -> None:
+        next_scale = 0.0
+        try:
+            while not self._stopping.is_set():
+                now = time.monotonic()
+                if now >= next_scale:
+                    await self.rescale()
+                    next_scale = now + config.QUEUE_SCALE_INTERVAL_SECONDS
+                self.reconcile()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), timeout=CHECK_INTERVAL_SECONDS)
+        finally:
+            await self.shutdown(config.QUEUE_DRAIN_TIMEOUT_SECONDS + DRAIN_GRACE_SECONDS)
+
+    async def rescale(self) -> None:
+        """Move the target towards what the current backlog needs."""
+        if self.min_processes == self.max_processes:
+            return
+        try:
+            stats = await queue_service.stream_stats()
+        except Exception:
+            logger.warning("Could not sample queue backlog; keeping %d worker process(es)", self.target)
+            return
+        backlog = sum(stream["undelivered"] + stream["pending"] for stream in stats.values())
+        desired = desired_processes(
+            backlog, self.min_processes, self.max_processes, config.QUEUE_SCALE_BACKLOG_PER_PROCESS
+        )
+        now = time.monotonic()
+        if desired > self.target:
+            logger.info("Queue backlog %d: scaling workers %d -> %d", backlog, self.target, desired)
+            self.target = desired
+            self._last_scaled = now
+        elif desired < self.target and now - self._last_scaled >= SCALE_DOWN_COOLDOWN_SECONDS:
+            logger.info("Queue backlog %d: scaling workers %d -> %d", backlog, self.target, self.target - 1)
+            self.target -= 1
+            self._last_scaled = now
+
+    def reconcile(self) -> None:
+        """Retire slots above the target, restart dead workers and start missing ones."""
+        now = time.monotonic()
+        for index in sorted(self._slots):
+            if index >= self.target:
+                self._retire(index, now)
+        self._retiring = [
+            (process, kill_at) for process, kill_at in self._retiring if not self._reaped(process, kill_at, now)
+        ]
+
+        for index in range(self.target):
+            slot = self._slots.setdefault(index, _Slot())
+            process = slot.process
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                self._record_exit(index, slot, process, now)
+            if now >= slot.restart_at:
+                self._start(index, slot, now)
+
+    def _retire(self, index: int, now: float) -> None:
+        slot = self._slots.pop(index)
+        if slot.process is not None and slot.process.is_alive():
+            logger.info("Retiring queue worker %s", self._consumer(index))
+            slot.process.terminate()
+            self._retiring.append((slot.process, now + config.QUEUE_DRAIN_TIMEOUT_SECONDS + DRAIN_GRACE_SECONDS))
+
+    def _record_exit(self, index: int, slot: _Slot, process: WorkerProcess, now: float) -> None:
+        process.join(0)
+        slot.process = None
+        if process.exitcode == 0:
+            # Clean exit (e.g. the worker drained after a stray SIGTERM); not a crash
+            slot.crashes = 0
+            slot.restart_at = now
+            logger.info("Queue worker %s exited cleanly; restarting", self._consumer(index))
+            return
+        if now - slot.started_at < STABLE_UPTIME_SECONDS:
+            slot.crashes += 1
+        else:
+            slot.crashes = 1
+        delay = min(2 ** (slot.crashes - 1), MAX_RESTART_DELAY_SECONDS)
+        slot.restart_at = now + delay
+        logger.error(
+            "Queue worker %s exited with code %s; restarting in %.0fs", self._consumer(index), process.exitcode, delay
+        )
+
+    def _start(self, index: int, slot: _Slot, now: float) -> None:
+        try:
+            slot.process = self._spawn(self._consumer(index))
+        except Exception:
+            logger.error("Could not start queue worker %s", self._consumer(index), exc_info=True)
+            slot.restart_at = now + MAX_RESTART_DELAY_SECONDS
+            return
+        slot.started_at = now
+
+    def _consumer(self, index: int) -> str:
+        return f"{self.base_name}-{index}"
+
+    @staticmethod
+    def _reaped(process: WorkerProcess, kill_at: float, now: float) -> bool:
+        if process.is_alive():
+            if now < kill_at:
+                return False
+            logger.warning("Retired queue worker did not drain in time; killing it")
+            process.kill()
+            process.join(1)
+            return True
+        process.join(0)
+        return True
+
+    async def shutdown(self, timeout: float) -> None:
+        """SIGTERM every worker, wait for them to drain, then kill what is left."""
+        processes = [slot.process for slot in self._slots.values() if slot.process is not None]
+        processes.extend(process for process, _ in self._retiring)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        while any(process.is_alive() for process in processes) and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+        for process in processes:
+            if process.is_alive():
+                logger.warning("Queue worker did not drain in time; killing it")
+                process.kill()
+            process.join(1)
+        self._slots.clear()
+        self._retiring = []
+
+
+async def _run() -> None:
+    supervisor = WorkerSupervisor()
+    loop = asyncio.get_running_loop()
+    for stop_signal in (signal.SIGTERM, signal.SIGINT):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(stop_signal, supervisor.request_stop)
+    try:
+        await supervisor.run_forever()
+    finally:
+        await queue_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_run())
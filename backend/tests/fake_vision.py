@@ -0,0 +1,52 @@
+"""
+In-process stand-in for ``google.cloud.vision.ImageAnnotatorClient``.
+
+Only ``batch_annotate_images`` is implemented. Image bytes containing ``b"dog"``
+annotate as a dog, ``b"error"`` fails that image, ``b"quota"`` fails it with
+RESOURCE_EXHAUSTED, anything else is a cat. Every
+call is recorded so tests and benchmarks can count API requests per image.
+"""
+
+import time
+from types import SimpleNamespace
+from typing import Any
+
+
+class FakeVisionClient:
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = latency_seconds
+        self.calls: list[int] = []
+        self.payloads: list[bytes] = []
+
+    @property
+    def images_annotated(self) -> int:
+        return sum(self.calls)
+
+    def batch_annotate_images(self, *, requests: list[Any], **_: Any) -> SimpleNamespace:
+        self.calls.append(len(requests))
+        self.payloads.extend(request.image.content for request in requests)
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return SimpleNamespace(responses=[self._annotate(request.image.content) for request in requests])
+
+    @staticmethod
+    def _annotate(content: bytes) -> SimpleNamespace:
+        if b"quota" in content:
+            return SimpleNamespace(
+                error=SimpleNamespace(code=8, message="Quota exceeded"),
+                label_annotations=[],
+                localized_object_annotations=[],
+            )
+        if b"error" in content:
+            return SimpleNamespace(
+                error=SimpleNamespace(message="Bad image data"), label_annotations=[], localized_object_annotations=[]
+            )
+        animal = "Dog" if b"dog" in content else "Cat"
+        return SimpleNamespace(
+            error=SimpleNamespace(message=""),
+            label_annotations=[
+                SimpleNamespace(description=animal, score=0.96),
+                SimpleNamespace(description="Park", score=0.8),
+            ],
+            localized_object_annotations=[SimpleNamespace(name=animal, score=0.93)],
+        )
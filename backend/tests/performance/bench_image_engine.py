@@ -0,0 +1,81 @@
+"""
+Upload image-processing throughput benchmark.
+
+Runs the upload decode/optimize step (the work done by process_uploaded_image
+after validation) through the image engine in thread mode and process-pool
+mode at 1, 4 and 16 concurrent uploads.
+
+Usage (from backend/):
+    python -m tests.performance.bench_image_engine [--uploads 48] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from PIL import Image  # noqa: E402
+
+from app.utils.file_processing import _decode_and_optimize  # noqa: E402
+from app.utils.image_utils import ImageEngine, ImageEngineSaturated  # noqa: E402
+
+CONCURRENCY_LEVELS = (1, 4, 16)
+
+
+def _sample_upload() -> bytes:
+    """A 12MP-class phone photo with real texture so encoders do real work."""
+    img = Image.effect_noise((4000, 3000), 64).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+async def _run(engine: ImageEngine, payload: bytes, uploads: int, concurrency: int) -> tuple[float, int]:
+    gate = asyncio.Semaphore(concurrency)
+    rejected = 0
+
+    async def _one() -> None:
+        nonlocal rejected
+        async with gate:
+            try:
+                await engine.run(_decode_and_optimize, payload, "image/jpeg", True, 1920)
+            except ImageEngineSaturated:
+                rejected += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_one() for _ in range(uploads)))
+    return time.perf_counter() - started, rejected
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=48)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    payload = _sample_upload()
+    print(f"payload={len(payload) / 1024:.0f}KB uploads={args.uploads} cpus={os.cpu_count()}")
+    print(f"{'mode':<8} {'conc':>4} {'seconds':>8} {'uploads/s':>10} {'avg_ms':>8} {'rejected':>8}")
+
+    for mode, workers in (("thread", 0), ("process", args.workers)):
+        for concurrency in CONCURRENCY_LEVELS:
+            engine = ImageEngine(workers=workers, max_pending=max(CONCURRENCY_LEVELS))
+            engine.start()
+            try:
+                elapsed, rejected = await _run(engine, payload, args.uploads, concurrency)
+            finally:
+                engine.shutdown()
+            stats = engine.stats()
+            print(
+                f"{mode:<8} {concurrency:>4} {elapsed:>8.2f} {args.uploads / elapsed:>10.2f} "
+                f"{stats['avg_ms']:>8.1f} {rejected:>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
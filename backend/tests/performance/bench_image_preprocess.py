@@ -0,0 +1,76 @@
+"""
+Peak RSS and latency of upload preprocessing on 24 MP phone photos.
+
+Each mode runs in a fresh process so ru_maxrss reflects only that mode:
+  full-decode  decode at full resolution, then optimize (no draft scaling)
+  draft        optimize_image's default path (JPEG draft decode near target)
+
+Usage (from backend/):
+    python -m tests.performance.bench_image_preprocess [--runs 5] [--max-dimension 1920]
+"""
+
+import argparse
+import io
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+PHOTO_SIZE = (6000, 4000)  # 24 MP
+
+
+def _phone_photo() -> bytes:
+    from PIL import Image
+
+    img = Image.effect_noise(PHOTO_SIZE, 48).convert("RGB")
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def _measure(mode: str, payload: bytes, runs: int, max_dimension: int, queue: "multiprocessing.Queue[tuple]") -> None:
+    from app.utils.image_utils import decode_image, optimize_image
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        if mode == "full-decode":
+            optimize_image(payload, "image/jpeg", max_dimension, image=decode_image(payload))
+        else:
+            optimize_image(payload, "image/jpeg", max_dimension)
+        timings.append(time.perf_counter() - started)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((mode, statistics.median(timings) * 1000, peak_kb / 1024, (peak_kb - baseline_kb) / 1024))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-dimension", type=int, default=1920)
+    args = parser.parse_args()
+
+    payload = _phone_photo()
+    print(
+        f"photo={PHOTO_SIZE[0]}x{PHOTO_SIZE[1]} jpeg={len(payload) / 1024 / 1024:.1f}MB target={args.max_dimension}px"
+    )
+    print(f"{'mode':<12} {'median_ms':>10} {'peak_rss_mb':>12} {'growth_mb':>10}")
+
+    context = multiprocessing.get_context("spawn")
+    for mode in ("full-decode", "draft"):
+        queue: multiprocessing.Queue[tuple] = context.Queue()
+        process = context.Process(target=_measure, args=(mode, payload, args.runs, args.max_dimension, queue))
+        process.start()
+        name, median_ms, peak_mb, growth_mb = queue.get()
+        process.join()
+        print(f"{name:<12} {median_ms:>10.1f} {peak_mb:>12.1f} {growth_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Local cat pre-classifier: accuracy against Vision escalation, and throughput.
+
+Scores a labelled sample set laid out as ``<samples>/cat/*`` and
+``<samples>/not_cat/*`` with the ONNX model in-process (the same
+``score_images`` call the image engine workers run), then reports:
+
+- how many images were settled locally (Vision calls avoided) vs escalated;
+- accuracy of the local decisions and false accepts (non-cats admitted as cats);
+- images/s for single-image and batched inference at the given thread cap.
+
+Requires numpy and onnxruntime. Model weights and sample photos are not shipped
+with the repository; point ``--model`` and ``--samples`` at your own.
+
+Usage (from backend/):
+    python -m tests.performance.bench_local_classifier --model cat.onnx --samples ./samples \
+        [--threads 1] [--batch-size 16] [--cat-threshold 0.97] [--not-cat-threshold 0.03]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.services.local_classifier import ONNX_AVAILABLE, score_images  # noqa: E402
+
+LABELS = {"cat": True, "not_cat": False}
+
+
+def _load_samples(root: Path) -> list[tuple[bytes, bool]]:
+    samples = []
+    for folder, is_cat in LABELS.items():
+        for path in sorted((root / folder).glob("*")):
+            if path.is_file():
+                samples.append((path.read_bytes(), is_cat))
+    return samples
+
+
+def _throughput(model: str, size: int, threads: int, contents: list[bytes], batch_size: int) -> float:
+    # Warm the session outside the timed region
+    score_images(model, size, threads, contents[:1])
+    started = time.perf_counter()
+    for offset in range(0, len(contents), batch_size):
+        score_images(model, size, threads, contents[offset : offset + batch_size])
+    return len(contents) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--samples", required=True, type=Path)
+    parser.add_argument("--input-size", type=int, default=224)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--cat-threshold", type=float, default=0.97)
+    parser.add_argument("--not-cat-threshold", type=float, default=0.03)
+    args = parser.parse_args()
+    if not ONNX_AVAILABLE:
+        sys.exit("numpy and onnxruntime are required")
+
+    samples = _load_samples(args.samples)
+    if not samples:
+        sys.exit(f"no images under {args.samples}/cat or {args.samples}/not_cat")
+    contents = [content for content, _ in samples]
+    scores = score_images(args.model, args.input_size, args.threads, contents)
+
+    settled = correct = false_accepts = unscorable = 0
+    for (_, is_cat), score in zip(samples, scores, strict=True):
+        if score is None:
+            unscorable += 1
+            continue
+        if score >= args.cat_threshold:
+            decision = True
+        elif score <= args.not_cat_threshold:
+            decision = False
+        else:
+            continue
+        settled += 1
+        correct += decision == is_cat
+        false_accepts += decision and not is_cat
+
+    total = len(samples)
+    cats = sum(is_cat for _, is_cat in samples)
+    print(f"samples={total} (cat={cats}, not_cat={total - cats}) threads={args.threads}")
+    print(f"settled locally      {settled:>6} ({settled / total:.1%} of Vision calls avoided)")
+    print(f"escalated to Vision  {total - settled:>6} (unscorable: {unscorable})")
+    print(f"local accuracy       {correct / settled if settled else 0:.1%}")
+    print(f"false accepts        {false_accepts:>6}")
+    for batch_size in sorted({1, args.batch_size}):
+        rate = _throughput(args.model, args.input_size, args.threads, contents, batch_size)
+        print(f"throughput batch={batch_size:<3} {rate:>8.1f} images/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Redis round trips and commands per queue job.
+
+Enqueues Vision, Stripe and upload jobs through ``queue_service`` and drives
+the worker's Stripe reader (``_run_stream``, so reads, stale claims and
+per-read acknowledgement are all real) through the success, retry and
+dead-letter paths, counting what reaches Redis: round trips (one per socket
+write; a pipeline or script is one) and commands. Consume figures include the
+reader's idle polls once the stream is empty.
+
+Runs against fakeredis (``pip install -r requirements-dev.txt``, which brings
+fakeredis with Lua support) unless ``--redis-url`` points at a real,
+disposable Redis database.
+
+Usage (from backend/):
+    python -m tests.performance.bench_queue_roundtrips [--jobs 50] [--redis-url redis://127.0.0.1:6379/15]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from redis.asyncio import connection as redis_connection  # noqa: E402
+
+from app.logger import logger  # noqa: E402
+from app.services.queue_service import QueueService  # noqa: E402
+from app.worker import PermanentJobError, QueueWorker  # noqa: E402
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.round_trips = 0
+        self.commands = 0
+
+    def install(self) -> Any:  # noqa: ANN401
+        counter = self
+        send_packed = redis_connection.AbstractConnection.send_packed_command
+
+        async def _send_packed(conn: Any, command: Any, check_health: bool = True) -> None:  # noqa: ANN401
+            counter.round_trips += 1
+            # A pipeline packs several commands into one write
+            parts = command if isinstance(command, list) else [command]
+            counter.commands += sum(bytes(part).count(b"\r\n*") + bytes(part).startswith(b"*") for part in parts)
+            await send_packed(conn, command, check_health)
+
+        return patch.object(redis_connection.AbstractConnection, "send_packed_command", _send_packed)
+
+
+def _clients(redis_url: str | None) -> tuple[Any, Any]:
+    if redis_url:
+        import redis.asyncio as aioredis
+
+        return aioredis.from_url(redis_url, decode_responses=True), aioredis.from_url(redis_url)
+    try:
+        import fakeredis
+    except ImportError:
+        sys.exit('fakeredis is not installed: pip install "fakeredis[lua]", or pass --redis-url')
+
+    class BlockingFakeRedis(fakeredis.FakeAsyncRedis):
+        """fakeredis answers a blocking XREADGROUP at once; wait out the block like Redis would."""
+
+        async def xreadgroup(self, *args: Any, block: int | None = None, **kwargs: Any) -> Any:  # noqa: ANN401
+            reply = await super().xreadgroup(*args, block=block, **kwargs)
+            if not reply and block:
+                await asyncio.sleep(block / 1000)
+            return reply
+
+    server = fakeredis.FakeServer()
+    return (
+        BlockingFakeRedis(server=server, decode_responses=True),
+        fakeredis.FakeAsyncRedis(server=server),
+    )
+
+
+async def _measure(counter: Counter, jobs: int, label: str, action: Callable[[], Awaitable[Any]]) -> None:
+    before = (counter.round_trips, counter.commands)
+    await action()
+    round_trips = (counter.round_trips - before[0]) / jobs
+    commands = (counter.commands - before[1]) / jobs
+    print(f"{label:<28} {round_trips:>12.2f} {commands:>14.2f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+    logger.setLevel(logging.CRITICAL)
+    jobs = args.jobs
+
+    service = QueueService()
+    service.client, service.binary_client = _clients(args.redis_url)
+    if args.redis_url:
+        await service.client.flushdb()
+    counter = Counter()
+
+    async def _enqueue_vision() -> None:
+        for _ in range(jobs):
+            await service.enqueue_vision_job(
+                operation="combined", user_id="bench", analyzed_by="bench", filename=None, contents=b"x" * 2048
+            )
+
+    async def _enqueue_stripe() -> None:
+        for index in range(jobs):
+            await service.enqueue_stripe_webhook({"id": f"evt_{index}", "type": "invoice.paid"})
+
+    async def _enqueue_upload() -> None:
+        for index in range(jobs):
+            await service.enqueue_upload_job(
+                upload_id=f"upload-{index}", user_id="bench", is_pro=False, object_key="k", photo={}
+            )
+
+    async def _consume(error: Exception | None) -> None:
+        async def _dispatch(message: Any) -> None:  # noqa: ANN401
+            if error:
+                raise error
+
+        worker = QueueWorker()
+        with patch.object(worker, "_dispatch_message", new=_dispatch):
+            reader = asyncio.create_task(worker._run_stream(service.STRIPE_STREAM, service.STRIPE_GROUP))
+            stripe = worker.metrics.snapshot(worker.consumer, {})["streams"][service.STRIPE_STREAM]
+            while sum(stripe["outcomes"].values()) < jobs:
+                await asyncio.sleep(0.005)
+                stripe = worker.metrics.snapshot(worker.consumer, {})["streams"][service.STRIPE_STREAM]
+            worker.request_stop()
+            await reader
+            await worker._drain(5)
+
+    with counter.install(), patch("app.worker.queue_service", service):
+        await service.ensure_groups()
+        print(f"jobs={jobs} backend={'redis' if args.redis_url else 'fakeredis'}")
+        print(f"{'path (per job)':<28} {'round trips':>12} {'commands':>14}")
+        await _measure(counter, jobs, "enqueue vision", _enqueue_vision)
+        await _measure(counter, jobs, "enqueue upload", _enqueue_upload)
+        await _measure(counter, jobs, "enqueue stripe", _enqueue_stripe)
+        await _measure(counter, jobs, "read + succeed", lambda: _consume(None))
+        await _enqueue_stripe()
+        await _measure(counter, jobs, "read + fail, retry later", lambda: _consume(RuntimeError("transient")))
+        await _enqueue_stripe()
+        await _measure(counter, jobs, "read + dead-letter", lambda: _consume(PermanentJobError("bad")))
+
+    await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+StorageService throughput: concurrent puts and bulk deletes.
+
+Compares the previous dispatch (default asyncio executor, batch deletes issued
+one after another) with the dedicated storage executor and parallel batches.
+
+Without AWS_S3_ENDPOINT_URL the S3 client is replaced by an in-process stand-in
+that sleeps for a fixed round-trip per request, so the numbers isolate
+dispatch behaviour. Point AWS_S3_ENDPOINT_URL/AWS_S3_BUCKET at MinIO (or any
+S3-compatible server) with credentials in the environment to measure a real
+server instead.
+
+Usage (from backend/):
+    python -m tests.performance.bench_storage [--puts 64] [--deletes 5000] [--rtt-ms 40]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.services.storage_service import StorageService  # noqa: E402
+
+
+class LatencyS3Client:
+    """Stand-in for a remote S3: every request costs one fixed round-trip."""
+
+    def __init__(self, rtt_seconds: float) -> None:
+        self.rtt_seconds = rtt_seconds
+
+    def put_object(self, **_: Any) -> dict[str, Any]:
+        time.sleep(self.rtt_seconds)
+        return {}
+
+    def delete_objects(self, **_: Any) -> dict[str, Any]:
+        # DeleteObjects is heavier server-side than a single put
+        time.sleep(self.rtt_seconds * 4)
+        return {}
+
+
+async def _legacy_puts(service: StorageService, count: int, body: bytes) -> None:
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(None, service._put_object_sync, f"bench/{index}.jpg", body, "image/jpeg")
+            for index in range(count)
+        )
+    )
+
+
+async def _pooled_puts(service: StorageService, count: int, body: bytes) -> None:
+    await asyncio.gather(
+        *(service._run(service._put_object_sync, f"bench/{index}.jpg", body, "image/jpeg") for index in range(count))
+    )
+
+
+async def _legacy_deletes(service: StorageService, keys: list[str]) -> None:
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, service._delete_files_sync, keys)
+
+
+async def _timed(label: str, operations: int, coro: Any) -> None:
+    started = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - started
+    print(f"{label:<26} {elapsed:>8.2f} {operations / elapsed:>12.1f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--puts", type=int, default=64)
+    parser.add_argument("--deletes", type=int, default=5000)
+    parser.add_argument("--rtt-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    service = StorageService()
+    if not os.getenv("AWS_S3_ENDPOINT_URL"):
+        service.s3_client = LatencyS3Client(args.rtt_ms / 1000)
+    target = os.getenv("AWS_S3_ENDPOINT_URL") or f"simulated rtt={args.rtt_ms:.0f}ms"
+    body = os.urandom(256 * 1024)
+    keys = [f"bench/{index}.jpg" for index in range(args.deletes)]
+
+    print(f"target={target} s3_max_concurrency={service.max_concurrency} cpus={os.cpu_count()}")
+    print(f"{'case':<26} {'seconds':>8} {'objects/s':>12}")
+    try:
+        await _timed("put default-executor", args.puts, _legacy_puts(service, args.puts, body))
+        await _timed("put storage-executor", args.puts, _pooled_puts(service, args.puts, body))
+        await _timed("delete sequential-batches", args.deletes, _legacy_deletes(service, keys))
+        await _timed("delete parallel-batches", args.deletes, service.delete_files(keys))
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
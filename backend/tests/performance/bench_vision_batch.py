@@ -0,0 +1,91 @@
+"""
+Vision queue throughput: per-job processing versus batched annotation.
+
+Runs QueueWorker against an in-memory job store and the fake Vision client
+(``tests/fake_vision.py``), which sleeps a fixed round-trip per API call. The
+Vision result cache is bypassed so every job reaches the API.
+
+Usage (from backend/):
+    python -m tests.performance.bench_vision_batch [--jobs 64] [--batch-size 8] [--rtt-ms 150]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.services.cat_detection_service import CatDetectionService, clear_detection_cache  # noqa: E402
+from app.services.google_vision import GoogleVisionService  # noqa: E402
+from app.services.queue_service import QueueMessage, queue_service  # noqa: E402
+from app.worker import QueueWorker, _ReadCompletions  # noqa: E402
+from tests.fake_vision import FakeVisionClient  # noqa: E402
+
+
+def _messages(count: int) -> list[QueueMessage]:
+    return [
+        QueueMessage(
+            stream=queue_service.VISION_STREAM,
+            message_id=f"{index}-0",
+            fields={"job_id": f"job-{index}", "user_id": "bench", "operation": "combined"},
+        )
+        for index in range(count)
+    ]
+
+
+async def _run(label: str, jobs: int, batch_size: int, rtt_seconds: float) -> None:
+    client = FakeVisionClient(latency_seconds=rtt_seconds)
+    vision = GoogleVisionService()
+    vision.client = client
+    vision.is_initialized = True
+    clear_detection_cache()
+    worker = QueueWorker()
+    payloads = {f"job-{index}": f"cat-image-{index}".encode() for index in range(jobs)}
+
+    async def _payload(job_id: str) -> bytes:
+        return payloads[job_id]
+
+    with (
+        patch.object(vision, "_get_cached_result", new=AsyncMock(return_value=None)),
+        patch.object(vision, "_get_cached_results", new=AsyncMock(return_value={})),
+        patch.object(vision, "_cache_result", new=AsyncMock()),
+        patch.object(queue_service, "get_vision_job", new=AsyncMock(return_value={"status": "queued"})),
+        patch.object(queue_service, "update_vision_job", new=AsyncMock()),
+        patch.object(queue_service, "get_vision_payload", new=AsyncMock(side_effect=_payload)),
+        patch.object(queue_service, "delete_vision_payload", new=AsyncMock()),
+        patch.object(queue_service, "complete_messages", new=AsyncMock()),
+        patch("app.worker.cat_detection_service", CatDetectionService(vision_service=vision)),
+    ):
+        messages = _messages(jobs)
+        started = time.perf_counter()
+        for offset in range(0, jobs, batch_size):
+            # One read per chunk, run through the same unit path as QueueWorker._run_stream
+            chunk: list[Any] = messages[offset : offset + batch_size]
+            await worker._acquire_slots(queue_service.VISION_STREAM, 1)
+            worker._start_unit(chunk, queue_service.VISION_STREAM, _ReadCompletions(queue_service.VISION_GROUP, 1))
+            await asyncio.gather(*worker._tasks)
+        elapsed = time.perf_counter() - started
+
+    print(f"{label:<18} {elapsed:>8.2f} {jobs / elapsed:>10.1f} {len(client.calls) / jobs:>14.3f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--rtt-ms", type=float, default=150.0)
+    args = parser.parse_args()
+    rtt = args.rtt_ms / 1000
+
+    print(f"jobs={args.jobs} batch_size={args.batch_size} simulated rtt={args.rtt_ms:.0f}ms")
+    print(f"{'case':<18} {'seconds':>8} {'jobs/s':>10} {'calls/image':>14}")
+    await _run("per-job", args.jobs, 1, rtt)
+    await _run(f"batched x{args.batch_size}", args.jobs, args.batch_size, rtt)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Queue worker throughput with bounded per-stream concurrency.
+
+Drives ``QueueWorker.run_forever`` against in-memory streams. Stripe jobs call
+a webhook handler that sleeps a fixed latency; Vision jobs use the fake Vision
+client (``tests/fake_vision.py``) with the same round-trip and bypass the result
+cache. The worker is stopped (SIGTERM path) once every job is acknowledged.
+
+Usage (from backend/):
+    python -m tests.performance.bench_worker_concurrency [--jobs 200] [--latency-ms 100] [--concurrency 1 4 16]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.config import config  # noqa: E402
+from app.logger import logger  # noqa: E402
+from app.services.cat_detection_service import CatDetectionService  # noqa: E402
+from app.services.google_vision import GoogleVisionService  # noqa: E402
+from app.services.queue_service import QueueMessage, queue_service  # noqa: E402
+from app.worker import QueueWorker  # noqa: E402
+from tests.fake_vision import FakeVisionClient  # noqa: E402
+
+
+class InMemoryStreams:
+    def __init__(self, messages: list[QueueMessage]) -> None:
+        self.pending = list(messages)
+        self.total = len(messages)
+        self.acked = 0
+        self.done = asyncio.Event()
+
+    async def read_group(self, *, stream: str, count: int, **_: Any) -> list[QueueMessage]:
+        batch = [message for message in self.pending if message.stream == stream][:count]
+        if not batch:
+            await asyncio.sleep(0.005)
+            return []
+        taken = {message.message_id for message in batch}
+        self.pending = [message for message in self.pending if message.message_id not in taken]
+        return batch
+
+    async def complete_messages(self, messages: list[QueueMessage], group: str) -> None:
+        self.acked += len(messages)
+        if self.acked >= self.total:
+            self.done.set()
+
+
+def _messages(jobs: int) -> list[QueueMessage]:
+    messages = []
+    for index in range(jobs):
+        if index % 2:
+            messages.append(
+                QueueMessage(
+                    stream=queue_service.VISION_STREAM,
+                    message_id=f"{index}-0",
+                    fields={"job_id": f"job-{index}", "user_id": "bench", "operation": "combined"},
+                )
+            )
+        else:
+            messages.append(
+                QueueMessage(
+                    stream=queue_service.STRIPE_STREAM,
+                    message_id=f"{index}-0",
+                    fields={"event": json.dumps({"id": f"evt_{index}", "type": "invoice.paid"})},
+                )
+            )
+    return messages
+
+
+async def _run(jobs: int, latency: float, concurrency: int) -> None:
+    streams = InMemoryStreams(_messages(jobs))
+    vision = GoogleVisionService()
+    vision.client = FakeVisionClient(latency_seconds=latency)
+    vision.is_initialized = True
+    worker = QueueWorker(concurrency=concurrency)
+
+    async def _webhook(event: dict[str, Any]) -> None:
+        await asyncio.sleep(latency)
+
+    subscription_service = MagicMock()
+    subscription_service.return_value.handle_verified_webhook = AsyncMock(side_effect=_webhook)
+    with ExitStack() as stack:
+        for target, value in [
+            ("client", object()),
+            ("ensure_groups", AsyncMock()),
+            ("claim_stale", AsyncMock(return_value=[])),
+            ("read_group", streams.read_group),
+            ("complete_messages", streams.complete_messages),
+            ("get_vision_job", AsyncMock(return_value={"status": "queued"})),
+            ("update_vision_job", AsyncMock()),
+            ("get_vision_payload", AsyncMock(side_effect=lambda job_id: f"cat-{job_id}".encode())),
+            ("delete_vision_payload", AsyncMock()),
+        ]:
+            stack.enter_context(patch.object(queue_service, target, value))
+        stack.enter_context(patch.object(vision, "_get_cached_result", new=AsyncMock(return_value=None)))
+        stack.enter_context(patch.object(vision, "_get_cached_results", new=AsyncMock(return_value={})))
+        stack.enter_context(patch.object(vision, "_cache_result", new=AsyncMock()))
+        stack.enter_context(patch("app.worker.cat_detection_service", CatDetectionService(vision_service=vision)))
+        stack.enter_context(patch("app.worker.SubscriptionService", subscription_service))
+        stack.enter_context(patch("app.worker.get_async_supabase_admin_client", new=AsyncMock()))
+        stack.enter_context(patch("app.worker.refresh_trending_scores_once", new=AsyncMock()))
+
+        started = time.perf_counter()
+        runner = asyncio.create_task(worker.run_forever())
+        await streams.done.wait()
+        elapsed = time.perf_counter() - started
+        worker.request_stop()
+        await runner
+
+    print(f"{concurrency:>11} {elapsed:>8.2f} {jobs / elapsed:>10.1f} {len(vision.client.calls):>13}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+
+    print(
+        f"jobs={args.jobs} (half Stripe, half Vision) latency={args.latency_ms:.0f}ms "
+        f"vision_batch={config.VISION_BATCH_SIZE}"
+    )
+    print(f"{'concurrency':>11} {'seconds':>8} {'jobs/s':>10} {'vision calls':>13}")
+    for concurrency in args.concurrency:
+        await _run(args.jobs, args.latency_ms / 1000, concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
 from starlette.testclient import TestClient
 
 from app.middleware.etag_middleware import ETagMiddleware
@@ -22,6 +23,15 @@ def _create_app() -> FastAPI:
     async def authenticated_endpoint(request: Request) -> dict[str, str]:
         return {"authorization": request.headers.get("Authorization", "")}
 
+    @app.get("/api/stream")
+    async def stream_endpoint() -> StreamingResponse:
+        async def body():
+            yield b'{"id": 1}\n'
+
+        return StreamingResponse(
+            body(), media_type="application/x-ndjson", headers={"Cache-Control": "public, max-age=300"}
+        )
+
     @app.get("/api/implicit")
     async def implicit_endpoint() -> dict[str, str]:
         return {"message": "implicit"}
@@ -76,3 +86,13 @@ def test_endpoint_without_explicit_cache_policy_does_not_emit_etag() -> None:
 
     assert response.status_code == 200
     assert response.headers.get("ETag") is None
+
+
+def test_ndjson_stream_is_not_buffered_for_etag() -> None:
+    client = TestClient(_create_app())
+
+    response = client.get("/api/stream")
+
+    assert response.status_code == 200
+    assert response.headers.get("ETag") is None
+    assert response.text == '{"id": 1}\n'
@@ -9,6 +9,18 @@ MIGRATION_PATH = (
 VIEWPORT_MIGRATION_PATH = (
     Path(__file__).resolve().parents[3] / "supabase" / "migrations" / "20260803100138_add_viewport_spatial_search.sql"
 )
+TAG_COUNTS_MIGRATION_PATH = (
+    Path(__file__).resolve().parents[3] / "supabase" / "migrations" / "20260805090000_incremental_tag_counts.sql"
+)
+TRENDING_MIGRATION_PATH = (
+    Path(__file__).resolve().parents[3] / "supabase" / "migrations" / "20260806090000_trending_hot_scores.sql"
+)
+PHASH_MIGRATION_PATH = (
+    Path(__file__).resolve().parents[3] / "supabase" / "migrations" / "20260807090000_cat_photos_perceptual_hash.sql"
+)
+AREA_SEARCH_MIGRATION_PATH = (
+    Path(__file__).resolve().parents[3] / "supabase" / "migrations" / "20260804090000_add_combined_area_search.sql"
+)
 
 
 def test_spatial_search_migration_keeps_public_results_indexable() -> None:
@@ -31,3 +43,50 @@ def test_viewport_spatial_migration_preserves_exact_bounds() -> None:
     assert "photo.location IS NOT NULL" in migration
     assert "SET search_path = pg_catalog, public, extensions" in migration
     assert "TO anon, authenticated, service_role" in migration
+
+
+def test_area_search_migration_combines_text_tags_and_space() -> None:
+    migration = AREA_SEARCH_MIGRATION_PATH.read_text(encoding="utf-8")
+
+    assert "CREATE FUNCTION public.search_photos_in_area" in migration
+    assert "ST_Intersects(photo.location, area.bounds)" in migration
+    assert "websearch_to_tsquery('english', search_query)" in migration
+    assert "photo.tags @> tag_filter" in migration
+    assert "photo.status = 'approved'" in migration
+    assert "SET search_path = pg_catalog, public, extensions" in migration
+    assert "TO anon, authenticated, service_role" in migration
+
+
+def test_tag_counts_migration_maintains_counts_incrementally() -> None:
+    migration = TAG_COUNTS_MIGRATION_PATH.read_text(encoding="utf-8")
+
+    assert "create table if not exists public.tag_counts" in migration
+    assert "create table if not exists public.tag_daily_counts" in migration
+    assert "after insert or delete or update of tags, status, deleted_at, uploaded_at" in migration
+    assert "create or replace function public.reconcile_tag_counts()" in migration
+    assert "grant execute on function public.reconcile_tag_counts() to service_role" in migration
+    assert "from public.tag_counts as counts" in migration
+    # Popular tags must no longer aggregate over every approved photo.
+    popular_tags = migration[migration.index("create function public.get_popular_tags") :]
+    assert "unnest" not in popular_tags.split("$$")[1]
+
+
+def test_trending_migration_indexes_public_hot_scores() -> None:
+    migration = TRENDING_MIGRATION_PATH.read_text(encoding="utf-8")
+
+    assert "add column if not exists hot_score double precision not null default 0" in migration
+    assert "on public.cat_photos (hot_score desc, uploaded_at desc)" in migration
+    assert "where deleted_at is null and status = 'approved'" in migration
+    assert "for update skip locked" in migration
+    assert "grant execute on function public.refresh_photo_hot_scores(integer, integer, integer) to service_role" in (
+        migration
+    )
+
+
+def test_perceptual_hash_migration_indexes_recent_hashes() -> None:
+    migration = PHASH_MIGRATION_PATH.read_text(encoding="utf-8")
+
+    assert "add column if not exists phash bigint" in migration
+    assert "on public.cat_photos (uploaded_at desc)" in migration
+    assert "include (user_id, phash)" in migration
+    assert "where phash is not null and deleted_at is null" in migration
@@ -1,4 +1,5 @@
 import io
+import uuid
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -6,7 +7,12 @@ from httpx import ASGITransport, AsyncClient
 from PIL import Image
 
 from app.config import config
-from app.dependencies import get_cat_detection_service, get_subscription_service
+from app.dependencies import (
+    get_cat_detection_service,
+    get_quota_service,
+    get_storage_service,
+    get_subscription_service,
+)
 from app.main import app
 from app.middleware.auth_middleware import get_current_user
 from app.services.queue_service import QueueUnavailable
@@ -76,7 +82,7 @@ async def test_stripe_webhook_returns_retryable_status_when_queue_is_unavailable
 
 @pytest.mark.asyncio
 async def test_vision_analysis_returns_accepted_job_without_calling_vision(monkeypatch: pytest.MonkeyPatch) -> None:
-    user = MagicMock(id="user-1", email="user@example.com")
+    user = MagicMock(id="user-1", email="user@example.com", is_pro=True)
     detection_service = MagicMock()
     monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: user)
     monkeypatch.setitem(app.dependency_overrides, get_cat_detection_service, lambda: detection_service)
@@ -91,7 +97,7 @@ async def test_vision_analysis_returns_accepted_job_without_calling_vision(monke
                     "created_at": "2026-08-04T00:00:00+00:00",
                 }
             ),
-        ),
+        ) as enqueue,
     ):
         async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
             response = await client.post(
@@ -101,4 +107,115 @@ async def test_vision_analysis_returns_accepted_job_without_calling_vision(monke
 
     assert response.status_code == 202
     assert response.json()["job_id"] == "job-1"
+    assert enqueue.await_args.kwargs["priority"] is True
     detection_service.analyze_cat_spot_suitability.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_presign_then_complete_queues_job(monkeypatch: pytest.MonkeyPatch) -> None:
+    user = MagicMock(id="user-1", email="user@example.com", is_pro=False)
+    storage = MagicMock()
+    storage.quarantine_key.side_effect = lambda user_id, upload_id: f"quarantine/{user_id}/{upload_id}"
+    storage.create_presigned_upload.return_value = {"url": "https://s3.test/bucket", "fields": {"key": "k"}}
+    storage.object_exists = AsyncMock(return_value=True)
+    quota = MagicMock()
+    quota.check_quota = AsyncMock(return_value=True)
+    enqueue = AsyncMock(return_value={"created_at": "2026-10-18T00:00:00+00:00"})
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: user)
+    monkeypatch.setitem(app.dependency_overrides, get_storage_service, lambda: storage)
+    monkeypatch.setitem(app.dependency_overrides, get_quota_service, lambda: quota)
+
+    with (
+        patch.object(config, "ENABLE_DIRECT_UPLOADS", True),
+        patch("app.routes.upload.queue_service") as queue,
+    ):
+        queue.available = True
+        queue.enqueue_upload_job = enqueue
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            presign = await client.post("/api/v1/upload/cat/presign", data={"content_type": "image/jpeg"})
+            upload_id = presign.json()["upload_id"]
+            complete = await client.post(
+                "/api/v1/upload/cat/complete",
+                data={"upload_id": upload_id, "lat": "13.75", "lng": "100.5", "location_name": "Lumpini Park"},
+            )
+            enqueue.return_value = None
+            duplicate = await client.post(
+                "/api/v1/upload/cat/complete",
+                data={"upload_id": upload_id, "lat": "13.75", "lng": "100.5", "location_name": "Lumpini Park"},
+            )
+
+    assert presign.status_code == 200
+    assert presign.json()["url"] == "https://s3.test/bucket"
+    assert storage.create_presigned_upload.call_args.args[0] == f"quarantine/user-1/{upload_id}"
+    assert complete.status_code == 202
+    assert complete.json()["job_id"] == upload_id
+    assert enqueue.await_args_list[0].kwargs["object_key"] == f"quarantine/user-1/{upload_id}"
+    assert duplicate.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_complete_rejects_upload_that_never_reached_storage(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    user = MagicMock(id="user-1", email="user@example.com", is_pro=False)
+    storage = MagicMock()
+    storage.object_exists = AsyncMock(return_value=False)
+    quota = MagicMock()
+    quota.check_quota = AsyncMock(return_value=True)
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: user)
+    monkeypatch.setitem(app.dependency_overrides, get_storage_service, lambda: storage)
+    monkeypatch.setitem(app.dependency_overrides, get_quota_service, lambda: quota)
+
+    with (
+        patch.object(config, "ENABLE_DIRECT_UPLOADS", True),
+        patch("app.routes.upload.queue_service") as queue,
+    ):
+        queue.available = True
+        queue.enqueue_upload_job = AsyncMock()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(
+                "/api/v1/upload/cat/complete",
+                data={"upload_id": str(uuid.uuid4()), "lat": "13.75", "lng": "100.5", "location_name": "Park"},
+            )
+
+    assert response.status_code == 400
+    queue.enqueue_upload_job.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_endpoints_are_hidden_when_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    user = MagicMock(id="user-1", email="user@example.com", is_pro=False)
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: user)
+
+    with patch.object(config, "ENABLE_DIRECT_UPLOADS", False):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/api/v1/upload/cat/presign", data={"content_type": "image/jpeg"})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_vision_job_status_long_polls_when_wait_is_given(monkeypatch: pytest.MonkeyPatch) -> None:
+    user = MagicMock(id="user-1", email="user@example.com")
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: user)
+    job = {
+        "job_id": "job-1",
+        "operation": "combined",
+        "status": "completed",
+        "result": {"ok": True},
+        "created_at": "2026-08-04T00:00:00+00:00",
+        "updated_at": "2026-08-04T00:00:01+00:00",
+    }
+    with (
+        patch("app.routes.cat_detection.queue_service.wait_for_vision_job", new=AsyncMock(return_value=job)) as wait,
+        patch("app.routes.cat_detection.queue_service.get_vision_job", new=AsyncMock()) as get_job,
+    ):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/v1/detect/jobs/job-1", params={"wait": 20})
+            too_long = await client.get("/api/v1/detect/jobs/job-1", params={"wait": 120})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    wait.assert_awaited_once_with("job-1", "user-1", timeout=20)
+    get_job.assert_not_awaited()
+    assert too_long.status_code == 422
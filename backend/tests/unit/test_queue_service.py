@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import time
 from typing import Any
 
 import pytest
+from redis.exceptions import ResponseError
 
-from app.services.queue_service import QueueService, QueueUnavailable
+from app.services.queue_service import QueueBackpressure, QueueMessage, QueueService, QueueUnavailable
 
 
 class FakeRedis:
@@ -13,12 +16,18 @@ class FakeRedis:
         self.streams: dict[str, list[tuple[str, dict[str, str]]]] = {}
         self.values: dict[str, str] = {}
         self.groups: set[tuple[str, str]] = set()
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+        self.acked: list[str] = []
         self.sequence = 0
+        self.script_calls = 0
+        self.executions = 0
 
     async def ping(self) -> bool:
         return True
 
     async def xgroup_create(self, stream: str, group: str, *, id: str, mkstream: bool) -> None:
+        if (stream, group) in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
         self.groups.add((stream, group))
         self.streams.setdefault(stream, [])
 
@@ -31,13 +40,33 @@ class FakeRedis:
         self.streams.setdefault(stream, []).append((message_id, fields))
         return message_id
 
-    async def set(self, key: str, value: str, *, ex: int) -> bool:
+    async def set(self, key: str, value: str, *, ex: int, nx: bool = False) -> bool:
+        if nx and key in self.values:
+            return False
         self.values[key] = value
         return True
 
     async def get(self, key: str) -> str | None:
         return self.values.get(key)
 
+    async def mget(self, keys: list[str]) -> list[Any]:
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    def register_script(self, source: str) -> FakeEnqueueScript | FakeReleaseRetriesScript:
+        if "ZRANGEBYSCORE" in source:
+            return FakeReleaseRetriesScript(self)
+        return FakeEnqueueScript(self)
+
+    async def zadd(self, key: str, mapping: dict[str, float]) -> int:
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    async def zcard(self, key: str) -> int:
+        return len(self.sorted_sets.get(key, {}))
+
     async def delete(self, *keys: str) -> int:
         deleted = 0
         for key in keys:
@@ -50,12 +79,14 @@ class FakeRedis:
     async def xautoclaim(self, *_: Any, **__: Any) -> list[Any]:
         return ["0-0", [], []]
 
-    async def xack(self, *_: Any, **__: Any) -> int:
-        return 1
+    async def xack(self, stream: str, group: str, *message_ids: str) -> int:
+        self.acked.extend(message_ids)
+        return len(message_ids)
 
-    async def xdel(self, stream: str, message_id: str) -> int:
-        self.streams[stream] = [entry for entry in self.streams.get(stream, []) if entry[0] != message_id]
-        return 1
+    async def xdel(self, stream: str, *message_ids: str) -> int:
+        before = len(self.streams.get(stream, []))
+        self.streams[stream] = [entry for entry in self.streams.get(stream, []) if entry[0] not in message_ids]
+        return before - len(self.streams[stream])
 
     async def incr(self, key: str) -> int:
         value = int(self.values.get(key, "0")) + 1
@@ -65,6 +96,94 @@ class FakeRedis:
     async def expire(self, *_: Any, **__: Any) -> bool:
         return True
 
+    async def hset(self, key: str, field: str, value: str) -> int:
+        self.values.setdefault(key, {})[field] = value  # type: ignore[index]
+        return 1
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        return dict(self.values.get(key) or {})
+
+    async def hdel(self, key: str, *fields: str) -> int:
+        hash_value: Any = self.values.get(key) or {}
+        return sum(hash_value.pop(field, None) is not None for field in fields)
+
+
+class FakePipeline:
+    """Queues commands and applies them on ``execute`` like MULTI/EXEC."""
+
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    async def __aenter__(self) -> FakePipeline:
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        self.commands = []
+
+    def __getattr__(self, name: str) -> Any:
+        def _queue(*args: Any, **kwargs: Any) -> FakePipeline:
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        self.redis.executions += 1
+        results: list[Any] = []
+        for name, args, kwargs in self.commands:
+            try:
+                results.append(await getattr(self.redis, name)(*args, **kwargs))
+            except ResponseError as exc:
+                if raise_on_error:
+                    raise
+                results.append(exc)
+        return results
+
+
+class FakeEnqueueScript:
+    """Python rendition of the queue's enqueue Lua script."""
+
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+
+    async def __call__(self, *, keys: list[str], args: list[Any]) -> list[bytes]:
+        self.redis.script_calls += 1
+        stream, *value_keys = keys
+        maxlen, ttl, claim_first, *rest = args
+        values, fields = rest[: len(value_keys)], rest[len(value_keys) :]
+        if await self.redis.xlen(stream) >= int(maxlen):
+            return [b"full"]
+        for index, (key, value) in enumerate(zip(value_keys, values, strict=True)):
+            if not await self.redis.set(key, value, ex=int(ttl), nx=index == 0 and claim_first == 1):
+                return [b"exists"]
+        message_id = await self.redis.xadd(stream, dict(zip(fields[::2], fields[1::2], strict=True)))
+        return [b"ok", message_id.encode()]
+
+
+class FakeReleaseRetriesScript:
+    """Python rendition of the queue's retry release Lua script."""
+
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+
+    async def __call__(self, *, keys: list[str], args: list[Any]) -> int:
+        retry_set, stream = keys
+        now_ms, limit = args
+        members = self.redis.sorted_sets.get(retry_set, {})
+        due = sorted((score, member) for member, score in members.items() if score <= now_ms)[:limit]
+        for _, member in due:
+            await self.redis.xadd(stream, json.loads(member)["fields"])
+            members.pop(member)
+        return len(due)
+
+
+def _service(fake: FakeRedis) -> QueueService:
+    service = QueueService()
+    service.client = fake  # type: ignore[assignment]
+    service.binary_client = fake  # type: ignore[assignment]
+    return service
+
 
 class FailingVisionRedis(FakeRedis):
     async def xadd(self, stream: str, fields: dict[str, str], **kwargs: Any) -> str:
@@ -78,9 +197,8 @@ class FailingVisionRedis(FakeRedis):
 
 @pytest.mark.asyncio
 async def test_enqueue_stripe_event_and_vision_payload_round_trip() -> None:
-    service = QueueService()
     fake = FakeRedis()
-    service.client = fake  # type: ignore[assignment]
+    service = _service(fake)
 
     stripe_message_id = await service.enqueue_stripe_webhook(
         {
@@ -101,6 +219,9 @@ async def test_enqueue_stripe_event_and_vision_payload_round_trip() -> None:
     assert stripe_message_id == "1-0"
     assert json.loads(fake.streams[service.STRIPE_STREAM][0][1]["event"])["id"] == "evt_test_1"
     assert await service.get_vision_payload(job["job_id"]) == b"image-bytes"
+    # Stored raw (no base64) and written by one script call per enqueue with the envelope
+    assert fake.values[f"{service.VISION_RAW_PAYLOAD_PREFIX}{job['job_id']}"] == b"image-bytes"
+    assert fake.script_calls == 2
     stored_job = await service.get_vision_job(job["job_id"], "user-1")
     assert stored_job is not None
     assert stored_job["status"] == "queued"
@@ -109,10 +230,29 @@ async def test_enqueue_stripe_event_and_vision_payload_round_trip() -> None:
     await service.close()
 
 
+@pytest.mark.asyncio
+async def test_priority_vision_job_is_enqueued_on_the_priority_lane() -> None:
+    fake = FakeRedis()
+    service = _service(fake)
+
+    await service.enqueue_vision_job(
+        operation="spot-analysis",
+        user_id="user-1",
+        analyzed_by="user@example.com",
+        filename="spot.jpg",
+        contents=b"image-bytes",
+        priority=True,
+    )
+
+    assert len(fake.streams[service.VISION_PRIORITY_STREAM]) == 1
+    assert service.VISION_STREAM not in fake.streams
+    assert service.base_stream(service.VISION_PRIORITY_STREAM) == service.VISION_STREAM
+    assert service.lanes(service.VISION_STREAM) == (service.VISION_PRIORITY_STREAM, service.VISION_STREAM)
+
+
 @pytest.mark.asyncio
 async def test_vision_enqueue_preserves_queue_error_when_cleanup_also_fails() -> None:
-    service = QueueService()
-    service.client = FailingVisionRedis()  # type: ignore[assignment]
+    service = _service(FailingVisionRedis())
 
     with pytest.raises(QueueUnavailable):
         await service.enqueue_vision_job(
@@ -122,3 +262,271 @@ async def test_vision_enqueue_preserves_queue_error_when_cleanup_also_fails() ->
             filename="spot.jpg",
             contents=b"image-bytes",
         )
+
+
+@pytest.mark.asyncio
+async def test_upload_job_is_claimed_once_per_upload_id() -> None:
+    fake = FakeRedis()
+    service = _service(fake)
+    kwargs: dict[str, Any] = {
+        "upload_id": "upload-1",
+        "user_id": "user-1",
+        "is_pro": False,
+        "object_key": "quarantine/user-1/upload-1",
+        "photo": {"location_name": "Park"},
+    }
+
+    job = await service.enqueue_upload_job(**kwargs)
+    duplicate = await service.enqueue_upload_job(**kwargs)
+
+    assert job is not None
+    assert job["status"] == "queued"
+    assert duplicate is None
+    assert fake.streams[service.UPLOAD_STREAM] == [("1-0", {"job_id": "upload-1", "user_id": "user-1"})]
+    updated = await service.update_upload_job("upload-1", status="processing")
+    assert updated is not None
+    assert updated["status"] == "processing"
+    assert await service.get_upload_job("upload-1", "other-user") is None
+
+
+class FakePubSub:
+    def __init__(self, redis: PubSubRedis) -> None:
+        self.redis = redis
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self.closed = False
+
+    async def subscribe(self, channel: str) -> None:
+        self.redis.subscribers.setdefault(channel, []).append(self)
+
+    async def get_message(self, *, ignore_subscribe_messages: bool, timeout: float) -> dict[str, Any] | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class PubSubRedis(FakeRedis):
+    def __init__(self) -> None:
+        super().__init__()
+        self.subscribers: dict[str, list[FakePubSub]] = {}
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+    async def publish(self, channel: str, message: str) -> int:
+        for subscriber in self.subscribers.get(channel, []):
+            subscriber.queue.put_nowait({"type": "message", "data": message})
+        return len(self.subscribers.get(channel, []))
+
+
+@pytest.mark.asyncio
+async def test_wait_for_vision_job_returns_when_worker_publishes_completion() -> None:
+    fake = PubSubRedis()
+    service = _service(fake)
+    job = await service.enqueue_vision_job(
+        operation="combined",
+        user_id="user-1",
+        analyzed_by="user@example.com",
+        filename="spot.jpg",
+        contents=b"image-bytes",
+    )
+
+    async def _complete() -> None:
+        await asyncio.sleep(0.01)
+        await service.update_vision_job(job["job_id"], status="processing")
+        await service.update_vision_job(job["job_id"], status="completed", result={"ok": True})
+
+    waiter = asyncio.create_task(service.wait_for_vision_job(job["job_id"], "user-1", timeout=5))
+    await _complete()
+    finished = await asyncio.wait_for(waiter, 1)
+
+    assert finished is not None
+    assert finished["status"] == "completed"
+    assert finished["result"] == {"ok": True}
+    assert all(pubsub.closed for pubsubs in fake.subscribers.values() for pubsub in pubsubs)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_vision_job_times_out_with_current_state() -> None:
+    service = _service(PubSubRedis())
+    job = await service.enqueue_vision_job(
+        operation="combined",
+        user_id="user-1",
+        analyzed_by="user@example.com",
+        filename="spot.jpg",
+        contents=b"image-bytes",
+    )
+
+    pending = await service.wait_for_vision_job(job["job_id"], "user-1", timeout=0.02)
+
+    assert pending is not None
+    assert pending["status"] == "queued"
+    assert await service.wait_for_vision_job(job["job_id"], "other-user", timeout=0.02) is None
+
+
+@pytest.mark.asyncio
+async def test_vision_payload_enqueued_as_base64_by_older_release_is_still_readable() -> None:
+    fake = FakeRedis()
+    service = _service(fake)
+    fake.values[f"{service.VISION_PAYLOAD_PREFIX}job-legacy"] = "aW1hZ2UtYnl0ZXM="
+
+    assert await service.get_vision_payload("job-legacy") == b"image-bytes"
+    await service.delete_vision_payload("job-legacy")
+    assert fake.values == {}
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_rejected_once_the_stream_reaches_its_bound(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeRedis()
+    service = _service(fake)
+    monkeypatch.setattr("app.services.queue_service.config.QUEUE_STREAM_MAXLEN", 1)
+
+    await service.enqueue_stripe_webhook({"id": "evt_1", "type": "invoice.paid"})
+    with pytest.raises(QueueBackpressure):
+        await service.enqueue_stripe_webhook({"id": "evt_2", "type": "invoice.paid"})
+
+    assert len(fake.streams[service.STRIPE_STREAM]) == 1
+    # The consumer group is created once, not on every enqueue
+    assert fake.groups == {(service.STRIPE_STREAM, service.STRIPE_GROUP)}
+
+
+@pytest.mark.asyncio
+async def test_completing_and_dead_lettering_are_one_transaction_each() -> None:
+    fake = FakeRedis()
+    service = _service(fake)
+    for index in range(3):
+        await service.enqueue_stripe_webhook({"id": f"evt_{index}", "type": "invoice.paid"})
+    messages = [
+        QueueMessage(service.STRIPE_STREAM, message_id, fields)
+        for message_id, fields in fake.streams[service.STRIPE_STREAM]
+    ]
+    assert await service.increment_attempt(messages[0]) == 1
+    assert await service.increment_attempt(messages[2]) == 1
+
+    await service.complete_messages(messages[:2], service.STRIPE_GROUP)
+    assert fake.executions == 3
+    assert fake.acked == ["1-0", "2-0"]
+    assert [entry[0] for entry in fake.streams[service.STRIPE_STREAM]] == ["3-0"]
+
+    await service.dead_letter(messages[2], service.STRIPE_GROUP, "bad event")
+    assert fake.executions == 4
+    assert fake.streams[service.STRIPE_STREAM] == []
+    dead = json.loads(fake.streams[f"{service.STRIPE_STREAM}{service.DEAD_LETTER_SUFFIX}"][0][1]["message"])
+    assert dead["source_message_id"] == "3-0"
+    assert not any(key.startswith(service.ATTEMPT_PREFIX) for key in fake.values)
+
+
+@pytest.mark.asyncio
+async def test_retry_is_parked_until_due_then_returns_to_its_stream_with_attempts() -> None:
+    fake = FakeRedis()
+    service = _service(fake)
+    message_id = await service.enqueue_stripe_webhook({"id": "evt_retry", "type": "invoice.paid", "created": 1})
+    message = QueueMessage(service.STRIPE_STREAM, message_id, dict(fake.streams[service.STRIPE_STREAM][0][1]))
+    assert await service.increment_attempt(message) == 1
+
+    await service.schedule_retry(message, service.STRIPE_GROUP, attempts=1, delay_seconds=60)
+
+    retry_set = f"{service.STRIPE_STREAM}{service.RETRY_SUFFIX}"
+    assert fake.streams[service.STRIPE_STREAM] == []
+    assert message_id in fake.acked
+    assert not any(key.startswith(service.ATTEMPT_PREFIX) for key in fake.values)
+    assert await service.release_due_retries() == 0
+
+    # Make it due
+    fake.sorted_sets[retry_set] = dict.fromkeys(fake.sorted_sets[retry_set], 0)
+    assert await service.release_due_retries() == 1
+    assert fake.sorted_sets[retry_set] == {}
+    new_id, fields = fake.streams[service.STRIPE_STREAM][0]
+    assert fields["attempts"] == "1"
+    # Attempts keep counting on the re-delivered entry
+    assert await service.increment_attempt(QueueMessage(service.STRIPE_STREAM, new_id, fields)) == 2
+
+    await service.close()
+
+
+class NoGroupRedis(FakeRedis):
+    async def xreadgroup(self, group: str, consumer: str, streams: dict[str, str], **_: Any) -> list[Any]:
+        stream = next(iter(streams))
+        if (stream, group) not in self.groups:
+            raise ResponseError("NOGROUP No such key or consumer group")
+        return []
+
+
+@pytest.mark.asyncio
+async def test_read_recreates_a_consumer_group_lost_with_its_stream() -> None:
+    fake = NoGroupRedis()
+    service = _service(fake)
+    await service.ensure_groups()
+    fake.groups.clear()
+
+    assert await service.read_group(stream=service.STRIPE_STREAM, group=service.STRIPE_GROUP, consumer="c") == []
+    assert (service.STRIPE_STREAM, service.STRIPE_GROUP) in fake.groups
+
+
+class StatsRedis(FakeRedis):
+    """Canned XPENDING/XINFO replies in redis-py's parsed shapes."""
+
+    def __init__(self, now_ms: int) -> None:
+        super().__init__()
+        self.now_ms = now_ms
+
+    async def xpending(self, stream: str, group: str) -> dict[str, Any]:
+        if stream != QueueService.STRIPE_STREAM:
+            raise ResponseError("NOGROUP No such key or consumer group")
+        return {"pending": 2, "min": "1-0", "max": "2-0", "consumers": [{"name": "worker-a", "pending": 2}]}
+
+    async def xpending_range(self, stream: str, group: str, **_: Any) -> list[dict[str, Any]]:
+        await self.xpending(stream, group)
+        oldest = f"{self.now_ms - 30_000}-0"
+        return [{"message_id": oldest, "consumer": "worker-a", "time_since_delivered": 12_000, "times_delivered": 3}]
+
+    async def xinfo_groups(self, stream: str) -> list[dict[str, Any]]:
+        return [{"name": QueueService.STRIPE_GROUP, "pending": 2, "last-delivered-id": f"{self.now_ms - 20_000}-0"}]
+
+    async def xrange(self, stream: str, *, min: str, max: str, count: int) -> list[Any]:
+        self.xrange_min = min
+        return [(f"{self.now_ms - 10_000}-0", {"event": "{}"})]
+
+
+@pytest.mark.asyncio
+async def test_stream_stats_reports_depth_and_oldest_work_per_stream() -> None:
+    fake = StatsRedis(now_ms=int(time.time() * 1000))
+    fake.streams[QueueService.STRIPE_STREAM] = [(f"{index}-0", {}) for index in range(5)]
+    fake.streams[f"{QueueService.STRIPE_STREAM}{QueueService.DEAD_LETTER_SUFFIX}"] = [("1-0", {})]
+    fake.sorted_sets[f"{QueueService.STRIPE_STREAM}{QueueService.RETRY_SUFFIX}"] = {"{}": 1.0}
+    service = _service(fake)
+
+    stats = await service.stream_stats()
+
+    stripe = stats[service.STRIPE_STREAM]
+    assert stripe["length"] == 5
+    assert stripe["pending"] == 2
+    assert stripe["undelivered"] == 3
+    assert stripe["consumers"] == {"worker-a": 2}
+    assert 29 <= stripe["oldest_pending_age_seconds"] < 40
+    assert stripe["oldest_pending_idle_seconds"] == 12.0
+    assert stripe["oldest_pending_deliveries"] == 3
+    assert 9 <= stripe["oldest_undelivered_age_seconds"] < 20
+    assert stripe["dead_letter_length"] == 1
+    assert stripe["scheduled_retries"] == 1
+    assert fake.xrange_min == f"({fake.now_ms - 20_000}-0"
+    # A stream that does not exist yet reports as empty
+    assert stats[service.VISION_STREAM]["length"] == 0
+    assert stats[service.VISION_STREAM]["oldest_pending_age_seconds"] is None
+    assert fake.executions == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_metrics_from_silent_workers_are_dropped() -> None:
+    fake = FakeRedis()
+    service = _service(fake)
+    await service.publish_worker_metrics("live", {"consumer": "live", "updated_at": time.time()})
+    await service.publish_worker_metrics("gone", {"consumer": "gone", "updated_at": time.time() - 120})
+
+    live = await service.get_worker_metrics(max_age_seconds=45)
+
+    assert [snapshot["consumer"] for snapshot in live] == ["live"]
+    assert list(fake.values[service.WORKER_METRICS_KEY]) == ["live"]  # type: ignore[call-overload]
@@ -87,3 +87,75 @@ class TestAdminStatsSummary:
         assert payload["data"][0]["resolved_reports"] == 2
         assert payload["data"][0]["points_earned"] == 0
         assert payload["data"][0]["points_earned_degraded"] is True
+
+    def test_upload_stage_metrics_returns_process_histograms(self, client) -> None:
+        from app.utils.stage_timing import stage_histograms
+
+        admin_user = User(
+            id="admin-123",
+            email="admin@example.com",
+            name="Admin User",
+            role="admin",
+            permissions=["system:stats"],
+        )
+        stage_histograms.reset()
+        stage_histograms.observe("upload", "detection", 120.0)
+        app.dependency_overrides[get_current_user] = lambda: admin_user
+        try:
+            response = client.get("/api/v1/admin/metrics/upload-stages")
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 200
+        detection = response.json()["pipelines"]["upload"]["detection"]
+        assert detection["count"] == 1
+        assert detection["p50_ms"] == 250.0
+
+    def test_detection_cache_metrics_reports_tier_hit_ratios(self, client) -> None:
+        from app.services.detection_cache import detection_cache
+
+        admin_user = User(
+            id="admin-123",
+            email="admin@example.com",
+            name="Admin User",
+            role="admin",
+            permissions=["system:stats"],
+        )
+        detection_cache._record("l1", 4, 3)
+        app.dependency_overrides[get_current_user] = lambda: admin_user
+        try:
+            response = client.get("/api/v1/admin/metrics/detection-cache")
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 200
+        assert response.json()["tiers"]["l1"] == {"lookups": 4, "hits": 3, "hit_ratio": 0.75}
+
+    def test_queue_metrics_returns_503_when_queue_redis_is_down(self, client) -> None:
+        from app.services.queue_service import QueueUnavailable
+
+        admin_user = User(
+            id="admin-123",
+            email="admin@example.com",
+            name="Admin User",
+            role="admin",
+            permissions=["system:stats"],
+        )
+        app.dependency_overrides[get_current_user] = lambda: admin_user
+        try:
+            with patch(
+                "app.routes.admin.stats.collect_queue_metrics",
+                new=AsyncMock(side_effect=QueueUnavailable("Queue Redis is not configured")),
+            ):
+                unavailable = client.get("/api/v1/admin/metrics/queues")
+            with patch(
+                "app.routes.admin.stats.collect_queue_metrics",
+                new=AsyncMock(return_value={"backlog": 3, "streams": {}, "workers": []}),
+            ):
+                response = client.get("/api/v1/admin/metrics/queues")
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert unavailable.status_code == 503
+        assert response.status_code == 200
+        assert response.json()["backlog"] == 3
@@ -2,6 +2,7 @@
 Original gallery tests - updated for new pagination API
 """
 
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
@@ -170,6 +171,46 @@ def test_get_locations_accepts_bounded_limit(client) -> None:
     app.dependency_overrides = {}
 
 
+def test_stream_locations_writes_protected_ndjson(client) -> None:
+    async def chunks(chunk_size: int = 500):
+        yield [
+            {"id": "1", "image_url": "url", "latitude": 10, "longitude": 10, "uploaded_at": "2024-03-20T10:00:00Z"},
+            {"id": "broken", "image_url": "url", "latitude": None, "longitude": 10},
+        ]
+        yield [{"id": "2", "image_url": "url", "latitude": 11, "longitude": 11}]
+
+    mock_service = MagicMock()
+    mock_service.stream_map_locations = chunks
+    app.dependency_overrides[get_gallery_service] = lambda: mock_service
+
+    response = client.get("/api/v1/gallery/locations/stream")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "etag" not in response.headers
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == ["1", "2"]
+    expected_lat, expected_lng = protect_public_coordinates(10, 10, seed="1")
+    assert rows[0]["latitude"] == pytest.approx(expected_lat, abs=1e-5)
+    assert rows[0]["longitude"] == pytest.approx(expected_lng, abs=1e-5)
+    app.dependency_overrides = {}
+
+
+def test_stream_locations_maps_initial_failure_to_500(client) -> None:
+    async def chunks(chunk_size: int = 500):
+        raise RuntimeError("db down")
+        yield []
+
+    mock_service = MagicMock()
+    mock_service.stream_map_locations = chunks
+    app.dependency_overrides[get_gallery_service] = lambda: mock_service
+
+    response = client.get("/api/v1/gallery/locations/stream")
+
+    assert response.status_code == 500
+    app.dependency_overrides = {}
+
+
 def test_get_ip_location(client) -> None:
     mock_response = MagicMock()
     mock_response.json.return_value = {"latitude": "13.7563", "longitude": "100.5018"}
@@ -310,6 +351,32 @@ def test_search_locations(client) -> None:
     assert response.json()["results"][0]["longitude"] == pytest.approx(expected_lng, abs=1e-5)
 
 
+def test_search_locations_with_radius_passes_area(client) -> None:
+    mock_service = MagicMock()
+    mock_service.search_photos = AsyncMock(return_value=[])
+    app.dependency_overrides[get_gallery_service] = lambda: mock_service
+
+    response = client.get("/api/v1/gallery/search?q=tabby&lat=13.7563&lng=100.5018&radius_km=2")
+
+    assert response.status_code == 200
+    area = mock_service.search_photos.await_args.kwargs["area"]
+    assert area.latitude == pytest.approx(13.7563)
+    assert area.radius_km == 2
+    app.dependency_overrides = {}
+
+
+def test_search_locations_rejects_mixed_spatial_filters(client) -> None:
+    mock_service = MagicMock()
+    mock_service.search_photos = AsyncMock(return_value=[])
+    app.dependency_overrides[get_gallery_service] = lambda: mock_service
+
+    response = client.get("/api/v1/gallery/search?lat=13&lng=100&north=14&south=12&east=101&west=99")
+
+    assert response.status_code == 400
+    mock_service.search_photos.assert_not_called()
+    app.dependency_overrides = {}
+
+
 def test_get_popular_tags(client) -> None:
     mock_service = MagicMock()
     mock_service.get_popular_tags = AsyncMock(return_value=[{"tag": "cute", "count": 10}])
@@ -319,6 +386,18 @@ def test_get_popular_tags(client) -> None:
     assert len(response.json()["tags"]) == 1
 
 
+def test_get_popular_tags_for_period(client) -> None:
+    mock_service = MagicMock()
+    mock_service.get_popular_tags = AsyncMock(return_value=[{"tag": "tabby", "count": 3}])
+    app.dependency_overrides[get_gallery_service] = lambda: mock_service
+
+    response = client.get("/api/v1/gallery/popular-tags?period=7d&limit=5")
+
+    assert response.status_code == 200
+    mock_service.get_popular_tags.assert_awaited_once_with(limit=5, period_days=7)
+    app.dependency_overrides = {}
+
+
 def test_get_photo(client) -> None:
     mock_service = MagicMock()
     mock_service.get_photo_by_id = AsyncMock(
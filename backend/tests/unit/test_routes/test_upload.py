@@ -174,6 +174,137 @@ class TestUploadRoute:
         result = response.json()
         assert result["success"] is True
         assert "photo" in result
+        assert "detection;dur=" in response.headers["server-timing"]
+        assert "s3_put;dur=" in response.headers["server-timing"]
+
+
+class _NullLock:
+    async def __aenter__(self) -> None:
+        return None
+
+    async def __aexit__(self, *_: Any) -> None:
+        return None
+
+
+class TestBatchUploadRoute:
+    """Multi-photo upload shares quota admission, insert and invalidation."""
+
+    @pytest.fixture
+    def batch_overrides(self, mock_user: Any, mock_storage_service: MagicMock) -> Any:
+        from app.middleware.auth_middleware import get_current_user
+        from app.routes.upload import (
+            get_cat_detection_service,
+            get_gallery_service,
+            get_quota_service,
+            get_storage_service,
+        )
+
+        async def _detect(contents: bytes, content_hash: str | None = None) -> dict[str, Any]:
+            if contents.startswith(b"dog"):
+                return {"has_cats": False, "confidence": 0.1}
+            return {"has_cats": True, "cat_count": 1, "confidence": 0.9}
+
+        detection = MagicMock()
+        detection.detect_cats = AsyncMock(side_effect=_detect)
+        quota = MagicMock()
+        quota.remaining_quota = AsyncMock(return_value=5)
+        quota.increment_usage = AsyncMock()
+        gallery = MagicMock()
+        gallery.save_photos = AsyncMock(side_effect=lambda rows: rows)
+        mock_storage_service.delete_file = AsyncMock()
+
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+        app.dependency_overrides[get_storage_service] = lambda: mock_storage_service
+        app.dependency_overrides[get_cat_detection_service] = lambda: detection
+        app.dependency_overrides[get_quota_service] = lambda: quota
+        app.dependency_overrides[get_gallery_service] = lambda: gallery
+
+        async def _process(file: Any, **_: Any) -> tuple[bytes, str, str]:
+            return (file.filename.encode(), "image/jpeg", "jpg")
+
+        with (
+            patch("app.routes.upload.process_uploaded_image", new=AsyncMock(side_effect=_process)),
+            patch("app.routes.upload.build_upload_renditions", new=AsyncMock(return_value=None)),
+            patch("app.routes.upload.redis_service.lock", return_value=_NullLock()),
+        ):
+            yield quota, gallery
+        app.dependency_overrides = {}
+
+    @pytest.mark.asyncio
+    async def test_batch_saves_accepted_photos_once(
+        self, client: AsyncClient, batch_overrides: Any, mock_storage_service: MagicMock
+    ) -> None:
+        quota, gallery = batch_overrides
+        files = [
+            ("files", ("cat-1.jpg", b"x", "image/jpeg")),
+            ("files", ("dog.jpg", b"x", "image/jpeg")),
+            ("files", ("cat-2.jpg", b"x", "image/jpeg")),
+        ]
+        data = {"lat": "13.7563", "lng": "100.5018", "location_name": "Colony Corner"}
+
+        with patch("app.routes.upload.invalidate_after_upload", new=AsyncMock()) as invalidate:
+            response = await client.post("/api/v1/upload/cats", files=files, data=data)
+
+        assert response.status_code == 201
+        assert "save_photo;dur=" in response.headers["server-timing"]
+        body = response.json()
+        assert len(body["photos"]) == 2
+        assert [item["filename"] for item in body["rejected"]] == ["dog.jpg"]
+        gallery.save_photos.assert_awaited_once()
+        assert len(gallery.save_photos.await_args.args[0]) == 2
+        quota.increment_usage.assert_awaited_once()
+        assert quota.increment_usage.await_args.kwargs == {"amount": 2}
+        invalidate.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_batch_rejected_up_front_when_quota_too_small(
+        self, client: AsyncClient, batch_overrides: Any, mock_storage_service: MagicMock
+    ) -> None:
+        quota, gallery = batch_overrides
+        quota.remaining_quota.return_value = 1
+        files = [("files", (f"cat-{i}.jpg", b"x", "image/jpeg")) for i in range(2)]
+        data = {"lat": "13.7563", "lng": "100.5018", "location_name": "Colony Corner"}
+
+        response = await client.post("/api/v1/upload/cats", files=files, data=data)
+
+        assert response.status_code == 429
+        mock_storage_service.upload_file.assert_not_awaited()
+        gallery.save_photos.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_near_duplicates_flagged_for_review_or_rejected(
+        self, client: AsyncClient, batch_overrides: Any, mock_storage_service: MagicMock
+    ) -> None:
+        from app.services.duplicate_service import DuplicateMatch
+
+        _, gallery = batch_overrides
+        match = DuplicateMatch(photo_id="photo-old", user_id="someone", distance=3)
+
+        async def _screen(contents: bytes, user_id: str) -> tuple[int, DuplicateMatch | None]:
+            return 42, match if contents.startswith(b"copy") else None
+
+        files = [("files", ("cat-1.jpg", b"x", "image/jpeg")), ("files", ("copy.jpg", b"x", "image/jpeg"))]
+        data = {"lat": "13.7563", "lng": "100.5018", "location_name": "Colony Corner"}
+
+        with (
+            patch("app.routes.upload.screen_upload", new=AsyncMock(side_effect=_screen)),
+            patch("app.routes.upload.invalidate_after_upload", new=AsyncMock()),
+            patch("app.routes.upload.remember_upload") as remember,
+        ):
+            flagged = await client.post("/api/v1/upload/cats", files=files, data=data)
+            with patch("app.routes.upload.config.DUPLICATE_UPLOAD_ACTION", "reject"):
+                rejected = await client.post("/api/v1/upload/cats", files=files, data=data)
+
+        assert flagged.status_code == 201
+        first_rows = gallery.save_photos.await_args_list[0].args[0]
+        assert [row["status"] for row in first_rows] == ["approved", "pending_review"]
+        assert first_rows[1]["metadata"] == {"near_duplicate_of": "photo-old", "near_duplicate_distance": 3}
+        assert all(row["phash"] == 42 for row in first_rows)
+        assert remember.call_count == 3
+
+        assert rejected.status_code == 201
+        assert rejected.json()["rejected"][0]["status_code"] == 409
+        assert len(gallery.save_photos.await_args_list[1].args[0]) == 1
 
 
 class TestParsingFunctions:
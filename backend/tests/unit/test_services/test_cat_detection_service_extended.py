@@ -126,6 +126,36 @@ class TestCatDetectionServiceExtended:
         assert second_result["has_cats"] is False
         assert mock_vision_service.detect_cats.await_count == 2
 
+    @pytest.mark.asyncio
+    async def test_detect_cats_reuses_caller_content_hash(self, service, mock_vision_service):
+        mock_vision_service.detect_cats.return_value = {"has_cats": True, "cat_count": 1, "confidence": 90}
+
+        with patch("app.services.cat_detection_service.hashlib.sha256") as mock_sha256:
+            first = await service.detect_cats(b"canonical-bytes", content_hash="a" * 64)
+            second = await service.detect_cats(b"canonical-bytes", content_hash="a" * 64)
+
+        mock_sha256.assert_not_called()
+        # Repeats are served by the vision service's cache, keyed by the same hash
+        mock_vision_service.detect_cats.assert_awaited_with(b"canonical-bytes", content_hash="a" * 64)
+        assert first == second
+
+    @pytest.mark.asyncio
+    async def test_repeat_image_is_served_from_layered_cache(self) -> None:
+        from app.services.google_vision import GoogleVisionService
+        from tests.fake_vision import FakeVisionClient
+
+        vision = GoogleVisionService()
+        vision.client = FakeVisionClient()
+        vision.is_initialized = True
+        service = CatDetectionService(vision_service=vision)
+
+        first = await service.detect_cats(b"cat-repeat")
+        second = await service.detect_cats(b"cat-repeat")
+
+        assert vision.client.calls == [1]
+        assert first == second
+        assert first["has_cats"] is True
+
     @pytest.mark.asyncio
     async def test_analyze_spot_suitability(self, service, mock_vision_service, mock_upload_file):
         mock_result = {"suitability_score": 80}
@@ -142,3 +172,30 @@ class TestCatDetectionServiceExtended:
             await service.analyze_cat_spot_suitability(mock_upload_file)
 
         assert excinfo.value.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_returns_detection_and_spot_analysis_per_image() -> None:
+    from unittest.mock import AsyncMock
+
+    from app.services.cat_detection_service import clear_detection_cache
+    from app.services.google_vision import GoogleVisionService
+    from tests.fake_vision import FakeVisionClient
+
+    vision = GoogleVisionService()
+    vision.client = FakeVisionClient()
+    vision.is_initialized = True
+    clear_detection_cache()
+
+    with (
+        patch.object(vision, "_get_cached_result", new=AsyncMock(return_value=None)),
+        patch.object(vision, "_cache_result", new=AsyncMock()),
+    ):
+        analyses = await CatDetectionService(vision_service=vision).analyze_batch([b"cat-a", b"dog-b"])
+
+    assert vision.client.calls == [2]
+    (cat_detection, cat_spot), (dog_detection, _) = analyses
+    assert cat_detection["has_cats"] is True
+    assert cat_detection["service_available"] is True
+    assert cat_spot["suitability_score"] > 0
+    assert dog_detection["has_cats"] is False
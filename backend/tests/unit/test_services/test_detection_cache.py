@@ -0,0 +1,127 @@
+"""
+Tests for the layered Vision detection result cache
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import detection_cache as detection_cache_module
+from app.services.detection_cache import REDIS_KEY_PREFIX, DetectionResultCache
+
+RESULT = {"has_cats": True, "cat_count": 1}
+
+
+def _admin(rows: list[dict] | None = None) -> MagicMock:
+    chain = MagicMock()
+    for method in ("select", "in_", "upsert"):
+        getattr(chain, method).return_value = chain
+    chain.execute = AsyncMock(return_value=MagicMock(data=rows or []))
+    admin = MagicMock()
+    admin.table.return_value = chain
+    return admin
+
+
+@pytest.fixture
+def redis() -> MagicMock:
+    redis = MagicMock()
+    redis.get_many = AsyncMock(side_effect=lambda keys: [None] * len(keys))
+    redis.set = AsyncMock(return_value=True)
+    with patch.object(detection_cache_module, "redis_service", redis):
+        yield redis
+
+
+@pytest.mark.asyncio
+async def test_table_hit_is_promoted_to_redis_and_l1(redis) -> None:
+    cache = DetectionResultCache(l1_size=8)
+    admin = _admin([{"image_hash": "h1", "response": RESULT}])
+
+    with patch.object(detection_cache_module, "get_async_supabase_admin_client", new=AsyncMock(return_value=admin)):
+        assert await cache.get_many(["h1", "h2"]) == {"h1": RESULT}
+        assert await cache.get("h1") == RESULT
+
+    admin.table.return_value.in_.assert_called_once_with("image_hash", ["h1", "h2"])
+    redis.set.assert_awaited_once()
+    assert redis.set.await_args.args[:2] == (REDIS_KEY_PREFIX + "h1", RESULT)
+    tiers = cache.stats()["tiers"]
+    assert tiers["l1"] == {"lookups": 3, "hits": 1, "hit_ratio": 0.3333}
+    assert tiers["redis"]["lookups"] == 2
+    assert tiers["table"] == {"lookups": 2, "hits": 1, "hit_ratio": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_redis_hit_skips_table(redis) -> None:
+    cache = DetectionResultCache(l1_size=8)
+    redis.get_many.side_effect = lambda keys: [RESULT for _ in keys]
+
+    with patch.object(detection_cache_module, "get_async_supabase_admin_client", new=AsyncMock()) as admin:
+        assert await cache.get("h1") == RESULT
+
+    admin.assert_not_awaited()
+    assert cache.stats()["overall_hit_ratio"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_writes_reach_table_in_batches(redis) -> None:
+    cache = DetectionResultCache(l1_size=1)
+    admin = _admin()
+
+    with (
+        patch.object(detection_cache_module, "get_async_supabase_admin_client", new=AsyncMock(return_value=admin)),
+        patch.object(detection_cache_module, "FLUSH_BATCH_SIZE", 2),
+    ):
+        for index in range(3):
+            await cache.set(f"h{index}", RESULT)
+        assert cache.stats()["pending_table_writes"] == 3
+        await cache.close()
+
+    upserts = [call.args[0] for call in admin.table.return_value.upsert.call_args_list]
+    assert [[row["image_hash"] for row in rows] for rows in upserts] == [["h0", "h1"], ["h2"]]
+    assert cache.stats()["pending_table_writes"] == 0
+    # L1 is bounded; the evicted entry is still in Redis
+    assert cache.stats()["l1_entries"] == 1
+    assert redis.set.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_for_retry(redis) -> None:
+    cache = DetectionResultCache()
+    await cache.set("h1", RESULT)
+
+    with patch.object(
+        detection_cache_module, "get_async_supabase_admin_client", new=AsyncMock(side_effect=RuntimeError("down"))
+    ):
+        await cache.close()
+
+    assert cache.stats()["pending_table_writes"] == 1
+    cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_close_writes_batch_whose_upsert_was_cancelled(redis) -> None:
+    cache = DetectionResultCache()
+    admin = _admin()
+    upsert_started = asyncio.Event()
+    execute = admin.table.return_value.execute
+
+    async def _slow_upsert() -> MagicMock:
+        upsert_started.set()
+        await asyncio.sleep(10)
+        return MagicMock(data=[])
+
+    with (
+        patch.object(detection_cache_module, "get_async_supabase_admin_client", new=AsyncMock(return_value=admin)),
+        patch.object(detection_cache_module, "FLUSH_BATCH_SIZE", 1),
+    ):
+        execute.side_effect = _slow_upsert
+        await cache.set("h1", RESULT)
+        await upsert_started.wait()
+
+        # close() cancels the background flush mid-upsert, then flushes what is left
+        execute.side_effect = None
+        await cache.close()
+
+    upserts = [call.args[0] for call in admin.table.return_value.upsert.call_args_list]
+    assert [[row["image_hash"] for row in rows] for rows in upserts] == [["h1"], ["h1"]]
+    assert cache.stats()["pending_table_writes"] == 0
@@ -0,0 +1,157 @@
+"""
+Tests for the direct-upload worker pipeline
+"""
+
+import io
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from PIL import Image
+
+from app.services import direct_upload_service
+from app.services.direct_upload_service import DirectUploadRejected, process_direct_upload
+
+JOB = {
+    "job_id": "upload-1",
+    "user_id": "user-1",
+    "is_pro": False,
+    "object_key": "quarantine/user-1/upload-1",
+    "photo": {"location_name": "Park", "latitude": 13.75, "longitude": 100.5, "tags": ["orange"]},
+}
+
+
+def _jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color=(200, 120, 40)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@asynccontextmanager
+async def _no_lock(*_args, **_kwargs):
+    yield
+
+
+@pytest.fixture
+def pipeline():
+    storage = MagicMock()
+    storage.download_object = AsyncMock(return_value=(_jpeg(), "image/jpeg"))
+    storage.upload_file = AsyncMock(return_value="https://cdn.test/upload/abc/original.jpg")
+    storage.delete_files = AsyncMock()
+    storage.delete_file = AsyncMock()
+    detection = MagicMock()
+    detection.detect_cats = AsyncMock(return_value={"has_cats": True, "cat_count": 1, "confidence": 0.9})
+    quota = MagicMock()
+    quota.check_quota = AsyncMock(return_value=True)
+    quota.increment_usage = AsyncMock()
+    gallery = MagicMock()
+    gallery.save_photo = AsyncMock(side_effect=lambda data: data)
+    redis = MagicMock()
+    redis.lock = _no_lock
+    admin = MagicMock()
+    lookup = admin.table.return_value.select.return_value.eq.return_value.eq.return_value.limit.return_value
+    lookup.execute = AsyncMock(return_value=MagicMock(data=[]))
+
+    with (
+        patch.object(direct_upload_service, "storage_service", storage),
+        patch.object(direct_upload_service, "cat_detection_service", detection),
+        patch.object(direct_upload_service, "QuotaService", return_value=quota),
+        patch.object(direct_upload_service, "GalleryService", return_value=gallery),
+        patch.object(direct_upload_service, "redis_service", redis),
+        patch.object(direct_upload_service, "get_async_supabase_admin_client", new=AsyncMock(return_value=admin)),
+        patch.object(direct_upload_service, "invalidate_after_upload", new=AsyncMock()),
+    ):
+        yield storage, detection, gallery, quota, lookup
+
+
+@pytest.mark.asyncio
+async def test_publishes_photo_and_removes_quarantine_object(pipeline) -> None:
+    storage, detection, gallery, *_ = pipeline
+
+    result = await process_direct_upload(JOB)
+
+    assert result["photo"]["id"] == "upload-1"
+    assert result["photo"]["status"] == "approved"
+    saved = gallery.save_photo.await_args.args[0]
+    assert saved["image_url"] == "https://cdn.test/upload/abc/original.jpg"
+    assert saved["tags"] == ["orange"]
+    assert detection.detect_cats.await_args.kwargs["content_hash"]
+    storage.delete_files.assert_awaited_once_with(["quarantine/user-1/upload-1"])
+
+
+@pytest.mark.asyncio
+async def test_rejects_image_without_cats_and_discards_upload(pipeline) -> None:
+    storage, detection, gallery, *_ = pipeline
+    detection.detect_cats.return_value = {"has_cats": False}
+
+    with pytest.raises(DirectUploadRejected):
+        await process_direct_upload(JOB)
+
+    storage.upload_file.assert_not_awaited()
+    gallery.save_photo.assert_not_awaited()
+    storage.delete_files.assert_awaited_once_with(["quarantine/user-1/upload-1"])
+
+
+@pytest.mark.asyncio
+async def test_vision_outage_leaves_upload_for_retry(pipeline) -> None:
+    storage, detection, *_ = pipeline
+    detection.detect_cats.return_value = {"service_available": False}
+
+    with pytest.raises(RuntimeError):
+        await process_direct_upload(JOB)
+
+    storage.delete_files.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_rejects_non_image_payload(pipeline) -> None:
+    storage, *_ = pipeline
+    storage.download_object.return_value = (b"<?php echo 1; ?>" * 4, "image/jpeg")
+
+    with pytest.raises(DirectUploadRejected):
+        await process_direct_upload(JOB)
+
+    storage.upload_file.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failure_after_photo_is_saved_keeps_its_image(pipeline) -> None:
+    storage, _, gallery, quota, _ = pipeline
+    quota.increment_usage.side_effect = RuntimeError("quota table unavailable")
+
+    result = await process_direct_upload(JOB)
+
+    assert result["photo"]["id"] == "upload-1"
+    gallery.save_photo.assert_awaited_once()
+    storage.delete_file.assert_not_awaited()
+    storage.delete_files.assert_awaited_once_with(["quarantine/user-1/upload-1"])
+
+
+@pytest.mark.asyncio
+async def test_retry_of_an_already_published_upload_completes_without_reinserting(pipeline) -> None:
+    storage, detection, gallery, _, lookup = pipeline
+    lookup.execute.return_value = MagicMock(
+        data=[
+            {
+                "id": "upload-1",
+                "location_name": "Park",
+                "latitude": 13.75,
+                "longitude": 100.5,
+                "image_url": "https://cdn.test/upload/abc/original.jpg",
+                "uploaded_at": "2026-10-18T00:00:00",
+                "status": "approved",
+            }
+        ]
+    )
+
+    result = await process_direct_upload(JOB)
+
+    assert result["photo"]["image_url"] == "https://cdn.test/upload/abc/original.jpg"
+    detection.detect_cats.assert_not_awaited()
+    storage.upload_file.assert_not_awaited()
+    gallery.save_photo.assert_not_awaited()
+    storage.delete_files.assert_awaited_once_with(["quarantine/user-1/upload-1"])
+    # The lookup is scoped to the uploader, not just the client-chosen id
+    by_id = direct_upload_service.get_async_supabase_admin_client.return_value.table.return_value.select.return_value.eq
+    by_id.assert_called_once_with("id", "upload-1")
+    by_id.return_value.eq.assert_called_once_with("user_id", "user-1")
@@ -0,0 +1,81 @@
+"""
+Tests for perceptual-hash near-duplicate screening
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import duplicate_service
+from app.services.duplicate_service import DuplicateService, RecentPhotoHashIndex, screen_upload
+
+
+def _admin(*results: list[dict]) -> MagicMock:
+    """Supabase admin mock whose successive queries return ``results`` in order, then no rows."""
+    chain = MagicMock()
+    for method in ("select", "eq", "gte", "is_", "order", "limit", "range"):
+        getattr(chain, method).return_value = chain
+    chain.not_ = chain
+    responses = iter(results)
+    chain.execute = AsyncMock(side_effect=lambda: MagicMock(data=next(responses, [])))
+    admin = MagicMock()
+    admin.table.return_value = chain
+    return admin
+
+
+@pytest.mark.asyncio
+async def test_merges_own_and_recent_matches_nearest_first() -> None:
+    own = [{"id": "mine", "phash": 0b1111}, {"id": "far", "phash": -1}]
+    recent = [{"id": "theirs", "user_id": "other", "phash": 0b1}, {"id": "mine", "user_id": "user-1", "phash": 0b1111}]
+    service = DuplicateService(_admin(own, recent), index=RecentPhotoHashIndex())
+
+    matches = await service.find_near_duplicates("user-1", 0)
+
+    assert [(match.photo_id, match.distance) for match in matches] == [("theirs", 1), ("mine", 4)]
+
+
+@pytest.mark.asyncio
+async def test_recent_index_refreshes_only_when_stale() -> None:
+    index = RecentPhotoHashIndex()
+    admin = _admin([{"id": "p1", "user_id": "u1", "phash": 7}])
+
+    await index.search(admin, 7, 0)
+    index.remember("p2", "u2", 7)
+    matches = await index.search(admin, 7, 0)
+
+    # One page plus the empty page that ends the read
+    assert admin.table.return_value.execute.await_count == 2
+    assert sorted(match.photo_id for match in matches) == ["p1", "p2"]
+
+
+@pytest.mark.asyncio
+async def test_recent_index_pages_past_the_server_row_cap() -> None:
+    index = RecentPhotoHashIndex()
+    pages = [[{"id": f"p{n}", "user_id": "u1", "phash": n} for n in range(start, start + 2)] for start in (0, 2, 4)]
+    admin = _admin(*pages)
+
+    with (
+        patch.object(duplicate_service, "RECENT_INDEX_PAGE_ROWS", 2),
+        patch.object(duplicate_service.config, "DUPLICATE_INDEX_MAX_ROWS", 5),
+        patch.object(duplicate_service.logger, "warning") as warning,
+    ):
+        await index.search(admin, 0, 0)
+
+    chain = admin.table.return_value
+    assert [call.args for call in chain.range.call_args_list] == [(0, 1), (2, 3), (4, 4)]
+    assert len(index) == 6
+    warning.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_screening_never_blocks_upload_when_lookup_fails() -> None:
+    with (
+        patch.object(duplicate_service.image_engine, "run", new=AsyncMock(return_value=99)),
+        patch.object(
+            duplicate_service, "get_async_supabase_admin_client", new=AsyncMock(side_effect=RuntimeError("down"))
+        ),
+    ):
+        assert await screen_upload(b"image", "user-1") == (99, None)
+
+    with patch.object(duplicate_service.config, "DUPLICATE_UPLOAD_ACTION", "off"):
+        assert await screen_upload(b"image", "user-1") == (None, None)
@@ -6,6 +6,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from postgrest.types import CountMethod
+from sqlalchemy.dialects import postgresql
 
 from app.services.gallery_service import GalleryService
 
@@ -63,6 +64,15 @@ class TestGalleryService:
         assert result["total"] == 50
         assert result["has_more"] is True  # 20 + 1 < 50
 
+    async def test_get_all_photos_trending_orders_by_hot_score(self, gallery_service, mock_supabase):
+        """Test trending sort reads the precomputed hot_score with a stable tiebreak"""
+        mock_supabase.execute.return_value = MagicMock(data=[], count=0)
+
+        await gallery_service.get_all_photos(limit=10, sort_field="trending", include_total=False)
+
+        orders = [call.args[0] for call in mock_supabase.order.call_args_list]
+        assert orders[-2:] == ["hot_score", "uploaded_at"]
+
     async def test_get_all_photos_limit_clamping(self, gallery_service, mock_supabase):
         """Test that limit is clamped to valid range"""
         mock_response = MagicMock()
@@ -173,6 +183,51 @@ class TestGalleryService:
 
         assert result == []
 
+    async def test_get_popular_tags_reads_incremental_counts(self, mock_supabase):
+        """Test the SQL path is a top-N read from tag_counts, not an unnest over photos"""
+        db = AsyncMock()
+        row = MagicMock(_mapping={"tag": "tabby", "count": 4})
+        db.execute = AsyncMock(return_value=[row])
+        service = GalleryService(mock_supabase, db=db)
+
+        result = await service.get_popular_tags(limit=3, period_days=7)
+
+        assert result == [{"tag": "tabby", "count": 4}]
+        query, params = db.execute.await_args.args
+        assert "FROM tag_daily_counts" in str(query)
+        assert "unnest" not in str(query)
+        assert params == {"limit": 3, "period_days": 7}
+        # date - unknown resolves to date - date (an integer), so the bind must be typed
+        compiled = str(query.compile(dialect=postgresql.dialect()))
+        assert "current_date - CAST(%(period_days)s AS integer)" in compiled
+
+    async def test_get_popular_tags_falls_back_to_rpc_with_period(self, mock_supabase):
+        """Test RPC fallback forwards the period when tag_counts is unreachable over SQL"""
+        db = AsyncMock()
+        db.execute = AsyncMock(side_effect=Exception("relation does not exist"))
+        mock_supabase.execute.return_value = MagicMock(data=[{"tag": "cute", "count": 2}])
+        service = GalleryService(mock_supabase, db=db)
+
+        result = await service.get_popular_tags(limit=5, period_days=30)
+
+        assert result == [{"tag": "cute", "count": 2}]
+        mock_supabase.rpc.assert_called_with("get_popular_tags", {"result_limit": 5, "period_days": 30})
+        db.rollback.assert_awaited_once()
+
+    async def test_stream_map_locations_keyset_paginates_supabase(self, gallery_service, mock_supabase):
+        """Test the marker stream walks (uploaded_at, id) pages until a short page"""
+        first = [{"id": f"p{i}", "uploaded_at": f"2024-03-2{i}T00:00:00+00:00"} for i in (3, 2)]
+        second = [{"id": "p1", "uploaded_at": "2024-03-21T00:00:00+00:00"}]
+        mock_supabase.execute.side_effect = [MagicMock(data=first), MagicMock(data=second)]
+
+        with patch("app.database.AsyncSessionLocal", None):
+            chunks = [chunk async for chunk in gallery_service.stream_map_locations(chunk_size=2)]
+
+        assert [[photo["id"] for photo in chunk] for chunk in chunks] == [["p3", "p2"], ["p1"]]
+        mock_supabase.or_.assert_called_once_with(
+            'uploaded_at.lt."2024-03-22T00:00:00+00:00",and(uploaded_at.eq."2024-03-22T00:00:00+00:00",id.lt.p2)'
+        )
+
     async def test_get_user_photos(self, gallery_service, mock_supabase, mock_cat_photo):
         """Test getting photos for a specific user"""
         mock_response = MagicMock()
@@ -264,3 +319,29 @@ class TestGalleryService:
             await gallery_service.search_photos(query="test", use_fulltext=False)
 
         assert "Database error during photo retrieval" in str(excinfo.value)
+
+    async def test_save_photos_inserts_batch_in_one_statement(self, gallery_service):
+        """SQL path issues one multi-row INSERT with per-row placeholders."""
+        rows = [MagicMock(_mapping={"id": "p1"}), MagicMock(_mapping={"id": "p2"})]
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(fetchall=MagicMock(return_value=rows)))
+        db.commit = AsyncMock()
+        gallery_service.db = db
+
+        saved = await gallery_service.save_photos([{"id": "p1", "tags": ["a"]}, {"id": "p2"}])
+
+        assert saved == [{"id": "p1"}, {"id": "p2"}]
+        db.execute.assert_awaited_once()
+        statement, params = db.execute.await_args.args
+        assert ":id_0" in str(statement) and ":id_1" in str(statement)
+        assert params["tags_0"] == ["a"]
+        assert params["tags_1"] == []
+        db.commit.assert_awaited_once()
+
+    async def test_save_photos_falls_back_to_supabase_bulk_insert(self, gallery_service, mock_supabase_admin):
+        """Without SQL the batch is one Supabase insert of the full row list."""
+        photos = [{"id": "p1"}, {"id": "p2"}]
+        mock_supabase_admin.execute.return_value = MagicMock(data=photos)
+
+        assert await gallery_service.save_photos(photos) == photos
+        mock_supabase_admin.insert.assert_called_once_with(photos)
@@ -65,8 +65,8 @@ class TestGoogleVisionServiceExtended:
         obj.score = 0.95
         mock_response.localized_object_annotations = [obj]
 
-        mock_vision_client.label_detection.return_value = mock_response
-        mock_vision_client.object_localization.return_value = mock_response
+        # Labels and objects come back from one combined annotate request
+        mock_vision_client.batch_annotate_images.return_value = MagicMock(responses=[mock_response])
 
         # Mock upload file
         mock_file = MagicMock()
@@ -85,6 +85,8 @@ class TestGoogleVisionServiceExtended:
             result = await service.detect_cats(mock_file)
             assert result["has_cats"] is True
             assert result["confidence"] > 90
+            mock_vision_client.batch_annotate_images.assert_called_once()
+            mock_vision_client.label_detection.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_fallback_cat_detection(self):
@@ -117,3 +119,77 @@ class TestGoogleVisionServiceExtended:
         assert result["suitability_score"] > 50
         # Verify shelter-related pros were added (from park detection)
         assert "Has spacious area" in result["pros"] or "Has trees for shelter" in result["pros"]
+
+
+class TestGoogleVisionBatch:
+    @pytest.fixture
+    def service(self):
+        from tests.fake_vision import FakeVisionClient
+
+        service = GoogleVisionService()
+        service.client = FakeVisionClient()
+        service.is_initialized = True
+        with (
+            patch.object(service, "_get_cached_result", new=AsyncMock(return_value=None)),
+            patch.object(service, "_get_cached_results", new=AsyncMock(return_value={})),
+            patch.object(service, "_cache_result", new=AsyncMock()) as cache_result,
+        ):
+            service.cache_result = cache_result
+            yield service
+
+    @pytest.mark.asyncio
+    async def test_batch_annotates_unique_images_in_one_request(self, service) -> None:
+        results = await service.detect_cats_batch([b"cat-1", b"dog-1", b"cat-1"])
+
+        assert service.client.calls == [2]
+        assert [result["has_cats"] for result in results] == [True, False, True]
+        assert results[0] is results[2]
+        assert service.cache_result.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_splits_requests_and_isolates_failed_images(self, service) -> None:
+        service.BATCH_MAX_IMAGES = 2
+
+        results = await service.detect_cats_batch([b"cat-1", b"error-1", b"cat-2"])
+
+        assert service.client.calls == [2, 1]
+        assert results[0]["has_cats"] is True
+        assert results[1]["fallback_mode"] is True
+        assert results[2]["has_cats"] is True
+        # Failed annotations are never cached
+        assert service.cache_result.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_quota_exhaustion_marks_the_whole_batch_rate_limited(self, service) -> None:
+        results = await service.detect_cats_batch([b"cat-1", b"quota-1"])
+
+        assert all(result["fallback_mode"] and result["rate_limited"] for result in results)
+        service.cache_result.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_batch_reuses_cached_results_without_api_call(self, service) -> None:
+        cached = {"has_cats": True, "labels": ["cat"]}
+        service._get_cached_results.side_effect = lambda hashes: dict.fromkeys(hashes, cached)
+
+        results = await service.detect_cats_batch([b"cat-1", b"cat-2"])
+
+        assert service.client.calls == []
+        assert all(result["has_cats"] for result in results)
+
+    @pytest.mark.asyncio
+    async def test_large_images_are_downscaled_but_cached_by_original_hash(self, service) -> None:
+        import hashlib
+        import io
+
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.effect_noise((3000, 2000), 40).convert("RGB").save(buffer, format="JPEG", quality=95)
+        original = buffer.getvalue()
+
+        await service.detect_cats(original)
+
+        sent = service.client.payloads[0]
+        assert len(sent) < len(original)
+        assert max(Image.open(io.BytesIO(sent)).size) == 1024
+        assert service.cache_result.await_args.args[0] == hashlib.sha256(original).hexdigest()
@@ -0,0 +1,53 @@
+"""
+Tests for ImageService URL optimization and rendition mapping
+"""
+
+from unittest.mock import patch
+
+from app.services.image_service import ImageService
+
+RENDITION_ORIGINAL = "https://cdn.example.com/upload/abc/original.webp"
+
+
+class TestImageService:
+    def setup_method(self) -> None:
+        ImageService._optimize_image_url_cached.cache_clear()
+
+    def test_rendition_width_picks_smallest_covering_size(self) -> None:
+        assert ImageService.rendition_width(80) == 100
+        assert ImageService.rendition_width(300) == 300
+        assert ImageService.rendition_width(301) == 500
+        assert ImageService.rendition_width(4000) == 1200
+
+    def test_rendition_url_only_for_rendition_sets(self) -> None:
+        assert ImageService.rendition_url(RENDITION_ORIGINAL, 500) == "https://cdn.example.com/upload/abc/w500.webp"
+        assert ImageService.rendition_url("https://cdn.example.com/upload/abc.webp", 500) is None
+        assert ImageService.rendition_url(RENDITION_ORIGINAL, 0) is None
+
+    def test_optimize_image_url_skips_proxy_for_renditions(self) -> None:
+        with patch("app.services.image_service.config") as mock_config:
+            mock_config.CDN_BASE_URL = ""
+            mock_config.ENABLE_IMAGE_PROXY = True
+
+            assert ImageService.optimize_image_url(RENDITION_ORIGINAL, 300) == (
+                "https://cdn.example.com/upload/abc/w300.webp"
+            )
+            legacy = ImageService.optimize_image_url("https://cdn.example.com/upload/legacy.jpg", 300)
+
+        assert legacy is not None
+        assert legacy.startswith("https://wsrv.nl/")
+
+    def test_process_photos_maps_width_to_rendition(self) -> None:
+        photos = [{"id": "1", "image_url": RENDITION_ORIGINAL}, {"id": "2"}]
+
+        processed = ImageService.process_photos(photos, width=1200)
+
+        assert processed[0]["image_url"] == "https://cdn.example.com/upload/abc/w1200.webp"
+        assert processed[1] == {"id": "2"}
+
+    def test_rendition_keys_cover_every_width_and_format(self) -> None:
+        keys = ImageService.rendition_keys("upload/abc/original.webp")
+
+        assert "upload/abc/w100.webp" in keys
+        assert "upload/abc/w1200.jpg" in keys
+        assert len(keys) == 8
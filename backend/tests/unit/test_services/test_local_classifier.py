@@ -0,0 +1,119 @@
+"""
+Tests for the local cat pre-classifier backend
+"""
+
+import asyncio
+import io
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image
+
+from app.services import local_classifier
+from app.services.cat_detection_service import CatDetectionService
+from app.services.local_classifier import OnnxCatClassifier, get_pre_classifier
+
+
+class FakePreClassifier:
+    name = "fake"
+
+    def __init__(self, score: float | None = None, error: Exception | None = None) -> None:
+        self.score_value = score
+        self.error = error
+
+    async def score(self, content: bytes) -> float | None:
+        if self.error:
+            raise self.error
+        return self.score_value
+
+    async def score_batch(self, contents: list[bytes]) -> list[float | None]:
+        return [await self.score(content) for content in contents]
+
+
+def _service(pre_classifier: FakePreClassifier) -> tuple[CatDetectionService, AsyncMock]:
+    vision = AsyncMock()
+    vision.detect_cats.return_value = {"has_cats": True, "cat_count": 1, "confidence": 91}
+    return CatDetectionService(vision_service=vision, pre_classifier=pre_classifier), vision
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("score", "has_cats"), [(0.99, True), (0.01, False)])
+async def test_confident_local_scores_skip_vision(score: float, has_cats: bool) -> None:
+    service, vision = _service(FakePreClassifier(score))
+
+    result = await service.detect_cats(b"image")
+
+    vision.detect_cats.assert_not_awaited()
+    assert result["has_cats"] is has_cats
+    assert result["service_available"] is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "pre_classifier", [FakePreClassifier(0.5), FakePreClassifier(None), FakePreClassifier(error=RuntimeError("boom"))]
+)
+async def test_ambiguous_or_failed_local_scores_escalate_to_vision(pre_classifier: FakePreClassifier) -> None:
+    service, vision = _service(pre_classifier)
+
+    result = await service.detect_cats(b"image")
+
+    vision.detect_cats.assert_awaited_once()
+    assert result["confidence"] == 91
+
+
+@pytest.mark.asyncio
+async def test_concurrent_scores_share_one_batch() -> None:
+    classifier = OnnxCatClassifier("model.onnx", input_size=64, threads=1, max_batch=4)
+
+    with patch.object(
+        local_classifier.image_engine, "run", new=AsyncMock(side_effect=lambda *args: [0.9] * len(args[-1]))
+    ) as run:
+        scores = await asyncio.gather(*(classifier.score(f"img-{index}".encode()) for index in range(6)))
+
+    assert scores == [0.9] * 6
+    assert [len(call.args[-1]) for call in run.await_args_list] == [4, 2]
+    assert not classifier._batch_tasks
+
+
+def test_score_images_runs_one_inference_and_skips_undecodable_images() -> None:
+    np = pytest.importorskip("numpy")
+
+    class StubSession:
+        def __init__(self) -> None:
+            self.batches: list = []
+
+        def get_inputs(self) -> list[SimpleNamespace]:
+            return [SimpleNamespace(name="pixels")]
+
+        def run(self, _outputs: None, feeds: dict) -> list:
+            batch = feeds["pixels"]
+            self.batches.append(batch)
+            return [np.tile(np.array([[0.0, 2.0]], dtype=np.float32), (len(batch), 1))]
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (120, 80), (200, 120, 40)).save(buffer, format="PNG")
+    session = StubSession()
+
+    with (
+        patch.object(local_classifier, "np", np),
+        patch.object(local_classifier, "_load_session", return_value=session),
+    ):
+        tensor = local_classifier._preprocess(buffer.getvalue(), 32)
+        scores = local_classifier.score_images("model.onnx", 32, 1, [buffer.getvalue(), b"not an image"])
+
+    assert tensor.shape == (3, 32, 32)
+    assert tensor.dtype == np.float32
+    assert [batch.shape for batch in session.batches] == [(1, 3, 32, 32)]
+    assert scores == [0.8808, None]
+    assert local_classifier._cat_probability([0.0]) == 0.5
+
+
+def test_pre_classifier_is_disabled_without_model_or_runtime() -> None:
+    with patch.object(local_classifier.config, "LOCAL_CLASSIFIER_MODEL_PATH", ""):
+        assert get_pre_classifier() is None
+    with (
+        patch.object(local_classifier.config, "LOCAL_CLASSIFIER_MODEL_PATH", "model.onnx"),
+        patch.object(local_classifier, "ONNX_AVAILABLE", False),
+    ):
+        assert get_pre_classifier() is None
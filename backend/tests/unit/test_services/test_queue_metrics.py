@@ -0,0 +1,91 @@
+"""
+Tests for queue observability: worker snapshots and their aggregation
+"""
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services import queue_metrics
+from app.services.queue_metrics import WorkerQueueMetrics
+from app.services.queue_service import queue_service
+
+STRIPE = queue_service.STRIPE_STREAM
+VISION = queue_service.VISION_STREAM
+
+
+def _stream_stats(**overrides: dict) -> dict:
+    base = {
+        "length": 0,
+        "pending": 0,
+        "undelivered": 0,
+        "consumers": {},
+        "oldest_pending_age_seconds": None,
+        "oldest_pending_idle_seconds": None,
+        "oldest_pending_deliveries": None,
+        "oldest_undelivered_age_seconds": None,
+        "dead_letter_length": 0,
+        "scheduled_retries": 0,
+    }
+    return {stream: {**base, **overrides.get(stream, {})} for stream, _ in queue_service.streams}
+
+
+def test_worker_snapshot_covers_every_stream() -> None:
+    metrics = WorkerQueueMetrics()
+    metrics.count(STRIPE, "completed", 2)
+    metrics.count(STRIPE, "retried")
+    metrics.observe(STRIPE, "processing", 40.0)
+
+    snapshot = metrics.snapshot("worker-1", {STRIPE: 1})
+
+    assert snapshot["consumer"] == "worker-1"
+    assert set(snapshot["streams"]) == {stream for stream, _ in queue_service.streams}
+    stripe = snapshot["streams"][STRIPE]
+    assert stripe["in_flight"] == 1
+    assert stripe["outcomes"] == {"completed": 2, "retried": 1, "dead_lettered": 0}
+    assert stripe["latency"]["processing"]["count"] == 1
+    assert snapshot["streams"][VISION]["outcomes"]["completed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_collect_merges_live_workers_with_stream_state() -> None:
+    first, second = WorkerQueueMetrics(), WorkerQueueMetrics()
+    first.count(STRIPE, "completed", 3)
+    first.observe(STRIPE, "processing", 20.0)
+    second.count(STRIPE, "completed", 1)
+    second.count(STRIPE, "dead_lettered")
+    second.observe(STRIPE, "processing", 400.0)
+    stats = _stream_stats(
+        **{
+            STRIPE: {
+                "length": 7,
+                "pending": 2,
+                "undelivered": 5,
+                "oldest_pending_age_seconds": 4.0,
+                "oldest_undelivered_age_seconds": 9.5,
+            }
+        }
+    )
+
+    with (
+        patch.object(queue_service, "stream_stats", new=AsyncMock(return_value=stats)),
+        patch.object(
+            queue_service,
+            "get_worker_metrics",
+            new=AsyncMock(return_value=[first.snapshot("w1", {STRIPE: 2}), second.snapshot("w2", {})]),
+        ),
+    ):
+        collected = await queue_metrics.collect_queue_metrics()
+
+    stripe = collected["streams"][STRIPE]
+    assert collected["backlog"] == 7
+    assert collected["oldest_entry_age_seconds"] == 9.5
+    assert stripe["outcomes"] == {"completed": 4, "retried": 0, "dead_lettered": 1}
+    assert stripe["in_flight"] == 2
+    processing = stripe["latency"]["processing"]
+    assert processing["count"] == 2
+    assert processing["max_ms"] == 400.0
+    assert processing["buckets"]["le_25"] == 1
+    assert [worker["consumer"] for worker in collected["workers"]] == ["w1", "w2"]
+    assert collected["workers"][0]["updated_at"] <= time.time()
@@ -67,6 +67,19 @@ async def test_check_and_increment_under_limit(mock_supabase):
     assert mock_supabase.rpc.call_args[0][0] == "increment_usage"
 
 
+@pytest.mark.asyncio
+async def test_increment_usage_records_a_batch_in_one_call(mock_supabase):
+    service = QuotaService(mock_supabase)
+    mock_supabase.rpc.return_value.execute = AsyncMock()
+
+    await service.increment_usage("user1", amount=3)
+    await service.increment_usage("user1", amount=0)
+
+    mock_supabase.rpc.assert_called_once()
+    name, params = mock_supabase.rpc.call_args[0]
+    assert (name, params["p_user_id"], params["p_amount"]) == ("increment_usage", "user1", 3)
+
+
 @pytest.mark.asyncio
 async def test_check_and_increment_over_limit_free(mock_supabase):
     service = QuotaService(mock_supabase)
@@ -138,3 +151,18 @@ async def test_check_quota_fails_closed_when_all_quota_reads_fail():
     service = QuotaService(broken_supabase, db=broken_db)
 
     assert await service.check_quota("user1", False) is False
+
+
+@pytest.mark.asyncio
+async def test_remaining_quota_counts_open_slots(mock_supabase):
+    service = QuotaService(mock_supabase)
+    mock_sys_res = MagicMock(data={"total_uploads": 100})
+    now = datetime.now(UTC)
+    mock_cat_res = MagicMock(data=[{"uploaded_at": (now - timedelta(minutes=i)).isoformat()} for i in range(2)])
+    mock_supabase.table.return_value.execute.side_effect = [mock_sys_res, mock_cat_res]
+
+    with patch.object(service, "FREE_LIMIT", 5):
+        assert await service.remaining_quota("user1", False) == 3
+
+    mock_supabase.table.return_value.execute.side_effect = [MagicMock(data={"total_uploads": 5000})]
+    assert await service.remaining_quota("user1", False) == 0
@@ -1,8 +1,10 @@
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 
-from app.services.search_service import SearchService
+from app.services.search_service import _SQL_PHOTOS, SearchService, SpatialFilter
 
 
 @pytest.fixture(autouse=True)
@@ -118,3 +120,84 @@ async def test_search_photos_with_tags(mock_supabase, search_service):
     assert call_args[0][0] == "tags"
     assert "cute" in call_args[0][1]
     assert "outdoor" in call_args[0][1]
+
+
+def test_spatial_filter_keeps_exact_radius_center():
+    area = SpatialFilter.from_radius(13.75634, 100.50177, 5)
+    # ~4.9 km north-east of the requested center, and a box corner outside the circle
+    inside = (13.7875, 100.5340)
+    corner = (area.max_lat - 0.001, area.max_lng - 0.001)
+
+    assert (area.latitude, area.longitude, area.radius_km) == (13.75634, 100.50177, 5)
+    assert area.contains(*inside)
+    assert not area.contains(*corner)
+    assert SpatialFilter.from_bbox(north=13.9, south=13.7, east=100.7, west=100.5).contains(*corner)
+
+
+def test_area_sql_adds_distance_check_for_radius():
+    area = SpatialFilter.from_radius(13.75634, 100.50177, 5)
+    params: dict = {}
+
+    sql_query = SearchService._apply_area_sql(select(_SQL_PHOTOS.c.id), params, area)
+
+    compiled = str(sql_query.compile(dialect=postgresql.dialect()))
+    assert "sin(radians(cat_photos.latitude - %(area_center_lat)s)" in compiled
+    assert "<= %(area_haversine_limit)s" in compiled
+    assert params["area_center_lat"] == 13.75634
+    assert params["area_haversine_limit"] == pytest.approx(area.haversine_limit)
+
+
+@pytest.mark.asyncio
+async def test_search_photos_in_area_uses_single_rpc(mock_supabase, search_service):
+    area = SpatialFilter.from_bbox(north=13.9, south=13.7, east=100.7, west=100.5)
+    mock_supabase.execute.return_value = MagicMock(
+        data=[{"id": "1", "status": "approved", "total_count": 7, "tags": ["tabby"]}]
+    )
+
+    with (
+        patch("app.services.feature_flags.FeatureFlagService.is_enabled", return_value=True),
+        patch.object(SearchService, "_check_fulltext_support", AsyncMock(return_value=True)),
+    ):
+        results, total = await search_service.search_photos_in_area("tabby", ["#Tabby"], area, limit=10)
+
+    assert results == [{"id": "1", "tags": ["tabby"]}]
+    assert total == 7
+    name, params = mock_supabase.rpc.call_args[0]
+    assert name == "search_photos_in_area"
+    assert params["search_query"] == "tabby"
+    assert params["tag_filter"] == ["tabby"]
+    assert params["radius_meters"] is None
+    assert params["min_lat"] == pytest.approx(13.7)
+
+
+@pytest.mark.asyncio
+async def test_search_photos_in_area_reports_zero_total_for_no_matches(mock_supabase, search_service):
+    area = SpatialFilter.from_bbox(north=13.9, south=13.7, east=100.7, west=100.5)
+    mock_supabase.execute.return_value = MagicMock(data=[])
+
+    with patch("app.services.feature_flags.FeatureFlagService.is_enabled", return_value=True):
+        assert await search_service.search_photos_in_area(None, None, area, include_total=True) == ([], 0)
+        assert await search_service.search_photos_in_area(None, None, area) == ([], None)
+
+
+@pytest.mark.asyncio
+async def test_search_photos_in_area_falls_back_to_bounding_box(mock_supabase, search_service):
+    area = SpatialFilter.from_radius(13.75, 100.5, 2)
+    mock_supabase.gte.return_value = mock_supabase
+    mock_supabase.lte.return_value = mock_supabase
+    inside = {"id": "2", "latitude": 13.76, "longitude": 100.51}
+    corner = {"id": "3", "latitude": area.max_lat, "longitude": area.max_lng}
+    mock_supabase.execute.return_value = MagicMock(data=[inside, corner])
+
+    with (
+        patch("app.services.feature_flags.FeatureFlagService.is_enabled", return_value=False),
+        patch.object(SearchService, "_check_fulltext_support", AsyncMock(return_value=False)),
+    ):
+        results, total = await search_service.search_photos_in_area("cat", None, area)
+
+    # The bounding box corner is outside the radius, as it is for the PostGIS RPC
+    assert results == [inside]
+    assert total is None
+    mock_supabase.rpc.assert_not_called()
+    mock_supabase.gte.assert_any_call("latitude", area.min_lat)
+    mock_supabase.lte.assert_any_call("longitude", area.max_lng)
@@ -134,6 +134,53 @@ class TestStorageService:
         assert exc.value.status_code == 500
         assert "Failed to upload image" in exc.value.detail
 
+    @pytest.mark.asyncio
+    async def test_upload_file_with_renditions_uses_deterministic_keys(self, storage_service):
+        """The original and each rendition share one <folder>/<id>/ prefix."""
+        renditions = [("w300.webp", b"small", "image/webp"), ("w300.jpg", b"small-jpg", "image/jpeg")]
+
+        with patch("app.config.config") as mock_config:
+            mock_config.CDN_BASE_URL = None
+            url = await storage_service.upload_file(b"master", "image/webp", "webp", renditions=renditions)
+
+        keys = {call.kwargs["Key"]: call.kwargs for call in storage_service.s3_client.put_object.call_args_list}
+        original_key = url.split("amazonaws.com/", 1)[1]
+        base_key = original_key.rsplit("/", 1)[0]
+        assert original_key.endswith("/original.webp")
+        assert set(keys) == {original_key, f"{base_key}/w300.webp", f"{base_key}/w300.jpg"}
+        assert keys[f"{base_key}/w300.jpg"]["ContentType"] == "image/jpeg"
+        assert keys[f"{base_key}/w300.jpg"]["CacheControl"] == "public, max-age=31536000"
+
+    @pytest.mark.asyncio
+    async def test_upload_file_with_renditions_rolls_back_partial_set(self, storage_service):
+        """A failed rendition put deletes the objects that were stored."""
+
+        def _put(**kwargs):
+            if kwargs["Key"].endswith("w300.jpg"):
+                raise Exception("S3 error")
+
+        storage_service.s3_client.put_object.side_effect = _put
+        renditions = [("w300.webp", b"small", "image/webp"), ("w300.jpg", b"small-jpg", "image/jpeg")]
+
+        with pytest.raises(HTTPException) as exc:
+            await storage_service.upload_file(b"master", "image/webp", "webp", renditions=renditions)
+
+        assert exc.value.status_code == 500
+        deleted = storage_service.s3_client.delete_objects.call_args.kwargs["Delete"]["Objects"]
+        assert len(deleted) == 2
+        assert not any(obj["Key"].endswith("w300.jpg") for obj in deleted)
+
+    @pytest.mark.asyncio
+    async def test_delete_file_removes_rendition_set(self, storage_service):
+        """Deleting a rendition original removes every sibling rendition in one batch."""
+        from app.services.image_service import ImageService
+
+        await storage_service.delete_file("https://cdn.example.com/upload/abc/original.webp")
+
+        storage_service.s3_client.delete_object.assert_not_called()
+        deleted = [obj["Key"] for obj in storage_service.s3_client.delete_objects.call_args.kwargs["Delete"]["Objects"]]
+        assert deleted == ["upload/abc/original.webp", *ImageService.rendition_keys("upload/abc/original.webp")]
+
     @pytest.mark.asyncio
     async def test_delete_file_success(self, storage_service):
         """Test successful file deletion"""
@@ -171,3 +218,76 @@ class TestStorageService:
 
         # Should not crash, may or may not call s3_client depending on implementation
         # Just verify it doesn't raise an exception
+
+    def test_create_presigned_upload_pins_type_and_size(self, storage_service):
+        """The presigned POST targets the quarantine key and S3 enforces type and size."""
+        storage_service.s3_client.generate_presigned_post.return_value = {"url": "https://s3", "fields": {"key": "k"}}
+        key = StorageService.quarantine_key("user-1", "upload-1")
+
+        presigned = storage_service.create_presigned_upload(key, "image/jpeg", 1024, 300)
+
+        assert key == "quarantine/user-1/upload-1"
+        assert presigned["url"] == "https://s3"
+        kwargs = storage_service.s3_client.generate_presigned_post.call_args.kwargs
+        assert kwargs["Key"] == key
+        assert kwargs["ExpiresIn"] == 300
+        assert ["content-length-range", 1, 1024] in kwargs["Conditions"]
+        assert {"Content-Type": "image/jpeg"} in kwargs["Conditions"]
+
+    @pytest.mark.asyncio
+    async def test_download_object_is_bounded(self, storage_service):
+        """Downloads return the stored type, a missing key, or reject oversized objects."""
+        from botocore.exceptions import ClientError
+
+        body = MagicMock()
+        body.read.return_value = b"image"
+        storage_service.s3_client.get_object.return_value = {
+            "Body": body,
+            "ContentLength": 5,
+            "ContentType": "image/png",
+        }
+        assert await storage_service.download_object("quarantine/u/1", 10) == (b"image", "image/png")
+        body.read.assert_called_once_with(11)
+
+        storage_service.s3_client.get_object.return_value = {"Body": MagicMock(), "ContentLength": 50}
+        with pytest.raises(ValueError):
+            await storage_service.download_object("quarantine/u/1", 10)
+
+        storage_service.s3_client.get_object.side_effect = ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        assert await storage_service.download_object("quarantine/u/1", 10) is None
+
+    @pytest.mark.asyncio
+    async def test_delete_files_issues_provider_sized_batches(self, storage_service):
+        """Large key sets split into 1000-key DeleteObjects requests."""
+        keys = [f"upload/{index}.jpg" for index in range(2500)]
+
+        await storage_service.delete_files(keys)
+
+        sizes = sorted(
+            len(call.kwargs["Delete"]["Objects"]) for call in storage_service.s3_client.delete_objects.call_args_list
+        )
+        assert sizes == [500, 1000, 1000]
+
+    @pytest.mark.asyncio
+    async def test_large_upload_uses_multipart_transfer(self, storage_service):
+        """Bodies above the multipart threshold go through the managed transfer."""
+        body = b"x" * storage_service.multipart_threshold
+
+        await storage_service.upload_file(body, "image/jpeg", "jpg")
+
+        storage_service.s3_client.put_object.assert_not_called()
+        args, kwargs = storage_service.s3_client.upload_fileobj.call_args
+        assert args[1] == "test-bucket"
+        assert kwargs["ExtraArgs"]["ContentType"] == "image/jpeg"
+        assert kwargs["Config"] is storage_service.transfer_config
+
+    def test_connection_pool_matches_executor(self, mock_boto3_client):
+        """The botocore pool is sized from S3_MAX_CONCURRENCY."""
+        with (
+            patch.dict(os.environ, {"S3_MAX_CONCURRENCY": "4"}),
+            patch("boto3.client") as client_factory,
+        ):
+            service = StorageService()
+
+        assert service.max_concurrency == 4
+        assert client_factory.call_args.kwargs["config"].max_pool_connections == 8
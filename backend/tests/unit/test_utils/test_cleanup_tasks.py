@@ -1,9 +1,16 @@
 import asyncio
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.tasks.cleanup_tasks import _cleanup_notifications_job, start_cleanup_jobs, stop_cleanup_jobs
+from app.tasks.cleanup_tasks import (
+    _cleanup_abandoned_direct_uploads,
+    _cleanup_notifications_job,
+    _cleanup_orphaned_s3_files,
+    _reconcile_tag_counts_job,
+    start_cleanup_jobs,
+    stop_cleanup_jobs,
+)
 
 
 class TestCleanupTasks:
@@ -42,3 +49,88 @@ class TestCleanupTasks:
         ):
             await _cleanup_notifications_job()
             # Should log error and continue to sleep (which cancels it)
+
+    @pytest.mark.asyncio
+    async def test_reconcile_tag_counts_job_invalidates_tags_cache(self):
+        mock_client = MagicMock()
+        mock_client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=12))
+
+        with (
+            patch("app.tasks.cleanup_tasks.get_async_supabase_admin_client", return_value=mock_client),
+            patch("app.utils.cache.invalidate_tags_cache", new_callable=AsyncMock) as invalidate,
+            patch("asyncio.sleep", side_effect=asyncio.CancelledError),
+            pytest.raises(asyncio.CancelledError),
+        ):
+            await _reconcile_tag_counts_job()
+
+        mock_client.rpc.assert_called_once_with("reconcile_tag_counts", {})
+        invalidate.assert_awaited_once()
+
+
+class TestOrphanedS3Cleanup:
+    @pytest.mark.asyncio
+    async def test_renditions_of_referenced_uploads_are_kept(self):
+        from datetime import UTC, datetime, timedelta
+
+        old = datetime.now(UTC) - timedelta(days=2)
+        base = "https://bucket.s3.ap-southeast-2.amazonaws.com"
+        mock_client = MagicMock()
+        mock_client.table.return_value.select.return_value.execute = AsyncMock(
+            return_value=MagicMock(
+                data=[
+                    {"image_url": f"{base}/upload/kept/original.webp"},
+                    {"image_url": f"{base}/upload/legacy.jpg"},
+                ]
+            )
+        )
+        storage = MagicMock()
+        storage.list_files = AsyncMock(
+            return_value=[
+                ("upload/kept/original.webp", old),
+                ("upload/kept/w300.webp", old),
+                ("upload/kept/w1200.jpg", old),
+                ("upload/legacy.jpg", old),
+                ("upload/gone/w300.webp", old),
+                ("upload/stray.jpg", old),
+            ]
+        )
+        storage.delete_files = AsyncMock()
+
+        with (
+            patch("app.tasks.cleanup_tasks.get_async_supabase_admin_client", return_value=mock_client),
+            patch("app.tasks.cleanup_tasks.storage_service", storage),
+        ):
+            await _cleanup_orphaned_s3_files()
+
+        storage.delete_files.assert_awaited_once_with(["upload/gone/w300.webp", "upload/stray.jpg"])
+
+
+class TestQuarantineCleanup:
+    @pytest.mark.asyncio
+    async def test_only_old_uploads_without_a_live_job_are_deleted(self):
+        from datetime import UTC, datetime, timedelta
+
+        old = datetime.now(UTC) - timedelta(days=1)
+        fresh = datetime.now(UTC)
+        storage = MagicMock()
+        storage.list_files = AsyncMock(
+            return_value=[
+                ("quarantine/user-1/abandoned", old),
+                ("quarantine/user-1/processing", old),
+                ("quarantine/user-1/failed", old),
+                ("quarantine/user-1/just-uploaded", fresh),
+            ]
+        )
+        storage.delete_files = AsyncMock()
+        jobs = {"processing": {"status": "processing"}, "failed": {"status": "failed"}}
+        queue = MagicMock(available=True, TERMINAL_JOB_STATUSES=frozenset({"completed", "failed"}))
+        queue.get_upload_job = AsyncMock(side_effect=lambda job_id, user_id: jobs.get(job_id))
+
+        with (
+            patch("app.tasks.cleanup_tasks.storage_service", storage),
+            patch("app.tasks.cleanup_tasks.queue_service", queue),
+        ):
+            await _cleanup_abandoned_direct_uploads()
+
+        storage.list_files.assert_awaited_once_with(prefix="quarantine/")
+        storage.delete_files.assert_awaited_once_with(["quarantine/user-1/abandoned", "quarantine/user-1/failed"])
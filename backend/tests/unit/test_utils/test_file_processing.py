@@ -38,7 +38,7 @@ class TestProcessUploadedImage:
 
         with (
             patch("app.utils.file_processing.validate_image_file"),
-            patch("app.utils.file_processing.is_valid_image", return_value=True),
+            patch("app.utils.file_processing.decode_image"),
             patch("app.utils.file_processing.validate_image_magic_bytes", return_value=(True, "image/jpeg", None)),
             patch("app.utils.file_processing.validate_content_type_matches", return_value=(True, "image/jpeg")),
             patch("app.utils.file_processing.get_safe_file_extension", return_value=".jpg"),
@@ -62,7 +62,7 @@ class TestProcessUploadedImage:
 
         with (
             patch("app.utils.file_processing.validate_image_file"),
-            patch("app.utils.file_processing.is_valid_image", return_value=True),
+            patch("app.utils.file_processing.decode_image") as mock_decode,
             patch("app.utils.file_processing.validate_image_magic_bytes", return_value=(True, "image/jpeg", None)),
             patch("app.utils.file_processing.validate_content_type_matches", return_value=(True, "image/jpeg")),
             patch(
@@ -74,7 +74,9 @@ class TestProcessUploadedImage:
 
             contents, content_type, extension = await process_uploaded_image(mock_file, optimize=True)
 
-            mock_optimize.assert_called_once_with(sample_image_bytes, "image/jpeg", 1920)
+            mock_optimize.assert_called_once_with(
+                sample_image_bytes, "image/jpeg", 1920, image=mock_decode.return_value
+            )
             assert contents == b"optimized"
             assert content_type == "image/webp"
             assert extension == "webp"
@@ -117,7 +119,9 @@ class TestProcessUploadedImage:
 
         with (
             patch("app.utils.file_processing.validate_image_file"),
-            patch("app.utils.file_processing.is_valid_image", return_value=False),
+            patch("app.utils.file_processing.validate_image_magic_bytes", return_value=(True, "image/jpeg", None)),
+            patch("app.utils.file_processing.validate_content_type_matches", return_value=(True, "image/jpeg")),
+            patch("app.utils.file_processing.decode_image", side_effect=OSError("image file is truncated")),
         ):
             from app.utils.file_processing import process_uploaded_image
 
@@ -134,7 +138,7 @@ class TestProcessUploadedImage:
 
         with (
             patch("app.utils.file_processing.validate_image_file"),
-            patch("app.utils.file_processing.is_valid_image", return_value=True),
+            patch("app.utils.file_processing.decode_image"),
             patch("app.utils.file_processing.validate_image_magic_bytes", return_value=(True, "image/jpeg", None)),
             patch("app.utils.file_processing.validate_content_type_matches", return_value=(True, "image/jpeg")),
             patch("app.utils.file_processing.get_safe_file_extension", return_value=".jpg"),
@@ -161,6 +165,56 @@ class TestProcessUploadedImage:
             assert excinfo.value.status_code == 400
             assert "mime type" in excinfo.value.detail.lower()
 
+    @pytest.mark.asyncio
+    async def test_process_reads_and_decodes_upload_once(self, create_mock_upload_file, sample_image_bytes):
+        """The body is read in one bounded call and decoded once for validation and optimization."""
+        mock_file = create_mock_upload_file(sample_image_bytes, "cat.jpg", "image/jpeg")
+
+        with (
+            patch("app.utils.file_processing.decode_image") as mock_decode,
+            patch("app.utils.file_processing.optimize_image", return_value=(b"optimized", "image/webp")),
+        ):
+            from app.utils.file_processing import process_uploaded_image
+
+            await process_uploaded_image(mock_file, max_size_mb=5, optimize=True)
+
+        mock_file.read.assert_awaited_once_with(5 * 1024 * 1024 + 1)
+        mock_file.file.tell.assert_not_called()
+        mock_decode.assert_called_once_with(sample_image_bytes, 1920)
+
+    @pytest.mark.asyncio
+    async def test_process_returns_503_when_image_engine_saturated(self, create_mock_upload_file, sample_image_bytes):
+        """A saturated image engine sheds the upload with 503 and Retry-After."""
+        from app.utils.image_utils import ImageEngineSaturated
+
+        mock_file = create_mock_upload_file(sample_image_bytes, "cat.jpg", "image/jpeg")
+
+        with patch(
+            "app.utils.file_processing.image_engine.run",
+            new=AsyncMock(side_effect=ImageEngineSaturated("Image engine is saturated")),
+        ):
+            from app.utils.file_processing import process_uploaded_image
+
+            with pytest.raises(HTTPException) as excinfo:
+                await process_uploaded_image(mock_file)
+
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers == {"Retry-After": "5"}
+
+    @pytest.mark.asyncio
+    async def test_process_rejects_oversized_upload_before_reading(self, create_mock_upload_file):
+        """A parser-recorded size over the limit is rejected without reading the body."""
+        mock_file = create_mock_upload_file(b"", "large.jpg", "image/jpeg")
+        mock_file.size = 11 * 1024 * 1024
+
+        from app.utils.file_processing import process_uploaded_image
+
+        with pytest.raises(HTTPException) as excinfo:
+            await process_uploaded_image(mock_file, max_size_mb=10)
+
+        assert excinfo.value.status_code == 400
+        mock_file.read.assert_not_awaited()
+
 
 class TestReadFileForDetection:
     """Test read_file_for_detection function"""
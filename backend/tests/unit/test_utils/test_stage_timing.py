@@ -0,0 +1,57 @@
+import os
+from unittest.mock import MagicMock, patch
+
+from app.utils import stage_timing
+from app.utils.stage_timing import StageHistogram, record_stage, stage_histograms, stage_timer, timed_stage
+
+
+def test_stages_accumulate_into_server_timing_and_histograms() -> None:
+    stage_histograms.reset()
+
+    with stage_timer("upload") as timer:
+        with timed_stage("detection"):
+            pass
+        record_stage("decode", 0.012)
+        record_stage("decode", 0.008)
+
+    header = timer.server_timing()
+    assert header.startswith("detection;dur=")
+    assert "decode;dur=20.0" in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+    snapshot = stage_histograms.snapshot()["upload"]
+    assert snapshot["decode"]["count"] == 2
+    assert snapshot["decode"]["buckets"]["le_10"] == 1
+    assert snapshot["detection"]["count"] == 1
+
+
+def test_helpers_are_noops_without_active_timer() -> None:
+    stage_histograms.reset()
+
+    with timed_stage("detection"):
+        pass
+    record_stage("decode", 1.0)
+
+    assert stage_histograms.snapshot() == {}
+
+
+def test_spans_only_created_when_telemetry_enabled() -> None:
+    tracer = MagicMock()
+    with patch.object(stage_timing, "_get_stage_tracer", return_value=tracer):
+        with patch.dict(os.environ, {"ENABLE_TELEMETRY": "false"}), stage_timer("upload"), timed_stage("s3_put"):
+            pass
+        tracer.start_as_current_span.assert_not_called()
+
+        with patch.dict(os.environ, {"ENABLE_TELEMETRY": "true"}), stage_timer("upload"), timed_stage("s3_put"):
+            pass
+        tracer.start_as_current_span.assert_called_once_with("upload.s3_put")
+
+
+def test_histogram_quantiles_use_bucket_bounds() -> None:
+    histogram = StageHistogram()
+    for duration_ms in (3, 4, 40, 45, 20000):
+        histogram.observe(duration_ms)
+
+    assert histogram.quantile(0.4) == 5.0
+    assert histogram.quantile(0.8) == 50.0
+    assert histogram.quantile(1.0) == 20000
+    assert histogram.snapshot()["buckets"]["le_inf"] == 1
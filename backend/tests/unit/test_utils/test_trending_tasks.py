@@ -0,0 +1,44 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.tasks.trending_tasks import refresh_trending_scores_once
+
+
+def _admin_client(batches: list[int]) -> MagicMock:
+    client = MagicMock()
+    client.rpc.return_value.execute = AsyncMock(side_effect=[MagicMock(data=batch) for batch in batches])
+    return client
+
+
+@pytest.mark.asyncio
+async def test_refresh_trending_scores_drains_full_batches():
+    client = _admin_client([500, 500, 120])
+
+    with (
+        patch("app.tasks.trending_tasks.get_async_supabase_admin_client", new=AsyncMock(return_value=client)),
+        patch("app.tasks.trending_tasks.config.TRENDING_REFRESH_BATCH_SIZE", 500),
+        patch("app.utils.cache.invalidate_gallery_cache", new_callable=AsyncMock) as invalidate,
+    ):
+        updated = await refresh_trending_scores_once()
+
+    assert updated == 1120
+    assert client.rpc.call_count == 3
+    name, params = client.rpc.call_args.args
+    assert name == "refresh_photo_hot_scores"
+    assert params["batch_size"] == 500
+    invalidate.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_refresh_trending_scores_skips_cache_invalidation_when_nothing_changed():
+    client = _admin_client([0])
+
+    with (
+        patch("app.tasks.trending_tasks.get_async_supabase_admin_client", new=AsyncMock(return_value=client)),
+        patch("app.utils.cache.invalidate_gallery_cache", new_callable=AsyncMock) as invalidate,
+    ):
+        updated = await refresh_trending_scores_once()
+
+    assert updated == 0
+    invalidate.assert_not_awaited()
@@ -136,6 +136,164 @@ class TestImageUtils:
         opt_img = Image.open(io.BytesIO(optimized_bytes))
         assert max(opt_img.size) <= 1920
 
+    def test_decode_image_rejects_truncated_data(self) -> None:
+        """decode_image fully loads pixels, so truncated files fail instead of only header parsing."""
+        from PIL import Image
+
+        from app.utils.image_utils import decode_image, optimize_image
+
+        img = Image.new("RGB", (400, 300), color="red")
+        img.putpixel((5, 5), (0, 0, 255))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG")
+        image_bytes = buffer.getvalue()
+
+        decoded = decode_image(image_bytes)
+        assert decoded.size == (400, 300)
+
+        with patch("app.utils.image_utils._open_image_safely") as mock_open:
+            optimized_bytes, content_type = optimize_image(image_bytes, "image/jpeg", image=decoded)
+        mock_open.assert_not_called()
+        assert content_type == "image/webp"
+        assert Image.open(io.BytesIO(optimized_bytes)).size == (400, 300)
+
+        with pytest.raises(OSError):
+            decode_image(image_bytes[: len(image_bytes) // 2])
+
+    def test_decode_image_uses_jpeg_draft_scaling(self) -> None:
+        """Large JPEGs decode at a DCT-reduced scale that never undershoots the target."""
+        from PIL import Image
+
+        from app.utils.image_utils import decode_image
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (4000, 3000), color="red").save(buffer, format="JPEG")
+
+        assert decode_image(buffer.getvalue()).size == (4000, 3000)
+        assert decode_image(buffer.getvalue(), max_dimension=1920).size == (2000, 1500)
+        assert decode_image(buffer.getvalue(), max_dimension=500).size == (500, 375)
+
+    def test_optimize_image_strips_metadata_without_copy(self) -> None:
+        """EXIF and comments are dropped and orientation is applied before stripping."""
+        from PIL import Image
+
+        from app.utils.image_utils import optimize_image
+
+        img = Image.new("RGB", (600, 400), color="red")
+        img.putpixel((1, 1), (0, 255, 0))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotate 90 CW
+        exif[0x010F] = "PhoneMaker"
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", exif=exif, comment=b"secret gps note")
+
+        optimized_bytes, content_type = optimize_image(buffer.getvalue(), "image/jpeg", target_format="JPEG")
+
+        assert content_type == "image/jpeg"
+        result = Image.open(io.BytesIO(optimized_bytes))
+        assert result.size == (400, 600)
+        assert not result.getexif()
+        assert "comment" not in result.info
+        assert b"secret" not in optimized_bytes
+
+    def test_blank_check_samples_large_images(self) -> None:
+        """Solid single-band images are rejected from a downsampled sample."""
+        from PIL import Image
+
+        from app.utils.image_utils import _is_blank_image
+
+        solid = Image.new("L", (3000, 2000), color=128)
+        with patch.object(solid, "getextrema", wraps=solid.getextrema) as full_extrema:
+            assert _is_blank_image(solid) is True
+        full_extrema.assert_not_called()
+
+        textured = Image.effect_noise((3000, 2000), 40)
+        assert _is_blank_image(textured) is False
+
+    def test_build_renditions_from_one_decode(self) -> None:
+        """Every width/format pair is produced, narrower sources are never upscaled."""
+        from PIL import Image
+
+        from app.utils import image_utils
+
+        buffer = io.BytesIO()
+        Image.effect_noise((800, 600), 30).convert("RGB").save(buffer, format="WEBP")
+
+        with patch.object(image_utils, "decode_image", wraps=image_utils.decode_image) as decode:
+            renditions = image_utils.build_renditions(buffer.getvalue())
+        decode.assert_called_once()
+
+        by_name = {name: (body, content_type) for name, body, content_type in renditions}
+        assert set(by_name) == {f"w{w}.{ext}" for w in (100, 300, 500, 1200) for ext in ("webp", "jpg")}
+        assert by_name["w300.jpg"][1] == "image/jpeg"
+        assert Image.open(io.BytesIO(by_name["w300.webp"][0])).size == (300, 225)
+        assert Image.open(io.BytesIO(by_name["w1200.webp"][0])).size == (800, 600)
+
+    def test_build_renditions_flattens_transparency_onto_white(self) -> None:
+        """Transparent uploads get the same white background ``optimize_image`` gives them, not black."""
+        from PIL import Image
+
+        from app.utils.image_utils import build_renditions
+
+        buffer = io.BytesIO()
+        image = Image.new("RGBA", (400, 300), (0, 0, 0, 0))
+        image.paste((200, 30, 30, 255), (100, 100, 300, 200))
+        image.save(buffer, format="PNG")
+
+        for name, body, _ in build_renditions(buffer.getvalue()):
+            rendition = Image.open(io.BytesIO(body)).convert("RGB")
+            assert min(rendition.getpixel((0, 0))) > 240, name
+
+    def test_perceptual_hash_tolerates_resize_and_recompression(self) -> None:
+        """Re-encoded copies stay within a few bits; unrelated images do not."""
+        from PIL import Image
+
+        from app.utils.bk_tree import hamming_distance
+        from app.utils.image_utils import perceptual_hash
+
+        def encode(image: "Image.Image", **kwargs: object) -> bytes:
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", **kwargs)
+            return buffer.getvalue()
+
+        source = Image.linear_gradient("L").resize((640, 480)).convert("RGB")
+        original = perceptual_hash(encode(source, quality=95))
+        copy = perceptual_hash(encode(source.resize((320, 240)), quality=60))
+        other = perceptual_hash(encode(Image.effect_noise((640, 480), 60).convert("RGB")))
+
+        assert hamming_distance(original, copy) <= 8
+        assert hamming_distance(original, other) > 8
+        assert -(2**63) <= original < 2**63
+
+    def test_prepare_vision_image_downscales_and_passes_small_jpegs_through(self) -> None:
+        from PIL import Image
+
+        from app.utils.image_utils import prepare_vision_image
+
+        large, small, transparent = io.BytesIO(), io.BytesIO(), io.BytesIO()
+        Image.new("RGB", (2400, 1200), (120, 80, 40)).save(large, format="JPEG")
+        Image.new("RGB", (800, 600), (120, 80, 40)).save(small, format="JPEG")
+        Image.new("RGBA", (2048, 512), (0, 0, 0, 0)).save(transparent, format="PNG")
+
+        downscaled = Image.open(io.BytesIO(prepare_vision_image(large.getvalue())))
+        assert (downscaled.format, downscaled.size) == ("JPEG", (1024, 512))
+        assert prepare_vision_image(small.getvalue()) == small.getvalue()
+        converted = Image.open(io.BytesIO(prepare_vision_image(transparent.getvalue())))
+        assert (converted.format, converted.mode, converted.size) == ("JPEG", "RGB", (1024, 256))
+        assert min(converted.getpixel((512, 128))) > 240
+
+    def test_bk_tree_returns_matches_within_radius(self) -> None:
+        from app.utils.bk_tree import BKTree
+
+        tree: BKTree[str] = BKTree()
+        for key, value in ((0b0000, "a"), (0b0001, "b"), (0b0111, "c"), (0b1111_1111, "d")):
+            tree.add(key, value)
+
+        assert len(tree) == 4
+        assert tree.search(0b0000, 1) == [(0, "a"), (1, "b")]
+        assert sorted(tree.search(0b0011, 2)) == [(1, "b"), (1, "c"), (2, "a")]
+        assert tree.search(-1, 0) == []
+
     def test_optimize_image_rgba(self) -> None:
         """Test optimization of RGBA images (transparency to white bg)"""
         from PIL import Image
@@ -261,6 +419,80 @@ class TestImageUtils:
         assert first != (13.7563, 100.5018)
 
 
+class TestImageEngine:
+    """Test the bounded image engine"""
+
+    @pytest.mark.asyncio
+    async def test_thread_mode_rejects_when_saturated(self) -> None:
+        import asyncio
+        import threading
+
+        from app.utils.image_utils import ImageEngine, ImageEngineSaturated
+
+        engine = ImageEngine(workers=0, max_pending=1)
+        release = threading.Event()
+
+        def _blocking() -> str:
+            release.wait(5)
+            return "done"
+
+        first = asyncio.create_task(engine.run(_blocking))
+        second = asyncio.create_task(engine.run(_blocking))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ImageEngineSaturated):
+            await engine.run(_blocking)
+
+        release.set()
+        assert await first == "done"
+        assert await second == "done"
+
+        stats = engine.stats()
+        assert stats["mode"] == "thread"
+        assert stats["capacity"] == 2
+        assert stats["completed"] == 2
+        assert stats["rejected"] == 1
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failures_release_the_slot(self) -> None:
+        from app.utils.image_utils import ImageEngine
+
+        engine = ImageEngine(workers=0, max_pending=0)
+
+        def _boom() -> None:
+            raise ValueError("bad image")
+
+        with pytest.raises(ValueError):
+            await engine.run(_boom)
+
+        stats = engine.stats()
+        assert stats["failed"] == 1
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_process_mode_runs_jobs_in_warm_workers(self) -> None:
+        import os
+
+        from PIL import Image
+
+        from app.utils.image_utils import ImageEngine, get_image_dimensions
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 48), color="red").save(buffer, format="PNG")
+
+        engine = ImageEngine(workers=1, max_pending=0)
+        try:
+            engine.start()
+            assert await engine.run(get_image_dimensions, buffer.getvalue()) == (64, 48)
+            assert await engine.run(os.getpid) != os.getpid()
+        finally:
+            engine.shutdown()
+
+        assert engine.stats()["mode"] == "process"
+        assert engine.stats()["completed"] == 2
+
+
 class TestFileUtils:
     """Test suite for file utilities"""
 
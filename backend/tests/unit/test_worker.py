@@ -1,10 +1,22 @@
+import asyncio
 import json
+from contextlib import ExitStack
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from app.config import config
 from app.services.queue_service import QueueMessage, queue_service
-from app.worker import QueueWorker
+from app.worker import QueueWorker, _ReadCompletions
+
+
+async def _run_read(worker: QueueWorker, batches: list[list[QueueMessage]], stream: str, group: str) -> None:
+    """Start the units of one read the way ``_run_stream`` does and wait for all of them."""
+    await worker._acquire_slots(stream, len(batches))
+    read = _ReadCompletions(group, len(batches))
+    for batch in batches:
+        worker._start_unit(batch, stream, read)
+    await asyncio.gather(*worker._tasks)
 
 
 @pytest.mark.asyncio
@@ -60,8 +72,13 @@ async def test_worker_processes_vision_job_and_removes_payload() -> None:
         patch.object(queue_service, "delete_vision_payload", new=AsyncMock()) as delete_payload,
         patch("app.worker.cat_detection_service") as detection_service,
     ):
-        detection_service.analyze_cat_spot_suitability = AsyncMock(
-            return_value={"suitability_score": 90, "suitable_for_cat_spot": True}
+        detection_service.analyze_batch = AsyncMock(
+            return_value=[
+                (
+                    {"has_cats": True, "cat_count": 1, "confidence": 90},
+                    {"suitability_score": 90, "suitable_for_cat_spot": True},
+                )
+            ]
         )
         await worker._process_vision(message)
 
@@ -75,7 +92,55 @@ async def test_worker_processes_vision_job_and_removes_payload() -> None:
 
 
 @pytest.mark.asyncio
-async def test_worker_keeps_failed_job_pending_for_retry() -> None:
+async def test_worker_annotates_vision_batch_once_and_fans_out_results() -> None:
+    worker = QueueWorker()
+    messages = [
+        QueueMessage(
+            stream=queue_service.VISION_STREAM,
+            message_id=f"{index}-0",
+            fields={"job_id": f"job-{index}", "user_id": "user-worker", "operation": operation},
+        )
+        for index, operation in enumerate(["combined", "spot-analysis", "unknown"])
+    ]
+    job = {"status": "queued", "attempts": 0, "filename": "spot.jpg", "analyzed_by": "user@example.com"}
+    update_job = AsyncMock()
+    complete = AsyncMock()
+    failure = AsyncMock()
+
+    with (
+        patch.object(queue_service, "get_vision_job", new=AsyncMock(return_value=job)),
+        patch.object(queue_service, "update_vision_job", new=update_job),
+        patch.object(queue_service, "get_vision_payload", new=AsyncMock(side_effect=[b"one", b"two"])),
+        patch.object(queue_service, "delete_vision_payload", new=AsyncMock()),
+        patch.object(worker, "_complete_messages", new=complete),
+        patch.object(worker, "_handle_processing_failure", new=failure),
+        patch("app.worker.cat_detection_service") as detection_service,
+    ):
+        detection_service.analyze_batch = AsyncMock(
+            return_value=[
+                ({"has_cats": True, "cat_count": 1, "confidence": 90}, {"suitability_score": 70}),
+                ({"has_cats": True, "cat_count": 2, "confidence": 80}, {"suitability_score": 60}),
+            ]
+        )
+        await _run_read(worker, [messages], queue_service.VISION_STREAM, queue_service.VISION_GROUP)
+
+    detection_service.analyze_batch.assert_awaited_once_with([b"one", b"two"])
+    results = {
+        call.args[0]: call.kwargs["result"]
+        for call in update_job.await_args_list
+        if call.kwargs["status"] == "completed"
+    }
+    assert results["job-0"]["cat_detection"]["cat_count"] == 1
+    assert results["job-0"]["overall_recommendation"]["confidence"] == 80
+    assert results["job-1"]["suitability_score"] == 60
+    # Both finished jobs are acknowledged together
+    complete.assert_awaited_once_with(messages[:2], queue_service.VISION_GROUP)
+    failure.assert_awaited_once()
+    assert failure.await_args.args[0] is messages[2]
+
+
+@pytest.mark.asyncio
+async def test_worker_schedules_failed_job_for_delayed_retry() -> None:
     worker = QueueWorker()
     message = QueueMessage(
         stream=queue_service.VISION_STREAM,
@@ -83,15 +148,342 @@ async def test_worker_keeps_failed_job_pending_for_retry() -> None:
         fields={"job_id": "job-retry", "user_id": "user-worker", "operation": "spot-analysis"},
     )
     update_job = AsyncMock()
-    acknowledge = AsyncMock()
+    complete = AsyncMock()
+    schedule = AsyncMock()
 
     with (
         patch.object(worker, "_process_vision", new=AsyncMock(side_effect=RuntimeError("Vision unavailable"))),
-        patch.object(queue_service, "increment_attempt", new=AsyncMock(return_value=1)),
+        patch.object(queue_service, "increment_attempt", new=AsyncMock(return_value=2)),
+        patch.object(queue_service, "update_vision_job", new=update_job),
+        patch.object(queue_service, "complete_messages", new=complete),
+        patch.object(queue_service, "schedule_retry", new=schedule),
+    ):
+        await _run_read(worker, [[message]], queue_service.VISION_STREAM, queue_service.VISION_GROUP)
+
+    update_job.assert_awaited_once_with("job-retry", status="queued", attempts=2)
+    complete.assert_awaited_once_with([], queue_service.VISION_GROUP)
+    scheduled_message, group, attempts, delay = schedule.await_args.args
+    assert (scheduled_message, group, attempts) == (message, queue_service.VISION_GROUP, 2)
+    # Default policy: 5s doubled once, with equal jitter
+    assert 5 <= delay <= 10
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_vision_job_when_vision_is_rate_limited() -> None:
+    worker = QueueWorker()
+    message = QueueMessage(
+        stream=queue_service.VISION_STREAM,
+        message_id="3-1",
+        fields={"job_id": "job-limited", "user_id": "user-worker", "operation": "combined"},
+    )
+    job = {"status": "queued", "attempts": 0, "filename": "spot.jpg", "analyzed_by": "user@example.com"}
+    update_job = AsyncMock()
+    schedule = AsyncMock()
+    fallback = {"has_cats": False, "fallback_active": True, "service_available": False, "rate_limited": True}
+
+    with (
+        patch.object(queue_service, "get_vision_job", new=AsyncMock(return_value=job)),
         patch.object(queue_service, "update_vision_job", new=update_job),
-        patch.object(queue_service, "acknowledge", new=acknowledge),
+        patch.object(queue_service, "get_vision_payload", new=AsyncMock(return_value=b"image-bytes")),
+        patch.object(queue_service, "delete_vision_payload", new=AsyncMock()) as delete_payload,
+        patch.object(queue_service, "increment_attempt", new=AsyncMock(return_value=1)),
+        patch.object(queue_service, "complete_messages", new=AsyncMock()),
+        patch.object(queue_service, "schedule_retry", new=schedule),
+        patch("app.worker.cat_detection_service") as detection_service,
+    ):
+        detection_service.analyze_batch = AsyncMock(return_value=[(fallback, {"suitability_score": 50})])
+        await _run_read(worker, [[message]], queue_service.VISION_STREAM, queue_service.VISION_GROUP)
+
+    assert all(call.kwargs["status"] != "completed" for call in update_job.await_args_list)
+    delete_payload.assert_not_awaited()
+    # Rate-limit policy: 7.5-15s on the first attempt rather than the default 2.5-5s
+    assert 7.5 <= schedule.await_args.args[3] <= 15
+
+
+def test_retry_delay_backs_off_per_error_class_with_jitter() -> None:
+    import stripe
+
+    from app.services.google_vision import VisionRateLimited
+    from app.services.queue_service import QueueUnavailable
+    from app.worker import retry_delay
+
+    rate_limited = [retry_delay(stripe.error.RateLimitError("slow down"), 3) for _ in range(50)]
+    assert all(30 <= delay <= 60 for delay in rate_limited)
+    assert len(set(rate_limited)) > 1
+    assert 30 <= retry_delay(VisionRateLimited("quota"), 3) <= 60
+    assert 0.5 <= retry_delay(QueueUnavailable("blip"), 1) <= 1
+    assert 60 <= retry_delay(TimeoutError(), 10) <= 120
+    assert 150 <= retry_delay(RuntimeError("boom"), 20) <= 300
+
+
+@pytest.mark.asyncio
+async def test_worker_records_rejected_upload_as_final_failure() -> None:
+    from app.services.direct_upload_service import DirectUploadRejected
+
+    worker = QueueWorker()
+    message = QueueMessage(
+        stream=queue_service.UPLOAD_STREAM,
+        message_id="4-0",
+        fields={"job_id": "upload-1", "user_id": "user-worker"},
+    )
+    job = {"job_id": "upload-1", "user_id": "user-worker", "status": "queued", "attempts": 0}
+    update_job = AsyncMock()
+
+    with (
+        patch.object(queue_service, "get_upload_job", new=AsyncMock(return_value=job)),
+        patch.object(queue_service, "update_upload_job", new=update_job),
+        patch("app.worker.process_direct_upload", new=AsyncMock(side_effect=DirectUploadRejected("No cats"))),
+    ):
+        await worker._process_upload(message)
+
+    assert update_job.await_args_list[-1].kwargs == {"status": "failed", "error": "No cats", "attempts": 1}
+
+
+@pytest.mark.asyncio
+async def test_worker_dead_letters_upload_and_removes_quarantine_object() -> None:
+    worker = QueueWorker()
+    message = QueueMessage(
+        stream=queue_service.UPLOAD_STREAM,
+        message_id="5-0",
+        fields={"job_id": "upload-2", "user_id": "user-worker"},
+    )
+    update_job = AsyncMock()
+
+    with (
+        patch.object(worker, "_process_upload", new=AsyncMock(side_effect=RuntimeError("S3 unavailable"))),
+        patch.object(queue_service, "increment_attempt", new=AsyncMock(return_value=5)),
+        patch.object(queue_service, "update_upload_job", new=update_job),
+        patch.object(queue_service, "dead_letter", new=AsyncMock()),
+        patch("app.worker.storage_service") as storage,
+    ):
+        storage.quarantine_key.return_value = "quarantine/user-worker/upload-2"
+        storage.delete_files = AsyncMock()
+        await worker._process_with_retry(message, queue_service.UPLOAD_GROUP)
+
+    assert update_job.await_args.kwargs["status"] == "failed"
+    storage.delete_files.assert_awaited_once_with(["quarantine/user-worker/upload-2"])
+
+
+class InMemoryStream:
+    """Just enough of queue_service for driving QueueWorker.run_forever."""
+
+    def __init__(self, messages: list[QueueMessage]) -> None:
+        self.pending = list(messages)
+        self.acked: list[str] = []
+        self.completions = 0
+
+    async def read_group(self, *, stream: str, count: int, **_: object) -> list[QueueMessage]:
+        batch = [message for message in self.pending if message.stream == stream][:count]
+        self.pending = [message for message in self.pending if message not in batch]
+        if not batch:
+            await asyncio.sleep(0.01)
+        return batch
+
+    async def read_lanes(self, *, streams: tuple[str, ...], count: int, **_: object) -> list[QueueMessage]:
+        return [message for stream in streams for message in await self.read_group(stream=stream, count=count)]
+
+    async def complete_messages(self, messages: list[QueueMessage], group: str) -> None:
+        self.completions += 1
+        self.acked.extend(message.message_id for message in messages)
+
+
+def _stripe_messages(count: int) -> list[QueueMessage]:
+    return [
+        QueueMessage(stream=queue_service.STRIPE_STREAM, message_id=f"{index}-0", fields={"event": "{}"})
+        for index in range(count)
+    ]
+
+
+def _patched_queue(stream: InMemoryStream, stale: list[QueueMessage] | None = None) -> ExitStack:
+    stack = ExitStack()
+    stack.enter_context(patch.object(queue_service, "client", object()))
+    stack.enter_context(patch.object(queue_service, "ensure_groups", new=AsyncMock()))
+    stack.enter_context(
+        patch.object(queue_service, "claim_stale", new=AsyncMock(side_effect=[stale or [], *[[]] * 1000]))
+    )
+    stack.enter_context(patch.object(queue_service, "read_group", new=stream.read_group))
+    stack.enter_context(patch.object(queue_service, "read_lanes", new=stream.read_lanes))
+    stack.enter_context(patch.object(queue_service, "complete_messages", new=stream.complete_messages))
+    stack.enter_context(patch("app.worker.refresh_trending_scores_once", new=AsyncMock()))
+    return stack
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_stream_jobs_concurrently_up_to_limit_and_drains_on_stop() -> None:
+    worker = QueueWorker(concurrency=2)
+    stream = InMemoryStream(_stripe_messages(5))
+    running = 0
+    peak = 0
+
+    async def _slow_stripe(message: QueueMessage) -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        if message.message_id == "4-0":
+            worker.request_stop()
+
+    with _patched_queue(stream), patch.object(worker, "_process_stripe", new=_slow_stripe):
+        await asyncio.wait_for(worker.run_forever(), 2)
+
+    assert peak == 2
+    assert sorted(stream.acked) == [f"{index}-0" for index in range(5)]
+    stripe = worker.metrics.snapshot(worker.consumer, {})["streams"][queue_service.STRIPE_STREAM]
+    assert stripe["outcomes"]["completed"] == 5
+    assert stripe["latency"]["processing"]["count"] == 5
+    assert worker._tasks == set()
+
+
+@pytest.mark.asyncio
+async def test_worker_acknowledges_the_units_of_one_read_together() -> None:
+    worker = QueueWorker(concurrency=4)
+    stream = InMemoryStream(_stripe_messages(4))
+    release = asyncio.Event()
+    started = 0
+
+    async def _stripe(message: QueueMessage) -> None:
+        nonlocal started
+        started += 1
+        if started == 4:
+            release.set()
+        # All four run concurrently and finish at different times
+        await release.wait()
+        await asyncio.sleep(0.01 * int(message.message_id.split("-")[0]))
+        if message.message_id == "3-0":
+            worker.request_stop()
+
+    with _patched_queue(stream), patch.object(worker, "_process_stripe", new=_stripe):
+        await asyncio.wait_for(worker.run_forever(), 2)
+
+    assert sorted(stream.acked) == [f"{index}-0" for index in range(4)]
+    assert stream.completions == 1
+    assert worker._in_flight[queue_service.STRIPE_STREAM] == set()
+
+
+@pytest.mark.asyncio
+async def test_finished_entries_stay_in_flight_until_the_last_unit_of_the_read_ends() -> None:
+    worker = QueueWorker(concurrency=2)
+    first, second = _stripe_messages(2)
+    stream = InMemoryStream([])
+    release = asyncio.Event()
+    finished: list[str] = []
+
+    async def _stripe(message: QueueMessage) -> None:
+        if message is second:
+            await release.wait()
+        finished.append(message.message_id)
+
+    with _patched_queue(stream), patch.object(worker, "_process_stripe", new=_stripe):
+        read = _ReadCompletions(queue_service.STRIPE_GROUP, 2)
+        await worker._acquire_slots(queue_service.STRIPE_STREAM, 2)
+        worker._start_unit([first], queue_service.STRIPE_STREAM, read)
+        worker._start_unit([second], queue_service.STRIPE_STREAM, read)
+        while finished != ["0-0"]:
+            await asyncio.sleep(0)
+
+        # The first entry is done but unacknowledged, so its visibility keeps being extended
+        assert worker._in_flight[queue_service.STRIPE_STREAM] == {"0-0", "1-0"}
+        assert stream.completions == 0
+
+        release.set()
+        await asyncio.gather(*worker._tasks)
+
+    assert stream.completions == 1
+    assert stream.acked == ["0-0", "1-0"]
+    assert worker._in_flight[queue_service.STRIPE_STREAM] == set()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_unit_still_acknowledges_finished_siblings() -> None:
+    worker = QueueWorker(concurrency=2)
+    first, second = _stripe_messages(2)
+    stream = InMemoryStream([])
+    finished: list[str] = []
+
+    async def _stripe(message: QueueMessage) -> None:
+        if message is second:
+            await asyncio.Event().wait()
+        finished.append(message.message_id)
+
+    with _patched_queue(stream), patch.object(worker, "_process_stripe", new=_stripe):
+        read = _ReadCompletions(queue_service.STRIPE_GROUP, 2)
+        await worker._acquire_slots(queue_service.STRIPE_STREAM, 2)
+        worker._start_unit([first], queue_service.STRIPE_STREAM, read)
+        worker._start_unit([second], queue_service.STRIPE_STREAM, read)
+        while finished != ["0-0"]:
+            await asyncio.sleep(0)
+
+        # Drain times out on the stuck unit and cancels it
+        await worker._drain(0.01)
+
+    # The cancelled entry stays pending for stale-claim recovery; the finished one is acknowledged
+    assert stream.acked == ["0-0"]
+    assert worker._in_flight[queue_service.STRIPE_STREAM] == set()
+    assert worker._tasks == set()
+    assert not worker._stream_slots(queue_service.STRIPE_STREAM).locked()
+
+
+@pytest.mark.asyncio
+async def test_worker_skips_reclaimed_entries_it_is_still_processing() -> None:
+    worker = QueueWorker(concurrency=1)
+    message = _stripe_messages(1)[0]
+    worker._in_flight[queue_service.STRIPE_STREAM] = {message.message_id}
+
+    with (
+        patch.object(queue_service, "claim_stale", new=AsyncMock(return_value=[message])),
+        patch.object(queue_service, "read_group", new=AsyncMock(return_value=[])) as read_group,
+    ):
+        messages = await worker._next_messages(queue_service.STRIPE_STREAM, queue_service.STRIPE_GROUP, 1)
+
+    assert messages == []
+    read_group.assert_awaited_once()
+
+
+def _vision_messages(stream: str, count: int) -> list[QueueMessage]:
+    return [
+        QueueMessage(stream=stream, message_id=f"{index}-0", fields={"job_id": f"{stream}-{index}"})
+        for index in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_worker_serves_priority_lane_first_without_starving_the_base_lane() -> None:
+    worker = QueueWorker(concurrency=1)
+    stream = InMemoryStream(
+        _vision_messages(queue_service.VISION_PRIORITY_STREAM, 10) + _vision_messages(queue_service.VISION_STREAM, 10)
+    )
+
+    with (
+        patch.object(config, "QUEUE_PRIORITY_WEIGHT", 3),
+        patch.object(queue_service, "claim_stale", new=AsyncMock(return_value=[])),
+        patch.object(queue_service, "read_group", new=stream.read_group),
+    ):
+        lanes = [
+            (await worker._next_messages(queue_service.VISION_STREAM, queue_service.VISION_GROUP, 1))[0].stream
+            for _ in range(8)
+        ]
+
+    priority, base = queue_service.VISION_PRIORITY_STREAM, queue_service.VISION_STREAM
+    assert lanes == [priority, priority, priority, base, priority, priority, priority, base]
+    assert [reader for reader, _ in worker.streams] == [
+        queue_service.STRIPE_STREAM,
+        queue_service.VISION_STREAM,
+        queue_service.UPLOAD_STREAM,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_worker_tracks_in_flight_entries_per_lane() -> None:
+    worker = QueueWorker(concurrency=1)
+    message = _vision_messages(queue_service.VISION_PRIORITY_STREAM, 1)[0]
+    # Same id on the base lane is a different entry and must not be skipped
+    worker._in_flight[queue_service.VISION_STREAM] = {message.message_id}
+
+    with (
+        patch.object(queue_service, "claim_stale", new=AsyncMock(side_effect=[[message], []])),
+        patch.object(queue_service, "read_group", new=AsyncMock(return_value=[])),
     ):
-        await worker._process_with_retry(message, queue_service.VISION_GROUP)
+        messages = await worker._next_messages(queue_service.VISION_STREAM, queue_service.VISION_GROUP, 1)
 
-    update_job.assert_awaited_once_with("job-retry", status="queued", attempts=1)
-    acknowledge.assert_not_awaited()
+    assert messages == [message]
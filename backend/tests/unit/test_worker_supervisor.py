@@ -0,0 +1,191 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.queue_service import QueueUnavailable, queue_service
+from app.worker_supervisor import (
+    DRAIN_GRACE_SECONDS,
+    SCALE_DOWN_COOLDOWN_SECONDS,
+    WorkerSupervisor,
+    desired_processes,
+)
+
+
+class FakeProcess:
+    def __init__(self, consumer: str) -> None:
+        self.consumer = consumer
+        self.alive = True
+        self.exitcode: int | None = None
+        self.terminated = False
+        self.killed = False
+        # Whether SIGTERM makes it exit (drain finished)
+        self.drains = True
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def terminate(self) -> None:
+        self.terminated = True
+        if self.drains:
+            self.exit(0)
+
+    def kill(self) -> None:
+        self.killed = True
+        self.exit(-9)
+
+    def join(self, timeout: float | None = None) -> None:
+        pass
+
+    def exit(self, code: int) -> None:
+        self.alive = False
+        self.exitcode = code
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    clock = Clock()
+    with patch("app.worker_supervisor.time.monotonic", clock):
+        yield clock
+
+
+def _supervisor(minimum: int, maximum: int) -> tuple[WorkerSupervisor, list[FakeProcess]]:
+    started: list[FakeProcess] = []
+
+    def _spawn(consumer: str) -> FakeProcess:
+        started.append(FakeProcess(consumer))
+        return started[-1]
+
+    supervisor = WorkerSupervisor(min_processes=minimum, max_processes=maximum, spawn=_spawn)
+    supervisor.base_name = "host"
+    return supervisor, started
+
+
+def _backlog(pending: int) -> dict:
+    return {
+        stream: {"undelivered": pending if index == 0 else 0, "pending": 0}
+        for index, (stream, _) in enumerate(queue_service.streams)
+    }
+
+
+def test_desired_processes_follow_backlog_within_range() -> None:
+    assert desired_processes(0, 1, 4, 50) == 1
+    assert desired_processes(51, 1, 4, 50) == 2
+    assert desired_processes(10_000, 1, 4, 50) == 4
+
+
+def test_crashed_worker_is_restarted_under_the_same_name_with_backoff(clock: Clock) -> None:
+    supervisor, started = _supervisor(2, 2)
+    supervisor.reconcile()
+    assert [process.consumer for process in started] == ["host-0", "host-1"]
+
+    started[1].exit(1)
+    supervisor.reconcile()
+    assert len(started) == 2
+    clock.now += 1
+    supervisor.reconcile()
+    assert [process.consumer for process in started] == ["host-0", "host-1", "host-1"]
+
+    # Crashing again right away doubles the delay
+    started[2].exit(1)
+    supervisor.reconcile()
+    clock.now += 1
+    supervisor.reconcile()
+    assert len(started) == 3
+    clock.now += 1
+    supervisor.reconcile()
+    assert len(started) == 4
+    assert supervisor.running == 2
+
+
+def test_clean_exit_restarts_without_counting_a_crash(clock: Clock) -> None:
+    supervisor, started = _supervisor(1, 1)
+    supervisor.reconcile()
+
+    started[0].exit(1)
+    supervisor.reconcile()
+    clock.now += 1
+    supervisor.reconcile()
+    assert len(started) == 2
+
+    # A clean exit right after a crash restarts straight away and resets the backoff
+    started[1].exit(0)
+    supervisor.reconcile()
+    assert len(started) == 3
+    started[2].exit(1)
+    supervisor.reconcile()
+    clock.now += 1
+    supervisor.reconcile()
+    assert len(started) == 4
+
+
+def test_retired_worker_that_never_drains_is_killed_after_the_drain_bound(clock: Clock) -> None:
+    supervisor, started = _supervisor(1, 2)
+    supervisor.target = 2
+    supervisor.reconcile()
+    started[1].drains = False
+
+    supervisor.target = 1
+    with patch("app.worker_supervisor.config.QUEUE_DRAIN_TIMEOUT_SECONDS", 30):
+        supervisor.reconcile()
+        assert started[1].terminated
+        clock.now += 30 + DRAIN_GRACE_SECONDS - 1
+        supervisor.reconcile()
+        assert not started[1].killed
+
+        clock.now += 1
+        supervisor.reconcile()
+
+    assert started[1].killed
+    assert supervisor._retiring == []
+    assert not started[0].terminated
+
+
+@pytest.mark.asyncio
+async def test_supervisor_scales_up_with_backlog_and_down_after_cooldown(clock: Clock) -> None:
+    supervisor, started = _supervisor(1, 4)
+    stats = AsyncMock(return_value=_backlog(120))
+
+    with (
+        patch("app.worker_supervisor.config.QUEUE_SCALE_BACKLOG_PER_PROCESS", 50),
+        patch.object(queue_service, "stream_stats", new=stats),
+    ):
+        await supervisor.rescale()
+        supervisor.reconcile()
+        assert supervisor.running == 3
+
+        stats.return_value = _backlog(0)
+        await supervisor.rescale()
+        assert supervisor.target == 3
+        clock.now += SCALE_DOWN_COOLDOWN_SECONDS
+        await supervisor.rescale()
+        supervisor.reconcile()
+
+        stats.side_effect = QueueUnavailable("down")
+        await supervisor.rescale()
+
+    assert supervisor.target == 2
+    assert supervisor.running == 2
+    assert started[2].terminated
+    assert not started[0].terminated
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_workers_and_kills_stragglers() -> None:
+    supervisor, started = _supervisor(2, 2)
+    supervisor.reconcile()
+    started[1].drains = False
+
+    await supervisor.shutdown(timeout=0.3)
+
+    assert all(process.terminated for process in started)
+    assert not started[0].killed
+    assert started[1].killed
+    assert supervisor.running == 0
@@ -18,6 +18,10 @@ interface QueuedVisionJob {
   created_at: string;
 }
 
+// Server-side long-poll per request (backend max 25s, below the 30s client timeout)
+const VISION_JOB_WAIT_SECONDS = 20;
+const VISION_JOB_TIMEOUT_MS = 60_000;
+
 interface VisionJobStatus {
   status: 'queued' | 'processing' | 'completed' | 'failed';
   job_id: string;
@@ -58,13 +62,16 @@ class CatDetectionService {
   private async resolveVisionJob(response: SpotAnalysisResult | CombinedAnalysisResult | QueuedVisionJob): Promise<Record<string, unknown>> {
     if (!isQueuedVisionJob(response)) return response;
 
-    for (let attempt = 0; attempt < 120; attempt++) {
-      const status = await apiV1.get<VisionJobStatus>(`/detect/jobs/${response.job_id}`);
+    // Long-poll: the server answers as soon as the worker finishes the job.
+    const deadline = Date.now() + VISION_JOB_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      const status = await apiV1.get<VisionJobStatus>(
+        `/detect/jobs/${response.job_id}?wait=${VISION_JOB_WAIT_SECONDS}`
+      );
       if (status.status === 'completed' && status.result) return status.result;
       if (status.status === 'failed') {
         throw new Error(status.error || 'Vision analysis failed');
       }
-      await new Promise<void>((resolve) => setTimeout(resolve, 500));
     }
     throw new Error('Vision analysis timed out while waiting for the worker');
   }
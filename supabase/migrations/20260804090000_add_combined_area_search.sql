@@ -0,0 +1,119 @@
+-- Combine full-text, tag and spatial predicates in one statement.
+-- Clients previously called /gallery/search and /gallery/nearby separately and
+-- intersected the results. The envelope predicate always uses the GIST index;
+-- the radius check only narrows rows the index already selected.
+
+CREATE FUNCTION public.search_photos_in_area(
+    search_query text,
+    tag_filter text[],
+    min_lat double precision,
+    max_lat double precision,
+    min_lng double precision,
+    max_lng double precision,
+    center_lat double precision DEFAULT NULL,
+    center_lng double precision DEFAULT NULL,
+    radius_meters double precision DEFAULT NULL,
+    result_limit integer DEFAULT 100,
+    result_offset integer DEFAULT 0
+)
+RETURNS TABLE (
+    id uuid,
+    user_id uuid,
+    image_url text,
+    location_name text,
+    description text,
+    latitude double precision,
+    longitude double precision,
+    uploaded_at timestamptz,
+    tags text[],
+    likes_count integer,
+    comments_count integer,
+    status text,
+    total_count bigint
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = pg_catalog, public, extensions
+AS $function$
+    WITH area AS (
+        SELECT
+            ST_MakeEnvelope(
+                least(min_lng, max_lng),
+                least(min_lat, max_lat),
+                greatest(min_lng, max_lng),
+                greatest(min_lat, max_lat),
+                4326
+            )::geography AS bounds,
+            CASE
+                WHEN center_lat IS NOT NULL AND center_lng IS NOT NULL
+                    THEN ST_SetSRID(ST_MakePoint(center_lng, center_lat), 4326)::geography
+            END AS center
+    )
+    SELECT
+        photo.id,
+        photo.user_id,
+        photo.image_url,
+        photo.location_name,
+        photo.description,
+        photo.latitude,
+        photo.longitude,
+        photo.uploaded_at,
+        photo.tags,
+        photo.likes_count,
+        photo.comments_count,
+        photo.status,
+        count(*) OVER () AS total_count
+    FROM public.cat_photos AS photo
+    CROSS JOIN area
+    WHERE photo.deleted_at IS NULL
+      AND photo.status = 'approved'
+      AND photo.location IS NOT NULL
+      AND ST_Intersects(photo.location, area.bounds)
+      AND (
+          radius_meters IS NULL
+          OR area.center IS NULL
+          OR ST_DWithin(photo.location, area.center, greatest(radius_meters, 0))
+      )
+      AND (
+          nullif(btrim(search_query), '') IS NULL
+          OR photo.search_vector @@ websearch_to_tsquery('english', search_query)
+      )
+      AND (
+          tag_filter IS NULL
+          OR cardinality(tag_filter) = 0
+          OR photo.tags @> tag_filter
+      )
+    ORDER BY photo.uploaded_at DESC
+    LIMIT greatest(1, least(result_limit, 100))
+    OFFSET greatest(result_offset, 0);
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.search_photos_in_area(
+    text,
+    text[],
+    double precision,
+    double precision,
+    double precision,
+    double precision,
+    double precision,
+    double precision,
+    double precision,
+    integer,
+    integer
+)
+    FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.search_photos_in_area(
+    text,
+    text[],
+    double precision,
+    double precision,
+    double precision,
+    double precision,
+    double precision,
+    double precision,
+    double precision,
+    integer,
+    integer
+)
+    TO anon, authenticated, service_role;
@@ -0,0 +1,207 @@
+-- Maintain popular-tag statistics incrementally instead of unnesting every
+-- approved photo when the tags cache expires.
+-- tag_counts holds all-time totals; tag_daily_counts holds per-upload-day
+-- buckets for the 7d/30d variants. A trigger on cat_photos applies deltas for
+-- uploads, deletes, moderation changes and tag edits, and
+-- reconcile_tag_counts() rebuilds both tables to correct any drift.
+
+begin;
+
+create table if not exists public.tag_counts (
+    tag text primary key,
+    photo_count integer not null default 0 check (photo_count >= 0),
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists idx_tag_counts_popular
+    on public.tag_counts (photo_count desc, tag)
+    where photo_count > 0;
+
+create table if not exists public.tag_daily_counts (
+    tag text not null,
+    day date not null,
+    photo_count integer not null default 0 check (photo_count >= 0),
+    primary key (tag, day)
+);
+
+create index if not exists idx_tag_daily_counts_day
+    on public.tag_daily_counts (day, tag)
+    include (photo_count);
+
+alter table public.tag_counts enable row level security;
+alter table public.tag_daily_counts enable row level security;
+
+drop policy if exists "Tag counts are public" on public.tag_counts;
+create policy "Tag counts are public" on public.tag_counts
+    for select to anon, authenticated using (true);
+
+drop policy if exists "Tag daily counts are public" on public.tag_daily_counts;
+create policy "Tag daily counts are public" on public.tag_daily_counts
+    for select to anon, authenticated using (true);
+
+create or replace function public.normalize_photo_tags(p_tags text[])
+returns text[]
+language sql
+immutable
+set search_path = pg_catalog, public
+as $$
+    select coalesce(array_agg(distinct normalized), '{}')
+    from (
+        select lower(btrim(tag)) as normalized
+        from unnest(coalesce(p_tags, '{}')) as tag
+    ) as tags
+    where normalized <> '';
+$$;
+
+create or replace function public.apply_tag_count_delta(p_tags text[], p_day date, p_delta integer)
+returns void
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    v_tags text[] := public.normalize_photo_tags(p_tags);
+begin
+    if p_delta = 0 or cardinality(v_tags) = 0 then
+        return;
+    end if;
+
+    insert into public.tag_counts as counts (tag, photo_count, updated_at)
+    select tag, greatest(p_delta, 0), now()
+    from unnest(v_tags) as tag
+    on conflict (tag) do update
+        set photo_count = greatest(counts.photo_count + p_delta, 0),
+            updated_at = now();
+
+    if p_day >= current_date - 31 then
+        insert into public.tag_daily_counts as daily (tag, day, photo_count)
+        select tag, p_day, greatest(p_delta, 0)
+        from unnest(v_tags) as tag
+        on conflict (tag, day) do update
+            set photo_count = greatest(daily.photo_count + p_delta, 0);
+    end if;
+end;
+$$;
+
+create or replace function public.sync_tag_counts()
+returns trigger
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    v_old_visible boolean := false;
+    v_new_visible boolean := false;
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        v_old_visible := old.deleted_at is null and old.status = 'approved';
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        v_new_visible := new.deleted_at is null and new.status = 'approved';
+    end if;
+
+    if tg_op = 'UPDATE'
+        and v_old_visible = v_new_visible
+        and old.tags is not distinct from new.tags
+        and old.uploaded_at is not distinct from new.uploaded_at then
+        return null;
+    end if;
+
+    if v_old_visible then
+        perform public.apply_tag_count_delta(old.tags, coalesce(old.uploaded_at, now())::date, -1);
+    end if;
+    if v_new_visible then
+        perform public.apply_tag_count_delta(new.tags, coalesce(new.uploaded_at, now())::date, 1);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists trg_cat_photos_tag_counts on public.cat_photos;
+create trigger trg_cat_photos_tag_counts
+    after insert or delete or update of tags, status, deleted_at, uploaded_at
+    on public.cat_photos
+    for each row execute function public.sync_tag_counts();
+
+create or replace function public.reconcile_tag_counts()
+returns integer
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    v_tag_total integer;
+begin
+    -- Serialize with concurrent trigger deltas for the duration of the rebuild.
+    lock table public.tag_counts, public.tag_daily_counts in share row exclusive mode;
+
+    create temporary table tmp_tag_counts on commit drop as
+    select tag, count(*)::integer as photo_count
+    from public.cat_photos as photo
+    cross join lateral unnest(public.normalize_photo_tags(photo.tags)) as tag
+    where photo.deleted_at is null
+      and photo.status = 'approved'
+    group by tag;
+
+    delete from public.tag_counts as counts
+    where not exists (select 1 from tmp_tag_counts as fresh where fresh.tag = counts.tag);
+
+    insert into public.tag_counts as counts (tag, photo_count, updated_at)
+    select tag, photo_count, now()
+    from tmp_tag_counts
+    on conflict (tag) do update
+        set photo_count = excluded.photo_count,
+            updated_at = now()
+        where counts.photo_count is distinct from excluded.photo_count;
+
+    delete from public.tag_daily_counts;
+
+    insert into public.tag_daily_counts (tag, day, photo_count)
+    select tag, photo.uploaded_at::date, count(*)::integer
+    from public.cat_photos as photo
+    cross join lateral unnest(public.normalize_photo_tags(photo.tags)) as tag
+    where photo.deleted_at is null
+      and photo.status = 'approved'
+      and photo.uploaded_at >= current_date - 31
+    group by tag, photo.uploaded_at::date;
+
+    select count(*) into v_tag_total from tmp_tag_counts;
+    return v_tag_total;
+end;
+$$;
+
+drop function if exists public.get_popular_tags(integer);
+
+create function public.get_popular_tags(result_limit integer default 20, period_days integer default null)
+returns table(tag text, count bigint)
+language sql
+stable
+security invoker
+set search_path = pg_catalog, public
+as $$
+    select counts.tag, counts.photo_count::bigint as count
+    from public.tag_counts as counts
+    where period_days is null
+      and counts.photo_count > 0
+    union all
+    select daily.tag, sum(daily.photo_count)::bigint as count
+    from public.tag_daily_counts as daily
+    where period_days is not null
+      and daily.day > current_date - least(greatest(period_days, 1), 31)
+    group by daily.tag
+    having sum(daily.photo_count) > 0
+    order by count desc, tag
+    limit greatest(1, least(result_limit, 100));
+$$;
+
+revoke execute on function public.normalize_photo_tags(text[]) from public;
+revoke execute on function public.apply_tag_count_delta(text[], date, integer) from public;
+revoke execute on function public.sync_tag_counts() from public;
+revoke execute on function public.reconcile_tag_counts() from public;
+grant execute on function public.reconcile_tag_counts() to service_role;
+revoke execute on function public.get_popular_tags(integer, integer) from public;
+grant execute on function public.get_popular_tags(integer, integer) to anon, authenticated, service_role;
+
+select public.reconcile_tag_counts();
+
+commit;
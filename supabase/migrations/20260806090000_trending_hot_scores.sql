@@ -0,0 +1,87 @@
+-- Precomputed trending score for /gallery?sort=trending.
+-- Sorting by likes_count scanned every approved photo; hot_score is refreshed
+-- in batches by the queue worker and served from a partial index, so the
+-- trending feed is an index range read.
+--
+-- hot_score = (1 + likes + 2 * comments + 0.5 * treats) / (age_hours + 2) ^ 1.5
+-- Photos older than the scoring window decay to 0 and stop being refreshed.
+
+begin;
+
+alter table public.cat_photos
+    add column if not exists hot_score double precision not null default 0,
+    add column if not exists hot_score_updated_at timestamptz;
+
+create index if not exists idx_cat_photos_public_hot_score
+    on public.cat_photos (hot_score desc, uploaded_at desc)
+    where deleted_at is null and status = 'approved';
+
+-- Candidate selection for the refresh batches.
+create index if not exists idx_cat_photos_hot_score_refresh
+    on public.cat_photos (hot_score_updated_at nulls first)
+    where deleted_at is null and status = 'approved';
+
+create index if not exists idx_treats_transactions_photo_give
+    on public.treats_transactions (photo_id)
+    include (amount)
+    where transaction_type = 'give' and photo_id is not null;
+
+create or replace function public.refresh_photo_hot_scores(
+    batch_size integer default 500,
+    window_days integer default 14,
+    stale_after_seconds integer default 300
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    v_updated integer;
+    v_window_start timestamptz := now() - make_interval(days => greatest(window_days, 1));
+begin
+    with candidates as (
+        select photo.id
+        from public.cat_photos as photo
+        where photo.deleted_at is null
+          and photo.status = 'approved'
+          and (photo.uploaded_at >= v_window_start or photo.hot_score > 0)
+          and (
+              photo.hot_score_updated_at is null
+              or photo.hot_score_updated_at < now() - make_interval(secs => greatest(stale_after_seconds, 0))
+          )
+        order by photo.hot_score_updated_at nulls first
+        limit greatest(1, least(batch_size, 5000))
+        for update skip locked
+    ),
+    treats as (
+        select tx.photo_id, sum(tx.amount) as total
+        from public.treats_transactions as tx
+        join candidates on candidates.id = tx.photo_id
+        where tx.transaction_type = 'give'
+        group by tx.photo_id
+    )
+    update public.cat_photos as photo
+    set hot_score = case
+            when photo.uploaded_at < v_window_start then 0
+            else (
+                1
+                + coalesce(photo.likes_count, 0)
+                + 2 * coalesce(photo.comments_count, 0)
+                + 0.5 * coalesce(treats.total, 0)
+            ) / power(greatest(extract(epoch from now() - photo.uploaded_at) / 3600.0, 0) + 2, 1.5)
+        end,
+        hot_score_updated_at = now()
+    from candidates
+    left join treats on treats.photo_id = candidates.id
+    where photo.id = candidates.id;
+
+    get diagnostics v_updated = row_count;
+    return v_updated;
+end;
+$$;
+
+revoke execute on function public.refresh_photo_hot_scores(integer, integer, integer) from public;
+grant execute on function public.refresh_photo_hot_scores(integer, integer, integer) to service_role;
+
+commit;
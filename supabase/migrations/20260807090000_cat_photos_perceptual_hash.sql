@@ -0,0 +1,19 @@
+-- Perceptual hash (64-bit pHash) for near-duplicate upload screening.
+-- Only moderation routing uses it; detection reuse stays keyed on SHA-256.
+begin;
+
+alter table public.cat_photos add column if not exists phash bigint;
+
+-- Recent-upload window loaded into the API's BK-tree index
+create index if not exists idx_cat_photos_recent_phash
+  on public.cat_photos (uploaded_at desc)
+  include (user_id, phash)
+  where phash is not null and deleted_at is null;
+
+-- Per-uploader scan of the user's own photos
+create index if not exists idx_cat_photos_user_phash
+  on public.cat_photos (user_id)
+  include (phash)
+  where phash is not null and deleted_at is null;
+
+commit;
@@ -0,0 +1,30 @@
+-- Let one call record a whole upload batch instead of one RPC per photo.
+-- p_amount defaults to 1, so existing single-upload callers are unchanged.
+begin;
+
+drop function if exists public.increment_usage(uuid, date);
+
+create or replace function public.increment_usage(p_user_id uuid, p_date date, p_amount integer default 1)
+returns integer as $$
+declare
+    v_new_count integer;
+begin
+    insert into user_daily_quotas (user_id, date, upload_count)
+    values (p_user_id, p_date, p_amount)
+    on conflict (user_id, date) do update
+    set upload_count = user_daily_quotas.upload_count + p_amount
+    returning upload_count into v_new_count;
+
+    insert into system_daily_stats (date, total_uploads)
+    values (p_date, p_amount)
+    on conflict (date) do update
+    set total_uploads = system_daily_stats.total_uploads + p_amount;
+
+    return v_new_count;
+end;
+$$ language plpgsql;
+
+revoke execute on function public.increment_usage(uuid, date, integer) from public, anon, authenticated;
+grant execute on function public.increment_usage(uuid, date, integer) to service_role;
+
+commit;